@@ -0,0 +1,55 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Shows the caustic formed by a spherical mirror using a density image of a 
+# million rays, far too many to plot individually
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+
+from tracing import PyTrace_Bundle, PyRasterize, PyMirror_Sph, PyScreen_Plane
+
+mirror = PyMirror_Sph(np.zeros(2), 2.0, -np.pi / 2, np.pi / 2)
+screen = PyScreen_Plane(np.array([-2.4, -2.0]), np.array([-2.4, 2.0]))
+
+comps = [mirror, screen]
+
+# Parallel rays travelling towards the mirror
+n_rays = 1_000_000
+starts = np.column_stack([np.full(n_rays, -2.3), np.linspace(-1.9, 1.9, n_rays)])
+directions = np.tile([1.0, 0.0], (n_rays, 1))
+
+bundle = PyTrace_Bundle(comps, starts, directions, 4)
+
+extent = (-2.5, 2.5, -2.0, 2.0)
+image = PyRasterize(bundle, extent, (1000, 800), weights=bundle.weights)
+
+# Plotting
+plt.gca().set_aspect('equal')
+plt.imshow(image, extent=extent, origin="lower", cmap="inferno", 
+           norm=LogNorm(vmin=image[image > 0].min()))
+
+for c in comps:
+    c_x, c_y = c.plot().T
+    plt.plot(c_x, c_y, color="C0")
+
+plt.show()
+
+print("End of program")
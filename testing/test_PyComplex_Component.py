@@ -0,0 +1,182 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def rotation(angle):
+    """Returns the matrix rotating vectors anti-clockwise by angle"""
+    c, s = np.cos(angle), np.sin(angle)
+
+    return np.array([[c, -s], [s, c]])
+
+
+def lens(centre=np.zeros(2)):
+    """Returns a biconvex lens"""
+    return tr.PyLens(np.asarray(centre, dtype=np.double), 2.0, 4.0, 6.0, 0.2, 1.6)
+
+
+def parallel_rays(y, x=-5.0):
+    """Returns rays travelling in the x direction from x at heights y"""
+    return [tr.PyRay(np.array([x, yi]), np.array([1.0, 0.0])) for yi in y]
+
+
+class Test_PyComplex_Component_transform(unittest.TestCase):
+    """Tests placing complex components in the scene with offset and angle"""
+
+    def check_paths(self, rays, expected, offset=np.zeros(2), angle=0.0):
+        """Checks rays took the paths of expected, transformed by offset and angle"""
+        R = rotation(angle)
+
+        for r, e in zip(rays, expected):
+            self.assertEqual(len(r.pos), len(e.pos))
+            assert_allclose(r.pos, e.pos @ R.T + offset, atol=1e-12)
+            assert_allclose(r.v, R @ e.v, atol=1e-12)
+
+    def test_PyComplex_Component_transform_default(self):
+        """Tests complex components start in the scene's frame"""
+        c = tr.PyComplex_Component([tr.PyMirror_Plane(np.array([0.0, -1.0]), np.array([0.0, 1.0]))])
+
+        assert_allclose(c.offset, np.zeros(2))
+        self.assertEqual(c.angle, 0.0)
+
+        with self.assertRaises(TypeError):
+            c.offset = np.zeros(3)
+
+    def test_PyLens_offset(self):
+        """Tests an offset lens takes the paths of a lens built at the offset"""
+        offset = np.array([3.0, 0.5])
+        moved = lens()
+        moved.offset = offset
+
+        rays = parallel_rays(np.linspace(-1.5, 2.5, 9))
+        expected = parallel_rays(np.linspace(-1.5, 2.5, 9))
+
+        tr.PyTrace([moved], rays, 5, fill_up=False)
+        tr.PyTrace([lens(offset)], expected, 5, fill_up=False)
+
+        self.check_paths(rays, expected)
+
+    def test_PyLens_rotated(self):
+        """Tests rays cross a rotated lens as they cross it in its own frame"""
+        offset, angle = np.array([1.0, -2.0]), 0.7
+        R = rotation(angle)
+
+        placed = lens()
+        placed.offset = offset
+        placed.angle = angle
+
+        expected = parallel_rays(np.linspace(-1.5, 1.5, 7))
+        rays = [tr.PyRay(R @ e.pos[0] + offset, R @ e.v) for e in expected]
+
+        # A screen behind the lens in its own frame stops the rays in both
+        screen = tr.PyScreen_Plane(np.array([3.0, -5.0]), np.array([3.0, 5.0]))
+        placed_screen = tr.PyComplex_Component([screen])
+        placed_screen.offset = offset
+        placed_screen.angle = angle
+
+        tr.PyTrace([placed, placed_screen], rays, 5, fill_up=True)
+        tr.PyTrace([lens(), screen], expected, 5, fill_up=True)
+
+        self.check_paths(rays, expected, offset, angle)
+
+    def test_PyLens_instances(self):
+        """Tests instances sharing a lens take the paths of separate lenses"""
+        xs = np.arange(10) * 1.5
+        base = lens()
+        instances = [base.instance(np.array([x, 0.0])) for x in xs]
+
+        # Rays cross each lens in turn, leaving one by the same arc they enter the next
+        rays = parallel_rays(np.linspace(-1.5, 1.5, 7))
+        expected = parallel_rays(np.linspace(-1.5, 1.5, 7))
+
+        tr.PyTrace(instances, rays, 30, fill_up=False)
+        tr.PyTrace([lens([x, 0.0]) for x in xs], expected, 30, fill_up=False)
+
+        self.check_paths(rays, expected)
+        self.assertIsInstance(instances[0], tr.PyLens)
+
+        # Changing the shared lens changes every instance
+        base.n_in = 1.0
+        rays = parallel_rays(np.linspace(-1.5, 1.5, 7))
+        tr.PyTrace(instances, rays, 30, fill_up=False)
+
+        for r in rays:
+            assert_allclose(r.pos[:, 1], r.pos[0, 1])
+
+    def test_PyLens_lens_centre_offset(self):
+        """
+        Tests setting lens_centre moves the lens by its offset, leaving its 
+        sub-components and other instances where they are
+        """
+        base = lens([1.0, 0.0])
+        other = base.instance()
+        arc_centre = base[0].centre.copy()
+
+        base.lens_centre = np.array([4.0, 0.5])
+
+        assert_allclose(base.offset, np.array([3.0, 0.5]))
+        assert_allclose(base[0].centre, arc_centre)
+        assert_allclose(other.lens_centre, np.array([1.0, 0.0]))
+        assert_allclose(other.offset, np.zeros(2))
+
+        rays = parallel_rays(np.linspace(-1.5, 2.5, 9))
+        expected = parallel_rays(np.linspace(-1.5, 2.5, 9))
+
+        tr.PyTrace([base], rays, 5, fill_up=False)
+        tr.PyTrace([lens([4.0, 0.5])], expected, 5, fill_up=False)
+
+        self.check_paths(rays, expected)
+
+        # The centre follows the offset and angle, and instances are placed by theirs
+        base.angle = np.pi / 2
+        assert_allclose(base.lens_centre, np.array([3.0, 1.5]))
+
+        placed = base.instance(np.array([0.0, 2.0]), 0.0)
+        assert_allclose(placed.lens_centre, np.array([1.0, 2.0]))
+        assert_allclose(base.lens_centre, np.array([3.0, 1.5]))
+
+    def test_PyComplex_Component_nested(self):
+        """Tests transforms of nested complex components are composed"""
+        outer_offset, outer_angle = np.array([2.0, 1.0]), -0.4
+        inner = lens().instance(np.array([1.0, 0.0]), 0.2)
+
+        outer = tr.PyComplex_Component([inner, inner.instance(np.array([4.0, 0.0]))])
+        outer.offset = outer_offset
+        outer.angle = outer_angle
+
+        R = rotation(outer_angle)
+        expected = parallel_rays(np.linspace(-1.0, 1.0, 5))
+        rays = [tr.PyRay(R @ e.pos[0] + outer_offset, R @ e.v) for e in expected]
+
+        tr.PyTrace([outer], rays, 8, fill_up=False)
+        tr.PyTrace([inner, inner.instance(np.array([4.0, 0.0]))], expected, 8, fill_up=False)
+
+        self.check_paths(rays, expected, outer_offset, outer_angle)
+
+    def test_PyCC_Wrap_plot(self):
+        """Tests plots are placed in the scene"""
+        offset, angle = np.array([1.0, 2.0]), np.pi / 2
+        l = lens()
+        placed = l.instance(offset, angle)
+
+        for p, q in zip(placed.plot(), l.plot()):
+            assert_allclose(p, q @ rotation(angle).T + offset, atol=1e-12)
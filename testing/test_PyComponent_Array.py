@@ -0,0 +1,121 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def trace_end_points(comps, n=10):
+    """Traces a fan of rays through comps and returns their paths"""
+    rays = [tr.PyRay(np.array([0.0, 0.0]), unit_vec(a)) 
+            for a in np.linspace(-0.8, 0.8, 9)]
+
+    tr.PyTrace(comps, rays, n)
+
+    return [r.pos for r in rays]
+
+
+class Test_PyComponent_Array(unittest.TestCase, useful_checks):
+    """Tests for the bulk constructors and PyComponent_Array"""
+
+    def test_PyComponent_Array_Planes_Same_As_Individual(self):
+        """
+        Checks tracing through plane arrays matches the individual components.
+        """
+        starts = np.array([[2.0, -2.0], [3.0, 2.0], [-3.0, 2.0]])
+        ends = np.array([[2.0, 2.0], [3.0, 4.0], [-3.0, -2.0]])
+
+        for cls, kwargs in ((tr.PyMirror_Plane, {'reflectivity': 0.5}),
+                            (tr.PyRefract_Plane, {'n1': 1.5, 'n2': np.array([1.0, 1.2, 1.3])}),
+                            (tr.PyScreen_Plane, {})):
+            arr_comps = cls.many(starts, ends, **kwargs)
+
+            ind_kwargs = [{k: np.broadcast_to(v, (3,))[i] for k, v in kwargs.items()} 
+                          for i in range(3)]
+            comps = [cls(s, e, **kw) for s, e, kw in zip(starts, ends, ind_kwargs)]
+
+            self.assertEqual(len(arr_comps), 3)
+            self.assertIs(arr_comps.component_type, cls)
+
+            for p, e in zip(trace_end_points([arr_comps]), trace_end_points(comps)):
+                assert_allclose(p, e)
+
+            assert_allclose(arr_comps.plot(), np.array([c.plot() for c in comps]))
+
+    def test_PyComponent_Array_Sph_Same_As_Individual(self):
+        """
+        Checks tracing through arc arrays matches the individual components.
+        """
+        centres = np.array([[0.0, 0.0], [0.5, 0.0]])
+        R = np.array([2.0, 4.0])
+
+        for cls, kwargs in ((tr.PyMirror_Sph, {'reflectivity': 0.7}),
+                            (tr.PyRefract_Sph, {'n_in': 1.5, 'n_out': 1.1})):
+            arr_comps = cls.many(centres, R, -1.0, 1.0, **kwargs)
+
+            comps = [cls(c, r, -1.0, 1.0, **kwargs) for c, r in zip(centres, R)]
+
+            for p, e in zip(trace_end_points([arr_comps]), trace_end_points(comps)):
+                assert_allclose(p, e)
+
+            assert_allclose(arr_comps.plot(n_points=20), 
+                            np.array([c.plot(n_points=20) for c in comps]))
+
+    def test_PyComponent_Array_In_Complex_Component(self):
+        """
+        Checks arrays can be used with other components in a complex 
+        component.
+        """
+        mirrors = tr.PyMirror_Plane.many(np.array([[2.0, -2.0], [-2.0, 2.0]]),
+                                         np.array([[2.0, 2.0], [-2.0, -2.0]]))
+        screen = tr.PyScreen_Plane(np.array([-1.0, 3.0]), np.array([1.0, 3.0]))
+
+        cc = tr.PyCC_Wrap([mirrors, screen])
+
+        ray = tr.PyRay(np.array([0.0, 0.0]), unit_vec(np.pi/4))
+        tr.PyTrace([cc], [ray], 10, fill_up=False)
+
+        assert_allclose(ray.pos[:3], [[0.0, 0.0], [2.0, 2.0], [1.0, 3.0]])
+        assert_allclose(ray.pos[-1], [1.0, 3.0])
+
+    def test_PyComponent_Array_Invalid(self):
+        """
+        Checks bad shapes and values raise.
+        """
+        starts = np.zeros((3, 2))
+        ends = np.ones((3, 2))
+
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Plane.many(starts, np.ones((2, 2)))
+
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Plane.many(np.zeros((3, 3)), ends)
+
+        with self.assertRaises(TypeError):
+            tr.PyRefract_Plane.many(starts, ends, n1=np.ones(2))
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Plane.many(starts, ends, reflectivity=np.array([0.5, 1.0, 1.5]))
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Sph.many(starts, np.array([1.0, -1.0, 1.0]), 0.0, 1.0)
+
+        with self.assertRaises(TypeError):
+            tr.PyComplex_Component([tr.PyScreen_Plane.many(starts, ends), 5])
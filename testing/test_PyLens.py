@@ -173,6 +173,21 @@ class Test_PyLens(unittest.TestCase, useful_checks):
         with self.assertRaises(ValueError):
             m.R2 = self._R_lens*0.99
 
+    def test_PyLens_R2_set_right_arc(self):
+        """Tests setting R2 updates the right arc and leaves the left arc"""
+        m = self.create_Obj()
+        new_R2 = self._R2 + 2.0
+
+        m.R2 = new_R2
+
+        self.assertEqual(m[2].R, new_R2)
+        assert_allclose(m[2].centre, 
+                        [self._d/2 - np.sqrt(new_R2**2 - self._R_lens**2), 0.0])
+
+        self.assertEqual(m[0].R, self._R1)
+        assert_allclose(m[0].centre, 
+                        [np.sqrt(self._R1**2 - self._R_lens**2) - self._d/2, 0.0])
+
     # Testing property d
     def test_PyLens_d_get(self):
         """Tests property d getting"""
@@ -206,5 +221,104 @@ class Test_PyLens(unittest.TestCase, useful_checks):
 
         self.check_float_property(m, 'n_out', self._n_out, self._n_out + 0.5)
 
-    # TODO: add tracing tests
+    def test_PyLens_instance_shared_params(self):
+        """
+        Tests setting a parameter of one instance changes the parameters and
+        paths of the others
+        """
+        a = self.create_Obj()
+        offset = np.array([5.0, 0.5])
+        b = a.instance(offset=offset)
+
+        a.R1 = 3.0
+        b.n_in = 1.7
+
+        for lens in [a, b]:
+            self.assertEqual(lens.R1, 3.0)
+            self.assertEqual(lens.n_in, 1.7)
+            self.assertEqual(lens.R2, self._R2)
+
+        expected = tr.PyLens(self._lens_centre + offset, self._R_lens, 3.0, 
+                             self._R2, self._d, 1.7, self._n_out)
+
+        for y in [-1.5, -0.5, 0.2, 1.2]:
+            rays = [tr.PyRay(np.array([-5.0, y]) + offset, np.array([1.0, 0.1])) 
+                    for _ in range(2)]
+
+            tr.PyTrace([b], rays[:1], 4)
+            tr.PyTrace([expected], rays[1:], 4)
+
+            self.assertEqual(len(rays[0].pos), len(rays[1].pos))
+            assert_allclose(rays[0].pos, rays[1].pos)
+
+
+class Test_PyLens_tracing(unittest.TestCase):
+    """Tests rays cross a PyLens as they do the same surfaces in a complex component"""
+
+    # R1, R2 and d of lenses with R_lens = 2, covering convex, concave and meniscus sides
+    _shapes = [(4.0, 6.0, 0.2), (-4.0, 6.0, 0.5), (4.0, -6.0, 0.5), (-8.0, -8.0, 1.0), 
+               (-4.0, 4.0, 0.3)]
+
+    def scenes(self):
+        """Yields pairs of scenes, the first with PyLens and the second with its surfaces"""
+        for R1, R2, d in self._shapes:
+            lenses = [tr.PyLens(np.array([x, 0.0]), 2.0, R1, R2, d, 1.6) for x in [0.0, 3.0]]
+            screen = tr.PyScreen_Plane(np.array([6.0, -5.0]), np.array([6.0, 5.0]))
+            mirror = tr.PyMirror_Plane(np.array([-3.0, 5.0]), np.array([5.0, 5.0]))
+
+            plain = [tr.PyComplex_Component([l[i] for i in range(4)]) for l in lenses]
+
+            yield lenses + [screen, mirror], plain + [screen, mirror]
+
+    def rays(self, n_rays=200, seed=3):
+        """Returns random rays starting around and inside the lenses"""
+        rng = np.random.default_rng(seed)
+        starts = rng.uniform([-4.0, -3.0], [5.0, 3.0], (n_rays, 2))
+        angles = rng.uniform(0.0, 2 * np.pi, n_rays)
+
+        return [tr.PyRay(s, np.array([np.cos(a), np.sin(a)])) for s, a in zip(starts, angles)]
+
+    def test_PyLens_same_paths(self):
+        """Tests every interaction budget gives the paths of the complex component"""
+        for lens_scene, plain_scene in self.scenes():
+            for n in [1, 2, 3, 7]:
+                for fill_up in [False, True]:
+                    rays = self.rays()
+                    expected = self.rays()
+
+                    tr.PyTrace(lens_scene, rays, n, fill_up=fill_up)
+                    tr.PyTrace(plain_scene, expected, n, fill_up=fill_up)
+
+                    for r, e in zip(rays, expected):
+                        self.assertEqual(len(r.pos), len(e.pos))
+                        assert_allclose(r.pos, e.pos)
+                        assert_allclose(r.v, e.v)
+
+    def test_PyLens_interactions(self):
+        """Tests each refraction counts as an interaction"""
+        lens = tr.PyLens(np.zeros(2), 2.0, 4.0, 6.0, 0.2, 1.6)
+
+        for n, n_pos in [(1, 2), (2, 3), (3, 4)]:
+            ry = tr.PyRay(np.array([-5.0, 1.0]), np.array([1.0, 0.0]))
+            tr.PyTrace([lens], [ry], n, fill_up=False)
+
+            self.assertEqual(len(ry.pos), n_pos)
+
+        # Entering then leaving by the arcs
+        self.assertLess(ry.pos[1][0], 0.0)
+        self.assertGreater(ry.pos[2][0], 0.0)
+        self.assertEqual(ry.pos[3][0], ry.pos[2][0] + ry.v[0])
+
+    def test_PyComplex_Component_lens_invalid(self):
+        """Tests a lens must be made of alternating arcs and planes"""
+        lens = tr.PyLens(np.zeros(2), 2.0, 4.0, 6.0, 0.2, 1.6)
+        comps = [lens[i] for i in range(4)]
+
+        tr.PyComplex_Component(comps, lens=True)
+
+        with self.assertRaises(ValueError):
+            tr.PyComplex_Component(comps[1:] + comps[:1], lens=True)
+
+        with self.assertRaises(ValueError):
+            tr.PyComplex_Component(comps[:3], lens=True)
 
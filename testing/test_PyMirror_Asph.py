@@ -0,0 +1,189 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+def axis_crossings(rays):
+    """Returns where each ray's final path crosses the x axis"""
+    ans = []
+
+    for r in rays:
+        p, v = r.pos[-1], r.v
+        ans.append(p[0] - p[1] * v[0] / v[1])
+
+    return np.array(ans)
+
+
+class Test_PyMirror_Asph(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyMirror_Asph"""
+    _vertex = np.array([5.0, 0.0])
+
+    def create_Obj(self):
+        """Creates an instance of PyMirror_Asph"""
+        return tr.PyMirror_Asph(self._vertex, np.pi, 4.0, 3.0, k=-1.0)
+
+    def test_PyMirror_Asph_cinit_check(self):
+        """Test PyMirror_Asph c initiliser rejects bad arguments"""
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Asph(np.array([1.0]), 0.0, 1.0, 0.5)
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Asph(self._vertex, 0.0, 0.0, 0.5)
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Asph(self._vertex, 0.0, 1.0, -0.5)
+
+        # Aperture larger than the circle
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Asph(self._vertex, 0.0, 1.0, 1.5)
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Asph(self._vertex, 0.0, 1.0, 0.5, reflectivity=2.0)
+
+    def test_PyMirror_Asph_properties(self):
+        """Tests getting and setting the surface properties"""
+        m = self.create_Obj()
+
+        self.check_writable_np_view_shape_2_set(m, "vertex", self._vertex, 
+                                                np.array([1.0, 2.0]))
+        self.check_float_property(m, "axis", np.pi, 0.5)
+        self.check_float_property(m, "R", 4.0, 5.0)
+        self.check_float_property(m, "k", -1.0, 0.0)
+        self.check_float_property(m, "h", 3.0, 2.0)
+        self.check_float_property(m, "reflectivity", 1.0, 0.5)
+
+        m.coeffs = np.array([1e-3, 2e-4])
+        assert_array_equal(m.coeffs, [1e-3, 2e-4])
+
+        m.R = np.inf
+        self.assertEqual(m.R, np.inf)
+
+        # k = 0 is a circle of radius 5, so h can't exceed 5
+        m.R = 5.0
+        m.k = 0.0
+        with self.assertRaises(ValueError):
+            m.h = 5.5
+
+        with self.assertRaises(ValueError):
+            m.R = 1.0
+
+        self.assertEqual(m.R, 5.0)
+
+    def test_PyMirror_Asph_sag(self):
+        """Tests the sag of a circle and of polynomial terms"""
+        m = tr.PyMirror_Asph(self._vertex, 0.0, 2.0, 1.0, k=0.0, coeffs=[0.1])
+        y = np.linspace(-1.0, 1.0, 11)
+
+        assert_allclose(m.sag(y), 2.0 - np.sqrt(4.0 - y**2) + 0.1 * y**4)
+        self.assertEqual(m.sag(0.0), 0.0)
+
+        assert_allclose(m.plot(11)[:, 0], 5.0 + m.sag(y))
+        assert_allclose(m.plot(11)[:, 1], y)
+
+    def test_PyMirror_Asph_Parabola_Focus(self):
+        """
+        Checks a parabolic mirror focuses rays parallel to its axis exactly.
+        """
+        f = 2.0
+        m = tr.PyMirror_Asph(self._vertex, np.pi, 2*f, 3.0, k=-1.0)
+
+        rays = [tr.PyRay(np.array([0.0, y]), np.array([1.0, 0.0])) 
+                for y in (-2.9, -1.0, -0.1, 0.3, 1.7, 2.9)]
+
+        tr.PyTrace([m], rays, 1, fill_up=False)
+
+        assert_allclose(axis_crossings(rays), self._vertex[0] - f)
+
+        # Ray outside the aperture misses
+        ray = tr.PyRay(np.array([0.0, 3.1]), np.array([1.0, 0.0]))
+        tr.PyTrace([m], [ray], 1, fill_up=False)
+        assert_allclose(ray.pos[-1], [1.0, 3.1])
+
+    def test_PyMirror_Asph_Ellipse_Foci(self):
+        """
+        Checks rays from one focus of an elliptical mirror pass through the 
+        other, and only the near half of the ellipse is hit.
+        """
+        a, b = 4.0, 2.0
+        e = np.sqrt(1 - b**2 / a**2)
+
+        # Vertex at the origin with axis along +x
+        m = tr.PyMirror_Asph(np.array([0.0, 0.0]), 0.0, b**2 / a, b, 
+                             k=-e**2)
+
+        f1, f2 = a - a * e, a + a * e
+
+        rays = [tr.PyRay(np.array([f2, 0.0]), unit_vec(ang)) 
+                for ang in np.linspace(np.pi - 0.25, np.pi + 0.25, 6)]
+
+        tr.PyTrace([m], rays, 1, fill_up=False)
+
+        for r in rays:
+            self.assertLess(r.pos[1][0], a)
+
+        assert_allclose(axis_crossings(rays), f1)
+
+    def test_PyMirror_Asph_Same_As_Polyline(self):
+        """
+        Checks an asphere with polynomial terms matches a finely sampled 
+        polyline.
+        """
+        m = tr.PyMirror_Asph(self._vertex, np.pi, 4.0, 2.0, k=-0.5, 
+                             coeffs=[0.01, -0.002])
+        poly = tr.PyMirror_Polyline(m.plot(100001))
+
+        def rays():
+            return [tr.PyRay(np.array([0.0, y]), unit_vec(0.1)) 
+                    for y in np.linspace(-1.9, 1.5, 5)]
+
+        r1, r2 = rays(), rays()
+
+        tr.PyTrace([m], r1, 1, fill_up=False)
+        tr.PyTrace([poly], r2, 1, fill_up=False)
+
+        for a, b in zip(r1, r2):
+            assert_allclose(a.pos, b.pos, atol=1e-8)
+            assert_allclose(a.v, b.v, atol=1e-4)
+
+            # Hit point lies on the surface
+            p = a.pos[1] - self._vertex
+            self.assertAlmostEqual(-p[0], m.sag(-p[1]))
+
+    def test_PyMirror_Asph_Tangents(self):
+        """
+        Checks tangents through an asphere match finite differences.
+        """
+        m = tr.PyMirror_Asph(self._vertex, np.pi, 4.0, 2.0, k=-0.5, 
+                             coeffs=[0.01, -0.002])
+        screen = tr.PyScreen_Plane(np.array([-2.0, 5.0]), np.array([-2.0, -5.0]))
+
+        def run(n2, params=False):
+            pl = tr.PyRefract_Plane(np.array([1.0, -5.0]), np.array([1.0, 5.0]), 
+                                    1.0, n2)
+            rays = [tr.PyRay(np.array([0.0, 0.5]), unit_vec(0.2))]
+            J = tr.PyTrace([pl, m, screen], rays, 4, 
+                           params=[(pl, 'n2')] if params else None)
+            return rays[0].pos[-1], J
+
+        h = 1e-6
+        fd = (run(1.3 + h)[0] - run(1.3 - h)[0]) / (2*h)
+
+        assert_allclose(run(1.3, True)[1][0, :, 0], fd, atol=1e-6)
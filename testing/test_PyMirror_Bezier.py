@@ -0,0 +1,154 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+def cubic(b, u):
+    """Evaluates the cubic Bezier curve with control points b at u"""
+    u = np.asarray(u)[:, None]
+    return ((1 - u)**3 * b[0] + 3 * u * (1 - u)**2 * b[1] 
+            + 3 * u**2 * (1 - u) * b[2] + u**3 * b[3])
+
+
+class Test_PyMirror_Bezier(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyMirror_Bezier"""
+    _points = np.array([[0.0, -1.0], [0.6, -0.5], [0.2, 0.3], [0.8, 1.0],
+                        [1.2, 1.5], [0.5, 2.0], [1.0, 2.5]])
+
+    def create_Obj(self):
+        """Creates an instance of PyMirror_Bezier"""
+        return tr.PyMirror_Bezier(self._points)
+
+    def test_PyMirror_Bezier_cinit_check(self):
+        """Test PyMirror_Bezier c initiliser rejects bad arguments"""
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Bezier(np.zeros((4, 3)))
+
+        # Number of points isn't 3m + 1
+        for n in (1, 3, 5, 6):
+            with self.assertRaises(ValueError):
+                tr.PyMirror_Bezier(np.zeros((n, 2)))
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Bezier(self._points, depth=-1)
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Bezier(self._points, reflectivity=1.5)
+
+    def test_PyMirror_Bezier_properties(self):
+        """Tests getting and setting the control points and depth"""
+        m = self.create_Obj()
+
+        self.assertEqual(len(m), 2)
+        self.assertEqual(m.depth, 3)
+        assert_array_equal(m.points, self._points)
+        self.check_float_property(m, "reflectivity", 1.0, 0.5)
+
+        # points returns a copy
+        m.points[0, 0] = 10.0
+        assert_array_equal(m.points, self._points)
+
+        m.points = self._points[:4]
+        self.assertEqual(len(m), 1)
+
+        with self.assertRaises(ValueError):
+            m.points = self._points[:5]
+
+        m.depth = 0
+        self.assertEqual(m.depth, 0)
+
+        with self.assertRaises(ValueError):
+            m.depth = 17
+
+        self.assertEqual(m.depth, 0)
+
+    def test_PyMirror_Bezier_plot(self):
+        """Tests plot evaluates each segment of the curve"""
+        m = self.create_Obj()
+        u = np.linspace(0.0, 1.0, 11)
+
+        ans = m.plot(11)
+        self.assertEqual(ans.shape, (21, 2))
+        assert_allclose(ans[:11], cubic(self._points[:4], u), atol=1e-14)
+        assert_allclose(ans[10:], cubic(self._points[3:], u), atol=1e-14)
+
+        with self.assertRaises(ValueError):
+            m.plot(1)
+
+    def test_PyMirror_Bezier_Same_As_Polyline(self):
+        """
+        Checks the curve matches a finely sampled polyline at every depth.
+        """
+        m = self.create_Obj()
+        poly = tr.PyMirror_Polyline(m.plot(50001))
+
+        def rays():
+            return [tr.PyRay(np.array([-2.0, y]), unit_vec(ang)) 
+                    for y in np.linspace(-0.9, 2.4, 12) for ang in (-0.3, 0.2)]
+
+        r_poly = rays()
+        tr.PyTrace([poly], r_poly, 1, fill_up=False)
+
+        for depth in (0, 2, 5):
+            m.depth = depth
+            r = rays()
+            tr.PyTrace([m], r, 1, fill_up=False)
+
+            for a, b in zip(r, r_poly):
+                assert_allclose(a.pos, b.pos, atol=1e-6)
+                assert_allclose(a.v, b.v, atol=1e-3)
+
+    def test_PyMirror_Bezier_Setters_Rebuild(self):
+        """
+        Checks the cached bounds follow the control points when they are set.
+        """
+        m = self.create_Obj()
+        m.points = self._points + np.array([3.0, 0.0])
+        moved = tr.PyMirror_Bezier(self._points + np.array([3.0, 0.0]))
+
+        r1 = tr.PyRay(np.array([-2.0, 0.1]), unit_vec(0.0))
+        r2 = tr.PyRay(np.array([-2.0, 0.1]), unit_vec(0.0))
+        tr.PyTrace([m], [r1], 1, fill_up=False)
+        tr.PyTrace([moved], [r2], 1, fill_up=False)
+
+        self.assertGreater(r1.pos[-1][0], 3.0)
+        assert_allclose(r1.pos, r2.pos)
+
+    def test_PyMirror_Bezier_Tangents(self):
+        """
+        Checks tangents through a curved mirror match finite differences.
+        """
+        m = tr.PyMirror_Bezier(np.array([[0.0, -2.0], [1.5, -1.0], [1.5, 1.0], 
+                                         [0.0, 2.0]]))
+        screen = tr.PyScreen_Plane(np.array([-3.0, 5.0]), np.array([-3.0, -5.0]))
+
+        def run(n2, params=False):
+            pl = tr.PyRefract_Plane(np.array([-1.0, -5.0]), np.array([-1.0, 5.0]), 
+                                    1.0, n2)
+            rays = [tr.PyRay(np.array([-2.0, 0.5]), unit_vec(0.2))]
+            J = tr.PyTrace([pl, m, screen], rays, 4, 
+                           params=[(pl, 'n2')] if params else None)
+            return rays[0].pos[-1], J
+
+        h = 1e-6
+        fd = (run(1.3 + h)[0] - run(1.3 - h)[0]) / (2*h)
+
+        assert_allclose(run(1.3, True)[1][0, :, 0], fd, atol=1e-6)
@@ -109,6 +109,26 @@ class Test_PyMirror_Plane(unittest.TestCase, useful_checks):
         with self.assertRaises(TypeError) as context:
             m.end = None
 
+    # Testing property reflectivity
+    def test_PyMirror_Plane_reflectivity_set(self):
+        """Tests property reflectivity setting"""
+        m = self.create_Obj()
+
+        self.check_float_property(m, 'reflectivity', 1.0, 0.25)
+
+    def test_PyMirror_Plane_reflectivity_invalid(self):
+        """Tests reflectivity must be between 0 and 1"""
+        m = self.create_Obj()
+
+        with self.assertRaises(ValueError) as context:
+            m.reflectivity = 1.5
+
+        with self.assertRaises(ValueError) as context:
+            m.reflectivity = -0.5
+
+        with self.assertRaises(ValueError) as context:
+            c = tr.PyMirror_Plane(self._start, self._end, reflectivity=2.0)
+
     # Test plot() method
     def test_PyMirror_Plane_plot(self):
         """Tests the plot method returns start point followed by end point"""
@@ -140,3 +160,14 @@ class Test_PyMirror_Plane(unittest.TestCase, useful_checks):
 
         assert_allclose(r.pos, expected_ans)
 
+    def test_PyMirror_Plane_tracing_reflectivity(self):
+        """Tests the ray's weight is reduced by the reflectivity"""
+        m = tr.PyMirror_Plane(start=np.array([1.0, 0.0]), end=np.array([1.0, 2.0]),
+                              reflectivity=0.8)
+
+        r = tr.PyRay(init=np.array([0.0, 0.0]), v=unit_vec(45 * np.pi/180.0))
+
+        tr.PyTrace([m], [r], n=2, fill_up=False)
+
+        self.assertAlmostEqual(r.weight, 0.8)
+
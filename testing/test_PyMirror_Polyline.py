@@ -0,0 +1,139 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+def parabola_points(n):
+    """Returns n points on a parabola opening to the left"""
+    y = np.linspace(-5.0, 5.0, n)
+    return np.stack([0.05 * y**2 + 3.0, y], axis=1)
+
+
+def fan(n=51):
+    """Returns a fan of rays starting at the origin"""
+    return [tr.PyRay(np.array([0.0, 0.0]), unit_vec(a)) 
+            for a in np.linspace(-1.0, 1.0, n)]
+
+
+class Test_PyMirror_Polyline(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyMirror_Polyline"""
+    _points = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 0.0]])
+
+    def create_Obj(self):
+        """Creates an instance of PyMirror_Polyline"""
+        return tr.PyMirror_Polyline(self._points)
+
+    def test_PyMirror_Polyline_cinit_shape_check(self):
+        """
+        Test PyMirror_Polyline c initiliser, check points has shape (N, 2) 
+        with N >= 2
+        """
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Polyline(None)
+
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Polyline(np.zeros((3, 3)))
+
+        with self.assertRaises(TypeError):
+            tr.PyMirror_Polyline(np.zeros(4))
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Polyline(np.zeros((1, 2)))
+
+        with self.assertRaises(ValueError):
+            tr.PyMirror_Polyline(self._points, reflectivity=1.5)
+
+    def test_PyMirror_Polyline_points(self):
+        """Tests property points getting and setting"""
+        m = self.create_Obj()
+
+        assert_array_equal(m.points, self._points)
+        assert_array_equal(m.plot(), self._points)
+        self.assertEqual(len(m), 2)
+
+        new_points = parabola_points(10)
+        m.points = new_points
+
+        assert_array_equal(m.points, new_points)
+        self.assertEqual(len(m), 9)
+
+        with self.assertRaises(ValueError):
+            m.points = np.zeros((1, 2))
+
+        # Unchanged if setting fails
+        assert_array_equal(m.points, new_points)
+
+    def test_PyMirror_Polyline_closed(self):
+        """Tests closed adds a segment back to the first point"""
+        m = tr.PyMirror_Polyline(self._points, closed=True)
+
+        self.assertEqual(len(m), 3)
+        assert_array_equal(m.points[-1], self._points[0])
+
+    def test_PyMirror_Polyline_reflectivity(self):
+        """Tests property reflectivity"""
+        self.check_float_property(self.create_Obj(), "reflectivity", 1.0, 0.25)
+
+        with self.assertRaises(ValueError):
+            self.create_Obj().reflectivity = -0.1
+
+    def test_PyMirror_Polyline_Same_As_Planes(self):
+        """
+        Checks tracing through a polyline matches tracing through a plane
+        mirror per segment, for both small and large numbers of segments.
+        """
+        for n in (2, 5, 2001):
+            pts = parabola_points(n)
+
+            poly = tr.PyMirror_Polyline(pts, reflectivity=0.5)
+            planes = [tr.PyMirror_Plane(s, e, reflectivity=0.5) 
+                      for s, e in zip(pts[:-1], pts[1:])]
+
+            r1, r2 = fan(), fan()
+
+            tr.PyTrace([poly], r1, 5)
+            tr.PyTrace(planes, r2, 5)
+
+            for a, b in zip(r1, r2):
+                assert_allclose(a.pos, b.pos)
+                self.assertEqual(a.weight, b.weight)
+
+    def test_PyMirror_Polyline_Tangents(self):
+        """
+        Checks tangents pass through a polyline, moving the ray's start 
+        plane moves its end point as for a plane mirror.
+        """
+        pts = parabola_points(101)
+
+        for comp in (tr.PyMirror_Polyline(pts), 
+                     tr.PyComplex_Component([tr.PyMirror_Plane(s, e) 
+                                             for s, e in zip(pts[:-1], pts[1:])])):
+            lens = tr.PyRefract_Plane(np.array([1.0, -5.0]), np.array([1.0, 5.0]), 
+                                      n1=1.0, n2=1.5)
+            screen = tr.PyScreen_Plane(np.array([-1.0, 5.0]), np.array([-1.0, -5.0]))
+            rays = [tr.PyRay(np.array([0.0, 0.5]), unit_vec(0.3))]
+
+            J = tr.PyTrace([lens, comp, screen], rays, 5, params=[(lens, 'n2')])
+
+            if isinstance(comp, tr.PyMirror_Polyline):
+                J_poly = J
+            else:
+                assert_allclose(J_poly, J)
@@ -0,0 +1,179 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def thick_lens_power(R1, R2, t, n):
+    """Returns the power of a thick lens in air from the lensmaker's equation"""
+    return (n - 1.0) * (1.0 / R1 + 1.0 / R2 - (n - 1.0) * t / (n * R1 * R2))
+
+
+def doublet():
+    """Returns the surfaces of a cemented doublet centred on the x axis"""
+    a = [np.arcsin(15.0 / R) for R in (60.0, 32.0, 85.0)]
+    left = tr.PyRefract_Sph(np.array([57.0, 0.0]), 60.0, np.pi - a[0], np.pi + a[0], 1.52, 1.0)
+    middle = tr.PyRefract_Sph(np.array([-28.0, 0.0]), 32.0, -a[1], a[1], 1.52, 1.65)
+    right = tr.PyRefract_Sph(np.array([94.0, 0.0]), 85.0, np.pi - a[2], np.pi + a[2], 1.0, 1.65)
+
+    return [left, middle, right]
+
+
+class Test_PyParaxial(unittest.TestCase):
+    """Tests the paraxial properties of lens systems"""
+
+    def test_PyParaxial_lens(self):
+        """Tests a PyLens against the lensmaker's equation"""
+        R1, R2, d, n, R_lens = 40.0, 60.0, 2.0, 1.5, 10.0
+        lens = tr.PyLens(np.array([5.0, 1.0]), R_lens, R1, R2, d, n)
+        p = tr.PyParaxial([lens], axis=1.0)
+
+        sags = [R - np.sqrt(R**2 - R_lens**2) for R in (R1, R2)]
+        t = d + sum(sags)
+        P = thick_lens_power(R1, R2, t, n)
+
+        assert_allclose(p.vertices, [5.0 - d / 2 - sags[0], 5.0 + d / 2 + sags[1]])
+        assert_allclose(p.power, P)
+        assert_allclose(p.efl, 1.0 / P)
+        assert_allclose(p.front_focal_length, 1.0 / P)
+        assert_allclose(np.linalg.det(p.matrix), 1.0)
+
+        # Principal planes lie a focal length from the focal points
+        F, F_r = p.focal_points
+        H, H_r = p.principal_planes
+        assert_allclose([H - F, F_r - H_r], [1.0 / P, 1.0 / P])
+        assert_allclose(p.bfl, F_r - p.vertices[-1])
+        assert_allclose(p.ffl, p.vertices[0] - F)
+
+        # Thick lens principal plane offsets from the vertices
+        assert_allclose(H_r - p.vertices[-1], -t * (n - 1.0) / (n * R1 * P), atol=1e-12)
+
+    def test_PyParaxial_lens_arcs(self):
+        """Tests a PyLens gives the same matrix as its arcs"""
+        for R1, R2 in [(40.0, 60.0), (-40.0, 60.0), (40.0, -25.0)]:
+            lens = tr.PyLens(np.array([0.0, 0.0]), 10.0, R1, R2, 6.0, 1.6, n_out=1.2)
+            arcs = tr.PyParaxial([lens._left_arc, lens._right_arc])
+
+            assert_allclose(tr.PyParaxial([lens]).matrix, arcs.matrix, atol=1e-12)
+            assert_allclose(tr.PyParaxial([lens]).vertices, arcs.vertices)
+            self.assertEqual(arcs.n_object, 1.2)
+            self.assertEqual(arcs.n_image, 1.2)
+
+    def test_PyParaxial_image(self):
+        """Tests imaging an object at twice the focal length"""
+        p = tr.PyParaxial(doublet())
+        f = p.efl
+        H, H_r = p.principal_planes
+
+        x_i, m = p.image(H - 2 * f)
+        assert_allclose([x_i, m], [H_r + 2 * f, -1.0])
+
+        # Objects at the front focal point are imaged at infinity
+        self.assertEqual(p.image(p.focal_points[0]), (np.inf, np.inf))
+
+    def test_PyParaxial_validate(self):
+        """Tests the matrix agrees with an exact trace close to the axis"""
+        systems = [[tr.PyLens(np.array([0.0, 0.0]), 10.0, 40.0, 60.0, 2.0, 1.5)],
+                   doublet(),
+                   [tr.PyLens(np.array([0.0, 0.0]), 10.0, 40.0, 40.0, 2.0, 1.5),
+                    tr.PyLens(np.array([30.0, 0.0]), 10.0, -40.0, -40.0, 4.0, 1.5)]]
+
+        for comps in systems:
+            p = tr.PyParaxial(comps)
+            traced = p.validate()
+            A, B, C, D = p.matrix.ravel()
+
+            self.assertEqual(traced.shape, (3, 2))
+            assert_allclose(traced[:, 0], A, rtol=1e-5)
+            assert_allclose(traced[:, 1], C, rtol=1e-5)
+
+        # Far from the axis spherical aberration is seen
+        with self.assertRaises(ValueError):
+            tr.PyParaxial(doublet()).validate(height=10.0, rtol=1e-6)
+
+        with self.assertRaises(ValueError):
+            tr.PyParaxial(doublet()).validate(height=-1.0)
+
+        with self.assertRaises(ValueError):
+            tr.PyParaxial(doublet()).validate(n_rays=0)
+
+    def test_PyParaxial_afocal(self):
+        """Tests a window made of two planes has no power"""
+        window = [tr.PyRefract_Plane(np.array([0.0, -5.0]), np.array([0.0, 5.0]), 1.0, 1.5),
+                  tr.PyRefract_Plane(np.array([3.0, 5.0]), np.array([3.0, -5.0]), 1.0, 1.5)]
+        p = tr.PyParaxial(window)
+
+        assert_allclose(p.matrix, [[1.0, 2.0], [0.0, 1.0]])
+        self.assertEqual(p.power, 0.0)
+        self.assertEqual(p.efl, np.inf)
+        self.assertTrue(np.all(np.isnan(p.focal_points)))
+        self.assertTrue(np.all(np.isnan(p.principal_planes)))
+        p.validate()
+
+    def test_PyParaxial_asph(self):
+        """Tests an aspheric surface uses its curvature at the vertex"""
+        sph = tr.PyRefract_Sph(np.array([20.0, 0.0]), 20.0, np.pi - 0.5, np.pi + 0.5, 1.5, 1.0)
+        for axis, n1, n2 in [(0.0, 1.5, 1.0), (np.pi, 1.0, 1.5)]:
+            R = 20.0 if axis == 0.0 else -20.0
+            asph = tr.PyRefract_Asph(np.array([0.0, 0.0]), axis, R, 5.0, k=-0.5, n1=n1, n2=n2)
+
+            assert_allclose(tr.PyParaxial([asph]).matrix, tr.PyParaxial([sph]).matrix)
+
+    def test_PyParaxial_sphere_twice(self):
+        """Tests a full circle given twice is a ball lens"""
+        ball = tr.PyRefract_Sph(np.array([0.0, 0.0]), 2.0, -np.pi, np.pi, 1.5, 1.0)
+        p = tr.PyParaxial([ball, ball])
+
+        # Ball lens focal length n D / (4 (n - 1)) from its centre
+        assert_allclose(p.vertices, [-2.0, 2.0])
+        assert_allclose(p.efl, 1.5 * 4.0 / (4 * 0.5))
+        assert_allclose(p.principal_planes, [0.0, 0.0], atol=1e-12)
+        p.validate()
+
+    def test_PyParaxial_errors(self):
+        """Tests invalid surface lists are rejected"""
+        with self.assertRaises(ValueError):
+            tr.PyParaxial([])
+
+        with self.assertRaises(TypeError):
+            tr.PyParaxial([tr.PyMirror_Plane(np.array([0.0, -1.0]), np.array([0.0, 1.0]))])
+
+        # Not centred on the axis
+        with self.assertRaises(ValueError):
+            tr.PyParaxial(doublet(), axis=1.0)
+
+        # Out of order
+        with self.assertRaises(ValueError):
+            tr.PyParaxial(doublet()[::-1])
+
+        # Refractive indices of the doublet's glasses swapped
+        left, middle, right = doublet()
+        middle.n_in, middle.n_out = middle.n_out, middle.n_in
+        with self.assertRaises(ValueError):
+            tr.PyParaxial([left, middle, right])
+
+        # Concave surfaces crossing on the axis
+        with self.assertRaises(ValueError):
+            tr.PyParaxial([tr.PyLens(np.array([0.0, 0.0]), 10.0, -40.0, -40.0, 2.0, 1.5)])
+
+        # Tilted plane
+        with self.assertRaises(ValueError):
+            tr.PyParaxial([tr.PyRefract_Plane(np.array([0.0, -1.0]), np.array([0.5, 1.0]))])
@@ -0,0 +1,149 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyRasterize(unittest.TestCase):
+    """Tests rasterizing paths into density images"""
+
+    def create_scene(self):
+        """A spherical surface focusing rays onto a screen"""
+        return [tr.PyRefract_Sph(np.array([3.0, 0.0]), 2.0, np.pi - 0.6, 
+                                 np.pi + 0.6, 1.0, 1.5),
+                tr.PyScreen_Plane(np.array([6.0, -5.0]), np.array([6.0, 5.0]))]
+
+    def starts_dirs(self):
+        """Rays starting left of the scene at different angles"""
+        starts = np.array([[0.0, y] for y in np.linspace(-1.0, 1.0, 41)])
+        dirs = np.array([unit_vec(a) for a in np.linspace(-0.1, 0.1, 41)])
+
+        return starts, dirs
+
+    def create_bundle(self, dtype=np.double):
+        """The paths of the rays through the scene"""
+        return tr.PyTrace_Bundle(self.create_scene(), *self.starts_dirs(), 5, 
+                                 dtype=dtype)
+
+    def path_lengths(self, bundle):
+        """Returns the length of each ray's path"""
+        return np.array([np.linalg.norm(np.diff(bundle.path(i), axis=0), axis=1).sum()
+                         for i in range(len(bundle))])
+
+    def test_PyRasterize_Total(self):
+        """
+        Checks the density integrates to the weighted length of the paths
+        when the image covers them, whatever the number of threads
+        """
+        bundle = self.create_bundle()
+        extent = (-1.0, 7.0, -5.0, 5.0)
+        pixel_area = (8.0 / 80) * (10.0 / 40)
+
+        image = tr.PyRasterize(bundle, extent, (80, 40), n_threads=1)
+
+        self.assertEqual(image.shape, (40, 80))
+        self.assertEqual(image.dtype, np.double)
+        assert_allclose(image.sum() * pixel_area, self.path_lengths(bundle).sum())
+
+        for n_threads in (0, 3):
+            assert_allclose(tr.PyRasterize(bundle, extent, (80, 40), 
+                                           n_threads=n_threads), image)
+
+        weights = np.linspace(0.0, 2.0, len(bundle))
+        image = tr.PyRasterize(bundle, extent, (80, 40), weights=weights)
+        assert_allclose(image.sum() * pixel_area, 
+                        (weights * self.path_lengths(bundle)).sum())
+
+    def test_PyRasterize_Pixels(self):
+        """Checks the length of a ray inside each pixel"""
+        ray = tr.PyRay(np.array([0.5, 0.5]), unit_vec(np.arctan(0.5)))
+        tr.PyTrace([tr.PyScreen_Plane(np.array([4.5, -5.0]), np.array([4.5, 5.0]))],
+                   [ray], 1)
+
+        image = tr.PyRasterize([ray], (0.0, 5.0, 0.0, 3.0), (5, 3))
+
+        # The ray crosses y = 1 at x = 1.5 and y = 2 at x = 3.5
+        seg = np.hypot(1.0, 0.5)
+        expected = np.zeros((3, 5))
+        expected[0, :2] = [0.5 * seg, 0.5 * seg]
+        expected[1, 1:4] = [0.5 * seg, seg, 0.5 * seg]
+        expected[2, 3:5] = [0.5 * seg, 0.5 * seg]
+
+        assert_allclose(image, expected, atol=1e-12)
+
+    def test_PyRasterize_Clipped(self):
+        """Checks sections are clipped to the extent and resolutions agree"""
+        bundle = self.create_bundle()
+        coarse = tr.PyRasterize(bundle, (2.0, 6.0, -1.0, 1.0), 10)
+        fine = tr.PyRasterize(bundle, (2.0, 6.0, -1.0, 1.0), 20)
+
+        self.assertEqual(coarse.shape, (10, 10))
+        assert_allclose(fine.reshape(10, 2, 10, 2).mean(axis=(1, 3)), coarse)
+        self.assertLess(coarse.sum() * 0.4 * 0.2, self.path_lengths(bundle).sum())
+
+        assert_array_equal(tr.PyRasterize(bundle, (10.0, 12.0, 0.0, 1.0), 4), 
+                           np.zeros((4, 4)))
+
+    def test_PyRasterize_Inputs(self):
+        """Checks rays, float32 bundles and accumulating into out"""
+        bundle = self.create_bundle()
+        extent = (-1.0, 7.0, -4.0, 4.0)
+        image = tr.PyRasterize(bundle, extent, 32)
+
+        rays = [tr.PyRay(s, d) for s, d in zip(*self.starts_dirs())]
+        tr.PyTrace(self.create_scene(), rays, 5, fill_up=False)
+        assert_array_equal(tr.PyRasterize(rays, extent, 32), image)
+
+        single = tr.PyRasterize(self.create_bundle(np.float32), extent, 32)
+        assert_allclose(single, image, rtol=1e-5, atol=1e-5 * image.max())
+
+        out = np.ones((32, 32))
+        ans = tr.PyRasterize(bundle, extent, 32, out=out)
+        self.assertIs(ans, out)
+        assert_allclose(out, image + 1.0)
+
+        empty = tr.PyRay_Bundle()
+        assert_array_equal(tr.PyRasterize(empty, extent, 4), np.zeros((4, 4)))
+
+    def test_PyRasterize_Errors(self):
+        """Checks invalid arguments raise the right exceptions"""
+        bundle = self.create_bundle()
+        extent = (-1.0, 7.0, -4.0, 4.0)
+
+        with self.assertRaises(TypeError):
+            tr.PyRasterize(bundle.points, extent, 8)
+
+        with self.assertRaises(TypeError):
+            tr.PyRasterize(bundle, extent, 8, weights=np.ones(len(bundle) + 1))
+
+        with self.assertRaises(TypeError):
+            tr.PyRasterize(bundle, extent, 8, out=np.zeros((8, 9)))
+
+        with self.assertRaises(TypeError):
+            tr.PyRasterize(bundle, extent, 8, out=np.zeros((8, 8), dtype=np.float32))
+
+        with self.assertRaises(ValueError):
+            tr.PyRasterize(bundle, extent, 8, out=np.zeros((8, 16))[:, ::2])
+
+        with self.assertRaises(ValueError):
+            tr.PyRasterize(bundle, (1.0, 1.0, -4.0, 4.0), 8)
+
+        with self.assertRaises(ValueError):
+            tr.PyRasterize(bundle, extent, (8, 0))
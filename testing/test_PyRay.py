@@ -70,6 +70,25 @@ class Test_PyRay(unittest.TestCase, useful_checks):
         with self.assertRaises(ValueError) as context:
             c = tr.PyRay(self._init, np.array([[1.0, 2.0], [3.0, 4.0]]))
 
+    def test_PyRay_without_init(self):
+        """
+        Tests a PyRay whose __init__() isn't called, e.g. by a subclass, has 
+        a ray from the origin along x which can be traced
+        """
+
+        class No_Init_Ray(tr.PyRay):
+            def __init__(self, label):
+                self.label = label
+
+        for r in (tr.PyRay.__new__(tr.PyRay), No_Init_Ray("a")):
+            assert_array_equal(r.pos, np.zeros((1, 2)))
+            assert_array_equal(r.v, np.array([1.0, 0.0]))
+
+            tr.PyTrace([tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]))], 
+                       [r], 1, False)
+
+            assert_allclose(r.pos[-1], np.array([1.0, 0.0]))
+
     # Testing property v
     def test_PyRay_v_get(self):
         """Tests PyRay.v get"""
@@ -91,6 +110,22 @@ class Test_PyRay(unittest.TestCase, useful_checks):
         # Note pos is an array with shape (N, 2)
         assert_array_equal(r.pos, self._init[np.newaxis, ...])
 
+    # Testing properties weight & alpha
+    def test_PyRay_weight_set(self):
+        """Tests PyRay.weight starts at 1.0 and can be set"""
+        r = self.create_obj()
+
+        self.check_float_property(r, 'weight', 1.0, 0.5)
+
+    def test_PyRay_alpha_set(self):
+        """Tests PyRay.alpha can be set and is initialised by __cinit__()"""
+        r = tr.PyRay(self._init, self._v, alpha=0.25)
+
+        self.check_float_property(r, 'alpha', 0.25, 0.5)
+
+        with self.assertRaises(ValueError) as context:
+            r.alpha = -1.0
+
     # Testing method plot()
     def test_PyRay_Plot(self):
         """Test plot() method by computing ray bouncing of PyMirror_Plane"""
@@ -146,3 +181,45 @@ class Test_PyRay(unittest.TestCase, useful_checks):
         assert_array_equal(r.pos[0], new_pos)
         assert_array_equal(r.v, new_v)
 
+    def test_PyRay_v_start(self):
+        """
+        Test PyRay.v_start keeps the initial direction of a traced ray and
+        follows direction changes made before it is traced
+        """
+        r = tr.PyRay(np.zeros(2), np.array([1.0, 0.0]))
+        assert_array_equal(r.v_start, [1.0, 0.0])
+
+        r.v[:] = [0.0, 1.0]
+        mirror = tr.PyMirror_Plane(np.array([-1.0, 2.0]), np.array([1.0, 2.0]))
+        tr.PyTrace([mirror], [r], n=3, fill_up=False)
+
+        assert_allclose(r.v, [0.0, -1.0])
+        assert_array_equal(r.v_start, [0.0, 1.0])
+
+        # Changing the direction of a traced ray does not change its start
+        r.v = np.array([1.0, 1.0])
+        assert_array_equal(r.v_start, [0.0, 1.0])
+
+        r.reset(np.array([-1.0, 0.0]))
+        assert_array_equal(r.v_start, [-1.0, 0.0])
+
+    def test_PyRay_reset_weight(self):
+        """
+        Test PyRay.reset() restores the weight and the ray can be traced
+        again after being absorbed by a screen
+        """
+        screen = tr.PyScreen_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]))
+        r = tr.PyRay(np.zeros(2), np.array([1.0, 0.0]), alpha=0.5)
+
+        tr.PyTrace([screen], [r], n=3, fill_up=False)
+
+        self.assertAlmostEqual(r.weight, np.exp(-0.5))
+
+        r.reset(np.array([1.0, 0.0]))
+
+        self.assertEqual(r.weight, 1.0)
+        self.assertEqual(r.alpha, 0.5)
+
+        tr.PyTrace([screen], [r], n=3, fill_up=False)
+
+        assert_allclose(r.pos, [[0.0, 0.0], [1.0, 0.0]])
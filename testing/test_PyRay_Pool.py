@@ -0,0 +1,117 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyRay_Pool(unittest.TestCase):
+    """Tests acquiring, tracing and releasing rays from PyRay_Pool"""
+
+    def test_PyRay_Pool_init_check(self):
+        """Test PyRay_Pool rejects bad arguments"""
+        with self.assertRaises(ValueError):
+            tr.PyRay_Pool(-1)
+
+        pool = tr.PyRay_Pool()
+
+        with self.assertRaises(ValueError):
+            pool.acquire(-1)
+
+        with self.assertRaises(ValueError):
+            pool.acquire(2, alpha=-1.0)
+
+        with self.assertRaises(TypeError):
+            pool.acquire(2, starts=np.zeros((3, 2)))
+
+        with self.assertRaises(TypeError):
+            pool.acquire(2, directions=np.zeros((2, 3)))
+
+    def test_PyRay_Pool_acquire(self):
+        """Tests acquired rays start where they are asked to"""
+        pool = tr.PyRay_Pool(4)
+        starts = np.array([[0.0, 1.0], [2.0, 3.0]])
+        dirs = np.array([unit_vec(0.1), unit_vec(-0.2)])
+
+        rays = pool.acquire(2, starts, dirs, alpha=0.5)
+
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.capacity, 2)
+
+        for r, s, d in zip(rays, starts, dirs):
+            assert_array_equal(r.pos, [s])
+            assert_array_equal(r.v, d)
+            self.assertEqual(r.weight, 1.0)
+            self.assertEqual(r.alpha, 0.5)
+
+        # Defaults start at the origin travelling along +x
+        r = pool.acquire(1)[0]
+        assert_array_equal(r.pos, [[0.0, 0.0]])
+        assert_array_equal(r.v, [1.0, 0.0])
+        self.assertEqual(len(pool), 3)
+
+    def test_PyRay_Pool_reuse(self):
+        """
+        Tests released rays are reset and reused rather than new rays being
+        created.
+        """
+        pool = tr.PyRay_Pool()
+        mirror = tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]), 
+                                   reflectivity=0.5)
+
+        def run():
+            rays = pool.acquire(3, np.array([[0.0, y] for y in (-0.5, 0.0, 0.5)]),
+                                alpha=0.1)
+            tr.PyTrace([mirror], rays, 2)
+            return rays
+
+        first = [(r.pos, r.weight) for r in run()]
+
+        pool.release_all()
+        self.assertEqual(len(pool), 0)
+
+        for r, (pos, weight) in zip(run(), first):
+            assert_array_equal(r.pos, pos)
+            self.assertEqual(r.weight, weight)
+            self.assertEqual(r.alpha, 0.1)
+
+        self.assertEqual(pool.capacity, 3)
+
+    def test_PyRay_Pool_outlives_pool_reference(self):
+        """
+        Tests rays keep the pool alive after the last reference to it is 
+        dropped.
+        """
+        rays = tr.PyRay_Pool().acquire(2)
+
+        tr.PyTrace([tr.PyScreen_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]))],
+                   rays, 1)
+
+        assert_array_equal(rays[1].pos[1], [1.0, 0.0])
+
+    def test_PyRay_init(self):
+        """Tests PyRay can be reinitialised and still rejects bad arguments"""
+        r = tr.PyRay(np.array([0.0, 0.0]), unit_vec(0.0))
+        r.__init__(np.array([1.0, 2.0]), unit_vec(0.5), 0.3)
+
+        assert_array_equal(r.pos, [[1.0, 2.0]])
+        self.assertEqual(r.alpha, 0.3)
+
+        with self.assertRaises(TypeError):
+            tr.PyRay(np.array([0.0, 0.0, 0.0]), unit_vec(0.0))
@@ -0,0 +1,94 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyRefract_Asph(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyRefract_Asph"""
+
+    def create_Obj(self):
+        """Creates an instance of PyRefract_Asph"""
+        return tr.PyRefract_Asph(np.array([0.0, 0.0]), 0.0, 2.0, 1.5, n1=1.5)
+
+    def test_PyRefract_Asph_cinit_check(self):
+        """Test PyRefract_Asph c initiliser rejects bad arguments"""
+        with self.assertRaises(TypeError):
+            tr.PyRefract_Asph(np.array([1.0, 2.0, 3.0]), 0.0, 1.0, 0.5)
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Asph(np.array([0.0, 0.0]), 0.0, 1.0, 0.5, a2=-1.0)
+
+    def test_PyRefract_Asph_properties(self):
+        """Tests properties n1, n2, a1 and a2"""
+        self.check_float_property(self.create_Obj(), "n1", 1.5, 1.7)
+        self.check_float_property(self.create_Obj(), "n2", 1.0, 1.1)
+        self.check_float_property(self.create_Obj(), "a1", 0.0, 0.5)
+        self.check_float_property(self.create_Obj(), "a2", 0.0, 0.25)
+
+        with self.assertRaises(ValueError):
+            self.create_Obj().n2 = -1.0
+
+        with self.assertRaises(ValueError):
+            self.create_Obj().a1 = -1.0
+
+    def test_PyRefract_Asph_Ellipse_Focus(self):
+        """
+        Checks an ellipsoidal surface with k = -1/n^2 focuses rays parallel 
+        to its axis inside the glass exactly, at the paraxial focus.
+        """
+        n, f = 1.5, 6.0
+        R = (n - 1) * f / n
+
+        s = tr.PyRefract_Asph(np.array([0.0, 0.0]), 0.0, R, 1.5, k=-1/n**2, 
+                              n1=n, n2=1.0)
+
+        rays = [tr.PyRay(np.array([-3.0, y]), np.array([1.0, 0.0])) 
+                for y in (-1.4, -0.5, 0.2, 0.9, 1.4)]
+
+        tr.PyTrace([s], rays, 1, fill_up=False)
+
+        for r in rays:
+            p, v = r.pos[-1], r.v
+            self.assertAlmostEqual(p[0] - p[1] * v[0] / v[1], f)
+
+    def test_PyRefract_Asph_Flat_Same_As_Plane(self):
+        """
+        Checks a flat asphere matches a refracting plane, including 
+        absorption.
+        """
+        s = tr.PyRefract_Asph(np.array([1.0, 0.0]), 0.0, np.inf, 2.0, n1=1.5,
+                              n2=1.0, a1=0.2)
+        p = tr.PyRefract_Plane(np.array([1.0, 2.0]), np.array([1.0, -2.0]), 
+                               n1=1.5, n2=1.0, a1=0.2)
+        screen = tr.PyScreen_Plane(np.array([3.0, -5.0]), np.array([3.0, 5.0]))
+
+        def rays():
+            return [tr.PyRay(np.array([0.0, 0.0]), unit_vec(a)) 
+                    for a in (-0.5, 0.0, 0.3)]
+
+        r1, r2 = rays(), rays()
+
+        tr.PyTrace([s, screen], r1, 3)
+        tr.PyTrace([p, screen], r2, 3)
+
+        for a, b in zip(r1, r2):
+            assert_allclose(a.pos, b.pos)
+            self.assertAlmostEqual(a.weight, b.weight)
@@ -0,0 +1,131 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyRefract_Bezier(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyRefract_Bezier"""
+    _points = np.array([[1.0, -2.0], [1.5, -1.0], [0.5, 1.0], [1.0, 2.0]])
+
+    def create_Obj(self):
+        """Creates an instance of PyRefract_Bezier"""
+        return tr.PyRefract_Bezier(self._points, 1.0, 1.5, 0.1, 0.2)
+
+    def test_PyRefract_Bezier_cinit_check(self):
+        """Test PyRefract_Bezier c initiliser rejects bad arguments"""
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Bezier(self._points[:3], 1.0, 1.5)
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Bezier(self._points, 1.0, 1.5, -0.1)
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Bezier(self._points, 1.0, 1.5, depth=20)
+
+    def test_PyRefract_Bezier_properties(self):
+        """Tests getting and setting the refractive properties"""
+        r = self.create_Obj()
+
+        self.check_float_property(r, "n1", 1.0, 1.2)
+        self.check_float_property(r, "n2", 1.5, 1.7)
+        self.check_float_property(r, "a1", 0.1, 0.3)
+        self.check_float_property(r, "a2", 0.2, 0.4)
+
+        for name in ("n1", "n2"):
+            with self.assertRaises(ValueError):
+                setattr(r, name, 0.0)
+
+        for name in ("a1", "a2"):
+            with self.assertRaises(ValueError):
+                setattr(r, name, -1.0)
+
+    def test_PyRefract_Bezier_Straight_Same_As_Plane(self):
+        """
+        Checks a straight Bezier segment refracts like a plane.
+        """
+        start, end = np.array([0.0, -1.0]), np.array([0.0, 1.0])
+        points = np.array([start, start + (end - start) / 3, 
+                           start + 2 * (end - start) / 3, end])
+
+        # n1 is on the left of start to end for both
+        b = tr.PyRefract_Bezier(points, 1.0, 1.5)
+        pl = tr.PyRefract_Plane(start, end, 1.0, 1.5)
+
+        for ang in (-0.4, 0.0, 0.3):
+            r1 = tr.PyRay(np.array([2.0, 0.1]), unit_vec(np.pi + ang))
+            r2 = tr.PyRay(np.array([2.0, 0.1]), unit_vec(np.pi + ang))
+            tr.PyTrace([b], [r1], 1, fill_up=False)
+            tr.PyTrace([pl], [r2], 1, fill_up=False)
+
+            assert_allclose(r1.pos, r2.pos, atol=1e-12)
+            assert_allclose(r1.v, r2.v, atol=1e-12)
+
+    def test_PyRefract_Bezier_Tangents(self):
+        """
+        Checks tangents through a curved boundary match finite differences.
+        """
+        b = self.create_Obj()
+        screen = tr.PyScreen_Plane(np.array([3.0, -5.0]), np.array([3.0, 5.0]))
+
+        def run(n2, params=False):
+            pl = tr.PyRefract_Plane(np.array([-1.0, -5.0]), np.array([-1.0, 5.0]), 
+                                    1.0, n2)
+            rays = [tr.PyRay(np.array([-2.0, 0.3]), unit_vec(0.25))]
+            J = tr.PyTrace([pl, b, screen], rays, 3, 
+                           params=[(pl, 'n2')] if params else None)
+            return rays[0].pos[-1], J
+
+        h = 1e-6
+        fd = (run(1.3 + h)[0] - run(1.3 - h)[0]) / (2*h)
+
+        assert_allclose(run(1.3, True)[1][0, :, 0], fd, atol=1e-6)
+
+    def test_bspline_to_bezier(self):
+        """
+        Checks converted B-splines match the B-spline basis and are 
+        continuous.
+        """
+        p = np.array([[0.0, 0.0], [1.0, 2.0], [3.0, 1.0], [4.0, 3.0], [5.0, 0.0]])
+        b = tr.bspline_to_bezier(p)
+
+        self.assertEqual(b.shape, (7, 2))
+
+        # Uniform cubic B-spline at the start of its first span
+        assert_allclose(b[0], (p[0] + 4 * p[1] + p[2]) / 6)
+        assert_allclose(b[3], (p[1] + 4 * p[2] + p[3]) / 6)
+        assert_allclose(b[-1], (p[2] + 4 * p[3] + p[4]) / 6)
+
+        # Tangents are continuous across segments
+        assert_allclose(b[3] - b[2], b[4] - b[3])
+
+        closed = tr.bspline_to_bezier(p, closed=True)
+        self.assertEqual(closed.shape, (16, 2))
+        assert_allclose(closed[0], closed[-1])
+        assert_allclose(closed[1] - closed[0], closed[-1] - closed[-2])
+
+        with self.assertRaises(ValueError):
+            tr.bspline_to_bezier(p[:3])
+
+        with self.assertRaises(ValueError):
+            tr.bspline_to_bezier(p[:2], closed=True)
+
+        with self.assertRaises(TypeError):
+            tr.bspline_to_bezier(np.zeros((5, 3)))
@@ -174,6 +174,29 @@ class Test_PyRefract_Plane(unittest.TestCase, useful_checks):
         with self.assertRaises(ValueError) as context:
             m.n2 = -1.0
 
+    # Test properties a1 & a2 (absorption coefficients)
+    def test_PyRefract_Plane_a1_set(self):
+        """Tests property a1 setting"""
+        m = self.create_Obj()
+
+        self.check_float_property(m, 'a1', 0.0, 0.5)
+
+    def test_PyRefract_Plane_a2_set(self):
+        """Tests property a2 setting"""
+        m = self.create_Obj()
+
+        self.check_float_property(m, 'a2', 0.0, 0.5)
+
+    def test_PyRefract_Plane_a_Set_Negative_not_allowed(self):
+        """Tests absorption coefficients cannot be negative"""
+        m = self.create_Obj()
+
+        with self.assertRaises(ValueError) as context:
+            m.a1 = -1.0
+
+        with self.assertRaises(ValueError) as context:
+            m.a2 = -1.0
+
     # Test plot() method
     def test_PyRefract_Plane_plot(self):
         """Tests the plot method returns start point followed by end point"""
@@ -213,3 +236,22 @@ class Test_PyRefract_Plane(unittest.TestCase, useful_checks):
 
         assert_allclose(r.pos, expected_ans)
 
+    def test_PyRefract_Plane_tracing_absorption(self):
+        """
+        Tests the Beer-Lambert law is applied to a ray crossing an absorbing
+        slab between two planar boundaries
+        """
+        a = 0.3
+
+        # Slab between x = 1 and x = 3 with absorption coefficient a
+        c1 = tr.PyRefract_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]),
+                                n1=1.0, n2=1.5, a2=a)
+        c2 = tr.PyRefract_Plane(np.array([3.0, -1.0]), np.array([3.0, 1.0]),
+                                n1=1.5, n2=1.0, a1=a)
+
+        r = tr.PyRay(init=np.array([0.0, 0.0]), v=np.array([1.0, 0.0]))
+
+        tr.PyTrace([c1, c2], [r], n=3, fill_up=False)
+
+        self.assertAlmostEqual(r.weight, np.exp(-2.0*a))
+        self.assertEqual(r.alpha, 0.0)
@@ -0,0 +1,83 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyRefract_Polyline(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyRefract_Polyline"""
+    _points = np.array([[1.0, -2.0], [1.5, 0.0], [1.0, 2.0]])
+
+    def create_Obj(self):
+        """Creates an instance of PyRefract_Polyline"""
+        return tr.PyRefract_Polyline(self._points, n1=1.2, n2=1.5)
+
+    def test_PyRefract_Polyline_cinit_check(self):
+        """Test PyRefract_Polyline c initiliser rejects bad arguments"""
+        with self.assertRaises(TypeError):
+            tr.PyRefract_Polyline(np.zeros((3, 3)))
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Polyline(np.zeros((1, 2)))
+
+        with self.assertRaises(ValueError):
+            tr.PyRefract_Polyline(self._points, a1=-1.0)
+
+    def test_PyRefract_Polyline_properties(self):
+        """Tests properties n1, n2, a1 and a2"""
+        self.check_float_property(self.create_Obj(), "n1", 1.2, 1.7)
+        self.check_float_property(self.create_Obj(), "n2", 1.5, 1.1)
+        self.check_float_property(self.create_Obj(), "a1", 0.0, 0.5)
+        self.check_float_property(self.create_Obj(), "a2", 0.0, 0.25)
+
+        with self.assertRaises(ValueError):
+            self.create_Obj().n1 = 0.0
+
+        with self.assertRaises(ValueError):
+            self.create_Obj().a2 = -1.0
+
+    def test_PyRefract_Polyline_Same_As_Planes(self):
+        """
+        Checks tracing through a refracting polygon matches tracing through a
+        refracting plane per edge.
+        """
+        ang = np.linspace(0.0, 2*np.pi, 40, endpoint=False)
+        pts = np.stack([2.0 + np.cos(ang), np.sin(ang)], axis=1)
+
+        # Anticlockwise so left of each edge is inside
+        poly = tr.PyRefract_Polyline(pts, n1=1.5, n2=1.0, a1=0.1, closed=True)
+
+        closed = np.concatenate([pts, pts[:1]])
+        planes = [tr.PyRefract_Plane(s, e, n1=1.5, n2=1.0, a1=0.1) 
+                  for s, e in zip(closed[:-1], closed[1:])]
+
+        def rays():
+            return [tr.PyRay(np.array([0.0, y]), np.array([1.0, 0.0])) 
+                    for y in np.linspace(-0.9, 0.9, 13)]
+
+        r1, r2 = rays(), rays()
+
+        tr.PyTrace([poly], r1, 6)
+        tr.PyTrace(planes, r2, 6)
+
+        for a, b in zip(r1, r2):
+            assert_allclose(a.pos, b.pos)
+            self.assertAlmostEqual(a.weight, b.weight)
+            self.assertLess(a.weight, 1.0)
@@ -0,0 +1,152 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+class Test_PyResponse_Matrix(unittest.TestCase):
+    """Tests for PyResponse_Matrix"""
+    _source_start = np.array([0.0, 1.0])
+    _source_end = np.array([0.0, -1.0])
+
+    def detector(self):
+        """Returns a detector at x = 5 from y = -5 to y = 5"""
+        return tr.PyScreen_Plane(np.array([5.0, -5.0]), np.array([5.0, 5.0]))
+
+    def create_Obj(self, components, detector, n_segments=4, max_angle=0.2, 
+                   n_angles=3, n_bins=20, **kwargs):
+        """Creates an instance of PyResponse_Matrix by tracing components"""
+        return tr.PyResponse_Matrix.trace(components, self._source_start, self._source_end,
+                                          n_segments, max_angle, n_angles, detector, 
+                                          n_bins, **kwargs)
+
+    def test_PyResponse_Matrix_trace_free_space(self):
+        """Tests each element delivers its power to the bins its rays can reach"""
+        det = self.detector()
+        M = self.create_Obj([det], det)
+        dense = M.toarray()
+
+        self.assertEqual(M.shape, (20, 12))
+        assert_allclose(dense.sum(axis=0), np.ones(12))
+
+        # Segment 0 is y in [0.5, 1], emitting at angles up to 0.2 below 
+        # the normal, bin j of the detector is y in [-5 + 0.5 j, -4.5 + 0.5 j]
+        y_min, y_max = 0.5 + 5 * np.tan(-0.2), 1.0 + 5 * np.tan(-0.2 / 3)
+        bins = np.arange(20)
+        reachable = (-4.5 + 0.5 * bins > y_min) & (-5 + 0.5 * bins < y_max)
+
+        self.assertTrue(np.all(dense[~reachable, 0] == 0.0))
+
+    def test_PyResponse_Matrix_trace_blocked(self):
+        """Tests rays stopped by other screens or absorbed don't count fully"""
+        det = self.detector()
+        block = tr.PyScreen_Plane(np.array([2.0, 0.0]), np.array([2.0, 5.0]))
+        M = self.create_Obj([block, det], det, max_angle=0.01, n_angles=1)
+        sums = M.toarray().sum(axis=0)
+
+        # The top segment is blocked and the bottom one passes below the block
+        self.assertEqual(sums[0], 0.0)
+        assert_allclose(sums[3], 1.0)
+        self.assertTrue(sums[1] < 0.5 < sums[2])
+
+        M = self.create_Obj([det], det, alpha=0.1, max_angle=1e-6, n_angles=1, n_segments=1)
+
+        assert_allclose(M.toarray().sum(), np.exp(-0.5), rtol=1e-6)
+
+    def test_PyResponse_Matrix_trace_butted(self):
+        """Tests rays stopped by a screen on the detector's line don't count"""
+        det = self.detector()
+        stop = tr.PyScreen_Plane(np.array([5.0 - 1e-10, 0.0]), np.array([5.0 - 1e-10, 5.0]))
+        M = self.create_Obj([stop, det], det, max_angle=0.01, n_angles=1)
+        sums = M.toarray().sum(axis=0)
+
+        self.assertEqual(sums[0], 0.0)
+        assert_allclose(sums[3], 1.0)
+
+    def test_PyResponse_Matrix_trace_batches(self):
+        """Tests elements whose rays are split between batches"""
+        det = self.detector()
+        batch = tr._RESPONSE_BATCH_RAYS
+
+        try:
+            tr._RESPONSE_BATCH_RAYS = 7
+            M = self.create_Obj([det], det, rays_per_element=10)
+        finally:
+            tr._RESPONSE_BATCH_RAYS = batch
+
+        assert_allclose(M.toarray().sum(axis=0), np.ones(12))
+        self.assertTrue(np.all(np.diff(M.indptr) >= 0))
+
+    def test_PyResponse_Matrix_matmul(self):
+        """Tests the response of sources matches the dense matrix"""
+        det = self.detector()
+        M = self.create_Obj([tr.PyLens(np.array([2.5, 0.0]), 2.0, 4.0, 4.0, 0.3, 1.5), det], det)
+        X = np.random.default_rng(0).random((12, 5))
+
+        assert_allclose(M @ X, M.toarray() @ X)
+        assert_allclose(M @ X[:, 0], M.toarray() @ X[:, 0])
+
+        with self.assertRaises(TypeError):
+            M @ np.ones(11)
+
+    def test_PyResponse_Matrix_trace_seed(self):
+        """Tests the matrix only depends on the seed"""
+        det = self.detector()
+        lens = tr.PyLens(np.array([2.5, 0.0]), 2.0, 4.0, 4.0, 0.3, 1.5)
+
+        assert_array_equal(self.create_Obj([lens, det], det, seed=3).toarray(), 
+                           self.create_Obj([lens, det], det, seed=3).toarray())
+
+    def test_PyResponse_Matrix_trace_invalid(self):
+        """Tests trace() checks its arguments"""
+        det = self.detector()
+
+        with self.assertRaises(ValueError):
+            self.create_Obj([], det)
+
+        with self.assertRaises(TypeError):
+            self.create_Obj([det], tr.PyMirror_Plane(np.zeros(2), np.ones(2)))
+
+        with self.assertRaises(ValueError):
+            self.create_Obj([det], det, max_angle=0.0)
+
+        with self.assertRaises(ValueError):
+            self.create_Obj([det], det, n_bins=0)
+
+    def test_PyResponse_Matrix_init_invalid(self):
+        """Tests PyResponse_Matrix checks its CSR arrays"""
+
+        # This should be ok
+        M = tr.PyResponse_Matrix([1.0, 2.0], [0, 1], [0, 1, 2], (2, 2))
+
+        assert_array_equal(M.toarray(), np.diag([1.0, 2.0]))
+
+        with self.assertRaises(TypeError):
+            tr.PyResponse_Matrix([1.0, 2.0], [0], [0, 1, 2], (2, 2))
+
+        with self.assertRaises(TypeError):
+            tr.PyResponse_Matrix([1.0, 2.0], [0, 1], [0, 2], (2, 2))
+
+        with self.assertRaises(ValueError):
+            tr.PyResponse_Matrix([1.0, 2.0], [0, 1], [0, 2, 1], (2, 2))
+
+        with self.assertRaises(ValueError):
+            tr.PyResponse_Matrix([1.0, 2.0], [0, 2], [0, 1, 2], (2, 2))
@@ -0,0 +1,53 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyScreen_Polyline(unittest.TestCase, useful_checks):
+    """Tests property access and methods of PyScreen_Polyline"""
+    _points = np.array([[3.0, -2.0], [2.0, 0.0], [3.0, 2.0]])
+
+    def test_PyScreen_Polyline_cinit_check(self):
+        """Test PyScreen_Polyline c initiliser rejects bad points"""
+        with self.assertRaises(TypeError):
+            tr.PyScreen_Polyline(np.zeros((2, 3)))
+
+        with self.assertRaises(ValueError):
+            tr.PyScreen_Polyline(np.zeros((0, 2)))
+
+    def test_PyScreen_Polyline_Stops_Rays(self):
+        """
+        Checks rays stop where they hit the screen.
+        """
+        screen = tr.PyScreen_Polyline(self._points)
+        mirror = tr.PyMirror_Plane(np.array([5.0, -5.0]), np.array([5.0, 5.0]))
+
+        rays = [tr.PyRay(np.array([0.0, y]), np.array([1.0, 0.0])) 
+                for y in (-1.0, 0.0, 1.0, 3.0)]
+
+        tr.PyTrace([screen, mirror], rays, 5, fill_up=False)
+
+        assert_allclose(rays[0].pos, [[0.0, -1.0], [2.5, -1.0]])
+        assert_allclose(rays[1].pos, [[0.0, 0.0], [2.0, 0.0]])
+        assert_allclose(rays[2].pos, [[0.0, 1.0], [2.5, 1.0]])
+
+        # Misses the screen so reflects off the mirror
+        assert_allclose(rays[3].pos, [[0.0, 3.0], [5.0, 3.0], [4.0, 3.0]])
@@ -135,3 +135,194 @@ class Test_PyTrace(unittest.TestCase, useful_checks):
 
             tr.PyTrace(comps, rays, n=2, fill_up=True)
 
+
+    def test_PyTrace_Roulette_Invalid_Threshold(self):
+        """Tests PyTrace raises ValueError for a negative roulette threshold"""
+        rays = [tr.PyRay(np.array([0.0, 0.0]), np.array([1.0, 0.0]))]
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace([], rays, n=2, roulette_threshold=-1.0)
+
+    def test_PyTrace_Roulette_Terminates_Trapped_Rays(self):
+        """
+        Tests Russian roulette stops rays trapped between two lossy concentric
+        mirrors well before n interactions are reached
+        """
+        m1 = tr.PyMirror_Sph(np.zeros(2), 5.0, 0.0, 2*np.pi, reflectivity=0.5)
+        m2 = tr.PyMirror_Sph(np.zeros(2), 10.0, 0.0, 2*np.pi, reflectivity=0.5)
+
+        theta = 10 * np.pi/180.0
+        rays = [tr.PyRay(np.array([-8.0, 0.0]), unit_vec(theta)) for _ in range(200)]
+
+        tr.PyTrace([m1, m2], rays, n=1000, fill_up=False, roulette_threshold=0.1,
+                   seed=1)
+
+        n_points = np.array([r.pos.shape[0] for r in rays])
+        weights = np.array([r.weight for r in rays])
+
+        self.assertTrue(np.all(n_points < 1000))
+
+        # Terminated rays have zero weight, survivors are raised to the threshold
+        self.assertTrue(np.all((weights == 0.0) | (weights == 0.1)))
+
+    def test_PyTrace_Roulette_Unbiased(self):
+        """
+        Tests the mean weight after roulette matches the deterministic weight
+        """
+        m = tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]), 
+                              reflectivity=0.2)
+
+        N = 20000
+        rays = [tr.PyRay(np.array([0.0, 0.0]), np.array([1.0, 0.0])) for _ in range(N)]
+
+        tr.PyTrace([m], rays, n=2, fill_up=False, roulette_threshold=0.5, seed=3)
+
+        mean_weight = np.mean([r.weight for r in rays])
+
+        # Standard error of the mean is about 0.5*sqrt(0.4*0.6/N) = 0.0017
+        self.assertAlmostEqual(mean_weight, 0.2, delta=0.01)
+
+    def test_PyTrace_Roulette_Reproducible(self):
+        """Tests the same seed produces the same result"""
+        m = tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]), 
+                              reflectivity=0.2)
+
+        def weights(seed):
+            rays = [tr.PyRay(np.array([0.0, 0.0]), np.array([1.0, 0.0])) for _ in range(100)]
+
+            tr.PyTrace([m], rays, n=2, roulette_threshold=0.5, seed=seed)
+
+            return np.array([r.weight for r in rays])
+
+        assert_array_equal(weights(7), weights(7))
+        self.assertFalse(np.array_equal(weights(7), weights(8)))
+
+    def test_PyTrace_Roulette_Independent_Streams(self):
+        """
+        Tests the random streams of neighbouring rays aren't shifted copies of
+        each other, which would make each ray survive one roulette fewer than
+        the ray before it
+        """
+        m1 = tr.PyMirror_Sph(np.zeros(2), 5.0, 0.0, 2*np.pi, reflectivity=0.5)
+        m2 = tr.PyMirror_Sph(np.zeros(2), 10.0, 0.0, 2*np.pi, reflectivity=0.5)
+
+        theta = 10 * np.pi/180.0
+
+        # Every roulette is survived with probability 0.5
+        for seed in (0, 1, 2):
+            rays = [tr.PyRay(np.array([-8.0, 0.0]), unit_vec(theta)) for _ in range(400)]
+
+            tr.PyTrace([m1, m2], rays, n=1000, fill_up=False, roulette_threshold=0.5,
+                       seed=seed)
+
+            survived = np.array([r.pos.shape[0] for r in rays]) - 3
+
+            for gap in (1, 2):
+                first, second = survived[:-gap], survived[gap:]
+                shifted = second[first > 0] == first[first > 0] - 1
+
+                # Independent streams give about a third
+                self.assertLess(shifted.mean(), 0.6)
+
+    def test_PyTrace_Params_Finite_Difference(self):
+        """
+        Tests the derivatives returned when params is given agree with finite
+        differences for refracting and reflecting planes and arcs
+        """
+
+        def run(p, params):
+            arc = tr.PyRefract_Sph(np.array([p[0], p[1]]), p[2], np.pi - 0.6, 
+                                   np.pi + 0.6, n_in=p[3])
+            pln = tr.PyRefract_Plane(np.array([p[4], -3.0]), np.array([3.2, 3.0]),
+                                     n1=1.0, n2=p[5])
+            mir = tr.PyMirror_Plane(np.array([8.0, -5.0]), np.array([p[6], 5.0]))
+
+            rays = [tr.PyRay(np.array([-5.0, y]), np.array([1.0, 0.0])) for y in [0.3, -0.7]]
+
+            prm = [(arc, 'centre'), (arc, 'R'), (arc, 'n_in'), (pln, 'start'), 
+                   (pln, 'n2'), (mir, 'end')] if params else None
+
+            J = tr.PyTrace([arc, pln, mir], rays, n=5, fill_up=False, params=prm)
+
+            return np.array([r.pos[-1] for r in rays]), J
+
+        p0 = np.array([5.0, 0.1, 4.0, 1.5, 3.0, 1.3, 8.5])
+        _, J = run(p0, True)
+
+        # Parameter index of each column, None for the columns held fixed
+        cols = [0, 1, 2, 3, 4, None, 5, 6, None]
+
+        self.assertEqual(J.shape, (2, 2, len(cols)))
+
+        h = 1e-6
+
+        for k, ind in enumerate(cols):
+            if ind is None:
+                continue
+
+            p_plus, p_minus = p0.copy(), p0.copy()
+            p_plus[ind] += h
+            p_minus[ind] -= h
+
+            fd = (run(p_plus, False)[0] - run(p_minus, False)[0]) / (2*h)
+
+            assert_allclose(J[:, :, k], fd, atol=1e-7)
+
+    def test_PyTrace_Params_Concurrent(self):
+        """
+        Tests traces differentiating different parameters of the same 
+        components from several threads each get their own columns
+        """
+        import threading
+
+        arc = tr.PyRefract_Sph(np.array([5.0, 0.1]), 4.0, np.pi - 0.6, np.pi + 0.6, 
+                               n_in=1.5)
+        mir = tr.PyMirror_Plane(np.array([8.0, -5.0]), np.array([8.5, 5.0]))
+        rays_y = np.linspace(-1.0, 1.0, 2000)
+        orders = [[(arc, 'R'), (mir, 'end')], [(mir, 'end'), (arc, 'centre')]]
+
+        def run(prm):
+            rays = [tr.PyRay(np.array([-5.0, y]), np.array([1.0, 0.0])) for y in rays_y]
+
+            return tr.PyTrace([arc, mir], rays, n=5, fill_up=False, params=prm)
+
+        expected = [run(prm) for prm in orders]
+        errors = []
+
+        def worker(k):
+            try:
+                for _ in range(20):
+                    assert_array_equal(run(orders[k]), expected[k])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in (0, 1)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+
+    def test_PyTrace_Params_Invalid(self):
+        """Tests PyTrace raises for unknown or repeated parameters"""
+        c = tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([1.0, 1.0]))
+        rays = [tr.PyRay(np.array([0.0, 0.0]), np.array([1.0, 0.0]))]
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace([c], rays, n=2, params=[(c, 'R')])
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace([c], rays, n=2, params=[(c, 'start'), (c, 'start')])
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace([c], rays, n=2, params=[(5, 'start')])
+
+        # Components are left usable after an error
+        J = tr.PyTrace([c], rays, n=2, params=[(c, 'start')])
+
+        self.assertEqual(J.shape, (1, 2, 2))
+        assert_array_equal(rays[0].d_pos, J[0])
+        self.assertEqual(tr.tangent_param_names(c), ['start', 'end'])
@@ -0,0 +1,128 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import time
+
+import tracing as tr
+from generic_test_functions import *
+
+class Test_PyTrace_Async(unittest.TestCase):
+    """Tests tracing from asyncio without blocking the event loop"""
+
+    def create_cavity(self):
+        """Two long parallel mirrors rays bounce between"""
+        return [tr.PyMirror_Plane(np.array([0.0, -1e6]), np.array([0.0, 1e6])),
+                tr.PyMirror_Plane(np.array([1.0, -1e6]), np.array([1.0, 1e6]))]
+
+    def create_rays(self, n_rays):
+        """Rays starting between the mirrors at different angles"""
+        return [tr.PyRay(np.array([0.5, 0.0]), unit_vec(a)) 
+                for a in np.linspace(-0.5, 0.5, n_rays)]
+
+    def test_PyTrace_Async_Same_As_PyTrace(self):
+        """Checks the rays end up the same as with PyTrace, including roulette"""
+        comps = self.create_cavity()
+        comps[0].reflectivity = 0.7
+
+        for threshold in (0.0, 0.5):
+            expected = self.create_rays(20)
+            tr.PyTrace(comps, expected, 30, roulette_threshold=threshold, seed=4)
+
+            rays = self.create_rays(20)
+            ans = asyncio.run(tr.trace_async(comps, rays, 30, 
+                                             roulette_threshold=threshold, seed=4))
+
+            self.assertIsNone(ans)
+
+            for r, e in zip(rays, expected):
+                assert_array_equal(r.pos, e.pos)
+                self.assertEqual(r.weight, e.weight)
+
+    def test_PyTrace_Async_Concurrent(self):
+        """
+        Checks concurrent traces through shared components give the same
+        results while the event loop keeps running
+        """
+        comps = self.create_cavity()
+        ray_lists = [self.create_rays(200) for _ in range(4)]
+        ticks = []
+
+        async def heartbeat(task):
+            while not task.done():
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.gather(*[tr.trace_async(comps, rays, 500) 
+                                    for rays in ray_lists])
+            await asyncio.gather(task, heartbeat(task))
+
+        asyncio.run(main())
+
+        self.assertGreater(len(ticks), 1)
+
+        for rays in ray_lists[1:]:
+            for r, e in zip(rays, ray_lists[0]):
+                assert_array_equal(r.pos, e.pos)
+
+        self.assertEqual(len(ray_lists[0][0].pos), 501)
+
+    def test_PyTrace_Async_Cancel(self):
+        """
+        Checks cancelling stops the trace soon, leaving rays which weren't 
+        reached unchanged
+        """
+        comps = self.create_cavity()
+        rays = self.create_rays(20000)
+
+        async def main():
+            task = asyncio.ensure_future(tr.trace_async(comps, rays, 1000))
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+            start = time.perf_counter()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(main())
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(len(rays[-1].pos), 1)
+
+        # Rays are traced completely or not at all
+        for r in rays:
+            self.assertIn(len(r.pos), (1, 1001))
+
+    def test_PyTrace_Async_Errors(self):
+        """Checks invalid arguments raise the right exceptions"""
+        comps = self.create_cavity()
+
+        with self.assertRaises(TypeError):
+            asyncio.run(tr.trace_async(comps + [1.0], self.create_rays(2), 3))
+
+        with self.assertRaises(TypeError):
+            asyncio.run(tr.trace_async(comps, [np.zeros(2)], 3))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(tr.trace_async(comps, self.create_rays(2), 3, 
+                                       roulette_threshold=-1.0))
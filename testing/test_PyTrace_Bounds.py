@@ -0,0 +1,104 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyTrace_Bounds(unittest.TestCase):
+    """Tests the bounding boxes used to cull components while tracing"""
+
+    def create_components(self):
+        """One component of each kind of geometry"""
+        return [tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([2.0, 1.0])),
+                tr.PyMirror_Sph(np.array([0.0, 0.0]), 1.0, 0.2, 2.0),
+                tr.PyMirror_Asph(np.array([-3.0, 0.5]), 0.3, 2.0, 0.8, k=-1.0,
+                                 coeffs=[0.05]),
+                tr.PyMirror_Polyline(np.array([[0.0, 3.0], [1.0, 3.5], [2.0, 2.5]])),
+                tr.PyMirror_Bezier(np.array([[-1.0, -3.0], [0.0, -2.0], 
+                                             [1.0, -4.0], [2.0, -3.0]])),
+                tr.PyBiConvexLens(np.array([4.0, 0.0]), 1.0, 3.0, 3.0, 0.3, 1.5)]
+
+    def test_PyTrace_Bounds_Tight(self):
+        """Checks the boxes of simple components are tight"""
+        plane = tr.PyMirror_Plane(np.array([1.0, -1.0]), np.array([2.0, 1.0]))
+        assert_allclose(tr.scene_bounds([plane]), (1.0, 2.0, -1.0, 1.0), atol=1e-8)
+
+        # Quarter circle, then an arc passing through the top and left of the circle
+        arc = tr.PyMirror_Sph(np.array([1.0, 2.0]), 2.0, 0.0, np.pi / 2)
+        assert_allclose(tr.scene_bounds([arc]), (1.0, 3.0, 2.0, 4.0), atol=1e-8)
+
+        arc = tr.PyMirror_Sph(np.array([0.0, 0.0]), 1.0, np.pi / 4, 5 * np.pi / 4)
+        assert_allclose(tr.scene_bounds([arc]), 
+                        (-1.0, np.sqrt(0.5), -np.sqrt(0.5), 1.0), atol=1e-8)
+
+        assert_allclose(tr.scene_bounds([plane, arc]), (-1.0, 2.0, -1.0, 1.0), 
+                        atol=1e-8)
+        self.assertEqual(tr.scene_bounds([])[0], np.inf)
+
+        with self.assertRaises(TypeError):
+            tr.scene_bounds([1])
+
+    def test_PyTrace_Bounds_Contains(self):
+        """Checks every point rays hit on each component is inside its box"""
+        angles = np.linspace(0.0, 2 * np.pi, 720, endpoint=False)
+
+        for comp in self.create_components():
+            x_min, x_max, y_min, y_max = tr.scene_bounds([comp])
+            centre = np.array([(x_min + x_max) / 2, (y_min + y_max) / 2])
+
+            # Rays from a circle around the box towards points inside it
+            starts = centre + 10.0 * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+            targets = centre + np.stack([np.linspace(x_min - centre[0], x_max - centre[0], 720),
+                                         np.linspace(y_max - centre[1], y_min - centre[1], 720)], axis=1)
+            dirs = targets - starts
+            dirs /= np.linalg.norm(dirs, axis=1)[:, None]
+
+            positions = np.empty((720, 2, 2))
+            status = np.empty(720, dtype=np.int32)
+            tr.PyTrace_Bundle([comp], starts, dirs, 1, out_positions=positions,
+                              out_status=status)
+            hits = positions[status != tr.TRACE_ESCAPED, 1]
+
+            self.assertGreater(len(hits), 50)
+            self.assertTrue(np.all(hits[:, 0] >= x_min) and np.all(hits[:, 0] <= x_max))
+            self.assertTrue(np.all(hits[:, 1] >= y_min) and np.all(hits[:, 1] <= y_max))
+
+    def test_PyTrace_Bounds_Escape(self):
+        """
+        Checks rays leaving the scene escape and rays inside it still hit
+        components
+        """
+        comps = self.create_components()
+        x_min, x_max, y_min, y_max = tr.scene_bounds(comps)
+
+        starts = np.array([[x_max + 1.0, 0.0], [x_min - 1.0, 0.0], 
+                           [0.0, y_max + 0.5], [x_max + 1.0, 0.0]])
+        dirs = np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 1.0], [-1.0, 0.0]])
+
+        status = np.empty(4, dtype=np.int32)
+        positions = np.empty((4, 4, 2))
+        tr.PyTrace_Bundle(comps, starts, dirs, 3, out_positions=positions, 
+                          out_status=status)
+
+        assert_array_equal(status[:3], tr.TRACE_ESCAPED)
+        assert_allclose(positions[:3, 1], starts[:3] + dirs[:3])
+
+        # Enters the scene and hits the lens
+        self.assertLess(positions[3, 1, 0], 5.0)
@@ -0,0 +1,297 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+from multiprocessing import shared_memory
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyTrace_Bundle(unittest.TestCase):
+    """Tests tracing into PyRay_Bundle and its helpers"""
+
+    def create_scene(self):
+        """
+        A mirror which reflects rays back, a refracting plane and a screen
+        which stops rays below the axis
+        """
+        return [tr.PyMirror_Plane(np.array([3.0, -1.0]), np.array([3.0, 1.0]), 
+                                  reflectivity=0.5),
+                tr.PyRefract_Plane(np.array([1.0, -5.0]), np.array([1.0, 5.0]), 
+                                   1.0, 1.5, 0.1, 0.0),
+                tr.PyScreen_Plane(np.array([2.0, -5.0]), np.array([2.0, -2.0]))]
+
+    def starts_dirs(self):
+        """Rays starting left of the scene at different angles"""
+        starts = np.array([[0.0, y] for y in np.linspace(-0.8, 0.8, 5)] 
+                          + [[0.0, -2.5], [0.0, 3.0]])
+        dirs = np.array([unit_vec(a) for a in (0.1, -0.2, 0.0, 0.3, -0.1, 0.0, 0.0)])
+
+        return starts, dirs
+
+    def test_PyTrace_Bundle_Same_As_PyTrace(self):
+        """
+        Checks the bundle holds the same paths as PyTrace without fill up, 
+        including with Russian roulette.
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        for threshold in (0.0, 0.4):
+            rays = [tr.PyRay(s, d, 0.2) for s, d in zip(starts, dirs)]
+            tr.PyTrace(comps, rays, 6, fill_up=False, 
+                       roulette_threshold=threshold, seed=3)
+
+            bundle = tr.PyTrace_Bundle(comps, starts, dirs, 6, alpha=0.2, 
+                                       roulette_threshold=threshold, seed=3)
+
+            self.assertEqual(len(bundle), len(rays))
+            self.assertEqual(bundle.offsets[-1], sum(len(r.pos) for r in rays))
+
+            for i, r in enumerate(rays):
+                assert_array_equal(bundle.path(i), r.pos)
+                assert_array_equal(bundle.directions[i], r.v)
+                self.assertEqual(bundle.weights[i], r.weight)
+
+            packed = tr.PyRay_Bundle.from_rays(rays)
+            assert_array_equal(packed.points, bundle.points)
+            assert_array_equal(packed.offsets, bundle.offsets)
+
+    def test_PyTrace_Bundle_Ragged(self):
+        """Checks paths are stored to their real length"""
+        bundle = tr.PyTrace_Bundle(self.create_scene(), *self.starts_dirs(), 200)
+
+        # The ray starting at y = -2.5 stops on the screen, y = 3 misses all
+        assert_array_equal(bundle.path(5), [[0.0, -2.5], [1.0, -2.5], [2.0, -2.5]])
+        assert_array_equal(bundle.path(-1), [[0.0, 3.0], [1.0, 3.0], [2.0, 3.0]])
+
+        self.assertLess(bundle.points.shape[0], 7 * 10)
+        assert_array_equal(bundle.lengths, np.diff(bundle.offsets))
+        assert_array_equal(bundle.end_points, 
+                           [bundle.path(i)[-1] for i in range(len(bundle))])
+
+        with self.assertRaises(ValueError):
+            bundle.points[0, 0] = 1.0
+
+        with self.assertRaises(IndexError):
+            bundle.path(7)
+
+    def test_PyRay_Bundle_plot_helpers(self):
+        """Tests plot, segments and padded follow the offsets"""
+        bundle = tr.PyTrace_Bundle(self.create_scene(), *self.starts_dirs(), 6)
+        paths = [bundle.path(i) for i in range(len(bundle))]
+
+        for a, b in zip(bundle.plot(), paths):
+            assert_array_equal(a, b)
+
+        expected = np.concatenate([np.stack((p[:-1], p[1:]), axis=1) for p in paths])
+        assert_array_equal(bundle.segments(), expected)
+
+        padded = bundle.padded(12)
+        self.assertEqual(padded.shape, (len(bundle), 12, 2))
+
+        for p, q in zip(padded, paths):
+            assert_array_equal(p[:len(q)], q)
+            assert_array_equal(p[len(q):], np.broadcast_to(q[-1], (12 - len(q), 2)))
+
+        self.assertEqual(bundle.padded().shape[1], bundle.lengths.max())
+
+        with self.assertRaises(ValueError):
+            bundle.padded(2)
+
+    def test_PyTrace_Bundle_input_check(self):
+        """Tests PyTrace_Bundle rejects bad arguments and handles no rays"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs[:-1], 3)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts[:, :1], dirs, 3)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, 3, alpha=-1.0)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, 3, roulette_threshold=-1.0)
+
+        empty = tr.PyTrace_Bundle(comps, np.zeros((0, 2)), np.zeros((0, 2)), 3)
+        self.assertEqual(len(empty), 0)
+        assert_array_equal(empty.offsets, [0])
+        self.assertEqual(empty.plot(), [])
+        self.assertEqual(empty.segments().shape, (0, 2, 2))
+
+    def test_PyTrace_Bundle_out_buffers(self):
+        """
+        Checks paths written to output arrays match the bundle padded to
+        n + 1 points, with the status of each ray.
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        N, n = starts.shape[0], 6
+
+        bundle = tr.PyTrace_Bundle(comps, starts, dirs, n)
+
+        pos = np.full((N, n + 1, 2), np.nan)
+        v = np.empty((N, 2))
+        w = np.empty(N)
+        status = np.empty(N, dtype=np.int32)
+
+        ans = tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=pos, 
+                                out_directions=v, out_status=status, out_weights=w)
+
+        self.assertIsNone(ans)
+        assert_array_equal(pos, bundle.padded(n + 1))
+        assert_array_equal(v, bundle.directions)
+        assert_array_equal(w, bundle.weights)
+
+        # Rays leave back through the plane, stop on the screen or miss
+        assert_array_equal(status, [tr.TRACE_ESCAPED] * 5 
+                           + [tr.TRACE_STOPPED, tr.TRACE_ESCAPED])
+
+        # Rays used up all n = 1 interactions before escaping or stopping
+        tr.PyTrace_Bundle(comps, starts, dirs, 1, out_positions=pos[:, :2].copy(),
+                          out_status=status)
+        assert_array_equal(status, tr.TRACE_ACTIVE)
+
+        # Roulette stops rays
+        tr.PyTrace_Bundle(comps, starts, dirs, n, roulette_threshold=10.0, 
+                          out_positions=pos, out_status=status)
+        self.assertIn(tr.TRACE_STOPPED, status[:5])
+
+    def test_PyTrace_Bundle_out_memmap_shared_memory(self):
+        """Checks disk and shared memory backed arrays are written in place"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        N, n = starts.shape[0], 4
+        expected = tr.PyTrace_Bundle(comps, starts, dirs, n).padded(n + 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "paths.dat")
+            mm = np.memmap(path, dtype=np.double, mode="w+", shape=(N, n + 1, 2))
+
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=mm)
+            mm.flush()
+            del mm
+
+            assert_array_equal(np.memmap(path, dtype=np.double, mode="r", 
+                                         shape=(N, n + 1, 2)), expected)
+
+        shm = shared_memory.SharedMemory(create=True, size=N * (n + 1) * 2 * 8)
+
+        try:
+            pos = np.ndarray((N, n + 1, 2), dtype=np.double, buffer=shm.buf)
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=pos)
+            assert_array_equal(pos, expected)
+            del pos
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_PyTrace_Bundle_out_check(self):
+        """Tests bad output arrays are rejected"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        N, n = starts.shape[0], 3
+        pos = np.empty((N, n + 1, 2))
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=np.empty((N, n, 2)))
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, 
+                              out_positions=np.empty((N, n + 1, 2), dtype=np.float32))
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=pos, 
+                              out_status=np.empty(N, dtype=np.int64))
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, 
+                              out_positions=np.empty((N, 2, n + 1)).transpose(0, 2, 1))
+
+        read_only = np.empty((N, n + 1, 2))
+        read_only.flags.writeable = False
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=read_only)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_directions=np.empty((N, 2)))
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_weights=np.empty(N))
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=np.empty((N, n + 1, 2)),
+                              out_weights=np.empty(N + 1))
+
+    def test_PyTrace_Bundle_float32(self):
+        """
+        Checks float32 results are the float64 results rounded, both in a
+        bundle and in output arrays.
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        N, n = starts.shape[0], 6
+
+        double = tr.PyTrace_Bundle(comps, starts, dirs, n)
+        single = tr.PyTrace_Bundle(comps, starts, dirs, n, dtype=np.float32)
+
+        self.assertEqual(double.dtype, np.float64)
+        self.assertEqual(single.dtype, np.float32)
+
+        for name in ("points", "directions", "weights", "end_points"):
+            self.assertEqual(getattr(single, name).dtype, np.float32)
+            assert_array_equal(getattr(single, name), 
+                               getattr(double, name).astype(np.float32))
+
+        assert_array_equal(single.offsets, double.offsets)
+        assert_array_equal(single.path(2), double.path(2).astype(np.float32))
+        self.assertEqual(single.segments().dtype, np.float32)
+
+        pos = np.empty((N, n + 1, 2), dtype=np.float32)
+        v = np.empty((N, 2), dtype=np.float32)
+        w = np.empty(N, dtype=np.float32)
+
+        tr.PyTrace_Bundle(comps, starts, dirs, n, out_positions=pos, 
+                          out_directions=v, out_weights=w, dtype=np.float32)
+
+        assert_array_equal(pos, single.padded(n + 1))
+        assert_array_equal(v, single.directions)
+        assert_array_equal(w, single.weights)
+
+        # Output arrays must match dtype
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, dtype=np.float32,
+                              out_positions=np.empty((N, n + 1, 2)))
+
+        rays = [tr.PyRay(s, d) for s, d in zip(starts, dirs)]
+        tr.PyTrace(comps, rays, n, fill_up=False)
+        packed = tr.PyRay_Bundle.from_rays(rays, dtype=np.float32)
+        assert_array_equal(packed.points, single.points)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, n, dtype=np.int32)
+
+        with self.assertRaises(TypeError):
+            tr.PyRay_Bundle.from_rays(rays, dtype=np.float16)
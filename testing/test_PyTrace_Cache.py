@@ -0,0 +1,216 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyTrace_Cache(unittest.TestCase):
+    """Tests caching trace results on disk"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = tr.PyTrace_Cache(os.path.join(self.tmp_dir.name, "cache"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_scene(self):
+        """A mirror, a lens made of planes and an array of screens"""
+        lens = tr.PyComplex_Component([
+            tr.PyRefract_Plane(np.array([1.0, -5.0]), np.array([1.0, 5.0]), 
+                               1.0, 1.5, 0.0, 0.1),
+            tr.PyRefract_Plane(np.array([1.5, -5.0]), np.array([1.5, 5.0]), 
+                               1.5, 1.0, 0.1, 0.0)])
+        screens = tr.PyScreen_Plane.many(np.array([[2.0, -5.0], [2.0, 2.0]]),
+                                         np.array([[2.0, -2.0], [2.0, 5.0]]))
+
+        return [tr.PyMirror_Plane(np.array([3.0, -1.0]), np.array([3.0, 1.0]), 
+                                  reflectivity=0.5), lens, screens]
+
+    def starts_dirs(self):
+        """Rays starting left of the scene at different angles"""
+        starts = np.array([[0.0, y] for y in np.linspace(-3.0, 3.0, 7)])
+        dirs = np.array([unit_vec(a) for a in np.linspace(-0.2, 0.2, 7)])
+
+        return starts, dirs
+
+    def test_PyTrace_Cache_Bundle(self):
+        """
+        Checks a repeated PyTrace_Bundle call is loaded from the cache with 
+        the same result
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        for dtype in (np.double, np.float32):
+            first = tr.PyTrace_Bundle(comps, starts, dirs, 6, alpha=0.1, 
+                                      dtype=dtype, cache=self.cache)
+            hits = self.cache.hits
+            second = tr.PyTrace_Bundle(comps, starts, dirs, 6, alpha=0.1, 
+                                       dtype=dtype, cache=self.cache)
+
+            self.assertEqual(self.cache.hits, hits + 1)
+            self.assertEqual(second.dtype, dtype)
+
+            for name in ("points", "offsets", "directions", "weights"):
+                assert_array_equal(getattr(second, name), getattr(first, name))
+
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.hit_rate, 0.5)
+        self.assertGreater(self.cache.bytes_saved, 0)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_PyTrace_Cache_Rays(self):
+        """Checks a repeated PyTrace call restores the same ray states"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        results = []
+
+        for i in range(2):
+            rays = [tr.PyRay(s, d, 0.1) for s, d in zip(starts, dirs)]
+            tr.PyTrace(comps, rays, 6, roulette_threshold=0.4, seed=2, 
+                       cache=self.cache)
+            results.append(rays)
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        for r1, r2 in zip(*results):
+            assert_array_equal(r2.pos, r1.pos)
+            assert_array_equal(r2.v, r1.v)
+            self.assertEqual(r2.weight, r1.weight)
+            self.assertEqual(r2.alpha, r1.alpha)
+
+        # Tracing the cached rays further continues from the restored state
+        for rays in results:
+            tr.PyTrace(comps, rays, 2)
+
+        for r1, r2 in zip(*results):
+            assert_array_equal(r2.pos, r1.pos)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace(comps, results[0], 1, cache=self.cache, 
+                       params=[(comps[0], "start")])
+
+    def test_PyTrace_Cache_Key(self):
+        """Checks changing the components or rays misses the cache"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        tr.PyTrace_Bundle(comps, starts, dirs, 6, cache=self.cache)
+
+        changes = [lambda: setattr(comps[0], "reflectivity", 0.6),
+                   lambda: setattr(comps[0], "start", np.array([3.0, -1.5])),
+                   lambda: starts.__setitem__((0, 1), -2.9)]
+
+        for change in changes:
+            misses = self.cache.misses
+            change()
+            tr.PyTrace_Bundle(comps, starts, dirs, 6, cache=self.cache)
+            self.assertEqual(self.cache.misses, misses + 1)
+
+        misses = self.cache.misses
+
+        for args in ((7,), (6, 0.1), (6, 0.0, 0.2)):
+            tr.PyTrace_Bundle(comps, starts, dirs, *args, cache=self.cache)
+
+        tr.PyTrace_Bundle(comps[::-1], starts, dirs, 6, cache=self.cache)
+        tr.PyTrace_Bundle(comps, starts, dirs, 6, dtype=np.float32, cache=self.cache)
+
+        self.assertEqual(self.cache.misses, misses + 5)
+
+        # Equal components created again give the same key
+        hits = self.cache.hits
+        tr.PyTrace_Bundle(self.create_scene(), *self.starts_dirs(), 6, 
+                          cache=self.cache)
+        self.assertEqual(self.cache.hits, hits + 1)
+
+        # Sub-components of complex components and arrays are fingerprinted
+        moved = self.create_scene()
+        moved[2] = tr.PyScreen_Plane.many(np.array([[2.1, -5.0], [2.0, 2.0]]),
+                                          np.array([[2.1, -2.0], [2.0, 5.0]]))
+        wrapped = self.create_scene()
+        wrapped[1] = tr.PyBiConvexLens(np.array([1.2, 0.0]), 1.0, 3.0, 3.0, 0.3, 1.5)
+        wrapped_thick = self.create_scene()
+        wrapped_thick[1] = tr.PyBiConvexLens(np.array([1.2, 0.0]), 1.0, 3.0, 3.0, 0.4, 1.5)
+
+        for scene in (moved, wrapped, wrapped_thick):
+            misses = self.cache.misses
+            tr.PyTrace_Bundle(scene, *self.starts_dirs(), 6, cache=self.cache)
+            self.assertEqual(self.cache.misses, misses + 1)
+
+    def test_PyTrace_Cache_Eviction(self):
+        """Checks the least recently used entries are evicted"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        tr.PyTrace_Bundle(comps, starts, dirs, 1, cache=self.cache)
+        entry_size = self.cache.size
+
+        cache = tr.PyTrace_Cache(self.cache.directory, 
+                                 max_bytes=int(2.5 * entry_size))
+
+        # Uses n = 1 again so it is more recent than n = 2
+        tr.PyTrace_Bundle(comps, starts, dirs, 2, cache=cache)
+        tr.PyTrace_Bundle(comps, starts, dirs, 1, cache=cache)
+        tr.PyTrace_Bundle(comps, starts, dirs, 3, cache=cache)
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+        tr.PyTrace_Bundle(comps, starts, dirs, 1, cache=cache)
+        tr.PyTrace_Bundle(comps, starts, dirs, 2, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Cache(self.cache.directory, max_bytes=-1)
+
+    def test_PyTrace_Cache_Corrupt(self):
+        """Checks a corrupt entry is a miss and is replaced"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+
+        first = tr.PyTrace_Bundle(comps, starts, dirs, 4, cache=self.cache)
+        path = os.path.join(self.cache.directory, os.listdir(self.cache.directory)[0])
+
+        with open(path, "wb") as f:
+            f.write(b"not an npz file")
+
+        second = tr.PyTrace_Bundle(comps, starts, dirs, 4, cache=self.cache)
+        third = tr.PyTrace_Bundle(comps, starts, dirs, 4, cache=self.cache)
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        assert_array_equal(second.points, first.points)
+        assert_array_equal(third.points, first.points)
+
+    def test_PyTrace_Cache_Out_Positions(self):
+        """Checks the cache can't be combined with output arrays"""
+        starts, dirs = self.starts_dirs()
+        out = np.empty((len(starts), 3, 2))
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(self.create_scene(), starts, dirs, 2, 
+                              out_positions=out, cache=self.cache)
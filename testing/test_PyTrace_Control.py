@@ -0,0 +1,209 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import threading
+
+import tracing as tr
+from generic_test_functions import *
+
+class Test_PyTrace_Control(unittest.TestCase):
+    """Tests progress reporting, time budgets and cancelling PyTrace"""
+
+    def create_cavity(self):
+        """Two long parallel mirrors rays bounce between, one absorbing"""
+        return [tr.PyMirror_Plane(np.array([0.0, -1e6]), np.array([0.0, 1e6]), 
+                                  reflectivity=0.9),
+                tr.PyMirror_Plane(np.array([1.0, -1e6]), np.array([1.0, 1e6]))]
+
+    def create_rays(self, n_rays):
+        """Rays starting between the mirrors at different angles"""
+        return [tr.PyRay(np.array([0.5, 0.0]), unit_vec(a)) 
+                for a in np.linspace(-0.5, 0.5, n_rays)]
+
+    def check_partial(self, rays, done, n):
+        """
+        Checks the first done rays match a complete trace and the rest are
+        untouched
+        """
+        expected = self.create_rays(len(rays))[:done]
+        tr.PyTrace(self.create_cavity(), expected, n, roulette_threshold=0.5, 
+                   seed=1)
+
+        traced = tr.PyRay_Bundle.from_rays(rays[:done])
+        expected = tr.PyRay_Bundle.from_rays(expected)
+
+        assert_array_equal(traced.points, expected.points)
+        assert_array_equal(traced.offsets, expected.offsets)
+        assert_array_equal(traced.weights, expected.weights)
+
+        assert_array_equal(tr.PyRay_Bundle.from_rays(rays[done:]).lengths, 1)
+
+    def test_PyTrace_Control_Progress(self):
+        """Checks progress is reported every progress_every rays and at the end"""
+        calls = []
+        rays = self.create_rays(25)
+
+        tr.PyTrace(self.create_cavity(), rays, 10, progress_every=10,
+                   progress=lambda done, total: calls.append((done, total)))
+
+        self.assertEqual(calls, [(10, 25), (20, 25), (25, 25)])
+
+        calls.clear()
+        control = tr.PyTrace_Control()
+        tr.PyTrace(self.create_cavity(), self.create_rays(20), 10, control=control,
+                   progress_every=10, 
+                   progress=lambda done, total: calls.append((done, control.done)))
+
+        self.assertEqual(calls, [(10, 10), (20, 20)])
+        self.assertEqual(control.done, 20)
+        self.assertFalse(control.cancelled)
+        self.assertFalse(control.timed_out)
+
+    def test_PyTrace_Control_Time_Budget(self):
+        """Checks tracing stops once the time budget runs out"""
+        rays = self.create_rays(20)
+        control = tr.PyTrace_Control()
+        tr.PyTrace(self.create_cavity(), rays, 100, time_budget=0.0, 
+                   control=control)
+
+        self.assertTrue(control.timed_out)
+        self.assertEqual(control.done, 0)
+        self.check_partial(rays, 0, 100)
+
+        rays = self.create_rays(20000)
+        tr.PyTrace(self.create_cavity(), rays, 1000, roulette_threshold=0.5, 
+                   seed=1, time_budget=0.02, control=control)
+
+        self.assertTrue(control.timed_out)
+        self.assertGreater(control.done, 0)
+        self.assertLess(control.done, len(rays))
+        self.check_partial(rays, control.done, 1000)
+
+        # The budget applies to each trace
+        tr.PyTrace(self.create_cavity(), self.create_rays(5), 10, control=control)
+        self.assertFalse(control.timed_out)
+        self.assertEqual(control.done, 5)
+
+    def test_PyTrace_Control_Cancel(self):
+        """Checks cancelling from a callback or another thread"""
+        rays = self.create_rays(50)
+        control = tr.PyTrace_Control()
+
+        def progress(done, total):
+            if done == 20:
+                control.cancel()
+
+        tr.PyTrace(self.create_cavity(), rays, 1000, roulette_threshold=0.5, 
+                   seed=1, progress=progress, progress_every=10, control=control)
+
+        self.assertTrue(control.cancelled)
+        self.assertEqual(control.done, 20)
+        self.check_partial(rays, 20, 1000)
+
+        # A cancelled token stops later traces immediately
+        rays = self.create_rays(5)
+        tr.PyTrace(self.create_cavity(), rays, 10, control=control)
+        self.assertEqual(control.done, 0)
+        self.assertEqual(len(rays[0].pos), 1)
+
+        rays = self.create_rays(20000)
+        control = tr.PyTrace_Control()
+        timer = threading.Timer(0.02, control.cancel)
+        timer.start()
+
+        tr.PyTrace(self.create_cavity(), rays, 1000, roulette_threshold=0.5, 
+                   seed=1, control=control)
+        timer.join()
+
+        self.assertLess(control.done, len(rays))
+        self.check_partial(rays, control.done, 1000)
+
+    def test_PyTrace_Control_Progress_Raises(self):
+        """Checks an exception raised by progress stops tracing and is raised"""
+        rays = self.create_rays(30)
+
+        def progress(done, total):
+            raise KeyError(done)
+
+        with self.assertRaises(KeyError):
+            tr.PyTrace(self.create_cavity(), rays, 10, progress=progress, 
+                       progress_every=10)
+
+        self.assertEqual(len(rays[9].pos), 11)
+        self.assertEqual(len(rays[10].pos), 1)
+
+    def test_PyTrace_Control_Progress_Raises_Reuse(self):
+        """
+        Checks a token whose progress callback raised isn't cancelled and 
+        traces every ray when reused
+        """
+        control = tr.PyTrace_Control()
+        calls = []
+
+        def progress(done, total):
+            calls.append(done)
+            raise KeyError(done)
+
+        with self.assertRaises(KeyError):
+            tr.PyTrace(self.create_cavity(), self.create_rays(30), 10, 
+                       progress=progress, progress_every=10, control=control)
+
+        # The callback isn't called again once it has raised
+        self.assertEqual(calls, [10])
+        self.assertFalse(control.cancelled)
+
+        rays = self.create_rays(30)
+        tr.PyTrace(self.create_cavity(), rays, 10, control=control)
+
+        self.assertEqual(control.done, 30)
+        assert_array_equal(tr.PyRay_Bundle.from_rays(rays).lengths, 11)
+
+    def test_PyTrace_Control_Cache(self):
+        """Checks the results of traces which stop early aren't cached"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = tr.PyTrace_Cache(os.path.join(tmp_dir, "cache"))
+            tr.PyTrace(self.create_cavity(), self.create_rays(10), 10, 
+                       time_budget=0.0, cache=cache)
+            self.assertEqual(len(cache), 0)
+
+            calls = []
+            for i in range(2):
+                tr.PyTrace(self.create_cavity(), self.create_rays(10), 10, cache=cache,
+                           progress=lambda done, total: calls.append(done))
+
+            self.assertEqual((cache.hits, len(cache)), (1, 1))
+            self.assertEqual(calls, [10, 10])
+
+    def test_PyTrace_Control_Errors(self):
+        """Checks invalid arguments raise the right exceptions"""
+        comps, rays = self.create_cavity(), self.create_rays(2)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace(comps, rays, 3, progress=1)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace(comps, rays, 3, control=threading.Event())
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace(comps, rays, 3, progress=print, progress_every=0)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace(comps, rays, 3, time_budget=-1.0)
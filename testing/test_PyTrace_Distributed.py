@@ -0,0 +1,183 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import socket
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+class Test_PyTrace_Distributed(unittest.TestCase):
+    """Tests tracing shards of rays on worker processes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workers = tr.PyLocal_Workers(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.workers.close()
+
+    def create_scene(self):
+        """A partial mirror, a lens made of planes and an array of screens"""
+        lens = tr.PyComplex_Component([
+            tr.PyRefract_Plane(np.array([1.0, -5.0]), np.array([1.0, 5.0]), 
+                               1.0, 1.5, 0.0, 0.1),
+            tr.PyRefract_Plane(np.array([1.5, -5.0]), np.array([1.5, 5.0]), 
+                               1.5, 1.0, 0.1, 0.0)])
+        screens = tr.PyScreen_Plane.many(np.array([[2.0, -5.0], [2.0, 2.0]]),
+                                         np.array([[2.0, -2.0], [2.0, 5.0]]))
+
+        return [tr.PyMirror_Plane(np.array([3.0, -1.0]), np.array([3.0, 1.0]), 
+                                  reflectivity=0.5), lens, screens,
+                tr.PyBiConvexLens(np.array([-2.0, 0.0]), 1.0, 3.0, 3.0, 0.3, 1.5)]
+
+    def starts_dirs(self, N=50):
+        """Rays starting between the lenses at different angles"""
+        starts = np.array([[0.0, y] for y in np.linspace(-4.0, 4.0, N)])
+        dirs = np.array([unit_vec(a) for a in np.linspace(-0.3, 0.3, N)])
+
+        return starts, dirs
+
+    def test_PyTrace_Distributed_Scene(self):
+        """Checks the scene sent to workers is rebuilt unchanged"""
+        comps = self.create_scene()
+        rebuilt = tr._build_scene(tr._scene_spec(comps))
+
+        self.assertEqual(tr._trace_key("scene", rebuilt), 
+                         tr._trace_key("scene", comps[:3] + [tr.PyComplex_Component(comps[3]._components)]))
+
+        with self.assertRaises(ValueError):
+            tr._build_scene([{"type": "PyTrace_Cache", "props": {"directory": "."}}])
+
+        with self.assertRaises(ValueError):
+            tr._build_scene([{"type": "_PyComponent", "props": {}}])
+
+    def test_PyTrace_Distributed_Local(self):
+        """
+        Checks the status and histogram match tracing each shard locally 
+        with its seed
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        extent = (-5.0, 5.0, -5.0, 5.0)
+
+        status, hist = tr.PyTrace_Distributed(comps, starts, dirs, 8, 
+                                              self.workers.addresses, alpha=0.1,
+                                              roulette_threshold=0.4, seed=3, 
+                                              shard_size=16, 
+                                              histogram_extent=extent,
+                                              histogram_bins=(20, 10))
+
+        self.assertEqual(status.shape, (50,))
+        self.assertEqual(hist.shape, (10, 20))
+
+        expected_status = np.empty(50, dtype=np.int32)
+        ends, weights = [], []
+
+        for i in range(4):
+            s = slice(16 * i, 16 * (i + 1))
+            positions = np.empty((len(starts[s]), 9, 2))
+            w = np.empty(len(starts[s]))
+
+            tr.PyTrace_Bundle(comps, starts[s], dirs[s], 8, 0.1, 0.4, 
+                              tr._shard_seed(3, i), out_positions=positions,
+                              out_status=expected_status[s], out_weights=w)
+
+            stopped = expected_status[s] == tr.TRACE_STOPPED
+            ends.append(positions[stopped, -1])
+            weights.append(w[stopped])
+
+        assert_array_equal(status, expected_status)
+        self.assertTrue(np.any(status == tr.TRACE_STOPPED))
+
+        ends = np.concatenate(ends)
+        expected, _, _ = np.histogram2d(ends[:, 1], ends[:, 0], bins=(10, 20),
+                                        range=[[-5.0, 5.0], [-5.0, 5.0]],
+                                        weights=np.concatenate(weights))
+        assert_allclose(hist, expected, rtol=1e-12, atol=1e-12)
+
+    def test_PyTrace_Distributed_Workers(self):
+        """
+        Checks the results don't depend on the number of workers and that 
+        shards of failed workers are traced by the others
+        """
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs(200)
+        kwargs = dict(roulette_threshold=0.4, seed=5, shard_size=7, 
+                      histogram_extent=(-5.0, 5.0, -5.0, 5.0))
+
+        one = tr.PyTrace_Distributed(comps, starts, dirs, 8, 
+                                     self.workers.addresses[:1], **kwargs)
+        two = tr.PyTrace_Distributed(comps, starts, dirs, 8, 
+                                     self.workers.addresses, **kwargs)
+
+        # Nothing listens on a port which was bound then closed
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            dead = sock.getsockname()
+
+        failed = tr.PyTrace_Distributed(comps, starts, dirs, 8, 
+                                        [dead] + self.workers.addresses, **kwargs)
+
+        for result in (two, failed):
+            assert_array_equal(result[0], one[0])
+            assert_array_equal(result[1], one[1])
+
+        status, hist = tr.PyTrace_Distributed(comps, starts, dirs, 8, 
+                                              self.workers.addresses, 
+                                              shard_size=1000)
+        self.assertIsNone(hist)
+        self.assertEqual(status.shape, (200,))
+
+        with self.assertRaises(ConnectionError):
+            tr.PyTrace_Distributed(comps, starts, dirs, 8, [dead])
+
+    def test_PyTrace_Distributed_Errors(self):
+        """Checks invalid arguments raise errors"""
+        comps = self.create_scene()
+        starts, dirs = self.starts_dirs()
+        addresses = self.workers.addresses
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Distributed(comps, starts, dirs, 8, [])
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Distributed(comps, starts, dirs, 8, addresses, shard_size=0)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Distributed(comps, starts, dirs, 8, addresses, 
+                                   histogram_extent=(1.0, -1.0, 0.0, 1.0))
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Distributed(comps, starts, dirs, 8, addresses, 
+                                   histogram_extent=(-1.0, 1.0, -1.0, 1.0),
+                                   histogram_bins=0)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Distributed(comps, starts[:, :1], dirs, 8, addresses)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Distributed(comps + [1], starts, dirs, 8, addresses)
+
+        with self.assertRaises(TypeError):
+            tr.PyLocal_Workers("2")
+
+        with self.assertRaises(ValueError):
+            tr.PyLocal_Workers(0)
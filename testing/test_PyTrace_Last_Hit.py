@@ -0,0 +1,99 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def scene(scale):
+    """
+    Returns mirrors at the given scale, a circle inside a square made of a
+    polyline and two planes, with a Bezier bulging into the square.
+    """
+    s = scale
+    circle = tr.PyMirror_Sph(np.array([0.0, 0.0]) * s, 1.0 * s, -np.pi, np.pi)
+    walls = tr.PyMirror_Polyline(np.array([[-3.0, -3.0], [3.0, -3.0], [3.0, 3.0]]) * s)
+    top = tr.PyMirror_Plane(np.array([3.0, 3.0]) * s, np.array([-3.0, 3.0]) * s)
+    left = tr.PyMirror_Plane(np.array([-3.0, 3.0]) * s, np.array([-3.0, -3.0]) * s)
+    bulge = tr.PyMirror_Bezier(np.array([[-2.9, -2.9], [-1.9, -2.4], [-2.4, -1.9], 
+                                         [-2.9, -2.9]]) * s)
+
+    return [circle, walls, top, left, bulge]
+
+
+def paths(scale, n=20):
+    """Returns the paths of rays bouncing n times in scene(scale), in units of scale"""
+    angles = np.linspace(0.1, 1.4, 7)
+    starts = np.tile(np.array([[-2.0, 2.0]]), (len(angles), 1)) * scale
+    directions = np.stack([np.cos(angles), -np.sin(angles)], axis=1)
+
+    out = np.empty((len(angles), n + 1, 2))
+    status = np.empty(len(angles), dtype=np.int32)
+    tr.PyTrace_Bundle(scene(scale), starts, directions, n, out_positions=out, 
+                      out_status=status)
+
+    return out / scale, status
+
+
+class Test_PyTrace_Last_Hit(unittest.TestCase):
+    """Tests rays don't hit the primitive they are leaving, at any scale"""
+
+    def test_PyTrace_Last_Hit_scale_invariant(self):
+        """Tests paths are the same once scaled, for scenes much larger and smaller than 1"""
+        expected, expected_status = paths(1.0)
+
+        self.assertTrue(np.all(expected_status == tr.TRACE_ACTIVE))
+
+        for scale in [1e-9, 1e-5, 1e5, 1e9]:
+            actual, status = paths(scale)
+
+            assert_array_equal(status, expected_status)
+            assert_allclose(actual, expected, atol=1e-6)
+
+    def test_PyTrace_Last_Hit_no_repeated_hits(self):
+        """Tests consecutive hits are separated, so no bounce is spent on the same point"""
+        for scale in [1e-9, 1.0, 1e9]:
+            actual, _ = paths(scale)
+            steps = np.linalg.norm(np.diff(actual, axis=1), axis=2)
+
+            self.assertGreater(steps.min(), 1e-3)
+
+    def test_PyTrace_Last_Hit_circle_inside(self):
+        """Tests a ray inside a circular mirror hits the far side each time"""
+        for scale in [1e-9, 1.0, 1e9]:
+            m = tr.PyMirror_Sph(np.array([1.0, -2.0]) * scale, scale, -np.pi, np.pi)
+            ray = tr.PyRay(np.array([1.0, -2.0]) * scale, unit_vec(0.3))
+            tr.PyTrace([m], [ray], 12)
+
+            pos = ray.pos / scale
+            chords = np.linalg.norm(np.diff(pos[1:], axis=0), axis=1)
+
+            self.assertEqual(len(pos), 13)
+            assert_allclose(np.linalg.norm(pos[1:] - np.array([1.0, -2.0]), axis=1), 1.0)
+            assert_allclose(chords, 2.0, rtol=1e-6)
+
+    def test_PyTrace_Last_Hit_retrace(self):
+        """Tests a ray traced again continues from the surface it stopped on"""
+        m = tr.PyMirror_Sph(np.array([0.0, 0.0]), 1e9, -np.pi, np.pi)
+        ray = tr.PyRay(np.array([0.0, 0.0]), unit_vec(0.0))
+        tr.PyTrace([m], [ray], 1)
+        tr.PyTrace([m], [ray], 1)
+
+        assert_allclose(ray.pos, [[0.0, 0.0], [1e9, 0.0], [-1e9, 0.0]], atol=1e-3)
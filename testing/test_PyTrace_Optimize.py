@@ -0,0 +1,183 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+
+
+def parallel_rays(heights, x=-2.0):
+    """Returns rays travelling in the x direction at the given heights"""
+    return [tr.PyRay(np.array([x, y]), np.array([1.0, 0.0])) for y in heights]
+
+
+class Test_PyTrace_Optimize(unittest.TestCase, useful_checks):
+    """Tests for the optimisation function optimize"""
+
+    def test_PyTrace_Optimize_Focus_Leaf_Param(self):
+        """
+        Optimises the radius of a refracting surface so parallel rays focus
+        at a target and checks the focus using the lensmaker's formula.
+        """
+        n_in, R = 1.5, 4.0
+
+        sph = tr.PyRefract_Sph(np.array([3.0, 0.0]), R, np.pi - 0.3, 
+                               np.pi + 0.3, n_in, 1.0)
+
+        # Near axis rays so the paraxial focus applies
+        rays = parallel_rays([-0.01, 0.01])
+
+        target = 10.0
+        res = tr.optimize([sph], [(sph, 'R')], tr.focus_merit(target), rays,
+                          2, fill_up=False)
+
+        self.assertTrue(res['converged'])
+        self.assertLess(res['cost'], 1e-16)
+        self.assertEqual(sph.R, res['x'][0])
+
+        # Focal length from the vertex, f = n R / (n - 1)
+        vertex = sph.centre[0] - sph.R
+        self.assertAlmostEqual(vertex + n_in * sph.R / (n_in - 1), target, 
+                               places=4)
+
+        # Rays are left traced through the optimised system
+        self.assertEqual(len(rays[0].pos), 3)
+
+    def test_PyTrace_Optimize_Traced_Rays_Start(self):
+        """
+        Rays that have already been traced, and had their directions changed
+        since, are optimised from their initial directions like new rays.
+        """
+        def optimise(rays):
+            sph = tr.PyRefract_Sph(np.array([3.0, 0.0]), 4.0, np.pi - 0.3, 
+                                   np.pi + 0.3, 1.5, 1.0)
+            res = tr.optimize([sph], [(sph, 'R')], tr.focus_merit(10.0), 
+                              rays, 2, fill_up=False)
+            return res['x']
+
+        traced = parallel_rays([-0.01, 0.01])
+        tr.PyTrace([], traced, 2, fill_up=True)
+
+        for r in traced:
+            r.v = np.array([0.0, 1.0])
+
+        np.testing.assert_allclose(optimise(traced), 
+                                   optimise(parallel_rays([-0.01, 0.01])))
+        assert_array_equal(traced[0].v_start, [1.0, 0.0])
+
+    def test_PyTrace_Optimize_Spot_Complex_Param(self):
+        """
+        Optimises R1 of a PyLens to minimise the spot on a screen.
+        """
+        lens = tr.PyLens(np.array([0.0, 0.0]), 1.0, 5.0, 5.0, 0.2, 1.5)
+        screen = tr.PyScreen_Plane(np.array([8.0, -3.0]), np.array([8.0, 3.0]))
+
+        rays = parallel_rays([-0.5, -0.25, 0.25, 0.5])
+
+        def rms_spot():
+            return np.std([r.pos[-1][1] for r in rays])
+
+        tr.PyTrace([lens, screen], rays, 4)
+        initial = rms_spot()
+
+        res = tr.optimize([lens, screen], [(lens, 'R1')], 'spot', rays, 4)
+
+        self.assertTrue(res['converged'])
+        self.assertEqual(lens.R1, res['x'][0])
+        self.assertLess(rms_spot(), initial / 10)
+
+        # Second arc is unchanged
+        self.assertAlmostEqual(lens[2].R, 5.0)
+
+    def test_PyTrace_Optimize_Configs(self):
+        """
+        Checks each configuration is traced and the residuals concatenated.
+        """
+        sph = tr.PyRefract_Sph(np.array([3.0, 0.0]), 4.0, np.pi - 0.3, 
+                               np.pi + 0.3, 1.5, 1.0)
+        rays = parallel_rays([-0.01, 0.01])
+        calls = []
+
+        def config(n_in):
+            def f():
+                calls.append(n_in)
+                sph.n_in = n_in
+            return f
+
+        merit = tr.focus_merit(10.0)
+
+        res = tr.optimize([sph], [(sph, 'R')], merit, rays, 2, 
+                          configs=[config(1.5), config(1.6)], fill_up=False)
+
+        self.assertGreater(len(calls), 2)
+        self.assertEqual(calls[:2], [1.5, 1.6])
+
+        # Neither index can be focused at target so cost is a compromise
+        self.assertGreater(res['cost'], 0.0)
+        
+        cost = 0.0
+        for n_in in (1.5, 1.6):
+            sph.n_in = n_in
+
+            for r in rays:
+                r.reset(np.array([1.0, 0.0]))
+
+            tr.PyTrace([sph], rays, 2, fill_up=False)
+            cost += 0.5 * np.sum(merit(rays)[0]**2)
+
+        self.assertAlmostEqual(res['cost'], cost)
+
+    def test_PyTrace_Optimize_Bounds(self):
+        """
+        Checks the parameters are kept within the bounds.
+        """
+        sph = tr.PyRefract_Sph(np.array([3.0, 0.0]), 4.0, np.pi - 0.3, 
+                               np.pi + 0.3, 1.5, 1.0)
+        rays = parallel_rays([-0.01, 0.01])
+
+        res = tr.optimize([sph], [(sph, 'R'), (sph, 'centre')], 
+                          tr.focus_merit(20.0), rays, 2, bounds=[(None, 4.5), None],
+                          fill_up=False)
+
+        self.assertLessEqual(sph.R, 4.5)
+        self.assertTrue(res['converged'])
+        self.assertLess(res['cost'], 1e-16)
+
+    def test_PyTrace_Optimize_Invalid(self):
+        """
+        Checks invalid parameters, merit functions and bounds raise.
+        """
+        lens = tr.PyLens(np.array([0.0, 0.0]), 1.0, 5.0, 5.0, 0.2, 1.5)
+        rays = parallel_rays([0.5])
+
+        with self.assertRaises(TypeError):
+            tr.optimize([lens], [(lens.PyCC, 'R1')], 'spot', rays, 4)
+
+        with self.assertRaises(ValueError):
+            tr.optimize([lens], [(lens, 'not_a_param')], 'spot', rays, 4)
+
+        with self.assertRaises(ValueError):
+            tr.optimize([lens], [(lens[0], 'R1')], 'spot', rays, 4)
+
+        with self.assertRaises(ValueError):
+            tr.optimize([lens], [(lens, 'R1')], 'not_a_merit', rays, 4)
+
+        with self.assertRaises(ValueError):
+            tr.optimize([lens], [(lens, 'R1')], 'spot', rays, 4, 
+                        bounds=[None, None])
+
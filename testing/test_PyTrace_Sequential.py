@@ -0,0 +1,159 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def lens_surfaces(x, R=20.0, h=3.0, d=2.0, n=1.5):
+    """Returns the left and right surfaces of a biconvex lens centred at (x, 0)"""
+    a = np.arcsin(h / R)
+    left = tr.PyRefract_Sph(np.array([x - d / 2 + R, 0.0]), R, np.pi - a, np.pi + a, n, 1.0)
+    right = tr.PyRefract_Sph(np.array([x + d / 2 - R, 0.0]), R, -a, a, n, 1.0)
+
+    return [left, right]
+
+
+def lens_stack():
+    """Returns the surfaces of three lenses in order followed by a screen"""
+    comps = lens_surfaces(0.0) + lens_surfaces(10.0) + lens_surfaces(20.0)
+    comps.append(tr.PyScreen_Plane(np.array([30.0, -10.0]), np.array([30.0, 10.0])))
+
+    return comps
+
+
+def parallel_rays(y):
+    """Returns rays travelling in the x direction from x = -5 at heights y"""
+    return [tr.PyRay(np.array([-5.0, yi]), np.array([1.0, 0.0])) for yi in y]
+
+
+class Test_PyTrace_Sequential(unittest.TestCase):
+    """Tests tracing an ordered surface list sequentially"""
+
+    def test_PyTrace_Sequential_same_paths(self):
+        """Tests rays through the aperture take the same paths in every order"""
+        y = np.linspace(-2.5, 2.5, 11)
+        expected = parallel_rays(y)
+        tr.PyTrace(lens_stack(), expected, 10)
+
+        for fallback in [False, True]:
+            rays = parallel_rays(y)
+            tr.PyTrace(lens_stack(), rays, 10, sequential=True, fallback=fallback)
+
+            for r, e in zip(rays, expected):
+                assert_allclose(r.pos, e.pos)
+                assert_allclose(r.v, e.v)
+
+    def test_PyTrace_Sequential_complex(self):
+        """Tests rays cross complex components before moving on to the next"""
+        def lenses():
+            return [tr.PyLens(np.array([x, 0.0]), 3.0, 20.0, 20.0, 1.0, 1.5) 
+                    for x in [0.0, 10.0]]
+
+        y = np.linspace(-2.5, 2.5, 11)
+        expected = parallel_rays(y)
+        tr.PyTrace(lenses(), expected, 6, fill_up=False)
+
+        rays = parallel_rays(y)
+        tr.PyTrace(lenses(), rays, 6, fill_up=False, sequential=True)
+
+        for r, e in zip(rays, expected):
+            self.assertEqual(len(r.pos), 6)
+            assert_allclose(r.pos, e.pos)
+
+    def test_PyTrace_Sequential_repeated(self):
+        """Tests a surface listed twice in a row is hit once for each"""
+        ball = tr.PyRefract_Sph(np.array([0.0, 0.0]), 1.0, -np.pi, np.pi, 1.5, 1.0)
+        screen = tr.PyScreen_Plane(np.array([5.0, -10.0]), np.array([5.0, 10.0]))
+
+        rays = parallel_rays([0.2])
+        tr.PyTrace([ball, ball, screen], rays, 5, fill_up=False, sequential=True)
+
+        self.assertEqual(len(rays[0].pos), 4)
+        self.assertEqual(rays[0].pos[-1][0], 5.0)
+
+    def test_PyTrace_Sequential_miss(self):
+        """Tests rays missing the next surface escape unless they fall back"""
+        expected = parallel_rays([4.0])
+        tr.PyTrace(lens_stack(), expected, 3, fill_up=False)
+
+        rays = parallel_rays([4.0])
+        tr.PyTrace(lens_stack(), rays, 3, fill_up=False, sequential=True)
+
+        assert_array_equal(rays[0].pos, [[-5.0, 4.0], [-4.0, 4.0]])
+
+        rays = parallel_rays([4.0])
+        tr.PyTrace(lens_stack(), rays, 3, fill_up=False, sequential=True, fallback=True)
+
+        assert_array_equal(rays[0].pos, expected[0].pos)
+        assert_array_equal(rays[0].pos, [[-5.0, 4.0], [30.0, 4.0]])
+
+    def test_PyTrace_Sequential_order(self):
+        """Tests surfaces are tested in the order of the list"""
+        rays = parallel_rays([1.0])
+        tr.PyTrace(lens_stack()[::-1], rays, 10, fill_up=False, sequential=True)
+
+        # The screen is first so the ray stops there without meeting a lens
+        assert_array_equal(rays[0].pos, [[-5.0, 1.0], [30.0, 1.0]])
+
+        # After the last surface of the first lens the ray escapes
+        rays = parallel_rays([1.0])
+        tr.PyTrace(lens_stack()[:2], rays, 5, fill_up=False, sequential=True)
+
+        self.assertEqual(len(rays[0].pos), 4)
+
+    def test_PyTrace_Sequential_bundle(self):
+        """Tests PyTrace_Bundle traces sequentially as PyTrace does"""
+        y = np.array([-4.0, -2.5, -1.0, 0.0, 1.0, 2.5, 4.0])
+        starts = np.stack([np.full(len(y), -5.0), y], axis=1)
+        directions = np.tile([1.0, 0.0], (len(y), 1))
+
+        for fallback in [False, True]:
+            rays = parallel_rays(y)
+            tr.PyTrace(lens_stack(), rays, 8, fill_up=False, sequential=True, 
+                       fallback=fallback)
+
+            out = np.empty((len(y), 9, 2))
+            status = np.empty(len(y), dtype=np.int32)
+            tr.PyTrace_Bundle(lens_stack(), starts, directions, 8, out_positions=out,
+                              out_status=status, sequential=True, fallback=fallback)
+            bundle = tr.PyTrace_Bundle(lens_stack(), starts, directions, 8, 
+                                       sequential=True, fallback=fallback)
+
+            for i, r in enumerate(rays):
+                m = len(r.pos)
+
+                assert_allclose(bundle.path(i), r.pos)
+                assert_allclose(out[i, :m], r.pos)
+                assert_allclose(out[i, m:], np.tile(r.pos[-1], (9 - m, 1)))
+
+            # Rays beyond the aperture only reach the screen if they fall back
+            missed = np.abs(y) > 3.0
+            assert_array_equal(status[~missed], tr.TRACE_STOPPED)
+            assert_array_equal(status[missed], tr.TRACE_STOPPED if fallback else tr.TRACE_ESCAPED)
+
+    def test_PyTrace_Sequential_fallback_requires_sequential(self):
+        """Tests fallback can't be given without sequential"""
+        with self.assertRaises(ValueError):
+            tr.PyTrace(lens_stack(), parallel_rays([0.0]), 2, fallback=True)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(lens_stack(), np.zeros((1, 2)), np.array([[1.0, 0.0]]), 2,
+                              fallback=True)
@@ -0,0 +1,175 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+from numpy.testing import assert_allclose
+
+
+def subsystem():
+    """Returns a lens fully covering the rays entering the port"""
+    return [tr.PyLens(np.array([3.0, 0.0]), 2.0, 4.0, 6.0, 0.2, 1.6)]
+
+
+def end_points(components, starts, directions, n=10):
+    """Returns where the rays end and their statuses"""
+    pos = np.empty((starts.shape[0], n + 1, 2))
+    status = np.empty(starts.shape[0], dtype=np.int32)
+
+    tr.PyTrace_Bundle(components, starts, directions, n, out_positions=pos, out_status=status)
+
+    return pos[:, -1], status
+
+
+class Test_PyTransfer(unittest.TestCase):
+    """Tests for PyTransfer"""
+    _start = np.array([0.0, 1.0])
+    _end = np.array([0.0, -1.0])
+    _max_angle = 0.1
+
+    def create_Obj(self, components=None, **kwargs):
+        """Creates an instance of PyTransfer by tabulating components"""
+        if components is None:
+            components = subsystem()
+
+        return tr.PyTransfer.tabulate(components, self._start, self._end, self._max_angle, 
+                                      tol=1e-5, angle_tol=1e-5, **kwargs)
+
+    def random_rays(self, N, max_angle):
+        """Returns rays from x = -1 crossing the port at angles up to max_angle"""
+        rng = np.random.default_rng(0)
+        a = rng.uniform(-max_angle, max_angle, N)
+        y = rng.uniform(-0.95, 0.95, N) - np.tan(a)
+
+        return np.column_stack([np.full(N, -1.0), y]), np.column_stack([np.cos(a), np.sin(a)])
+
+    def test_PyTransfer_tabulate_matches_trace(self):
+        """Tests rays through the table end where rays traced through the subsystem do"""
+        t = self.create_Obj()
+        screen = tr.PyScreen_Plane(np.array([10.0, -20.0]), np.array([10.0, 20.0]))
+        starts, dirs = self.random_rays(1000, self._max_angle * 0.99)
+
+        full, full_status = end_points(subsystem() + [screen], starts, dirs)
+        table, table_status = end_points([t, screen], starts, dirs)
+
+        self.assertEqual(t.unresolved_fraction, 0.0)
+        self.assertLessEqual(t.position_error, 1e-5)
+        self.assertLessEqual(t.direction_error, 1e-5)
+        assert_array_equal(table_status, full_status)
+        assert_allclose(table, full, atol=1e-4)
+
+    def test_PyTransfer_tabulate_hit_interactions(self):
+        """Tests a hit moves the ray to the port and then to its exit"""
+        t = self.create_Obj()
+        r = tr.PyRay(np.array([-1.0, 0.5]), np.array([1.0, 0.0]))
+        expected = tr.PyRay(np.array([-1.0, 0.5]), np.array([1.0, 0.0]))
+
+        tr.PyTrace([t], [r], 5, False)
+        tr.PyTrace(subsystem(), [expected], 5, False)
+
+        # Escaped rays end a step past their last position
+        self.assertEqual(len(r.pos), 4)
+        assert_allclose(r.pos[1], np.array([0.0, 0.5]), atol=1e-12)
+        assert_allclose(r.pos[2], expected.pos[-2], atol=1e-5)
+        assert_allclose(r.v, expected.v, atol=1e-5)
+
+    def test_PyTransfer_tabulate_stops(self):
+        """Tests rays stopped in the subsystem stop in the table"""
+        screen = tr.PyScreen_Plane(np.array([2.0, 0.0]), np.array([2.0, 2.0]))
+        t = self.create_Obj([screen], max_depth=4)
+        starts = np.array([[-1.0, 0.5], [-1.0, -0.5]])
+        dirs = np.array([[1.0, 0.0], [1.0, 0.0]])
+
+        end, status = end_points([t], starts, dirs)
+
+        assert_array_equal(status, np.array([tr.TRACE_STOPPED, tr.TRACE_ESCAPED]))
+        assert_allclose(end[0], np.array([2.0, 0.5]), atol=1e-12)
+        self.assertGreater(t.unresolved_fraction, 0.0)
+        self.assertTrue(t.stops[t.s_nodes < 0.35].all())
+        self.assertFalse(t.stops[t.s_nodes > 0.65].any())
+
+    def test_PyTransfer_stops_at_port(self):
+        """Tests rays outside the table's angles or without interactions left stop at the port"""
+        t = self.create_Obj()
+        a = 2 * self._max_angle
+        r = tr.PyRay(np.array([-1.0, 0.0]), np.array([np.cos(a), np.sin(a)]))
+        s = tr.PyRay(np.array([-1.0, 0.0]), np.array([1.0, 0.0]))
+
+        tr.PyTrace([t], [r], 5, False)
+        tr.PyTrace([t], [s], 1, False)
+
+        for ray in (r, s):
+            self.assertEqual(len(ray.pos), 2)
+            self.assertAlmostEqual(ray.pos[-1][0], 0.0)
+
+    def test_PyTransfer_leaving_rays_pass(self):
+        """Tests rays leaving the subsystem through the port pass through it"""
+        t = self.create_Obj()
+        r = tr.PyRay(np.array([1.0, 0.0]), np.array([-1.0, 0.0]))
+
+        tr.PyTrace([t], [r], 5, False)
+
+        self.assertEqual(len(r.pos), 2)
+        assert_allclose(r.pos[-1], np.array([0.0, 0.0]))
+
+    def test_PyTransfer_init_invalid(self):
+        """Tests PyTransfer checks the shapes and order of its table"""
+        s, a = np.linspace(0.0, 1.0, 3), np.linspace(-0.1, 0.1, 4)
+        exits, stops = np.zeros((3, 4, 5)), np.zeros((3, 4), dtype=np.bool_)
+
+        # This should be ok
+        tr.PyTransfer(self._start, self._end, s, a, exits, stops)
+
+        with self.assertRaises(TypeError):
+            tr.PyTransfer(self._start, self._end, s, a, exits[:, :3], stops)
+
+        with self.assertRaises(TypeError):
+            tr.PyTransfer(self._start, self._end, s, a, exits, stops[:2])
+
+        with self.assertRaises(TypeError):
+            tr.PyTransfer(np.zeros(3), self._end, s, a, exits, stops)
+
+        with self.assertRaises(ValueError):
+            tr.PyTransfer(self._start, self._end, s[::-1], a, exits, stops)
+
+        with self.assertRaises(ValueError):
+            tr.PyTransfer(self._start, self._end, s[:1], a, exits[:1], stops[:1])
+
+    def test_PyTransfer_tabulate_invalid(self):
+        """Tests tabulate() checks its arguments"""
+        with self.assertRaises(ValueError):
+            tr.PyTransfer.tabulate(subsystem(), self._start, self._end, 0.0)
+
+        with self.assertRaises(ValueError):
+            tr.PyTransfer.tabulate(subsystem(), self._start, self._end, 0.1, n_s=1)
+
+        with self.assertRaises(ValueError):
+            tr.PyTransfer.tabulate(subsystem(), self._start, self._end, 0.1, n_s=9, max_nodes=5)
+
+        with self.assertRaises(TypeError):
+            tr.PyTransfer.tabulate(subsystem(), np.zeros(3), self._end, 0.1)
+
+    def test_PyTransfer_scene_spec(self):
+        """Tests a PyTransfer is rebuilt from its scene description"""
+        t = self.create_Obj(max_depth=2)
+        rebuilt = tr._build_scene(tr._scene_spec([t]))
+
+        self.assertEqual(tr._trace_key("scene", rebuilt), tr._trace_key("scene", [t]))
+        self.assertEqual(rebuilt[0].position_error, t.position_error)
+        assert_array_equal(rebuilt[0].exits, t.exits)
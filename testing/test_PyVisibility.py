@@ -0,0 +1,142 @@
+# geometrical-ray-tracing: Program to perform geometrical ray tracing
+# Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+# This file is part of geometrical-ray-tracing
+
+# geometrical-ray-tracing is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import tracing as tr
+from generic_test_functions import *
+
+class Test_PyVisibility(unittest.TestCase):
+    """Tests pruning the components tested after each hit"""
+
+    def create_scene(self):
+        """Two closed cavities, one of planes and one a polyline, and two outside components"""
+        corners = [np.array(p) for p in ([0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0])]
+        walls = [tr.PyMirror_Plane(corners[i], corners[(i + 1) % 4], reflectivity=0.9)
+                 for i in range(4)]
+
+        inside_a = [tr.PyMirror_Sph(np.array([2.0, 2.0]), 1.0, 0.0, np.pi),
+                    tr.PyScreen_Plane(np.array([1.0, 0.5]), np.array([1.5, 0.5]))]
+
+        ring = tr.PyMirror_Polyline(np.array([[6.0, 0.0], [10.0, 0.0], [10.0, 4.0], 
+                                              [6.0, 4.0], [6.0, 0.0]]))
+        inside_b = [tr.PyRefract_Plane(np.array([7.0, 1.0]), np.array([9.0, 3.0]), 
+                                       1.0, 1.5, 0.0, 0.1),
+                    tr.PyMirror_Sph(np.array([8.0, 2.0]), 0.5, 2.0, 4.0)]
+
+        outside = [tr.PyScreen_Plane(np.array([-3.0, -5.0]), np.array([12.0, -5.0])),
+                   tr.PyMirror_Plane(np.array([-3.0, 6.0]), np.array([12.0, 6.0]))]
+
+        return walls + inside_a + [ring] + inside_b + outside
+
+    def create_rays(self, N=300):
+        """Rays starting inside both cavities and outside them"""
+        rng = np.random.default_rng(4)
+        starts = np.concatenate([rng.uniform([0.2, 2.2], [3.8, 3.8], (N // 3, 2)),
+                                 rng.uniform([6.2, 0.2], [9.8, 0.8], (N // 3, 2)),
+                                 rng.uniform([-2.0, 4.5], [11.0, 5.5], (N // 3, 2))])
+        angles = rng.uniform(0.0, 2 * np.pi, len(starts))
+
+        return starts, np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    def test_PyVisibility_Lists(self):
+        """Checks components on different sides of a closed wall are hidden"""
+        vis = tr.PyVisibility(self.create_scene())
+
+        self.assertEqual(len(vis), 11)
+        assert_array_equal(vis.visible(4), [0, 1, 2, 3, 4, 5])
+        assert_array_equal(vis.visible(5), [0, 1, 2, 3, 4, 5])
+        assert_array_equal(vis.visible(7), [6, 7, 8])
+        assert_array_equal(vis.visible(9), [0, 1, 2, 3, 6, 9, 10])
+
+        # Walls can be hit from either side but are still hidden by other walls
+        assert_array_equal(vis.visible(0), [0, 1, 2, 3, 4, 5, 6, 9, 10])
+        assert_array_equal(vis.visible(6), [0, 1, 2, 3, 6, 7, 8, 9, 10])
+
+        # Planes in a wall have a list for each side, the left of wall 0 is inside
+        assert_array_equal(vis.visible(0, 1), [0, 1, 2, 3, 4, 5])
+        assert_array_equal(vis.visible(0, -1), [0, 1, 2, 3, 6, 9, 10])
+        assert_array_equal(vis.visible(6, 1), vis.visible(6))
+        assert_array_equal(vis.visible(9, -1), vis.visible(9))
+
+        with self.assertRaises(ValueError):
+            vis.visible(0, 2)
+
+        # An open wall doesn't separate anything
+        open_scene = self.create_scene()
+        del open_scene[3]
+        vis = tr.PyVisibility(open_scene)
+        assert_array_equal(vis.visible(3), [0, 1, 2, 3, 4, 5, 8, 9])
+        assert_array_equal(vis.visible(0, 1), vis.visible(0))
+
+        with self.assertRaises(IndexError):
+            vis.visible(10)
+
+    def test_PyVisibility_Trace(self):
+        """Checks tracing with the visibility gives the same results"""
+        comps = self.create_scene()
+        vis = tr.PyVisibility(comps)
+        starts, dirs = self.create_rays()
+
+        status = np.empty((2, len(starts)), dtype=np.int32)
+        positions = np.empty((2, len(starts), 31, 2))
+
+        for i, v in enumerate((None, vis)):
+            tr.PyTrace_Bundle(comps, starts, dirs, 30, out_positions=positions[i],
+                              out_status=status[i], visibility=v)
+
+        assert_array_equal(positions[1], positions[0])
+        assert_array_equal(status[1], status[0])
+
+        # Rays hit the cavities' contents and escape from outside
+        self.assertTrue(np.any(status[0] == tr.TRACE_STOPPED))
+        self.assertTrue(np.any(status[0] == tr.TRACE_ESCAPED))
+
+        bundles = [tr.PyTrace_Bundle(comps, starts, dirs, 30, roulette_threshold=0.5,
+                                     seed=2, visibility=v) for v in (None, vis)]
+        assert_array_equal(bundles[1].points, bundles[0].points)
+        assert_array_equal(bundles[1].weights, bundles[0].weights)
+
+        rays = [[tr.PyRay(s, d) for s, d in zip(starts, dirs)] for i in range(2)]
+        tr.PyTrace(comps, rays[0], 30)
+        tr.PyTrace(comps, rays[1], 30, visibility=vis)
+
+        assert_array_equal(tr.PyRay_Bundle.from_rays(rays[1]).points, 
+                           tr.PyRay_Bundle.from_rays(rays[0]).points)
+
+    def test_PyVisibility_Errors(self):
+        """Checks visibility computed for other components is rejected"""
+        comps = self.create_scene()
+        vis = tr.PyVisibility(comps)
+        starts, dirs = self.create_rays(3)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace_Bundle(comps[1:], starts, dirs, 3, visibility=vis)
+
+        with self.assertRaises(ValueError):
+            tr.PyTrace(comps[1:], [tr.PyRay(starts[0], dirs[0])], 3, visibility=vis)
+
+        with self.assertRaises(TypeError):
+            tr.PyTrace_Bundle(comps, starts, dirs, 3, visibility=[])
+
+        with self.assertRaises(TypeError):
+            tr.PyVisibility([1])
+
+        # Each component of an array is counted
+        array = tr.PyScreen_Plane.many(np.array([[2.0, -5.0], [2.0, 2.0]]),
+                                       np.array([[2.0, -2.0], [2.0, 5.0]]))
+        self.assertEqual(len(tr.PyVisibility([array, comps[0]])), 3)
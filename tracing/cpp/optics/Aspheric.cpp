@@ -0,0 +1,307 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Aspheric.h"
+#include <algorithm>
+
+namespace optics
+{
+	namespace
+	{
+		// Maximum number of Newton steps added to the conic solution
+		constexpr int max_newton{ 20 };
+
+		// Number of intervals the sag is sampled over for the bounding box
+		constexpr int n_bound_samples{ 256 };
+	}
+
+	Aspheric::Aspheric(arr vertex, double axis, double c, double k, double h, std::vector<double> coeffs)
+		: vertex{ vertex }, c{ c }, k{ k }, h{ h }, coeffs{ std::move(coeffs) }
+	{
+		set_axis(axis);
+	}
+
+	arr Aspheric::to_local(const arr& x, bool is_point) const
+	{
+		arr d{ x };
+
+		if (is_point)
+		{
+			d[0] -= vertex[0];
+			d[1] -= vertex[1];
+		}
+
+		return { cos_ax * d[0] + sin_ax * d[1], -sin_ax * d[0] + cos_ax * d[1] };
+	}
+
+	arr Aspheric::to_global_dir(const arr& d) const
+	{
+		return { cos_ax * d[0] - sin_ax * d[1], sin_ax * d[0] + cos_ax * d[1] };
+	}
+
+	double Aspheric::sag(double y) const
+	{
+		double y2{ y * y };
+		double ans{ c * y2 / (1.0 + std::sqrt(std::max(0.0, 1.0 - (1.0 + k) * c * c * y2))) };
+		double y_pow{ y2 * y2 };
+
+		for (double a : coeffs)
+		{
+			ans += a * y_pow;
+			y_pow *= y2;
+		}
+
+		return ans;
+	}
+
+	double Aspheric::sag_deriv(double y) const
+	{
+		double y2{ y * y };
+		double ans{ c * y / std::sqrt(std::max(1e-300, 1.0 - (1.0 + k) * c * c * y2)) };
+		double y_pow{ y2 * y };  // y^3
+		double p{ 4.0 };
+
+		for (double a : coeffs)
+		{
+			ans += p * a * y_pow;
+			y_pow *= y2;
+			p += 2.0;
+		}
+
+		return ans;
+	}
+
+	double Aspheric::sag_deriv2(double y) const
+	{
+		double y2{ y * y };
+		double ans{ c / std::pow(std::max(1e-300, 1.0 - (1.0 + k) * c * c * y2), 1.5) };
+		double y_pow{ y2 };
+		double p{ 4.0 };
+
+		for (double a : coeffs)
+		{
+			ans += p * (p - 1.0) * a * y_pow;
+			y_pow *= y2;
+			p += 2.0;
+		}
+
+		return ans;
+	}
+
+	bool Aspheric::on_surface(double z, double y) const
+	{
+		if (std::abs(y) > h || (1.0 + k) * c * c * y * y > 1.0 + 1e-12)
+			return false;
+
+		// Rejects the far branch of the conic, e.g. the back of an ellipse
+		return std::abs(z - sag(y)) <= 1e-9 * (1.0 + std::abs(z));
+	}
+
+	double Aspheric::solve(const arr& r, const arr& v, bool leaving) const
+	{
+		arr r_l{ to_local(r, true) };
+		arr v_l{ to_local(v, false) };
+
+		// Conic c (y^2 + (1 + k) z^2) - 2 z = 0 along the ray is a quadratic in t
+		double a{ c * (v_l[1] * v_l[1] + (1.0 + k) * v_l[0] * v_l[0]) };
+		double b{ 2.0 * c * (r_l[1] * v_l[1] + (1.0 + k) * r_l[0] * v_l[0]) - 2.0 * v_l[0] };
+		double cc{ c * (r_l[1] * r_l[1] + (1.0 + k) * r_l[0] * r_l[0]) - 2.0 * r_l[0] };
+
+		double starts[3];
+		int n_starts{ 0 };
+
+		if (std::abs(a) < 1e-12)
+		{
+			if (b != 0.0)
+				starts[n_starts++] = -cc / b;
+		}
+		else
+		{
+			double disc{ b * b - 4.0 * a * cc };
+
+			if (disc >= 0.0)
+			{
+				// Numerically stable form of the quadratic formula
+				double q{ -0.5 * (b + std::copysign(std::sqrt(disc), b)) };
+
+				starts[n_starts++] = q / a;
+
+				if (q != 0.0)
+					starts[n_starts++] = cc / q;
+			}
+		}
+
+		// Polynomial terms can move the hit far from the conic, also start from the
+		// plane through the vertex
+		if (!coeffs.empty() && v_l[0] != 0.0)
+			starts[n_starts++] = -r_l[0] / v_l[0];
+
+		// Every start converges on the root where a leaving ray starts from, skip it
+		// within the rounding of the last hit relative to the size of the surface
+		double best_t{ infinity };
+		double t_min{ leaving ? min_hit_time(r, v, leave_rtol, h) : min_hit_time(r, v) };
+
+		for (int i = 0; i < n_starts; ++i)
+		{
+			double t{ starts[i] };
+
+			// Newton steps on f(t) = z(t) - sag(y(t))
+			if (!coeffs.empty())
+			{
+				for (int step = 0; step < max_newton; ++step)
+				{
+					double y{ r_l[1] + t * v_l[1] };
+					double f{ r_l[0] + t * v_l[0] - sag(y) };
+					double df{ v_l[0] - sag_deriv(y) * v_l[1] };
+
+					if (df == 0.0)
+						break;
+
+					double dt{ f / df };
+					t -= dt;
+
+					if (std::abs(dt) <= 1e-13 * (1.0 + std::abs(t)))
+						break;
+				}
+			}
+
+			if (!(t < best_t) || t <= t_min)
+				continue;
+
+			if (on_surface(r_l[0] + t * v_l[0], r_l[1] + t * v_l[1]))
+				best_t = t;
+		}
+
+		return best_t;
+	}
+
+	double Aspheric::test_hit(const Ray* ry) const
+	{
+		return solve(ry->pos.back(), ry->v, ry->last_hit == this);
+	}
+
+	std::pair<arr, arr> Aspheric::bounds() const
+	{
+		// The conic only exists where (1 + k) c^2 y^2 <= 1
+		double y_max{ h };
+
+		if ((1.0 + k) * c * c > 0.0)
+			y_max = std::min(y_max, 1.0 / std::sqrt((1.0 + k) * c * c));
+
+		// The sag is even so only y >= 0 is sampled, it changes by at most the
+		// largest slope times half a step away from the samples
+		double z_min{ infinity }, z_max{ -infinity }, slope{ 0.0 };
+		const double step{ y_max / n_bound_samples };
+
+		for (int i = 0; i <= n_bound_samples; ++i)
+		{
+			const double y{ step * i };
+			const double z{ sag(y) };
+
+			z_min = std::min(z_min, z);
+			z_max = std::max(z_max, z);
+			slope = std::max(slope, std::abs(sag_deriv(y)));
+		}
+
+		const double pad{ slope * step / 2.0 + 1e-9 * (1.0 + std::abs(z_min) + std::abs(z_max)) };
+
+		if (!std::isfinite(pad))
+			return Component::bounds();
+
+		// Corners of the box in the local frame mapped to the global frame
+		arr lo{ infinity, infinity }, hi{ -infinity, -infinity };
+
+		for (double z : { z_min - pad, z_max + pad })
+		{
+			for (double y : { -y_max, y_max })
+			{
+				const arr d{ to_global_dir({ z, y }) };
+				expand_box(lo, hi, { vertex[0] + d[0], vertex[1] + d[1] });
+			}
+		}
+
+		return { lo, hi };
+	}
+
+	arr Aspheric::normal(const arr& x) const
+	{
+		double y{ to_local(x, true)[1] };
+		double ds{ sag_deriv(y) };
+		double mag{ std::sqrt(1.0 + ds * ds) };
+
+		return to_global_dir({ 1.0 / mag, -ds / mag });
+	}
+
+	arr Aspheric::surface_tangents(const Ray&, const arr& x, std::size_t n_cols, std::vector<double>& dg) const
+	{
+		// Surface function is g(x) = z - sag(y)
+		dg.assign(n_cols, 0.0);
+
+		return to_global_dir({ 1.0, -sag_deriv(to_local(x, true)[1]) });
+	}
+
+	void Aspheric::normal_tangents(const Ray& ry, std::vector<arr>& dn) const
+	{
+		double y{ to_local(ry.pos.back(), true)[1] };
+		double ds{ sag_deriv(y) };
+		double mag{ std::sqrt(1.0 + ds * ds) };
+
+		// Derivative of the unit normal (1, -s'(y)) / |.| with respect to y
+		arr n_l{ 1.0 / mag, -ds / mag };
+		arr dm{ 0.0, -sag_deriv2(y) };
+		double n_dot_dm{ n_l[1] * dm[1] };
+		arr dn_dy{ to_global_dir({ -n_dot_dm * n_l[0] / mag, (dm[1] - n_dot_dm * n_l[1]) / mag }) };
+
+		dn.resize(ry.dr.size());
+
+		for (std::size_t col = 0; col < ry.dr.size(); ++col)
+		{
+			// y = perp . (x - vertex) so dy is the perpendicular part of dr
+			double dy{ -sin_ax * ry.dr[col][0] + cos_ax * ry.dr[col][1] };
+
+			dn[col] = { dn_dy[0] * dy, dn_dy[1] * dy };
+		}
+	}
+
+	double Aspheric::get_axis() const
+	{
+		return axis;
+	}
+
+	void Aspheric::set_axis(double new_axis)
+	{
+		axis = new_axis;
+
+		cos_ax = std::cos(axis);
+		sin_ax = std::sin(axis);
+	}
+
+	void Aspheric::print(std::ostream& os) const
+	{
+		int N{ 100 };
+
+		for (int i = 0; i < N; ++i)
+		{
+			double y{ -h + 2.0 * h * static_cast<double>(i) / static_cast<double>(N - 1) };
+			arr d{ to_global_dir({ sag(y), y }) };
+
+			os << vertex[0] + d[0] << '\t' << vertex[1] + d[1] << '\n';
+		}
+	}
+}
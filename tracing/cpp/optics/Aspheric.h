@@ -0,0 +1,88 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes an even asphere, a conic section with even polynomial terms added to
+// its sag. In a local frame with z along the optical axis and y perpendicular to
+// it, the surface is z = c y^2 / (1 + sqrt(1 - (1 + k) c^2 y^2)) + sum_i A_i y^(2i + 4)
+// for |y| <= h, with its vertex at the origin. The conic constant k gives a
+// sphere for k = 0, an ellipse for k > -1, a parabola for k = -1 and a hyperbola
+// for k < -1. Note setting the axis except in the constructor is non-trivial,
+// the relevant setting & getting methods should be used instead.
+//
+#pragma once
+#include "Component.h"
+
+namespace optics
+{
+	class Aspheric :
+		public Component
+	{
+	protected:
+		double axis;            // Angle of the optical axis anti-clockwise from the x axis
+		double cos_ax, sin_ax;  // cos and sin of axis
+
+		// Converts the global point or direction x to local (z, y) coordinates
+		arr to_local(const arr& x, bool is_point) const;
+
+		// Converts local (z, y) coordinates to a global direction
+		arr to_global_dir(const arr& d) const;
+
+		// Whether the local point (z, y) lies on the surface within the aperture
+		bool on_surface(double z, double y) const;
+
+	public:
+		arr vertex;                   // Vertex of the surface
+		double c;                     // Curvature at the vertex, 1 / R
+		double k;                     // Conic constant
+		double h;                     // Half width of the aperture
+		std::vector<double> coeffs;   // Coefficients A_i of y^4, y^6, ...
+
+		Aspheric(arr vertex, double axis, double c, double k, double h, std::vector<double> coeffs = {});
+
+		virtual double test_hit(const Ray* ry) const override;
+
+		// Samples the sag across the aperture, padded by how far it can change between samples
+		virtual std::pair<arr, arr> bounds() const override;
+
+		// Sag of the surface and its first and second derivatives at y
+		double sag(double y) const;
+		double sag_deriv(double y) const;
+		double sag_deriv2(double y) const;
+
+		// Determines the time of interception of a ray with starting position
+		// r and initial direction v with the surface. The conic part is solved in
+		// closed form and polynomial terms are added with Newton steps. Returns 
+		// infinity if no interception occurs. If leaving the ray has just hit the 
+		// surface and the root where it starts is skipped
+		double solve(const arr& r, const arr& v, bool leaving = false) const;
+
+		// Unit normal at the global point x on the surface, pointing along the axis
+		arr normal(const arr& x) const;
+
+		// Tangent helpers. The surface has no parameters that can be differentiated
+		// but the ray's tangents still move and the normal changes with the hit point
+		arr surface_tangents(const Ray& ry, const arr& x, std::size_t n_cols, std::vector<double>& dg) const;
+		void normal_tangents(const Ray& ry, std::vector<arr>& dn) const;
+
+		double get_axis() const;
+		void set_axis(double new_axis);
+
+		virtual void print(std::ostream& os) const override;
+	};
+}
@@ -0,0 +1,377 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include "Bezier.h"
+#include "trace_func.h"
+#include "tangent_func.h"
+#include <algorithm>
+#include <stdexcept>
+
+namespace optics
+{
+	namespace
+	{
+		// Padding of the bounding boxes so hits on their edges are not missed
+		constexpr double curve_box_pad{ 1e-9 };
+
+		// Maximum number of Newton steps within a piece
+		constexpr int max_curve_newton{ 50 };
+
+		// z component of the cross product of a and b
+		inline double cross(const arr& a, const arr& b)
+		{
+			return a[0] * b[1] - a[1] * b[0];
+		}
+
+		void check_control_points(const std::vector<arr>& points)
+		{
+			if (points.size() < 4 || (points.size() - 1) % 3 != 0)
+				throw std::invalid_argument("the number of control points must be 3m + 1 with m >= 1");
+		}
+
+		void check_depth(int depth)
+		{
+			if (depth < 0 || depth > 16)
+				throw std::invalid_argument("depth must be between 0 and 16");
+		}
+	}
+
+	Bezier::Bezier(std::vector<arr> points, int depth)
+	{
+		check_control_points(points);
+		check_depth(depth);
+
+		this->points = std::move(points);
+		this->depth = depth;
+
+		build();
+	}
+
+	void Bezier::build()
+	{
+		std::size_t n_segs{ size() };
+
+		poly.resize(n_segs);
+		pieces.clear();
+		pieces.reserve(n_segs << depth);
+
+		for (std::size_t seg = 0; seg < n_segs; ++seg)
+		{
+			const arr* b{ &points[3 * seg] };
+			std::array<arr, 4>& a{ poly[seg] };
+
+			for (int i = 0; i < 2; ++i)
+			{
+				a[0][i] = b[0][i];
+				a[1][i] = 3.0 * (b[1][i] - b[0][i]);
+				a[2][i] = 3.0 * (b[0][i] - 2.0 * b[1][i] + b[2][i]);
+				a[3][i] = b[3][i] - 3.0 * b[2][i] + 3.0 * b[1][i] - b[0][i];
+			}
+
+			std::uint32_t n_pieces{ 1u << depth };
+
+			for (std::uint32_t k = 0; k < n_pieces; ++k)
+			{
+				double u0{ static_cast<double>(k) / n_pieces };
+				double u1{ static_cast<double>(k + 1) / n_pieces };
+				double w{ u1 - u0 };
+
+				// Power basis of the piece in s = (u - u0) / w, converted to
+				// its Bezier control points whose box bounds the piece
+				arr p0{ point(seg, u0) }, d1{ deriv(seg, u0) }, d2{ deriv2(seg, u0) };
+				arr c[4];
+
+				for (int i = 0; i < 2; ++i)
+				{
+					double q1{ d1[i] * w }, q2{ 0.5 * d2[i] * w * w }, q3{ a[3][i] * w * w * w };
+
+					c[0][i] = p0[i];
+					c[1][i] = p0[i] + q1 / 3.0;
+					c[2][i] = p0[i] + 2.0 * q1 / 3.0 + q2 / 3.0;
+					c[3][i] = p0[i] + q1 + q2 + q3;
+				}
+
+				Piece piece{ { infinity, infinity }, { -infinity, -infinity }, u0, u1,
+					static_cast<std::uint32_t>(seg) };
+
+				for (const arr& p : c)
+				{
+					for (int i = 0; i < 2; ++i)
+					{
+						piece.lo[i] = std::min(piece.lo[i], p[i] - curve_box_pad);
+						piece.hi[i] = std::max(piece.hi[i], p[i] + curve_box_pad);
+					}
+				}
+
+				pieces.push_back(piece);
+			}
+		}
+	}
+
+	std::tuple<std::size_t, double, double> Bezier::find_hit(const arr& r, const arr& v, std::size_t leaving) const
+	{
+		double best_t{ infinity }, best_u{ 0.0 };
+		std::size_t best_seg{ 0 };
+		double v_sq{ v[0] * v[0] + v[1] * v[1] };
+		double t_min{ min_hit_time(r, v) };
+
+		for (const Piece& piece : pieces)
+		{
+			if (!hits_box(piece.lo, piece.hi, r, v, best_t))
+				continue;
+
+			// The curve crosses the ray's line where f(u) = v x (B(u) - r) = 0,
+			// a cubic in u
+			const std::array<arr, 4>& a{ poly[piece.seg] };
+			double f[4]{ cross(v, { a[0][0] - r[0], a[0][1] - r[1] }), cross(v, a[1]), cross(v, a[2]),
+				cross(v, a[3]) };
+
+			auto eval = [&f](double u) { return f[0] + u * (f[1] + u * (f[2] + u * f[3])); };
+			auto eval_deriv = [&f](double u) { return f[1] + u * (2.0 * f[2] + u * 3.0 * f[3]); };
+
+			// Split the piece where f is stationary so each interval has at most one root
+			double bounds[4]{ piece.u0 };
+			int n_bounds{ 1 };
+			double qa{ 3.0 * f[3] }, qb{ 2.0 * f[2] }, qc{ f[1] };
+
+			if (qa != 0.0)
+			{
+				double disc{ qb * qb - 4.0 * qa * qc };
+
+				if (disc > 0.0)
+				{
+					double q{ -0.5 * (qb + std::copysign(std::sqrt(disc), qb)) };
+					double s1{ q / qa }, s2{ q != 0.0 ? qc / q : s1 };
+
+					if (s1 > s2)
+						std::swap(s1, s2);
+
+					for (double s : { s1, s2 })
+						if (s > piece.u0 && s < piece.u1)
+							bounds[n_bounds++] = s;
+				}
+			}
+			else if (qb != 0.0)
+			{
+				double s{ -qc / qb };
+
+				if (s > piece.u0 && s < piece.u1)
+					bounds[n_bounds++] = s;
+			}
+
+			bounds[n_bounds++] = piece.u1;
+
+			for (int j = 0; j + 1 < n_bounds; ++j)
+			{
+				double lo{ bounds[j] }, hi{ bounds[j + 1] };
+				double f_lo{ eval(lo) }, f_hi{ eval(hi) };
+				double u;
+
+				if (f_lo == 0.0)
+					u = lo;
+				else if (f_hi == 0.0)
+					u = hi;
+				else if ((f_lo < 0.0) == (f_hi < 0.0))
+					continue;
+				else
+				{
+					// Newton steps from the chord's root, bisecting if a step leaves the bracket
+					u = lo - f_lo * (hi - lo) / (f_hi - f_lo);
+
+					for (int step = 0; step < max_curve_newton; ++step)
+					{
+						double f_u{ eval(u) };
+
+						if (f_u == 0.0)
+							break;
+
+						if ((f_u < 0.0) == (f_lo < 0.0))
+							lo = u;
+						else
+							hi = u;
+
+						double df{ eval_deriv(u) };
+						double u_new{ df != 0.0 ? u - f_u / df : lo };
+
+						if (!(u_new > lo && u_new < hi))
+							u_new = 0.5 * (lo + hi);
+
+						bool done{ std::abs(u_new - u) <= 1e-15 };
+						u = u_new;
+
+						if (done)
+							break;
+					}
+				}
+
+				arr x{ point(piece.seg, u) };
+				double t{ ((x[0] - r[0]) * v[0] + (x[1] - r[1]) * v[1]) / v_sq };
+
+				// The root where a ray leaving the segment starts carries the rounding of
+				// the last hit, relative to the size of the piece
+				double t_skip{ piece.seg == leaving ?
+					min_hit_time(r, v, leave_rtol, std::max(piece.hi[0] - piece.lo[0], piece.hi[1] - piece.lo[1])) : t_min };
+
+				if (t < best_t && t > t_skip)
+				{
+					best_t = t;
+					best_u = u;
+					best_seg = piece.seg;
+				}
+			}
+		}
+
+		return { best_seg, best_u, best_t };
+	}
+
+	arr Bezier::move_to_hit(Ray* ry, std::vector<arr>& dn) const
+	{
+		std::size_t seg;
+		double u, t;
+
+		std::tie(seg, u, t) = find_hit(ry->pos.back(), ry->v, ry->last_hit == this ? ry->last_part : no_part);
+
+		// compute new position of ray
+		arr newPos = compute_new_pos(*ry, t);
+		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		ry->last_part = seg;
+		attenuate_ray(*ry, t);
+
+		arr d1{ deriv(seg, u) };
+		double mag{ std::hypot(d1[0], d1[1]) };
+		arr n_vec{ -d1[1] / mag, d1[0] / mag };
+
+		if (has_tangents(*ry))
+		{
+			// Control points aren't parameters so only the ray's own tangents change
+			std::size_t n_cols{ ry->dr.size() };
+
+			move_tangents(*ry, t, n_vec, std::vector<double>(n_cols, 0.0));
+
+			// Derivative of the unit normal with respect to u, with du = B' . dr / |B'|^2
+			// as the moved tangents lie along the curve
+			arr d2{ deriv2(seg, u) };
+			double d1_d2{ (d1[0] * d2[0] + d1[1] * d2[1]) / (mag * mag) };
+			arr dn_du{ -d2[1] / mag - n_vec[0] * d1_d2, d2[0] / mag - n_vec[1] * d1_d2 };
+
+			dn.resize(n_cols);
+
+			for (std::size_t col = 0; col < n_cols; ++col)
+			{
+				double du{ (d1[0] * ry->dr[col][0] + d1[1] * ry->dr[col][1]) / (mag * mag) };
+
+				dn[col] = { dn_du[0] * du, dn_du[1] * du };
+			}
+		}
+
+		return n_vec;
+	}
+
+	double Bezier::test_hit(const Ray* ry) const
+	{
+		double t;
+
+		std::tie(std::ignore, std::ignore, t) = find_hit(ry->pos.back(), ry->v,
+			ry->last_hit == this ? ry->last_part : no_part);
+
+		return t;
+	}
+
+	std::pair<arr, arr> Bezier::bounds() const
+	{
+		arr lo{ points[0] }, hi{ points[0] };
+
+		for (const arr& p : points)
+			expand_box(lo, hi, p);
+
+		return { lo, hi };
+	}
+
+	arr Bezier::point(std::size_t seg, double u) const
+	{
+		const std::array<arr, 4>& a{ poly[seg] };
+
+		return { a[0][0] + u * (a[1][0] + u * (a[2][0] + u * a[3][0])),
+			a[0][1] + u * (a[1][1] + u * (a[2][1] + u * a[3][1])) };
+	}
+
+	arr Bezier::deriv(std::size_t seg, double u) const
+	{
+		const std::array<arr, 4>& a{ poly[seg] };
+
+		return { a[1][0] + u * (2.0 * a[2][0] + u * 3.0 * a[3][0]),
+			a[1][1] + u * (2.0 * a[2][1] + u * 3.0 * a[3][1]) };
+	}
+
+	arr Bezier::deriv2(std::size_t seg, double u) const
+	{
+		const std::array<arr, 4>& a{ poly[seg] };
+
+		return { 2.0 * a[2][0] + 6.0 * u * a[3][0], 2.0 * a[2][1] + 6.0 * u * a[3][1] };
+	}
+
+	const std::vector<arr>& Bezier::get_points() const
+	{
+		return points;
+	}
+
+	void Bezier::set_points(std::vector<arr> points)
+	{
+		check_control_points(points);
+
+		this->points = std::move(points);
+		build();
+	}
+
+	int Bezier::get_depth() const
+	{
+		return depth;
+	}
+
+	void Bezier::set_depth(int depth)
+	{
+		check_depth(depth);
+
+		this->depth = depth;
+		build();
+	}
+
+	std::size_t Bezier::size() const
+	{
+		return (points.size() - 1) / 3;
+	}
+
+	void Bezier::print(std::ostream& os) const
+	{
+		int N{ 20 };
+
+		for (std::size_t seg = 0; seg < size(); ++seg)
+		{
+			for (int i = 0; i < N; ++i)
+			{
+				arr p{ point(seg, static_cast<double>(i) / N) };
+				os << p[0] << '\t' << p[1] << '\n';
+			}
+		}
+
+		os << points.back()[0] << '\t' << points.back()[1] << '\n';
+	}
+}
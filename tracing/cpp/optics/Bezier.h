@@ -0,0 +1,94 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+// Describes a freeform curve made of cubic Bezier segments stored as a single
+// component. Segment i has control points 3i to 3i + 3 so neighbouring segments
+// share an end point. Each segment is split into 2^depth pieces by de Casteljau
+// subdivision and the bounding boxes of the pieces' control points are cached.
+// A ray is only tested against pieces whose box it enters, where the cubic 
+// along the ray is solved by Newton iteration within the piece.
+#pragma once
+#include "Component.h"
+#include <cstdint>
+#include <tuple>
+
+namespace optics
+{
+	class Bezier :
+		public Component
+	{
+	protected:
+		// Piece of segment seg between parameters u0 and u1
+		struct Piece
+		{
+			arr lo, hi;          // Corners of the bounding box of the piece's control points
+			double u0, u1;       // Range of the segment's parameter covered
+			std::uint32_t seg;   // Segment the piece belongs to
+		};
+
+		std::vector<arr> points;               // Control points
+		int depth;                             // Number of times each segment is halved
+		std::vector<std::array<arr, 4>> poly;  // Power basis coefficients of each segment, constant first
+		std::vector<Piece> pieces;             // Cached pieces of all segments
+
+		// Rebuilds poly and pieces from the control points
+		void build();
+
+		// Finds the first hit of the ray starting at r with direction v, returns 
+		// (segment, u, t). t is infinity if the curve isn't hit. On segment leaving,
+		// which the ray has just hit, the root where it starts is skipped
+		std::tuple<std::size_t, double, double> find_hit(const arr& r, const arr& v,
+			std::size_t leaving = no_part) const;
+
+		// Moves the ray to the point it hits, updating its weight and tangents and
+		// filling dn with the tangents of the normal if the ray has tangents
+		// Returns the unit normal at the hit, pointing left of the direction of increasing u
+		arr move_to_hit(Ray* ry, std::vector<arr>& dn) const;
+
+	public:
+		// Throws std::invalid_argument if the number of control points isn't 3m + 1
+		// for m >= 1 or depth isn't between 0 and 16
+		Bezier(std::vector<arr> points, int depth = 3);
+
+		// function for testing for hits
+		virtual double test_hit(const Ray* ry) const override;
+
+		// Box of the control points, which contains the curve
+		virtual std::pair<arr, arr> bounds() const override;
+
+		// Position and first and second derivatives of segment seg at u in [0, 1]
+		arr point(std::size_t seg, double u) const;
+		arr deriv(std::size_t seg, double u) const;
+		arr deriv2(std::size_t seg, double u) const;
+
+		// getter/setter methods for the control points and depth, setting rebuilds the cache
+		const std::vector<arr>& get_points() const;
+		void set_points(std::vector<arr> points);
+
+		int get_depth() const;
+		void set_depth(int depth);
+
+		// Number of segments
+		std::size_t size() const;
+
+		// Printing
+		virtual void print(std::ostream& os) const override;
+	};
+}
@@ -21,7 +21,26 @@
 
 namespace optics
 {
+	namespace
+	{
+		// Rays in the sub-components' frames, one for each depth of nested transformed
+		// components so tracing through them doesn't allocate. A deque as adding a ray
+		// mustn't move those in use
+		thread_local std::deque<Ray> local_rays;
+		thread_local std::size_t local_depth{ 0 };
+
+		Ray& next_local_ray()
+		{
+			if (local_rays.size() == local_depth)
+				local_rays.emplace_back(arr{ 0.0, 0.0 }, arr{ 1.0, 0.0 });
+
+			return local_rays[local_depth];
+		}
+	}
+
 	Complex_Component::Complex_Component(const Complex_Component& c)
+		: offset(c.offset), angle(c.angle), cos_angle(c.cos_angle), sin_angle(c.sin_angle),
+		framed(c.framed)
 	{
 		this->comps.reserve(c.comps.size());
 
@@ -44,20 +63,193 @@ namespace optics
 	void swap(Complex_Component& c1, Complex_Component& c2)
 	{
 		std::swap(c1.comps, c2.comps);
+		std::swap(c1.offset, c2.offset);
+		std::swap(c1.angle, c2.angle);
+		std::swap(c1.cos_angle, c2.cos_angle);
+		std::swap(c1.sin_angle, c2.sin_angle);
+		std::swap(c1.framed, c2.framed);
+	}
+
+	arr Complex_Component::to_local(const arr& v) const
+	{
+		return { cos_angle * v[0] + sin_angle * v[1], -sin_angle * v[0] + cos_angle * v[1] };
+	}
+
+	arr Complex_Component::to_scene(const arr& v) const
+	{
+		return { cos_angle * v[0] - sin_angle * v[1], sin_angle * v[0] + cos_angle * v[1] };
+	}
+
+	void Complex_Component::set_local_ray(const Ray& ry, Ray& local, bool with_tangents) const
+	{
+		const arr& r{ ry.pos.back() };
+
+		local.pos.resize(1);
+		local.pos[0] = to_local({ r[0] - offset[0], r[1] - offset[1] });
+		local.v = to_local(ry.v);
+		local.continue_tracing = ry.continue_tracing;
+		local.weight = ry.weight;
+		local.alpha = ry.alpha;
+
+		// Sub-components are only excluded if the ray left them through this component
+		local.last_hit = nullptr;
+		local.inner_hits.clear();
+
+		if (ry.last_hit == this && !ry.inner_hits.empty())
+		{
+			local.last_hit = ry.inner_hits.back();
+			local.last_part = ry.last_part;
+			local.inner_hits.assign(ry.inner_hits.begin(), ry.inner_hits.end() - 1);
+		}
+
+		local.dr.clear();
+		local.dv.clear();
+		local.tangent_cols = ry.tangent_cols;
+
+		if (with_tangents)
+		{
+			for (std::size_t k = 0; k < ry.dr.size(); ++k)
+			{
+				local.dr.push_back(to_local(ry.dr[k]));
+				local.dv.push_back(to_local(ry.dv[k]));
+			}
+		}
+	}
+
+	void Complex_Component::hit_local(Ray* ry, int n) const
+	{
+		// Only the sub-component hit next interacts, the caller traces the ray onwards
+		std::size_t ind;
+
+		std::tie(ind, std::ignore) = next_component(comps, ry);
+		comps[ind]->hit(ry, n);
 	}
 
 	double Complex_Component::test_hit(const Ray* ry) const
 	{
 		double t;
 
-		std::tie(std::ignore, t) = next_component(comps, ry);
+		if (!framed)
+		{
+			std::tie(std::ignore, t) = next_component(comps, ry);
+			return t;
+		}
+
+		Ray& local{ next_local_ray() };
+		set_local_ray(*ry, local, false);
+
+		// Rigid transforms preserve the time of each hit
+		++local_depth;
+		std::tie(std::ignore, t) = next_component(comps, &local);
+		--local_depth;
 
 		return t;
 	}
 
 	void Complex_Component::hit(Ray* ry, int n) const
 	{
-		trace_ray(comps, ry, n);
+		if (!framed)
+		{
+			hit_local(ry, n);
+			return;
+		}
+
+		Ray& local{ next_local_ray() };
+		set_local_ray(*ry, local, true);
+
+		++local_depth;
+		hit_local(&local, n);
+		--local_depth;
+
+		for (std::size_t k = 1; k < local.pos.size(); ++k)
+		{
+			const arr r{ to_scene(local.pos[k]) };
+			ry->pos.push_back({ r[0] + offset[0], r[1] + offset[1] });
+		}
+
+		ry->v = to_scene(local.v);
+		ry->continue_tracing = local.continue_tracing;
+		ry->weight = local.weight;
+		ry->alpha = local.alpha;
+
+		for (std::size_t k = 0; k < ry->dr.size(); ++k)
+		{
+			ry->dr[k] = to_scene(local.dr[k]);
+			ry->dv[k] = to_scene(local.dv[k]);
+		}
+
+		ry->inner_hits.assign(local.inner_hits.begin(), local.inner_hits.end());
+		ry->inner_hits.push_back(local.last_hit);
+		ry->last_part = local.last_part;
+		ry->last_hit = this;
+	}
+
+	void Complex_Component::set_transform(const arr& new_offset, double new_angle)
+	{
+		offset = new_offset;
+		angle = new_angle;
+		cos_angle = std::cos(angle);
+		sin_angle = std::sin(angle);
+		framed = offset[0] != 0.0 || offset[1] != 0.0 || angle != 0.0;
+	}
+
+	const arr& Complex_Component::get_offset() const
+	{
+		return offset;
+	}
+
+	double Complex_Component::get_angle() const
+	{
+		return angle;
+	}
+
+	std::pair<arr, arr> Complex_Component::bounds() const
+	{
+		arr lo{ infinity, infinity }, hi{ -infinity, -infinity };
+
+		for (auto& ptr : comps)
+		{
+			arr c_lo, c_hi;
+			std::tie(c_lo, c_hi) = ptr->bounds();
+
+			expand_box(lo, hi, c_lo);
+			expand_box(lo, hi, c_hi);
+		}
+
+		if (!framed || lo[0] > hi[0])
+			return { lo, hi };
+
+		if (std::isinf(lo[0]) || std::isinf(lo[1]) || std::isinf(hi[0]) || std::isinf(hi[1]))
+			return { { -infinity, -infinity }, { infinity, infinity } };
+
+		// The box around the transformed corners of the sub-components' box
+		arr t_lo{ infinity, infinity }, t_hi{ -infinity, -infinity };
+
+		for (const arr& corner : { lo, hi, arr{ lo[0], hi[1] }, arr{ hi[0], lo[1] } })
+		{
+			const arr r{ to_scene(corner) };
+			expand_box(t_lo, t_hi, { r[0] + offset[0], r[1] + offset[1] });
+		}
+
+		return { t_lo, t_hi };
+	}
+
+	void Complex_Component::append_segments(std::vector<std::pair<arr, arr>>& segs) const
+	{
+		const std::size_t n_segs{ segs.size() };
+
+		for (auto& ptr : comps)
+			ptr->append_segments(segs);
+
+		if (!framed)
+			return;
+
+		for (std::size_t k = n_segs; k < segs.size(); ++k)
+		{
+			const arr a{ to_scene(segs[k].first) }, b{ to_scene(segs[k].second) };
+
+			segs[k] = { { a[0] + offset[0], a[1] + offset[1] }, { b[0] + offset[0], b[1] + offset[1] } };
+		}
 	}
 
 	Complex_Component* Complex_Component::clone() const
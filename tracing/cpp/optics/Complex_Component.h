@@ -19,10 +19,13 @@
 
 // Class to describe an optical component composed of multiple sub-components
 // E.g. triangluar prism can be described as three planar boundaries where refraction occurs
+// The sub-components can be placed in the scene by a rigid transform, rays are then traced
+// through them in their own frame so several complex components can share them
 //
 #pragma once
 #include "Component.h"
 #include "general.h"
+#include <deque>
 #include <tuple>
 #include <utility>
 #include <vector>
@@ -32,6 +35,25 @@ namespace optics
 	class Complex_Component :
 		public Component
 	{
+		// Rigid transform from the sub-components' frame to the scene's, a rotation
+		// anticlockwise by angle about the origin followed by a translation by offset.
+		// Rays are only moved into the sub-components' frame if it differs from the scene's
+		arr offset{ 0.0, 0.0 };
+		double angle{ 0.0 }, cos_angle{ 1.0 }, sin_angle{ 0.0 };
+		bool framed{ false };
+
+		// Rotates the vector between the frames
+		arr to_local(const arr& v) const;
+		arr to_scene(const arr& v) const;
+
+		// Sets local to the ray in the sub-components' frame with only its current
+		// position. Tangents are only copied if with_tangents
+		void set_local_ray(const Ray& ry, Ray& local, bool with_tangents) const;
+
+	protected:
+		// Performs up to n interactions with a ray in the sub-components' frame
+		virtual void hit_local(Ray* ry, int n) const;
+
 	public:
 		// Sub-components the Complex_Component is composed from
 		comp_list comps;
@@ -56,6 +78,17 @@ namespace optics
 		virtual double test_hit(const Ray* ry) const override;
 		virtual void hit(Ray* ry, int n = 1) const override;
 
+		// Places the sub-components in the scene, see offset and angle
+		void set_transform(const arr& new_offset, double new_angle);
+		const arr& get_offset() const;
+		double get_angle() const;
+
+		// Union of the boxes of the sub-components, transformed into the scene's frame
+		virtual std::pair<arr, arr> bounds() const override;
+
+		// Segments of the sub-components, any of which stops a ray reaching past them
+		virtual void append_segments(std::vector<std::pair<arr, arr>>& segs) const override;
+
 		virtual Complex_Component* clone() const override;
 
 
@@ -26,4 +26,13 @@ namespace optics
 		b.print(os);
 		return os;
 	}
+
+	std::pair<arr, arr> Component::bounds() const
+	{
+		return { { -infinity, -infinity }, { infinity, infinity } };
+	}
+
+	void Component::append_segments(std::vector<std::pair<arr, arr>>& segs) const
+	{
+	}
 }
@@ -30,15 +30,24 @@ namespace optics
 	class Component
 	{
 	public:
-
 		// Virtual destructor as we expect to detroy instances polymorphically
 		virtual ~Component() = default;
 
 		// Methods for testing whether a ray hits the component and performing the hit
-		// Pure virtual functions as class shouldn't be initiated
+		// Pure virtual functions as class shouldn't be initiated. hit() may perform up to
+		// n interactions, adding a position for each, leaf components only perform one
 		virtual double test_hit(const Ray* ry) const = 0;
 		virtual void hit(Ray* ry, int n = 1) const = 0;
 
+		// Corners (lo, hi) of an axis aligned box containing the component, used to
+		// skip testing rays which can't reach it. Defaults to the infinite box so 
+		// components which don't override it are always tested
+		virtual std::pair<arr, arr> bounds() const;
+
+		// Appends the straight line segments the component is made of to segs, used
+		// to find walls separating other components. Curved components add none
+		virtual void append_segments(std::vector<std::pair<arr, arr>>& segs) const;
+
 		// CLone method that returns a copy of the component
 		virtual Component* clone() const = 0;
 
@@ -0,0 +1,120 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Lens.h"
+
+namespace optics
+{
+	arr Lens::interior() const
+	{
+		arr p{ 0.0, 0.0 };
+
+		for (std::size_t ind = 0; ind < 4; ind += 2)
+		{
+			const Spherical& arc{ static_cast<const Spherical&>(*comps[ind]) };
+			double start{ arc.get_start() }, end{ arc.get_end() };
+
+			if (end < start)
+				end += 2 * M_PI;
+
+			const double mid{ (start + end) / 2 };
+
+			p[0] += (arc.centre[0] + arc.R * std::cos(mid)) / 2;
+			p[1] += (arc.centre[1] + arc.R * std::sin(mid)) / 2;
+		}
+
+		return p;
+	}
+
+	bool Lens::heads_inside(std::size_t ind, const Ray& ry, const arr& p) const
+	{
+		const arr& x{ ry.pos.back() };
+
+		if (ind % 2 == 0)
+		{
+			// The glass is inside the circle of a convex arc and outside a concave one
+			const Spherical& arc{ static_cast<const Spherical&>(*comps[ind]) };
+			const arr dp{ p[0] - arc.centre[0], p[1] - arc.centre[1] };
+			const bool glass_inside{ dp[0] * dp[0] + dp[1] * dp[1] < arc.R * arc.R };
+
+			return (ry.v[0] * (x[0] - arc.centre[0]) + ry.v[1] * (x[1] - arc.centre[1]) < 0.0) == glass_inside;
+		}
+
+		const Plane& pln{ static_cast<const Plane&>(*comps[ind]) };
+		const arr& s{ pln.get_start() };
+		const arr& e{ pln.get_end() };
+		const arr normal{ s[1] - e[1], e[0] - s[0] };
+
+		return (ry.v[0] * normal[0] + ry.v[1] * normal[1] > 0.0)
+			== (normal[0] * (p[0] - s[0]) + normal[1] * (p[1] - s[1]) > 0.0);
+	}
+
+	void Lens::check_surfaces() const
+	{
+		if (comps.size() != 4)
+			throw std::invalid_argument("A lens must have four surfaces");
+
+		for (std::size_t ind = 0; ind < comps.size(); ++ind)
+		{
+			const bool is_arc{ dynamic_cast<const Spherical*>(comps[ind].get()) != nullptr };
+			const bool is_plane{ dynamic_cast<const Plane*>(comps[ind].get()) != nullptr };
+
+			if (ind % 2 == 0 ? !is_arc : !is_plane)
+				throw std::invalid_argument("A lens's surfaces must alternate between arcs and planes");
+		}
+	}
+
+	void Lens::hit_local(Ray* ry, int n) const
+	{
+		arr p;
+
+		for (int i = 0; i < n; ++i)
+		{
+			std::size_t ind;
+			double t;
+
+			// The entry surface was found by test_hit(), those after it can only be the lens's own
+			std::tie(ind, t) = next_component(comps, ry);
+
+			if (t == infinity)
+				return;
+
+			comps[ind]->hit(ry);
+
+			if (!ry->continue_tracing)
+				return;
+
+			if (i == 0)
+				p = interior();
+
+			if (!heads_inside(ind, *ry, p))
+				return;
+		}
+	}
+
+	Lens* Lens::clone() const
+	{
+		return new Lens{ *this };
+	}
+
+	void Lens::print(std::ostream& os) const
+	{
+		os << "Lens with " << comps.size() << " surfaces";
+	}
+}
@@ -0,0 +1,57 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes a lens as PyLens builds it, its sub-components being the left arc, bottom
+// plane, right arc and top plane. A ray entering the lens is refracted by the entry 
+// surface and, while it stays inside the glass, by the surfaces it meets next in the
+// same hit, so its exit is found among the four surfaces rather than the whole scene.
+// Each refraction still counts as one of the ray's interactions
+//
+#pragma once
+#include "Complex_Component.h"
+#include "Plane.h"
+#include "Spherical.h"
+#include <stdexcept>
+
+namespace optics
+{
+	class Lens :
+		public Complex_Component
+	{
+		// Point inside the glass, halfway between the vertices of the two arcs
+		arr interior() const;
+
+		// Determines if a ray which has just been refracted by comps[ind] is heading
+		// into the glass
+		bool heads_inside(std::size_t ind, const Ray& ry, const arr& p) const;
+
+	protected:
+		// Performs up to n interactions, stopping once the ray leaves the glass
+		virtual void hit_local(Ray* ry, int n) const override;
+
+	public:
+		// Throws std::invalid_argument if comps are not alternately arcs and planes
+		// starting with an arc
+		void check_surfaces() const;
+
+		virtual Lens* clone() const override;
+
+		virtual void print(std::ostream& os) const override;
+	};
+}
@@ -0,0 +1,62 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Mirror_Asph.h"
+#include "tangent_func.h"
+
+namespace optics
+{
+	Mirror_Asph::Mirror_Asph(arr vertex, double axis, double c, double k, double h, std::vector<double> coeffs,
+		double reflectivity)
+		: Aspheric(vertex, axis, c, k, h, std::move(coeffs)), reflectivity(reflectivity)
+	{
+	}
+
+	void Mirror_Asph::hit(Ray* ry, int n) const
+	{
+		double t{ solve(ry->pos.back(), ry->v, ry->last_hit == this) };
+
+		// compute new position of ray
+		arr newPos = compute_new_pos(*ry, t);
+		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
+
+		arr n_vec{ normal(newPos) };
+
+		if (has_tangents(*ry))
+		{
+			std::vector<double> dg;
+			std::vector<arr> dn;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, ry->dr.size(), dg), dg);
+			normal_tangents(*ry, dn);
+			reflect_tangents(*ry, n_vec, dn);
+		}
+
+		// perform the change of direction
+		reflect_ray(*ry, n_vec);
+		ry->weight *= reflectivity;
+	}
+
+	Mirror_Asph* Mirror_Asph::clone() const
+	{
+		return new Mirror_Asph{ *this };
+	}
+}
@@ -0,0 +1,48 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include "Mirror_Bezier.h"
+#include "tangent_func.h"
+
+namespace optics
+{
+	Mirror_Bezier::Mirror_Bezier(std::vector<arr> points, double reflectivity, int depth)
+		: Bezier(std::move(points), depth), reflectivity(reflectivity)
+	{
+	}
+
+	void Mirror_Bezier::hit(Ray* ry, int n) const
+	{
+		std::vector<arr> dn;
+		arr n_vec{ move_to_hit(ry, dn) };
+
+		if (has_tangents(*ry))
+			reflect_tangents(*ry, n_vec, dn);
+
+		// perform the change of direction
+		reflect_ray(*ry, n_vec);
+		ry->weight *= reflectivity;
+	}
+
+	Mirror_Bezier* Mirror_Bezier::clone() const
+	{
+		return new Mirror_Bezier{ *this };
+	}
+}
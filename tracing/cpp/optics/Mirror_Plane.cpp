@@ -18,11 +18,12 @@
 
 
 #include "Mirror_Plane.h"
+#include "tangent_func.h"
 
 namespace optics
 {
-	Mirror_Plane::Mirror_Plane(arr start, arr end)
-		: Plane(start, end)
+	Mirror_Plane::Mirror_Plane(arr start, arr end, double reflectivity)
+		: Plane(start, end), reflectivity(reflectivity)
 	{
 	}
 
@@ -32,14 +33,27 @@ namespace optics
 		arr& r = ry->pos.back();
 		arr& v = ry->v;
 
-		std::tie(t, std::ignore) = solve(r, v);
+		std::tie(t, std::ignore) = solve(r, v, ry->last_hit == this);
 
 		// compute new position of ray
 		arr newPos = compute_new_pos(*ry, t);
 		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
+
+		if (has_tangents(*ry))
+		{
+			std::vector<double> dg;
+			std::vector<arr> dn;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, ry->dr.size(), dg), dg);
+			normal_tangents(*ry, dn);
+			reflect_tangents(*ry, n_vec, dn);
+		}
 
 		// perform the change of direction
 		reflect_ray(*ry, n_vec);
+		ry->weight *= reflectivity;
 	}
 
 	Mirror_Plane* Mirror_Plane::clone() const
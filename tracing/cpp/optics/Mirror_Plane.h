@@ -29,8 +29,9 @@ namespace optics
 		public Plane
 	{
 	public:
+		double reflectivity;  // Fraction of the ray's weight that is reflected
 
-		Mirror_Plane(arr start, arr end);
+		Mirror_Plane(arr start, arr end, double reflectivity = 1.0);
 
 		// Hit function
 		virtual void hit(Ray* ry, int n) const override;
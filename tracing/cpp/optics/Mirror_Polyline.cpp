@@ -0,0 +1,46 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Mirror_Polyline.h"
+#include "tangent_func.h"
+
+namespace optics
+{
+	Mirror_Polyline::Mirror_Polyline(std::vector<arr> points, double reflectivity)
+		: Polyline(std::move(points)), reflectivity(reflectivity)
+	{
+	}
+
+	void Mirror_Polyline::hit(Ray* ry, int n) const
+	{
+		arr n_vec{ move_to_hit(ry) };
+
+		if (has_tangents(*ry))
+			reflect_tangents(*ry, n_vec, std::vector<arr>(ry->dr.size(), arr{ 0.0, 0.0 }));
+
+		// perform the change of direction
+		reflect_ray(*ry, n_vec);
+		ry->weight *= reflectivity;
+	}
+
+	Mirror_Polyline* Mirror_Polyline::clone() const
+	{
+		return new Mirror_Polyline{ *this };
+	}
+}
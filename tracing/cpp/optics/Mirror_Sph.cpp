@@ -18,11 +18,12 @@
 
 
 #include "Mirror_Sph.h"
+#include "tangent_func.h"
 
 namespace optics
 {
-	Mirror_Sph::Mirror_Sph(arr centre, double R, double start, double end)
-		: Spherical(centre, R, start, end)
+	Mirror_Sph::Mirror_Sph(arr centre, double R, double start, double end, double reflectivity)
+		: Spherical(centre, R, start, end), reflectivity(reflectivity)
 	{
 	}
 
@@ -33,16 +34,29 @@ namespace optics
 
 		double t;
 
-		t = solve(r, v);
+		t = solve(r, v, ry->last_hit == this);
 
 		// compute new position of ray
 		arr newPos = compute_new_pos(*ry, t);
 		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
 
 		arr n_vec = { (newPos[0] - centre[0]) / R, (newPos[1] - centre[1]) / R };
 
+		if (has_tangents(*ry))
+		{
+			std::vector<double> dg;
+			std::vector<arr> dn;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, ry->dr.size(), dg), dg);
+			normal_tangents(*ry, dn);
+			reflect_tangents(*ry, n_vec, dn);
+		}
+
 		// perform the change of direction
 		reflect_ray(*ry, n_vec);
+		ry->weight *= reflectivity;
 	}
 
 	Mirror_Sph* Mirror_Sph::clone() const
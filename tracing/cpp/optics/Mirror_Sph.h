@@ -29,7 +29,9 @@ namespace optics
 		public Spherical
 	{
 	public:
-		Mirror_Sph(arr centre, double R, double start, double end);
+		double reflectivity;  // Fraction of the ray's weight that is reflected
+
+		Mirror_Sph(arr centre, double R, double start, double end, double reflectivity = 1.0);
 
 		virtual void hit(Ray* ry, int n = 1) const override;
 
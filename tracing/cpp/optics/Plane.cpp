@@ -18,6 +18,7 @@
 
 
 #include "Plane.h"
+#include "tangent_func.h"
 
 namespace optics
 {
@@ -36,16 +37,34 @@ namespace optics
 	{
 		double t, tp;
 
-		std::tie(t, tp) = solve(ry->pos.back(), ry->v);
+		std::tie(t, tp) = solve(ry->pos.back(), ry->v, ry->last_hit == this);
 
 		return t;
 	}
 
+	std::pair<arr, arr> Plane::bounds() const
+	{
+		arr lo{ start }, hi{ start };
+		expand_box(lo, hi, end);
+
+		return { lo, hi };
+	}
+
+	void Plane::append_segments(std::vector<std::pair<arr, arr>>& segs) const
+	{
+		segs.emplace_back(start, end);
+	}
+
 	arr& Plane::get_start()
 	{
 		return this->start;
 	}
 
+	const arr& Plane::get_start() const
+	{
+		return this->start;
+	}
+
 	void Plane::set_start(const arr& start)
 	{
 		this->start = start;
@@ -60,6 +79,11 @@ namespace optics
 		return this->end;
 	}
 
+	const arr& Plane::get_end() const
+	{
+		return this->end;
+	}
+
 	void Plane::set_end(const arr& end)
 	{
 		this->end = end;
@@ -75,11 +99,22 @@ namespace optics
 			os << start[i] << '\t' << end[i] << '\n';
 	}
 
-	std::tuple<double, double> Plane::solve(const arr& r, const arr& v) const
+	std::tuple<double, double> Plane::solve(const arr& r, const arr& v, bool leaving) const
+	{
+		// A ray leaving a straight line can't meet it again
+		if (leaving)
+			return { infinity, 0.0 };
+
+		return solve(start, end, r, v, min_hit_time(r, v));
+	}
+
+	std::tuple<double, double> Plane::solve(const arr& start, const arr& end, const arr& r, const arr& v, double t_min)
 	{
 		double bottom{ v[0] * (start[1] - end[1]) + v[1] * (end[0] - start[0]) };  // denominator of t expression
+		double dx{ end[0] - start[0] }, dy{ end[1] - start[1] };
 
-		if (is_close(bottom, 0.0))  // Check lines aren't parallel
+		// Check lines aren't parallel, relative to their lengths so it holds at any scale
+		if (bottom * bottom <= 1e-24 * (v[0] * v[0] + v[1] * v[1]) * (dx * dx + dy * dy))
 			return { infinity, 0.0 };
 
 		double t{ r[0] * (end[1] - start[1]) - start[0] * end[1] + end[0] * start[1] + r[1] * (start[0] - end[0]) };
@@ -90,9 +125,51 @@ namespace optics
 
 		tp /= -bottom;
 
-		if (tp < 0 || tp > 1 || t < 0.0 || is_close(t, 0.0))
+		if (tp < 0 || tp > 1 || t <= t_min)
 			return { infinity, 0.0 };
 
 		return { t, tp };
 	}
+
+	arr Plane::surface_tangents(const Ray& ry, const arr& x, std::size_t n_cols, std::vector<double>& dg) const
+	{
+		// Surface function is g(x) = m.(x - start) where m is the normal scaled by
+		// the length of the plane
+		const double partials[4]{ end[1] - x[1], x[0] - end[0], x[1] - start[1], start[0] - x[0] };
+
+		dg.assign(n_cols, 0.0);
+
+		for (std::size_t ind = 0; ind < 4; ++ind)
+		{
+			int col{ tangent_col(ry, *this, ind) };
+
+			if (col >= 0 && static_cast<std::size_t>(col) < n_cols)
+				dg[col] += partials[ind];
+		}
+
+		return { start[1] - end[1], end[0] - start[0] };
+	}
+
+	void Plane::normal_tangents(const Ray& ry, std::vector<arr>& dn) const
+	{
+		// Derivative of the unnormalised normal with respect to each parameter
+		const arr dm[4]{ { 0.0, -1.0 }, { 1.0, 0.0 }, { 0.0, 1.0 }, { -1.0, 0.0 } };
+		double mag{ std::hypot(end[0] - start[0], end[1] - start[1]) };
+
+		dn.assign(ry.dr.size(), arr{ 0.0, 0.0 });
+
+		for (std::size_t ind = 0; ind < 4; ++ind)
+		{
+			int col{ tangent_col(ry, *this, ind) };
+
+			if (col < 0 || static_cast<std::size_t>(col) >= dn.size())
+				continue;
+
+			// Only the component of dm perpendicular to n_vec changes the unit normal
+			double n_dot_dm{ n_vec[0] * dm[ind][0] + n_vec[1] * dm[ind][1] };
+
+			for (int i = 0; i < 2; ++i)
+				dn[col][i] += (dm[ind][i] - n_dot_dm * n_vec[i]) / mag;
+		}
+	}
 }
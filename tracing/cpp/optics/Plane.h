@@ -39,19 +39,39 @@ namespace optics
 		// function for testing for hits
 		virtual double test_hit(const Ray* ry) const override;
 
+		virtual std::pair<arr, arr> bounds() const override;
+
+		virtual void append_segments(std::vector<std::pair<arr, arr>>& segs) const override;
+
 		// getter/setter methods for start & end
 		// getter methods shouldn't be used to modify start end values
 		arr& get_start();
+		const arr& get_start() const;
 		void set_start(const arr& start);
 
 		arr& get_end();
+		const arr& get_end() const;
 		void set_end(const arr& end);
 
 		// Printing
 		virtual void print(std::ostream& os) const override;
 
 		// helper functions
-		// Solve for point of intersection, returns (t, tp)
-		std::tuple<double, double> solve(const arr& r, const arr& v) const;
+		// Solve for point of intersection, returns (t, tp). If leaving the ray has
+		// just hit the plane so there's no intersection
+		std::tuple<double, double> solve(const arr& r, const arr& v, bool leaving = false) const;
+
+		// Solve for the point of intersection with the segment from start to end,
+		// ignoring hits at times up to t_min
+		static std::tuple<double, double> solve(const arr& start, const arr& end, const arr& r, const arr& v,
+			double t_min);
+
+		// Tangent helpers, the parameters are ordered start x, start y, end x, end y
+		// Returns the gradient of the plane's surface function at x and fills dg with
+		// its derivative with respect to each column's parameter
+		arr surface_tangents(const Ray& ry, const arr& x, std::size_t n_cols, std::vector<double>& dg) const;
+
+		// Fills dn with the tangents of n_vec for a ray that has just hit the plane
+		void normal_tangents(const Ray& ry, std::vector<arr>& dn) const;
 	};
 }
@@ -0,0 +1,200 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Polyline.h"
+#include "Plane.h"
+#include "trace_func.h"
+#include "tangent_func.h"
+#include <algorithm>
+#include <stdexcept>
+
+namespace optics
+{
+	namespace
+	{
+		// Maximum number of segments in a leaf of the hierarchy
+		constexpr std::uint32_t leaf_size{ 4 };
+
+		// Padding of the bounding boxes so hits on their edges are not missed
+		constexpr double box_pad{ 1e-9 };
+	}
+
+	Polyline::Polyline(std::vector<arr> points)
+	{
+		set_points(std::move(points));
+	}
+
+	std::uint32_t Polyline::build(std::uint32_t first, std::uint32_t count)
+	{
+		std::uint32_t ind{ static_cast<std::uint32_t>(nodes.size()) };
+		nodes.push_back(Node{ { infinity, infinity }, { -infinity, -infinity }, first, count, 0 });
+
+		// Segments share vertices so the box covers points first to first + count
+		arr lo{ infinity, infinity }, hi{ -infinity, -infinity };
+
+		for (std::size_t p = first; p <= first + count; ++p)
+		{
+			for (int i = 0; i < 2; ++i)
+			{
+				lo[i] = std::min(lo[i], points[p][i] - box_pad);
+				hi[i] = std::max(hi[i], points[p][i] + box_pad);
+			}
+		}
+
+		nodes[ind].lo = lo;
+		nodes[ind].hi = hi;
+
+		if (count > leaf_size)
+		{
+			std::uint32_t half{ count / 2 };
+
+			build(first, half);  // Left child is the next node
+			std::uint32_t right{ build(first + half, count - half) };
+
+			nodes[ind].right = right;
+		}
+
+		return ind;
+	}
+
+	std::pair<std::size_t, double> Polyline::find_hit(const arr& r, const arr& v, std::size_t skip) const
+	{
+		double best_t{ infinity };
+		double t_min{ min_hit_time(r, v) };
+		std::size_t best_ind{ 0 };
+
+		// Depth of a hierarchy built by halving is small so a fixed stack suffices
+		std::uint32_t stack[64];
+		int top{ 0 };
+		stack[top++] = 0;
+
+		while (top > 0)
+		{
+			std::uint32_t node_ind{ stack[--top] };
+			const Node& node{ nodes[node_ind] };
+
+			if (!hits_box(node.lo, node.hi, r, v, best_t))
+				continue;
+
+			if (node.right == 0)
+			{
+				for (std::size_t s = node.first; s < node.first + node.count; ++s)
+				{
+					double t;
+
+					if (s == skip)
+						continue;
+
+					std::tie(t, std::ignore) = Plane::solve(points[s], points[s + 1], r, v, t_min);
+
+					if (t < best_t)
+					{
+						best_t = t;
+						best_ind = s;
+					}
+				}
+			}
+			else
+			{
+				stack[top++] = node.right;
+				stack[top++] = node_ind + 1;
+			}
+		}
+
+		return { best_ind, best_t };
+	}
+
+	arr Polyline::move_to_hit(Ray* ry) const
+	{
+		std::size_t ind;
+		double t;
+
+		std::tie(ind, t) = find_hit(ry->pos.back(), ry->v, ry->last_hit == this ? ry->last_part : no_part);
+
+		const arr& start{ points[ind] };
+		const arr& end{ points[ind + 1] };
+
+		// compute new position of ray
+		arr newPos = compute_new_pos(*ry, t);
+		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		ry->last_part = ind;
+		attenuate_ray(*ry, t);
+
+		if (has_tangents(*ry))
+		{
+			// Vertices aren't parameters so only the ray's own tangents change
+			std::vector<double> dg(ry->dr.size(), 0.0);
+
+			move_tangents(*ry, t, { start[1] - end[1], end[0] - start[0] }, dg);
+		}
+
+		double mag{ std::hypot(end[0] - start[0], end[1] - start[1]) };
+
+		return { -(end[1] - start[1]) / mag, (end[0] - start[0]) / mag };
+	}
+
+	double Polyline::test_hit(const Ray* ry) const
+	{
+		double t;
+
+		std::tie(std::ignore, t) = find_hit(ry->pos.back(), ry->v, ry->last_hit == this ? ry->last_part : no_part);
+
+		return t;
+	}
+
+	std::pair<arr, arr> Polyline::bounds() const
+	{
+		return { nodes[0].lo, nodes[0].hi };
+	}
+
+	void Polyline::append_segments(std::vector<std::pair<arr, arr>>& segs) const
+	{
+		for (std::size_t ind = 0; ind + 1 < points.size(); ++ind)
+			segs.emplace_back(points[ind], points[ind + 1]);
+	}
+
+	const std::vector<arr>& Polyline::get_points() const
+	{
+		return points;
+	}
+
+	void Polyline::set_points(std::vector<arr> points)
+	{
+		if (points.size() < 2)
+			throw std::invalid_argument("a polyline needs at least two points");
+
+		this->points = std::move(points);
+
+		nodes.clear();
+		nodes.reserve(2 * (size() / leaf_size + 1));
+		build(0, static_cast<std::uint32_t>(size()));
+	}
+
+	std::size_t Polyline::size() const
+	{
+		return points.size() - 1;
+	}
+
+	void Polyline::print(std::ostream& os) const
+	{
+		for (const arr& p : points)
+			os << p[0] << '\t' << p[1] << '\n';
+	}
+}
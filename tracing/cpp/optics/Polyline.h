@@ -0,0 +1,81 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes a polyline, connected line segments stored as a single component.
+// Segment i runs from point i to point i + 1 so neighbouring segments share a
+// vertex. The segment a ray hits is found through a bounding volume hierarchy 
+// over contiguous ranges of segments, which suits polylines as consecutive 
+// segments are close together.
+#pragma once
+#include "Component.h"
+#include <cstdint>
+#include <tuple>
+
+namespace optics
+{
+	class Polyline :
+		public Component
+	{
+	protected:
+		// Node of the hierarchy covering segments [first, first + count)
+		struct Node
+		{
+			arr lo, hi;           // Corners of the bounding box
+			std::uint32_t first;  // First segment
+			std::uint32_t count;  // Number of segments
+			std::uint32_t right;  // Index of the right child, the left child is the next node. 0 for leaves
+		};
+
+		std::vector<arr> points;  // Vertices of the segments
+		std::vector<Node> nodes;  // The hierarchy, the root is the first node
+
+		// Builds the hierarchy for segments [first, first + count), returns the index of the node
+		std::uint32_t build(std::uint32_t first, std::uint32_t count);
+
+		// Finds the first segment the ray starting at r with direction v hits, returns (segment, t)
+		// t is infinity if no segment is hit. Segment skip, which the ray is leaving, isn't tested
+		std::pair<std::size_t, double> find_hit(const arr& r, const arr& v, std::size_t skip = no_part) const;
+
+		// Moves the ray to the segment it hits, updating its weight and tangents
+		// Returns the unit normal of the segment, pointing left of its start to end
+		arr move_to_hit(Ray* ry) const;
+
+	public:
+		// Throws std::invalid_argument if there are fewer than two points
+		Polyline(std::vector<arr> points);
+
+		// function for testing for hits
+		virtual double test_hit(const Ray* ry) const override;
+
+		// Box of the root of the hierarchy
+		virtual std::pair<arr, arr> bounds() const override;
+
+		virtual void append_segments(std::vector<std::pair<arr, arr>>& segs) const override;
+
+		// getter/setter methods for points, setting rebuilds the hierarchy
+		const std::vector<arr>& get_points() const;
+		void set_points(std::vector<arr> points);
+
+		// Number of segments
+		std::size_t size() const;
+
+		// Printing
+		virtual void print(std::ostream& os) const override;
+	};
+}
@@ -0,0 +1,177 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <thread>
+#include <vector>
+#include "Rasterize.h"
+
+namespace optics
+{
+	namespace
+	{
+		// Fewest positions worth giving a thread its own copy of the image
+		constexpr std::int64_t raster_min_points{ 1 << 14 };
+
+		// Adds the weighted length of the section from a to b inside each pixel
+		// divided by the pixel's area
+		void rasterize_section(const arr& a, const arr& b, double w, const Raster_Grid& grid,
+			double* image)
+		{
+			if (!(std::isfinite(a[0]) && std::isfinite(a[1]) && std::isfinite(b[0]) && std::isfinite(b[1])))
+				return;
+
+			// Clips the section to the grid with the Liang-Barsky algorithm, 
+			// positions along the section are a + t * d for t between t0 and t1
+			const arr d{ b[0] - a[0], b[1] - a[1] };
+			const double p[4]{ -d[0], d[0], -d[1], d[1] };
+			const double q[4]{ a[0] - grid.x_min, grid.x_max - a[0], a[1] - grid.y_min, grid.y_max - a[1] };
+			double t0{ 0.0 }, t1{ 1.0 };
+
+			for (int k = 0; k < 4; ++k)
+			{
+				if (p[k] == 0.0)
+				{
+					if (q[k] < 0.0)
+						return;
+				}
+				else if (p[k] < 0.0)
+					t0 = std::max(t0, q[k] / p[k]);
+				else
+					t1 = std::min(t1, q[k] / p[k]);
+			}
+
+			if (t0 >= t1)
+				return;
+
+			const long long nx{ static_cast<long long>(grid.nx) }, ny{ static_cast<long long>(grid.ny) };
+			const double dx{ (grid.x_max - grid.x_min) / grid.nx }, dy{ (grid.y_max - grid.y_min) / grid.ny };
+			const double scale{ w * std::hypot(d[0], d[1]) / (dx * dy) };
+
+			// Clipped start and direction of the section in units of pixels
+			const double gx{ (a[0] + t0 * d[0] - grid.x_min) / dx }, gy{ (a[1] + t0 * d[1] - grid.y_min) / dy };
+			const double ux{ d[0] / dx }, uy{ d[1] / dy };
+
+			long long i{ std::min(std::max(static_cast<long long>(std::floor(gx)), 0LL), nx - 1) };
+			long long j{ std::min(std::max(static_cast<long long>(std::floor(gy)), 0LL), ny - 1) };
+
+			// Walks through the pixels the section crosses (Amanatides and Woo),
+			// t_next is the value of t at the next pixel boundary in x and y
+			constexpr double inf{ std::numeric_limits<double>::infinity() };
+			const int step_i{ ux > 0.0 ? 1 : -1 }, step_j{ uy > 0.0 ? 1 : -1 };
+			const double t_delta_x{ ux != 0.0 ? 1.0 / std::abs(ux) : inf };
+			const double t_delta_y{ uy != 0.0 ? 1.0 / std::abs(uy) : inf };
+			double t_next_x{ ux != 0.0 ? t0 + (i + (step_i > 0) - gx) / ux : inf };
+			double t_next_y{ uy != 0.0 ? t0 + (j + (step_j > 0) - gy) / uy : inf };
+			double t{ t0 };
+
+			while (true)
+			{
+				const double t_end{ std::max(t, std::min({ t_next_x, t_next_y, t1 })) };
+				image[j * nx + i] += scale * (t_end - t);
+
+				if (t_end >= t1)
+					break;
+
+				t = t_end;
+
+				if (t_next_x <= t_next_y)
+				{
+					i += step_i;
+					t_next_x += t_delta_x;
+				}
+				else
+				{
+					j += step_j;
+					t_next_y += t_delta_y;
+				}
+
+				// Rounding can take the walk just outside the grid before t1
+				if (i < 0 || i >= nx || j < 0 || j >= ny)
+					break;
+			}
+		}
+	}
+
+	template <typename P>
+	void rasterize(const std::array<P, 2>* points, const std::int64_t* offsets, std::size_t n_rays,
+		const double* weights, const Raster_Grid& grid, double* image, unsigned n_threads)
+	{
+		if (n_rays == 0)
+			return;
+
+		if (n_threads == 0)
+			n_threads = std::max(1u, std::thread::hardware_concurrency());
+
+		const std::int64_t n_points{ offsets[n_rays] - offsets[0] };
+		n_threads = static_cast<unsigned>(std::min<std::int64_t>(std::max<std::int64_t>(n_points / raster_min_points, 1), n_threads));
+
+		// Splits the rays so each thread has a similar number of positions, 
+		// thread k traces rays first[k] to first[k + 1] - 1
+		std::vector<std::size_t> first(n_threads + 1, n_rays);
+		first[0] = 0;
+
+		for (unsigned k = 1; k < n_threads; ++k)
+			first[k] = std::lower_bound(offsets, offsets + n_rays, offsets[0] + n_points * k / n_threads) - offsets;
+
+		// Thread 0 adds to image, the others to their own copies
+		const std::size_t n_pixels{ grid.nx * grid.ny };
+		std::vector<std::vector<double>> copies(n_threads - 1, std::vector<double>(n_pixels, 0.0));
+
+		auto work = [&](unsigned k)
+		{
+			double* out{ k == 0 ? image : copies[k - 1].data() };
+
+			for (std::size_t i = first[k]; i < first[k + 1]; ++i)
+			{
+				const double w{ weights ? weights[i] : 1.0 };
+
+				for (std::int64_t p = offsets[i] + 1; p < offsets[i + 1]; ++p)
+				{
+					const arr a{ static_cast<double>(points[p - 1][0]), static_cast<double>(points[p - 1][1]) };
+					const arr b{ static_cast<double>(points[p][0]), static_cast<double>(points[p][1]) };
+					rasterize_section(a, b, w, grid, out);
+				}
+			}
+		};
+
+		std::vector<std::thread> threads;
+
+		for (unsigned k = 1; k < n_threads; ++k)
+			threads.emplace_back(work, k);
+
+		work(0);
+
+		for (std::thread& th : threads)
+			th.join();
+
+		for (const std::vector<double>& copy : copies)
+			for (std::size_t i = 0; i < n_pixels; ++i)
+				image[i] += copy[i];
+	}
+
+	// Explicitly instantiate the supported precisions
+	template void rasterize(const std::array<double, 2>* points, const std::int64_t* offsets,
+		std::size_t n_rays, const double* weights, const Raster_Grid& grid, double* image, unsigned n_threads);
+	template void rasterize(const std::array<float, 2>* points, const std::int64_t* offsets,
+		std::size_t n_rays, const double* weights, const Raster_Grid& grid, double* image, unsigned n_threads);
+}
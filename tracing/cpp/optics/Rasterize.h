@@ -0,0 +1,49 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+// Accumulates the paths of many rays into a density image. Each straight 
+// section of a path adds its weighted length inside each pixel divided by 
+// the pixel's area, so the image is independent of resolution and 
+// approximates the weighted path length per unit area, i.e. the fluence. 
+// Sections are clipped to the image and rays are shared between threads, 
+// each accumulating into its own copy of the image before they are summed.
+//
+#pragma once
+#include <cstdint>
+#include "general.h"
+
+namespace optics
+{
+	// Region of the plane covered by an image with nx by ny pixels
+	struct Raster_Grid
+	{
+		double x_min, x_max, y_min, y_max;
+		std::size_t nx, ny;
+	};
+
+	// Adds the density of the paths to image, which has grid.ny rows of grid.nx
+	// pixels with row 0 at y_min. The positions of ray i are points[offsets[i]] 
+	// to points[offsets[i + 1] - 1] as in Ray_Bundle. Its sections are weighted by 
+	// weights[i], or 1 if weights is null. If n_threads is 0 the number of 
+	// hardware threads is used
+	template <typename P>
+	void rasterize(const std::array<P, 2>* points, const std::int64_t* offsets, std::size_t n_rays,
+		const double* weights, const Raster_Grid& grid, double* image, unsigned n_threads = 0);
+}
@@ -18,12 +18,13 @@
 
 
 #include "Ray.h"
+#include <algorithm>
 
 namespace optics
 {
 
-	Ray::Ray(arr init, arr v)
-		: continue_tracing(true)
+	Ray::Ray(arr init, arr v, double alpha)
+		: continue_tracing(true), v_start(v), weight(1.0), alpha(alpha), alpha_start(alpha)
 	{
 		pos.push_back(init);
 		Ray::v = v;
@@ -47,14 +48,32 @@ namespace optics
 	void Ray::reset(const arr& new_v)
 	{
 		v = new_v;
+		v_start = new_v;
 		pos.resize(1);
+
+		continue_tracing = true;
+		weight = 1.0;
+		alpha = alpha_start;
+		last_hit = nullptr;
+
+		std::fill(dr.begin(), dr.end(), arr{ 0.0, 0.0 });
+		std::fill(dv.begin(), dv.end(), arr{ 0.0, 0.0 });
 	}
 
 	void Ray::reset(const arr& new_v, const arr& new_start)
 	{
 		v = new_v;
+		v_start = new_v;
 
 		pos.resize(1);
 		pos[0] = new_start;
+
+		continue_tracing = true;
+		weight = 1.0;
+		alpha = alpha_start;
+		last_hit = nullptr;
+
+		std::fill(dr.begin(), dr.end(), arr{ 0.0, 0.0 });
+		std::fill(dv.begin(), dv.end(), arr{ 0.0, 0.0 });
 	}
 }
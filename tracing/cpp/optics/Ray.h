@@ -22,10 +22,17 @@
 #include <array>
 #include <vector>
 #include <iostream>
+#include <unordered_map>
 #include "general.h"
 
 namespace optics
 {
+	// Column of the ray's tangents each parameter of the components being 
+	// differentiated with respect to maps to, -1 or beyond the end of a 
+	// component's vector if the parameter isn't. The order of the parameters is
+	// defined by each derived class of Component
+	using Tangent_Cols = std::unordered_map<const Component*, std::vector<int>>;
+
 	class Ray
 	{
 	public:
@@ -33,12 +40,41 @@ namespace optics
 		arr v;
 		bool continue_tracing;
 
-		Ray(arr init, arr v);
+		// Direction the ray leaves pos[0] in. Set on creation and by reset(), and
+		// recorded again when tracing starts from pos[0] as v may have been changed
+		arr v_start;
+
+		// Energy carried by the ray and the absorption coefficient of the medium
+		// it is currently travelling through. alpha_start is the absorption
+		// coefficient of the medium the ray starts in, restored by reset()
+		double weight;
+		double alpha, alpha_start;
+
+		// Tangents of the current position, pos.back(), and direction with respect
+		// to each parameter being differentiated with respect to. Empty if no
+		// derivatives are being propagated
+		std::vector<arr> dr, dv;
+
+		// Columns of dr and dv of the parameters of the trace propagating them, kept
+		// with the ray rather than the components so traces can share components
+		const Tangent_Cols* tangent_cols{ nullptr };
+
+		// Primitive the ray last hit and the part of it, e.g. the segment of a polyline,
+		// so it isn't hit again from where the ray leaves it. Null before the first hit
+		const Component* last_hit{ nullptr };
+		std::size_t last_part{ 0 };
+
+		// Components last hit within the transformed complex components the ray last
+		// hit, outermost last, as their sub-components may be shared between several
+		std::vector<const Component*> inner_hits;
+
+		Ray(arr init, arr v, double alpha = 0.0);
 
 		friend std::ostream& operator<<(std::ostream& os, const Ray& ry);
 
 		// Resets the Ray to only the first point in pos with specified new direction
-		// and resets the start position if specified
+		// and resets the start position if specified. The weight is reset to 1, the
+		// ray is placed back in its starting medium and it has no last hit
 		void reset(const arr& new_v);
 		void reset(const arr& new_v, const arr& new_start);
 	};
@@ -0,0 +1,59 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Ray_Bundle.h"
+
+namespace optics
+{
+	template <typename P>
+	Ray_Bundle<P>::Ray_Bundle()
+		: offsets{ 0 }
+	{
+	}
+
+	template <typename P>
+	void Ray_Bundle<P>::clear()
+	{
+		points.clear();
+		offsets.assign(1, 0);
+		v.clear();
+		weight.clear();
+	}
+
+	template <typename P>
+	void Ray_Bundle<P>::append(const Ray& ry)
+	{
+		for (const arr& p : ry.pos)
+			points.push_back({ static_cast<P>(p[0]), static_cast<P>(p[1]) });
+
+		offsets.push_back(static_cast<std::int64_t>(points.size()));
+		v.push_back({ static_cast<P>(ry.v[0]), static_cast<P>(ry.v[1]) });
+		weight.push_back(static_cast<P>(ry.weight));
+	}
+
+	template <typename P>
+	std::size_t Ray_Bundle<P>::size() const
+	{
+		return v.size();
+	}
+
+	// Explicitly instantiate the supported precisions
+	template class Ray_Bundle<double>;
+	template class Ray_Bundle<float>;
+}
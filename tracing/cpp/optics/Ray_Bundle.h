@@ -0,0 +1,55 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes the paths of many rays stored contiguously. The positions of ray
+// i are points[offsets[i]] to points[offsets[i + 1] - 1], so each path takes
+// only as many points as the ray has positions, with no padding. Rays are 
+// traced in double precision and stored with precision P, float halves the
+// memory of large bundles.
+//
+#pragma once
+#include <cstdint>
+#include "general.h"
+#include "Ray.h"
+
+namespace optics
+{
+	template <typename P>
+	class Ray_Bundle
+	{
+	public:
+		using point = std::array<P, 2>;
+
+		std::vector<point> points;          // Positions of every ray, one path after another
+		std::vector<std::int64_t> offsets;  // Index in points of the start of each path, then the number of points
+		std::vector<point> v;               // Final direction of each ray
+		std::vector<P> weight;              // Final weight of each ray
+
+		Ray_Bundle();
+
+		// Removes every path
+		void clear();
+
+		// Appends the path, direction and weight of the ray
+		void append(const Ray& ry);
+
+		// Number of rays
+		std::size_t size() const;
+	};
+}
@@ -0,0 +1,64 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Ray_Pool.h"
+
+namespace optics
+{
+	Ray_Pool::Ray_Pool(std::size_t reserve_pos)
+		: n_used{ 0 }, reserve_pos{ reserve_pos }
+	{
+	}
+
+	Ray* Ray_Pool::acquire(const arr& init, const arr& v, double alpha)
+	{
+		if (n_used == rays.size())
+		{
+			rays.emplace_back(init, v, alpha);
+			rays.back().pos.reserve(reserve_pos);
+
+			return &rays[n_used++];
+		}
+
+		Ray& ry{ rays[n_used++] };
+
+		ry.alpha_start = alpha;
+		ry.dr.clear();
+		ry.dv.clear();
+		ry.tangent_cols = nullptr;
+		ry.reset(v, init);
+
+		return &ry;
+	}
+
+	void Ray_Pool::release_all()
+	{
+		n_used = 0;
+	}
+
+	std::size_t Ray_Pool::size() const
+	{
+		return n_used;
+	}
+
+	std::size_t Ray_Pool::capacity() const
+	{
+		return rays.size();
+	}
+}
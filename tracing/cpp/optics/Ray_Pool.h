@@ -0,0 +1,55 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes an arena of rays that can be reused between traces. Rays are 
+// stored in a deque so their addresses are stable as the pool grows, and a 
+// released ray keeps the capacity of its position vector so tracing it again
+// doesn't allocate. All rays are released together by release_all().
+//
+#pragma once
+#include <deque>
+#include "general.h"
+#include "Ray.h"
+
+namespace optics
+{
+	class Ray_Pool
+	{
+	private:
+		std::deque<Ray> rays;
+		std::size_t n_used;        // Rays handed out since the last release_all()
+		std::size_t reserve_pos;   // Capacity reserved for the positions of new rays
+
+	public:
+		Ray_Pool(std::size_t reserve_pos = 0);
+
+		// Returns a ray starting at init with direction v in a medium with 
+		// absorption coefficient alpha, reusing a released ray if there is one
+		Ray* acquire(const arr& init, const arr& v, double alpha = 0.0);
+
+		// Releases every ray, they are reused by later calls to acquire()
+		void release_all();
+
+		// Number of rays handed out since the last release_all()
+		std::size_t size() const;
+
+		// Number of rays held by the pool
+		std::size_t capacity() const;
+	};
+}
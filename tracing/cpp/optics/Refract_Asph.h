@@ -0,0 +1,44 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes a refractive boundary in the shape of an even asphere. n1 is the 
+// refractive index on the side the optical axis points to and n2 on the side of
+// the vertex's tangent plane it points away from
+//
+#pragma once
+#include "Aspheric.h"
+#include "trace_func.h"
+
+namespace optics
+{
+	class Refract_Asph :
+		public Aspheric
+	{
+	public:
+		double n1, n2;  // Refractive indices
+		double a1, a2;  // Absorption coefficients
+
+		Refract_Asph(arr vertex, double axis, double c, double k, double h, std::vector<double> coeffs,
+			double n1, double n2, double a1 = 0.0, double a2 = 0.0);
+
+		virtual void hit(Ray* ry, int n = 1) const override;
+
+		virtual Refract_Asph* clone() const override;
+	};
+}
@@ -0,0 +1,53 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include "Refract_Bezier.h"
+#include "tangent_func.h"
+
+namespace optics
+{
+	Refract_Bezier::Refract_Bezier(std::vector<arr> points, double n1, double n2, double a1, double a2,
+		int depth)
+		: Bezier(std::move(points), depth), n1(n1), n2(n2), a1(a1), a2(a2)
+	{
+	}
+
+	void Refract_Bezier::hit(Ray* ry, int n) const
+	{
+		std::vector<arr> dn;
+		arr n_vec{ move_to_hit(ry, dn) };
+
+		if (has_tangents(*ry))
+		{
+			std::size_t n_cols{ ry->dr.size() };
+
+			refract_tangents(*ry, n_vec, dn, n1, n2, std::vector<double>(n_cols, 0.0),
+				std::vector<double>(n_cols, 0.0));
+		}
+
+		// Now compute new direction
+		refract_ray(*ry, n_vec, n1, n2, a1, a2);
+	}
+
+	Refract_Bezier* Refract_Bezier::clone() const
+	{
+		return new Refract_Bezier{ *this };
+	}
+}
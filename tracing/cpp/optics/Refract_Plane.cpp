@@ -18,12 +18,13 @@
 
 
 #include "Refract_Plane.h"
+#include "tangent_func.h"
 
 namespace optics
 {
 
-	Refract_Plane::Refract_Plane(arr start, arr end, double n1, double n2)
-		: Plane(start, end), n1(n1), n2(n2)
+	Refract_Plane::Refract_Plane(arr start, arr end, double n1, double n2, double a1, double a2)
+		: Plane(start, end), n1(n1), n2(n2), a1(a1), a2(a2)
 	{
 	}
 
@@ -34,14 +35,28 @@ namespace optics
 
 		double t;
 
-		std::tie(t, std::ignore) = solve(r, v);
+		std::tie(t, std::ignore) = solve(r, v, ry->last_hit == this);
 
 		// Compute new position
 		arr newPos = compute_new_pos(*ry, t);
 		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
+
+		if (has_tangents(*ry))
+		{
+			std::size_t n_cols{ ry->dr.size() };
+			std::vector<double> dg;
+			std::vector<arr> dn;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, n_cols, dg), dg);
+			normal_tangents(*ry, dn);
+			refract_tangents(*ry, n_vec, dn, n1, n2, param_tangents(*ry, *this, 4, n_cols),
+				param_tangents(*ry, *this, 5, n_cols));
+		}
 
 		// Now compute new direction
-		refract_ray(*ry, n_vec, n1, n2);
+		refract_ray(*ry, n_vec, n1, n2, a1, a2);
 	}
 
 	Refract_Plane* Refract_Plane::clone() const
@@ -17,7 +17,8 @@
 // along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-// Describes a plane at which refraction occurs
+// Describes a plane at which refraction occurs. Its parameters for tangents are
+// those of Plane followed by n1 and n2
 //
 #pragma once
 #include "Plane.h"
@@ -30,8 +31,9 @@ namespace optics
 	{
 	public:
 		double n1, n2;
+		double a1, a2;  // Absorption coefficients of the media on the n1 and n2 sides
 
-		Refract_Plane(arr start, arr end, double n1 = 1.0, double n2 = 1.0);
+		Refract_Plane(arr start, arr end, double n1 = 1.0, double n2 = 1.0, double a1 = 0.0, double a2 = 0.0);
 
 		// Hit function
 		virtual void hit(Ray* ry, int n) const override;
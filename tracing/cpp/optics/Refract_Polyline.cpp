@@ -0,0 +1,50 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Refract_Polyline.h"
+#include "tangent_func.h"
+
+namespace optics
+{
+	Refract_Polyline::Refract_Polyline(std::vector<arr> points, double n1, double n2, double a1, double a2)
+		: Polyline(std::move(points)), n1(n1), n2(n2), a1(a1), a2(a2)
+	{
+	}
+
+	void Refract_Polyline::hit(Ray* ry, int n) const
+	{
+		arr n_vec{ move_to_hit(ry) };
+
+		if (has_tangents(*ry))
+		{
+			std::size_t n_cols{ ry->dr.size() };
+
+			refract_tangents(*ry, n_vec, std::vector<arr>(n_cols, arr{ 0.0, 0.0 }), n1, n2,
+				std::vector<double>(n_cols, 0.0), std::vector<double>(n_cols, 0.0));
+		}
+
+		// Now compute new direction
+		refract_ray(*ry, n_vec, n1, n2, a1, a2);
+	}
+
+	Refract_Polyline* Refract_Polyline::clone() const
+	{
+		return new Refract_Polyline{ *this };
+	}
+}
@@ -0,0 +1,41 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes a refractive boundary made of connected line segments
+//
+#pragma once
+#include "Polyline.h"
+#include "trace_func.h"
+
+namespace optics
+{
+	class Refract_Polyline :
+		public Polyline
+	{
+	public:
+		double n1, n2;  // Refractive indices left and right of the segments
+		double a1, a2;  // Absorption coefficients left and right of the segments
+
+		Refract_Polyline(std::vector<arr> points, double n1, double n2, double a1 = 0.0, double a2 = 0.0);
+
+		virtual void hit(Ray* ry, int n = 1) const override;
+
+		virtual Refract_Polyline* clone() const override;
+	};
+}
@@ -18,12 +18,14 @@
 
 
 #include "Refract_Sph.h"
+#include "tangent_func.h"
 
 namespace optics
 {
 
-	Refract_Sph::Refract_Sph(arr centre, double R, double start, double end, double n1, double n2)
-		: Spherical(centre, R, start, end), n1(n1), n2(n2)
+	Refract_Sph::Refract_Sph(arr centre, double R, double start, double end, double n1, double n2,
+		double a1, double a2)
+		: Spherical(centre, R, start, end), n1(n1), n2(n2), a1(a1), a2(a2)
 	{
 	}
 
@@ -34,16 +36,30 @@ namespace optics
 
 		double t;
 
-		t = solve(r, v);
+		t = solve(r, v, ry->last_hit == this);
 
 		// Compute new position
 		arr newPos = compute_new_pos(*ry, t);
 		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
 
 		// Now compute new direction
 		arr n_vec = { (newPos[0] - centre[0]) / R, (newPos[1] - centre[1]) / R };  // normal vector is radial vector
 
-		refract_ray(*ry, n_vec, n1, n2);
+		if (has_tangents(*ry))
+		{
+			std::size_t n_cols{ ry->dr.size() };
+			std::vector<double> dg;
+			std::vector<arr> dn;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, n_cols, dg), dg);
+			normal_tangents(*ry, dn);
+			refract_tangents(*ry, n_vec, dn, n1, n2, param_tangents(*ry, *this, 5, n_cols),
+				param_tangents(*ry, *this, 6, n_cols));
+		}
+
+		refract_ray(*ry, n_vec, n1, n2, a1, a2);
 	}
 
 	Refract_Sph* Refract_Sph::clone() const
@@ -17,7 +17,8 @@
 // along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-// Describes an arc across which refraction occurs
+// Describes an arc across which refraction occurs. Its parameters for tangents
+// are those of Spherical followed by n1 and n2
 //
 #pragma once
 #include "Spherical.h"
@@ -30,8 +31,10 @@ namespace optics
 	{
 	public:
 		double n1, n2;
+		double a1, a2;  // Absorption coefficients of the media on the n1 and n2 sides
 
-		Refract_Sph(arr centre, double R, double start = 0.0, double end = 0.0, double n1 = 1.0, double n2 = 1.0);
+		Refract_Sph(arr centre, double R, double start = 0.0, double end = 0.0, double n1 = 1.0, double n2 = 1.0,
+			double a1 = 0.0, double a2 = 0.0);
 
 		virtual void hit(Ray* ry, int n = 1) const override;
 
@@ -0,0 +1,73 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+#include "Roulette.h"
+
+namespace optics
+{
+	namespace
+	{
+		// The splitmix64 finalizer, a bijection scrambling the bits of z
+		std::uint64_t splitmix_mix(std::uint64_t z)
+		{
+			z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+			z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+
+			return z ^ (z >> 31);
+		}
+	}
+
+	Roulette::Roulette(double threshold, std::uint64_t seed)
+		: state{ seed }, threshold{ threshold }, seed{ seed }
+	{
+	}
+
+	void Roulette::seed_ray(std::uint64_t ind)
+	{
+		// Hashing (seed, ind) places each ray's stream at an unrelated point of
+		// the splitmix64 sequence. Offsetting the state by multiples of its 
+		// increment instead would make neighbouring streams shifted copies
+		state = splitmix_mix(seed ^ splitmix_mix(ind + 1));
+	}
+
+	double Roulette::uniform()
+	{
+		// splitmix64, see https://prng.di.unimi.it/splitmix64.c
+		std::uint64_t z{ splitmix_mix(state += 0x9E3779B97F4A7C15ULL) };
+
+		// Use the top 53 bits to form a double in [0, 1)
+		return static_cast<double>(z >> 11) / 9007199254740992.0;
+	}
+
+	bool Roulette::play(Ray& ry)
+	{
+		if (ry.weight >= threshold)
+			return true;
+
+		double p_survive{ ry.weight / threshold };
+
+		if (uniform() < p_survive)
+		{
+			ry.weight = threshold;
+			return true;
+		}
+
+		ry.weight = 0.0;
+		return false;
+	}
+}
@@ -0,0 +1,53 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+// Describes the Russian roulette used to terminate rays whose weight has
+// fallen below a threshold. Rays below the threshold survive with probability
+// weight / threshold and have their weight raised to threshold if they do, so
+// the expected weight carried by the ray is unchanged.
+//
+#pragma once
+#include <cstdint>
+#include "general.h"
+#include "Ray.h"
+
+namespace optics
+{
+	class Roulette
+	{
+	private:
+		std::uint64_t state;  // State of the splitmix64 generator
+
+	public:
+		double threshold;
+		std::uint64_t seed;
+
+		Roulette(double threshold = 0.0, std::uint64_t seed = 0);
+
+		// Reseeds the generator for the ray with index ind so each ray receives
+		// the same random stream regardless of the order rays are traced in
+		void seed_ray(std::uint64_t ind);
+
+		// Returns a uniform random number in [0, 1)
+		double uniform();
+
+		// Plays roulette with the ray if its weight is below threshold, returns
+		// true if the ray should continue to be traced
+		bool play(Ray& ry);
+	};
+}
@@ -0,0 +1,66 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include "Scene_Bounds.h"
+#include <algorithm>
+
+namespace optics
+{
+	namespace
+	{
+		// Padding of the boxes relative to the size of their coordinates
+		constexpr double scene_box_pad{ 1e-9 };
+	}
+
+	template <typename T>
+	Scene_Bounds::Scene_Bounds(const T& c)
+		: lo{ infinity, infinity }, hi{ -infinity, -infinity }
+	{
+		boxes.reserve(c.size());
+
+		for (std::size_t ind = 0; ind < c.size(); ++ind)
+		{
+			arr c_lo, c_hi;
+			std::tie(c_lo, c_hi) = c[ind]->bounds();
+
+			for (int i = 0; i < 2; ++i)
+			{
+				const double pad{ scene_box_pad * (1.0 + std::max(std::abs(c_lo[i]), std::abs(c_hi[i]))) };
+
+				c_lo[i] -= pad;
+				c_hi[i] += pad;
+			}
+
+			expand_box(lo, hi, c_lo);
+			expand_box(lo, hi, c_hi);
+			boxes.emplace_back(c_lo, c_hi);
+		}
+	}
+
+	bool Scene_Bounds::escapes(const Ray& ry) const
+	{
+		return !hits_box(lo, hi, ry.pos.back(), ry.v, infinity);
+	}
+
+	bool Scene_Bounds::may_hit(std::size_t ind, const Ray& ry, double t_max) const
+	{
+		return hits_box(boxes[ind].first, boxes[ind].second, ry.pos.back(), ry.v, t_max);
+	}
+}
@@ -0,0 +1,53 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+// Axis aligned bounding boxes of the components rays are traced through and 
+// of the whole scene, computed once before tracing. A ray whose path misses
+// the scene's box can't hit any more components so escapes without them 
+// being tested, and a component is only tested if the ray enters its box.
+// Boxes are padded in proportion to their coordinates so rounding can't cull
+// a hit on their edge.
+//
+#pragma once
+#include "general.h"
+#include "Component.h"
+#include "Ray.h"
+
+namespace optics
+{
+	class Scene_Bounds
+	{
+	public:
+		arr lo, hi;                              // Corners of the scene's box
+		std::vector<std::pair<arr, arr>> boxes;  // Corners of each component's box
+
+		template <typename T>
+		explicit Scene_Bounds(const T& c);
+
+		// Whether the ray can't hit any of the components
+		bool escapes(const Ray& ry) const;
+
+		// Whether the ray can hit component ind before time t_max
+		bool may_hit(std::size_t ind, const Ray& ry, double t_max) const;
+	};
+
+	template Scene_Bounds::Scene_Bounds(const std::vector<std::shared_ptr<Component>>& c);
+	template Scene_Bounds::Scene_Bounds(const std::vector<Component*>& c);
+}
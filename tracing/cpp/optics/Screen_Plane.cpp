@@ -18,6 +18,7 @@
 
 
 #include "Screen_Plane.h"
+#include "tangent_func.h"
 
 namespace optics
 {
@@ -35,7 +36,7 @@ namespace optics
 		arr& r = ry->pos.back();
 		arr& v = ry->v;
 
-		std::tie(t, tp) = solve(r, v);
+		std::tie(t, tp) = solve(r, v, ry->last_hit == this);
 
 		// Compute new position
 		for (int i = 0; i < 2; ++i)
@@ -43,6 +44,15 @@ namespace optics
 
 		// Add collision point, no need to update v
 		ry->pos.push_back(newPos);
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
+
+		if (has_tangents(*ry))
+		{
+			std::vector<double> dg;
+
+			move_tangents(*ry, t, surface_tangents(*ry, newPos, ry->dr.size(), dg), dg);
+		}
 		ry->continue_tracing = false;
 	}
 
@@ -21,6 +21,7 @@
 // rays that hit Screen_Plane will not occur.
 //
 #pragma once
+#include "trace_func.h"
 #include "Plane.h"
 
 namespace optics
@@ -0,0 +1,40 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Screen_Polyline.h"
+
+namespace optics
+{
+	Screen_Polyline::Screen_Polyline(std::vector<arr> points)
+		: Polyline(std::move(points))
+	{
+	}
+
+	void Screen_Polyline::hit(Ray* ry, int n) const
+	{
+		// Add collision point, no need to update v
+		move_to_hit(ry);
+		ry->continue_tracing = false;
+	}
+
+	Screen_Polyline* Screen_Polyline::clone() const
+	{
+		return new Screen_Polyline{ *this };
+	}
+}
@@ -18,6 +18,7 @@
 
 
 #include "Spherical.h"
+#include "tangent_func.h"
 
 namespace optics
 {
@@ -31,7 +32,27 @@ namespace optics
 
 	double Spherical::test_hit(const Ray* ry) const
 	{
-		return solve(ry->pos.back(), ry->v);
+		return solve(ry->pos.back(), ry->v, ry->last_hit == this);
+	}
+
+	std::pair<arr, arr> Spherical::bounds() const
+	{
+		// The arc's extent is set by its end points and any of the circle's 
+		// extreme points in the x and y directions it passes through
+		arr lo{ centre[0] + R * cos_start, centre[1] + R * sin_start }, hi{ lo };
+		expand_box(lo, hi, { centre[0] + R * std::cos(end), centre[1] + R * std::sin(end) });
+
+		const arr extremes[4]{ { R, 0.0 }, { 0.0, R }, { -R, 0.0 }, { 0.0, -R } };
+
+		for (const arr& e : extremes)
+		{
+			arr p{ centre[0] + e[0], centre[1] + e[1] };
+
+			if (in_range(p))
+				expand_box(lo, hi, p);
+		}
+
+		return { lo, hi };
 	}
 
 	bool Spherical::in_range(arr& p) const
@@ -59,7 +80,7 @@ namespace optics
 		return p_rot[0] <= end_p[0];
 	}
 
-	double Spherical::solve(const arr& r, const arr& v) const
+	double Spherical::solve(const arr& r, const arr& v, bool leaving) const
 	{
 		double dx{ r[0] - centre[0] }, dy{ r[1] - centre[1] };
 		double gamma{ dx * v[0] + dy * v[1] };
@@ -76,14 +97,27 @@ namespace optics
 		t_vals[0] = -gamma + std::sqrt(disc);
 		t_vals[1] = -gamma - std::sqrt(disc);
 
-		// bool found_sol{ false };
+		// A ray leaving the circle starts on it, so the root nearest zero is where it starts
+		int n_vals{ 2 };
+
+		if (leaving)
+		{
+			if (std::abs(t_vals[0]) < std::abs(t_vals[1]))
+				t_vals[0] = t_vals[1];
+
+			n_vals = 1;
+		}
+
 		double best_t{ infinity };
+		double t_min{ min_hit_time(r, v) };
 		arr pos;
 
-		for (double t : t_vals)
+		for (int i = 0; i < n_vals; ++i)
 		{
+			double t{ t_vals[i] };
+
 			// Check t is in the future, it's better than the current time and isn't where we are starting from
-			if (t > 0.0 && t < best_t && !is_close(t, 0.0))
+			if (t > t_min && t < best_t)
 			{
 				pos = { r[0] + v[0] * t, r[1] + v[1] * t };
 
@@ -93,13 +127,59 @@ namespace optics
 			}
 		}
 
-		if (best_t != infinity)
-			return best_t;
+		return best_t;
+	}
+
+	arr Spherical::surface_tangents(const Ray& ry, const arr& x, std::size_t n_cols, std::vector<double>& dg) const
+	{
+		// Surface function is g(x) = |x - centre|^2 - R^2, the arc's angles don't 
+		// move the surface so their partial derivatives are zero
+		const double partials[3]{ -2.0 * (x[0] - centre[0]), -2.0 * (x[1] - centre[1]), -2.0 * R };
+
+		dg.assign(n_cols, 0.0);
 
-		return infinity;
+		for (std::size_t ind = 0; ind < 3; ++ind)
+		{
+			int col{ tangent_col(ry, *this, ind) };
+
+			if (col >= 0 && static_cast<std::size_t>(col) < n_cols)
+				dg[col] += partials[ind];
+		}
+
+		return { 2.0 * (x[0] - centre[0]), 2.0 * (x[1] - centre[1]) };
+	}
+
+	void Spherical::normal_tangents(const Ray& ry, std::vector<arr>& dn) const
+	{
+		const arr& x{ ry.pos.back() };
+		std::size_t n_cols{ ry.dr.size() };
+
+		// Normal is (x - centre) / R, so it changes as the hit point moves too
+		dn.resize(n_cols);
+
+		for (std::size_t k = 0; k < n_cols; ++k)
+			dn[k] = { ry.dr[k][0] / R, ry.dr[k][1] / R };
+
+		for (std::size_t ind = 0; ind < 3; ++ind)
+		{
+			int col{ tangent_col(ry, *this, ind) };
+
+			if (col < 0 || static_cast<std::size_t>(col) >= n_cols)
+				continue;
+
+			if (ind < 2)  // centre
+			{
+				dn[col][ind] -= 1.0 / R;
+			}
+			else  // R
+			{
+				dn[col][0] -= (x[0] - centre[0]) / (R * R);
+				dn[col][1] -= (x[1] - centre[1]) / (R * R);
+			}
+		}
 	}
 
-	double Spherical::get_start()
+	double Spherical::get_start() const
 	{
 		return start;
 	}
@@ -115,7 +195,7 @@ namespace optics
 		end_p = rotate(end_p, start);
 	}
 
-	double Spherical::get_end()
+	double Spherical::get_end() const
 	{
 		return end;
 	}
@@ -45,6 +45,8 @@ namespace optics
 
 		virtual double test_hit(const Ray* ry) const override;
 
+		virtual std::pair<arr, arr> bounds() const override;
+
 		// helper functions
 
 		// Determines if the point p satisfies start <= atan2(p) <= end
@@ -52,14 +54,24 @@ namespace optics
 
 		// Determines the time of interception of a ray with starting position
 		// r and initial direction v with the arc. Returns infinity if no
-		// interception occurs
-		double solve(const arr& r, const arr& v) const;
+		// interception occurs. If leaving the ray has just hit the arc and the root
+		// where it starts is skipped
+		double solve(const arr& r, const arr& v, bool leaving = false) const;
+
+		// Tangent helpers, the parameters are ordered centre x, centre y, R, start, end
+		// Returns the gradient of the arc's surface function at x and fills dg with
+		// its derivative with respect to each column's parameter
+		arr surface_tangents(const Ray& ry, const arr& x, std::size_t n_cols, std::vector<double>& dg) const;
+
+		// Fills dn with the tangents of the radial unit normal for a ray that has just
+		// hit the arc, its position tangents must already have been updated
+		void normal_tangents(const Ray& ry, std::vector<arr>& dn) const;
 
-		double get_start();
+		double get_start() const;
 
 		void set_start(double new_start);
 
-		double get_end();
+		double get_end() const;
 
 		void set_end(double new_end);
 
@@ -0,0 +1,160 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "Transfer.h"
+#include <algorithm>
+#include <functional>
+
+namespace optics
+{
+	namespace
+	{
+		// Index of the interval of the increasing nodes containing x, clamped to the
+		// first and last, and how far along it x lies
+		std::pair<std::size_t, double> locate(const std::vector<double>& nodes, double x)
+		{
+			std::size_t i = std::upper_bound(nodes.begin(), nodes.end(), x) - nodes.begin();
+			i = std::min(std::max(i, std::size_t{ 1 }), nodes.size() - 1) - 1;
+
+			return { i, (x - nodes[i]) / (nodes[i + 1] - nodes[i]) };
+		}
+
+		bool increasing(const std::vector<double>& nodes)
+		{
+			return std::adjacent_find(nodes.begin(), nodes.end(), std::greater_equal<double>()) == nodes.end();
+		}
+	}
+
+	Transfer::Transfer(arr start, arr end, std::vector<double> s_nodes, std::vector<double> angle_nodes,
+		std::vector<Exit> exits)
+		: Plane(start, end), s_nodes(std::move(s_nodes)), angle_nodes(std::move(angle_nodes)),
+		exits(std::move(exits))
+	{
+		if (this->s_nodes.size() < 2 || this->angle_nodes.size() < 2)
+			throw std::invalid_argument("A transfer table needs at least two nodes in s and angle");
+
+		if (!increasing(this->s_nodes) || !increasing(this->angle_nodes))
+			throw std::invalid_argument("The nodes of a transfer table must be increasing");
+
+		if (this->exits.size() != this->s_nodes.size() * this->angle_nodes.size())
+			throw std::invalid_argument("A transfer table needs an exit for each node");
+	}
+
+	Transfer::Exit Transfer::interpolate(double s, double angle) const
+	{
+		std::size_t i, j;
+		double fs, fa;
+
+		std::tie(i, fs) = locate(s_nodes, s);
+		std::tie(j, fa) = locate(angle_nodes, angle);
+
+		const std::size_t n_a{ angle_nodes.size() };
+		const Exit* corners[4]{ &exits[i * n_a + j], &exits[i * n_a + j + 1],
+			&exits[(i + 1) * n_a + j], &exits[(i + 1) * n_a + j + 1] };
+		const double w[4]{ (1 - fs) * (1 - fa), (1 - fs) * fa, fs * (1 - fa), fs * fa };
+
+		// Exits can't be blended across the edge of the rays that stop, the nearest is used
+		for (const Exit* c : corners)
+		{
+			if (c->stops)
+				return *corners[(fs < 0.5 ? 0 : 2) + (fa < 0.5 ? 0 : 1)];
+		}
+
+		Exit ans{ { 0.0, 0.0 }, { 0.0, 0.0 }, 0.0, false };
+
+		for (int k = 0; k < 4; ++k)
+		{
+			for (int xy = 0; xy < 2; ++xy)
+			{
+				ans.pos[xy] += w[k] * corners[k]->pos[xy];
+				ans.v[xy] += w[k] * corners[k]->v[xy];
+			}
+
+			ans.weight += w[k] * corners[k]->weight;
+		}
+
+		renorm_unit_vec(ans.v);
+
+		return ans;
+	}
+
+	double Transfer::test_hit(const Ray* ry) const
+	{
+		if (ry->v[0] * n_vec[0] + ry->v[1] * n_vec[1] <= 0.0)
+			return infinity;
+
+		return Plane::test_hit(ry);
+	}
+
+	void Transfer::hit(Ray* ry, int n) const
+	{
+		double t, s;
+
+		std::tie(t, s) = solve(ry->pos.back(), ry->v, ry->last_hit == this);
+
+		ry->pos.push_back(compute_new_pos(*ry, t));
+		ry->last_hit = this;
+		attenuate_ray(*ry, t);
+
+		const arr& v{ ry->v };
+		const double angle{ std::atan2(n_vec[0] * v[1] - n_vec[1] * v[0], n_vec[0] * v[0] + n_vec[1] * v[1]) };
+
+		if (n < 2 || angle < angle_nodes.front() || angle > angle_nodes.back())
+		{
+			ry->continue_tracing = false;
+			return;
+		}
+
+		const Exit e{ interpolate(s, angle) };
+
+		ry->pos.push_back(e.pos);
+		ry->v = e.v;
+		ry->weight *= e.weight;
+		ry->continue_tracing = !e.stops;
+	}
+
+	void Transfer::append_segments(std::vector<std::pair<arr, arr>>& segs) const
+	{
+	}
+
+	const std::vector<double>& Transfer::get_s_nodes() const
+	{
+		return s_nodes;
+	}
+
+	const std::vector<double>& Transfer::get_angle_nodes() const
+	{
+		return angle_nodes;
+	}
+
+	const std::vector<Transfer::Exit>& Transfer::get_exits() const
+	{
+		return exits;
+	}
+
+	Transfer* Transfer::clone() const
+	{
+		return new Transfer{ *this };
+	}
+
+	void Transfer::print(std::ostream& os) const
+	{
+		os << "Transfer table with " << s_nodes.size() << " x " << angle_nodes.size() << " nodes";
+	}
+}
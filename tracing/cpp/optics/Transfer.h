@@ -0,0 +1,84 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+// Describes a frozen subsystem by a table of the rays leaving it for those entering
+// through its input port, a line segment with the subsystem on its left (see n_vec).
+// Entry rays are given by the fraction s of the way from start to end they cross the
+// port and the angle of their direction anticlockwise from n_vec. The table is tabulated
+// on a grid of s and angles, possibly unevenly spaced, and interpolated bilinearly.
+// Rays leaving the port the other way pass through it. Tangents aren't propagated
+//
+#pragma once
+#include "Plane.h"
+#include "trace_func.h"
+#include <stdexcept>
+#include <vector>
+
+namespace optics
+{
+	class Transfer :
+		public Plane
+	{
+	public:
+		// Ray leaving the subsystem, or where it stops if stops, with the fraction
+		// of its weight that remains
+		struct Exit
+		{
+			arr pos;
+			arr v;
+			double weight;
+			bool stops;
+		};
+
+	private:
+		std::vector<double> s_nodes, angle_nodes;
+
+		// Exits of the grid's nodes, that of s_nodes[i] and angle_nodes[j] is at 
+		// i * angle_nodes.size() + j
+		std::vector<Exit> exits;
+
+		// Interpolates the exit of the ray entering at s with the given angle
+		Exit interpolate(double s, double angle) const;
+
+	public:
+		// Throws std::invalid_argument if either grid has less than two nodes or
+		// isn't increasing or exits doesn't have an element for each node
+		Transfer(arr start, arr end, std::vector<double> s_nodes, std::vector<double> angle_nodes,
+			std::vector<Exit> exits);
+
+		// Only rays entering the subsystem hit the port
+		virtual double test_hit(const Ray* ry) const override;
+
+		// Moves the ray to the port then to its exit, using two interactions. A ray with
+		// only one left, entering at an angle outside the table or whose exit stops 
+		// stops there
+		virtual void hit(Ray* ry, int n = 1) const override;
+
+		// Rays can pass through the port so it isn't a wall
+		virtual void append_segments(std::vector<std::pair<arr, arr>>& segs) const override;
+
+		const std::vector<double>& get_s_nodes() const;
+		const std::vector<double>& get_angle_nodes() const;
+		const std::vector<Exit>& get_exits() const;
+
+		virtual Transfer* clone() const override;
+
+		virtual void print(std::ostream& os) const override;
+	};
+}
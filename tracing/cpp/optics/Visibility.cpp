@@ -0,0 +1,373 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+#include "Visibility.h"
+#include <algorithm>
+#include <map>
+#include <numeric>
+
+namespace optics
+{
+	namespace
+	{
+		// Gap kept between the boxes of separated components and the walls, relative
+		// to the size of the scene. It is much larger than the distance within which
+		// tracing ignores hits so rays leaving a component can't slip past a wall
+		constexpr double wall_margin{ 1e-6 };
+
+		using segment = std::pair<arr, arr>;
+
+		// Closed set of segments, every end point is shared by an even number of them
+		struct Wall
+		{
+			std::vector<segment> segs;
+			std::vector<std::size_t> owners;  // Component each segment belongs to
+			arr lo, hi;                       // Box containing the segments
+		};
+
+		// Finds the root of ind in the disjoint set forest parent
+		std::size_t find_root(std::vector<std::size_t>& parent, std::size_t ind)
+		{
+			while (parent[ind] != ind)
+			{
+				parent[ind] = parent[parent[ind]];
+				ind = parent[ind];
+			}
+
+			return ind;
+		}
+
+		// Groups the segments into connected walls, keeping those which are closed.
+		// End points are only joined if they are exactly equal so a closed wall has
+		// no gaps a ray could pass through
+		std::vector<Wall> closed_walls(const std::vector<segment>& segs, const std::vector<std::size_t>& owners)
+		{
+			std::map<arr, std::size_t> point_ind;
+			std::vector<std::size_t> degree;
+
+			auto index = [&](const arr& p)
+			{
+				auto it = point_ind.emplace(p, point_ind.size()).first;
+
+				if (it->second == degree.size())
+					degree.push_back(0);
+
+				++degree[it->second];
+
+				return it->second;
+			};
+
+			std::vector<std::pair<std::size_t, std::size_t>> ends;
+			ends.reserve(segs.size());
+
+			for (const segment& s : segs)
+				ends.emplace_back(index(s.first), index(s.second));
+
+			std::vector<std::size_t> parent(degree.size());
+			std::iota(parent.begin(), parent.end(), 0);
+
+			for (auto& e : ends)
+				parent[find_root(parent, e.first)] = find_root(parent, e.second);
+
+			// A group is closed if none of its points has an odd degree
+			std::vector<bool> closed(degree.size(), true);
+
+			for (std::size_t ind = 0; ind < degree.size(); ++ind)
+			{
+				if (degree[ind] % 2 != 0)
+					closed[find_root(parent, ind)] = false;
+			}
+
+			std::map<std::size_t, Wall> walls;
+
+			for (std::size_t ind = 0; ind < segs.size(); ++ind)
+			{
+				std::size_t root{ find_root(parent, ends[ind].first) };
+
+				if (!closed[root])
+					continue;
+
+				auto it = walls.find(root);
+
+				if (it == walls.end())
+					it = walls.emplace(root, Wall{ {}, {}, segs[ind].first, segs[ind].first }).first;
+
+				it->second.segs.push_back(segs[ind]);
+				it->second.owners.push_back(owners[ind]);
+				expand_box(it->second.lo, it->second.hi, segs[ind].first);
+				expand_box(it->second.lo, it->second.hi, segs[ind].second);
+			}
+
+			std::vector<Wall> ans;
+			ans.reserve(walls.size());
+
+			for (auto& w : walls)
+				ans.push_back(std::move(w.second));
+
+			return ans;
+		}
+
+		// Whether p is inside the wall by the parity of the crossings of the ray from
+		// p in the +x direction. Each end point counts for the segment above it only so
+		// the parity is the same for any p not on the wall
+		bool inside_wall(const Wall& wall, const arr& p)
+		{
+			bool inside{ false };
+
+			for (const segment& s : wall.segs)
+			{
+				const arr& a{ s.first };
+				const arr& b{ s.second };
+
+				if ((a[1] > p[1]) != (b[1] > p[1]))
+				{
+					double x{ a[0] + (p[1] - a[1]) * (b[0] - a[0]) / (b[1] - a[1]) };
+
+					if (p[0] < x)
+						inside = !inside;
+				}
+			}
+
+			return inside;
+		}
+
+		// Whether the segments s1 and s2 intersect, including touching
+		bool segments_cross(const segment& s1, const segment& s2)
+		{
+			auto orient = [](const arr& a, const arr& b, const arr& p)
+			{
+				double cross{ (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0]) };
+
+				return (cross > 0.0) - (cross < 0.0);
+			};
+
+			const arr d{ s2.second[0] - s2.first[0], s2.second[1] - s2.first[1] };
+
+			// The box test catches collinear segments which overlap
+			return orient(s1.first, s1.second, s2.first) * orient(s1.first, s1.second, s2.second) <= 0
+				&& orient(s2.first, s2.second, s1.first) * orient(s2.first, s2.second, s1.second) <= 0
+				&& hits_box({ std::min(s1.first[0], s1.second[0]), std::min(s1.first[1], s1.second[1]) },
+					{ std::max(s1.first[0], s1.second[0]), std::max(s1.first[1], s1.second[1]) }, s2.first, d, 1.0);
+		}
+
+		// Side of the wall the box is on, 1 inside, 0 outside and -1 if it touches the wall
+		int wall_side(const Wall& wall, const arr& lo, const arr& hi)
+		{
+			// Boxes apart from the wall's box are outside
+			if (lo[0] > wall.hi[0] || hi[0] < wall.lo[0] || lo[1] > wall.hi[1] || hi[1] < wall.lo[1])
+				return 0;
+
+			for (const segment& s : wall.segs)
+			{
+				const arr d{ s.second[0] - s.first[0], s.second[1] - s.first[1] };
+
+				if (hits_box(lo, hi, s.first, d, 1.0))
+					return -1;
+			}
+
+			// The box doesn't cross the wall so all of it is on the side of a corner
+			return inside_wall(wall, lo) ? 1 : 0;
+		}
+
+		// Side of the wall, 1 inside and 0 outside, the normal of segment seg of the
+		// wall points to or -1 if it can't be told as other segments are too close
+		int normal_side(const Wall& wall, std::size_t seg, const arr& normal, double delta)
+		{
+			const segment& s{ wall.segs[seg] };
+			const arr mid{ (s.first[0] + s.second[0]) / 2.0, (s.first[1] + s.second[1]) / 2.0 };
+			const segment probe{ { mid[0] - delta * normal[0], mid[1] - delta * normal[1] },
+				{ mid[0] + delta * normal[0], mid[1] + delta * normal[1] } };
+
+			for (std::size_t ind = 0; ind < wall.segs.size(); ++ind)
+			{
+				if (ind != seg && segments_cross(probe, wall.segs[ind]))
+					return -1;
+			}
+
+			return inside_wall(wall, probe.second) ? 1 : 0;
+		}
+
+		// Indices in increasing order of the components which aren't hidden
+		std::vector<std::uint32_t> shown(const std::vector<bool>& hidden)
+		{
+			std::vector<std::uint32_t> ans;
+
+			for (std::size_t ind = 0; ind < hidden.size(); ++ind)
+			{
+				if (!hidden[ind])
+					ans.push_back(static_cast<std::uint32_t>(ind));
+			}
+
+			return ans;
+		}
+	}
+
+	template <typename T>
+	Visibility::Visibility(const T& c)
+	{
+		const std::size_t n{ c.size() };
+
+		std::vector<std::pair<arr, arr>> boxes;
+		std::vector<segment> segs;
+		std::vector<std::size_t> owners, n_segs(n);
+		double scale{ 1.0 };
+
+		boxes.reserve(n);
+
+		for (std::size_t ind = 0; ind < n; ++ind)
+		{
+			boxes.push_back(c[ind]->bounds());
+			c[ind]->append_segments(segs);
+			n_segs[ind] = segs.size() - owners.size();
+			owners.resize(segs.size(), ind);
+
+			for (const arr& p : { boxes.back().first, boxes.back().second })
+			{
+				if (std::isfinite(p[0]) && std::isfinite(p[1]))
+					scale = std::max({ scale, std::abs(p[0]), std::abs(p[1]) });
+			}
+		}
+
+		margin = wall_margin * scale;
+
+		const std::vector<Wall> walls{ closed_walls(segs, owners) };
+
+		// Sides of the walls each component is on as (wall, side)
+		std::vector<std::vector<std::pair<std::size_t, int>>> sides(n);
+
+		// Components on each side of each wall
+		std::vector<std::array<std::vector<std::uint32_t>, 2>> members(walls.size());
+
+		for (std::size_t ind = 0; ind < n; ++ind)
+		{
+			arr lo{ boxes[ind].first }, hi{ boxes[ind].second };
+
+			if (!(std::isfinite(lo[0]) && std::isfinite(lo[1]) && std::isfinite(hi[0]) && std::isfinite(hi[1])))
+				continue;
+
+			for (int i = 0; i < 2; ++i)
+			{
+				lo[i] -= margin;
+				hi[i] += margin;
+			}
+
+			for (std::size_t w = 0; w < walls.size(); ++w)
+			{
+				int side{ wall_side(walls[w], lo, hi) };
+
+				if (side >= 0)
+				{
+					sides[ind].emplace_back(w, side);
+					members[w][side].push_back(static_cast<std::uint32_t>(ind));
+				}
+			}
+		}
+
+		// Components are hidden from those on the other side of any wall
+		visible.resize(n);
+		flat_ind.assign(n, -1);
+		std::vector<bool> hidden(n);
+
+		for (std::size_t ind = 0; ind < n; ++ind)
+		{
+			std::fill(hidden.begin(), hidden.end(), false);
+
+			for (auto& ws : sides[ind])
+			{
+				for (std::uint32_t other : members[ws.first][1 - ws.second])
+					hidden[other] = true;
+			}
+
+			visible[ind] = shown(hidden);
+
+			// A component made of one segment and nothing else is flat
+			if (n_segs[ind] != 1)
+				continue;
+
+			const std::size_t seg{ static_cast<std::size_t>(std::find(owners.begin(), owners.end(), ind) - owners.begin()) };
+			const segment& s{ segs[seg] };
+			const double length{ std::hypot(s.second[0] - s.first[0], s.second[1] - s.first[1]) };
+
+			if (length <= 2.0 * margin || boxes[ind].first != arr{ std::min(s.first[0], s.second[0]), std::min(s.first[1], s.second[1]) }
+				|| boxes[ind].second != arr{ std::max(s.first[0], s.second[0]), std::max(s.first[1], s.second[1]) })
+				continue;
+
+			Flat flat{ s.first, s.second, { -(s.second[1] - s.first[1]) / length, (s.second[0] - s.first[0]) / length }, {} };
+			std::array<std::vector<bool>, 2> side_hidden{ hidden, hidden };
+			bool any{ false };
+
+			// A ray leaving a wall to its inside can't reach the components outside it
+			for (std::size_t w = 0; w < walls.size(); ++w)
+			{
+				auto it = std::find(walls[w].owners.begin(), walls[w].owners.end(), ind);
+
+				if (it == walls[w].owners.end())
+					continue;
+
+				int side{ normal_side(walls[w], static_cast<std::size_t>(it - walls[w].owners.begin()), flat.normal, margin) };
+
+				if (side < 0)
+					continue;
+
+				for (int k = 0; k < 2; ++k)
+				{
+					// Side k is the normal's side for k = 0 and the other side for k = 1
+					int leaving{ k == 0 ? side : 1 - side };
+
+					for (std::uint32_t other : members[w][1 - leaving])
+						side_hidden[k][other] = true;
+				}
+
+				any = true;
+			}
+
+			if (!any)
+				continue;
+
+			flat.sides[0] = shown(side_hidden[0]);
+			flat.sides[1] = shown(side_hidden[1]);
+			flat_ind[ind] = static_cast<std::int64_t>(flats.size());
+			flats.push_back(std::move(flat));
+		}
+	}
+
+	const std::vector<std::uint32_t>& Visibility::candidates(std::size_t ind, const Ray& ry) const
+	{
+		if (flat_ind[ind] < 0)
+			return visible[ind];
+
+		const Flat& flat{ flats[flat_ind[ind]] };
+		const arr& p{ ry.pos.back() };
+
+		if (std::hypot(p[0] - flat.start[0], p[1] - flat.start[1]) < margin
+			|| std::hypot(p[0] - flat.end[0], p[1] - flat.end[1]) < margin)
+			return visible[ind];
+
+		const double v_dot_n{ ry.v[0] * flat.normal[0] + ry.v[1] * flat.normal[1] };
+
+		if (v_dot_n > 0.0)
+			return flat.sides[0];
+
+		if (v_dot_n < 0.0)
+			return flat.sides[1];
+
+		return visible[ind];
+	}
+}
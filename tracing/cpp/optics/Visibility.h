@@ -0,0 +1,75 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+// Conservative lists of the components a ray can hit next after hitting each 
+// component, so only those are tested after a hit. Straight segments of the 
+// components which join up into closed walls, e.g. the sides of a cavity or a 
+// closed polyline, split the plane into an inside and outside. A component 
+// whose box lies inside such a wall can't reach one whose box lies outside it,
+// or vice versa, without first hitting the wall. A flat component which is 
+// part of a wall has a list for each side, so a ray leaving it into the 
+// inside only tests the components inside. Components touching a wall or 
+// which can't be bounded otherwise see everything. The lists are only valid 
+// while the components don't move.
+//
+#pragma once
+#include "general.h"
+#include "Component.h"
+#include "Ray.h"
+#include <cstdint>
+
+namespace optics
+{
+	class Visibility
+	{
+	public:
+		// A flat component, listing the components visible from each side of it
+		struct Flat
+		{
+			arr start, end;
+			arr normal;  // Unit normal pointing to the side of sides[0]
+			std::vector<std::uint32_t> sides[2];
+		};
+
+		// visible[i] are the indices of the components, in increasing order, which
+		// a ray leaving component i can hit next. They always include i
+		std::vector<std::vector<std::uint32_t>> visible;
+
+		// Flat components with lists for each side and the index in flats of each
+		// component, -1 if it has none
+		std::vector<Flat> flats;
+		std::vector<std::int64_t> flat_ind;
+
+		// Distance from the ends of flat components within which their sides aren't
+		// used, as a ray leaving there could slip past the neighbouring wall
+		double margin{ 0.0 };
+
+		Visibility() = default;
+
+		template <typename T>
+		explicit Visibility(const T& c);
+
+		// Components a ray which has just hit component ind can hit next
+		const std::vector<std::uint32_t>& candidates(std::size_t ind, const Ray& ry) const;
+	};
+
+	template Visibility::Visibility(const std::vector<std::shared_ptr<Component>>& c);
+	template Visibility::Visibility(const std::vector<Component*>& c);
+}
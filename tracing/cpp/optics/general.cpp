@@ -19,9 +19,57 @@
 
 #pragma once
 #include "general.h"
+#include <algorithm>
 
 namespace optics
 {
+	void Trace_Control::set_budget(double seconds)
+	{
+		has_deadline = seconds < infinity;
+
+		if (has_deadline)
+			deadline = std::chrono::steady_clock::now() + std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+				std::chrono::duration<double>(seconds));
+	}
+
+	void Trace_Control::start()
+	{
+		done.store(0, std::memory_order_relaxed);
+		timed_out.store(false, std::memory_order_relaxed);
+		stopped.store(false, std::memory_order_relaxed);
+	}
+
+	bool Trace_Control::should_stop()
+	{
+		if (cancelled.load(std::memory_order_relaxed) || stopped.load(std::memory_order_relaxed))
+			return true;
+
+		if (has_deadline && std::chrono::steady_clock::now() >= deadline)
+		{
+			timed_out.store(true, std::memory_order_relaxed);
+			return true;
+		}
+
+		return false;
+	}
+
+	void Trace_Control::ray_done(std::size_t n_done)
+	{
+		done.store(n_done, std::memory_order_relaxed);
+
+		if (progress != nullptr && n_done % progress_every == 0)
+			progress(progress_data, n_done);
+	}
+
+	void Trace_Control::end()
+	{
+		const std::size_t n_done{ done.load(std::memory_order_relaxed) };
+
+		// Reports the final count unless it was just reported
+		if (progress != nullptr && n_done % progress_every != 0)
+			progress(progress_data, n_done);
+	}
+
 	arr rotate(const arr& r, const double theta)
 	{
 		double top{ cos(theta) * r[0] + sin(theta) * r[1] };
@@ -44,4 +92,43 @@ namespace optics
 		v[0] *= fact;
 		v[1] *= fact;
 	}
+
+	bool hits_box(const arr& lo, const arr& hi, const arr& r, const arr& v, double t_max)
+	{
+		double t_min{ 0.0 };
+
+		for (int i = 0; i < 2; ++i)
+		{
+			if (v[i] == 0.0)
+			{
+				if (r[i] < lo[i] || r[i] > hi[i])
+					return false;
+
+				continue;
+			}
+
+			double t1{ (lo[i] - r[i]) / v[i] };
+			double t2{ (hi[i] - r[i]) / v[i] };
+
+			if (t1 > t2)
+				std::swap(t1, t2);
+
+			t_min = std::max(t_min, t1);
+			t_max = std::min(t_max, t2);
+
+			if (t_min > t_max)
+				return false;
+		}
+
+		return true;
+	}
+
+	void expand_box(arr& lo, arr& hi, const arr& p)
+	{
+		for (int i = 0; i < 2; ++i)
+		{
+			lo[i] = std::min(lo[i], p[i]);
+			hi[i] = std::max(hi[i], p[i]);
+		}
+	}
 }
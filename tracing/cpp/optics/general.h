@@ -22,7 +22,11 @@
 #pragma once
 #define _USE_MATH_DEFINES  // Need for definition of M_PI
 #include <cmath>
+#include <algorithm>
 #include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
 #include <limits>
 #include <memory>
 #include <string>
@@ -33,27 +37,94 @@ namespace optics
 {
 	constexpr double infinity = std::numeric_limits<double>::infinity();
 
+	// Part of a component a ray isn't leaving from, e.g. when it last hit another component
+	constexpr std::size_t no_part = std::numeric_limits<std::size_t>::max();
+
 	class Component;  // Forward declare the Component class
 	class Ray;
+	class Roulette;
+	class Scene_Bounds;
+	class Visibility;
 
 	// Type aliases for the length two std::array and component vector
 	using arr = std::array<double, 2>;
 	using comp_list = std::vector<std::shared_ptr<Component>>;
 
+	// State of a ray at the end of tracing. active rays used all n interactions, escaped
+	// rays were found to hit no more components and stopped rays hit a screen or lost the
+	// Russian roulette
+	enum class Trace_Status : std::int32_t { active = 0, escaped = 1, stopped = 2 };
+
+	// Order components are tested in. any searches all the components for each interaction.
+	// sequential only tests the component after the one last hit in the list, the first
+	// before any hit, and the one last hit so rays can cross complex components. Rays 
+	// missing them escape. fallback is sequential but searches all the components for 
+	// rays which miss
+	enum class Trace_Order : std::int32_t { any = 0, sequential = 1, fallback = 2 };
+
+	// Lets another thread follow and stop a trace. Tracing stops before the next ray
+	// once cancelled or stopped is set or the time budget runs out, done is the number
+	// of rays which have been traced. If progress isn't null it is called with 
+	// progress_data and done every progress_every rays and when tracing ends. Unlike
+	// cancelled, stopped only stops the current trace, e.g. when progress fails
+	struct Trace_Control
+	{
+		std::atomic<bool> cancelled{ false };
+		std::atomic<bool> stopped{ false };
+		std::atomic<bool> timed_out{ false };
+		std::atomic<std::size_t> done{ 0 };
+		void (*progress)(void* data, std::size_t done) { nullptr };
+		void* progress_data{ nullptr };
+		std::size_t progress_every{ 1 };
+
+		// Limits tracing to the given number of seconds from now, infinity for no limit
+		void set_budget(double seconds);
+
+		// Called before the first ray is traced
+		void start();
+
+		// Whether tracing should stop before the next ray, setting timed_out if the
+		// budget has run out
+		bool should_stop();
+
+		// Called after the first n_done rays have been traced
+		void ray_done(std::size_t n_done);
+
+		// Called once tracing has ended
+		void end();
+
+	private:
+		bool has_deadline{ false };
+		std::chrono::steady_clock::time_point deadline;
+	};
+
 	// Forward declarations for tracing functions
 
 	// Determines the nect index in c of the next component the ray hits and the time it hits
-	// Returns time of infinity if no component is next to interact
+	// Returns time of infinity if no component is next to interact. If bounds isn't null,
+	// components whose box the ray doesn't enter aren't tested. If candidates isn't null
+	// only the components with those indices are tested
 	template <typename T>
-	std::pair<size_t, double> next_component(const T& c, const Ray* r);
-
-	// Traces an individual ray for n interactions
+	std::pair<size_t, double> next_component(const T& c, const Ray* r, const Scene_Bounds* bounds = nullptr,
+		const std::vector<std::uint32_t>* candidates = nullptr);
+
+	// Traces an individual ray for n interactions, playing Russian roulette
+	// after each interaction if roulette is not null. If bounds isn't null they must
+	// be those of c and rays leaving them escape without testing the components. If
+	// visibility isn't null it must be that of c and after each hit only the components
+	// visible from the one hit are tested. Components are tested in the given order, in 
+	// fallback order visibility narrows the search for rays which miss the next component.
+	// Returns the status of the ray
 	template <typename T>
-	void trace_ray(const T& c, Ray* ry, int n, bool fill_up = true);
+	Trace_Status trace_ray(const T& c, Ray* ry, int n, bool fill_up = true, Roulette* roulette = nullptr,
+		const Scene_Bounds* bounds = nullptr, const Visibility* visibility = nullptr,
+		Trace_Order order = Trace_Order::any);
 
-	// Traces a vector of rays through the components
+	// Traces a vector of rays through the components, stopping early if control says to
 	template <typename T>
-	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up = true);
+	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up = true, Roulette* roulette = nullptr,
+		Trace_Control* control = nullptr, const Visibility* visibility = nullptr, 
+		Trace_Order order = Trace_Order::any);
 
 
 	// Adds a component to the vector to the comp_list
@@ -80,7 +151,34 @@ namespace optics
 		return abs(v1 - v2) < atol;
 	}
 
+	// Tolerances relative to the scale of the scene. A hit closer to the ray's start
+	// than hit_rtol times the size of its coordinates is taken to be the start itself.
+	// The root of a curved surface a ray has just left carries the rounding of that
+	// hit so is skipped within the looser leave_rtol
+	constexpr double hit_rtol = 1e-10;
+	constexpr double leave_rtol = 1e-7;
+
+	// Size of the coordinates of r, which rounding errors at r are relative to
+	inline double coord_scale(const arr& r)
+	{
+		return std::max(std::abs(r[0]), std::abs(r[1]));
+	}
+
+	// Smallest time a hit of the ray starting at r with direction v is accepted at,
+	// rtol times the larger of the scale of r and size
+	inline double min_hit_time(const arr& r, const arr& v, double rtol = hit_rtol, double size = 0.0)
+	{
+		return rtol * std::max(coord_scale(r), size) / std::hypot(v[0], v[1]);
+	}
+
 	// Renormalises vector whose magnitude is close to 1 using first order Taylor series
 	// for 1/sqrt(abs(vec))
 	void renorm_unit_vec(arr& v);
+
+	// Whether the ray starting at r with direction v enters the axis aligned box
+	// with corners lo and hi before time t_max
+	bool hits_box(const arr& lo, const arr& hi, const arr& r, const arr& v, double t_max);
+
+	// Grows the axis aligned box with corners lo and hi to contain p
+	void expand_box(arr& lo, arr& hi, const arr& p);
 }
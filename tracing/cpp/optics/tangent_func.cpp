@@ -0,0 +1,118 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+#include "tangent_func.h"
+
+namespace optics
+{
+	std::vector<double> param_tangents(const Ray& ry, const Component& c, std::size_t ind, 
+		std::size_t n_cols)
+	{
+		std::vector<double> d(n_cols, 0.0);
+		int col{ tangent_col(ry, c, ind) };
+
+		if (col >= 0 && static_cast<std::size_t>(col) < n_cols)
+			d[col] = 1.0;
+
+		return d;
+	}
+
+	void move_tangents(Ray& ry, const double t, const arr& grad_g, const std::vector<double>& dg)
+	{
+		const arr& v = ry.v;
+		double grad_dot_v{ grad_g[0] * v[0] + grad_g[1] * v[1] };
+
+		for (std::size_t k = 0; k < ry.dr.size(); ++k)
+		{
+			arr& dr = ry.dr[k];
+			const arr& dv = ry.dv[k];
+
+			// Tangent of the position had the time been held fixed
+			arr dx{ dr[0] + t * dv[0], dr[1] + t * dv[1] };
+
+			// Implicitly differentiate g(r + v*t) = 0 to get the tangent of t
+			double dt{ -(grad_g[0] * dx[0] + grad_g[1] * dx[1] + dg[k]) / grad_dot_v };
+
+			dr[0] = dx[0] + v[0] * dt;
+			dr[1] = dx[1] + v[1] * dt;
+		}
+	}
+
+	void reflect_tangents(Ray& ry, const arr& n_vec, const std::vector<arr>& dn)
+	{
+		const arr& v = ry.v;
+		double v_dot_n{ v[0] * n_vec[0] + v[1] * n_vec[1] };
+
+		// Differentiate v - 2*(v.n)*n
+		for (std::size_t k = 0; k < ry.dv.size(); ++k)
+		{
+			arr& dv = ry.dv[k];
+			double d_v_dot_n{ dv[0] * n_vec[0] + dv[1] * n_vec[1] + v[0] * dn[k][0] + v[1] * dn[k][1] };
+
+			for (int i = 0; i < 2; ++i)
+				dv[i] -= 2.0 * (d_v_dot_n * n_vec[i] + v_dot_n * dn[k][i]);
+		}
+	}
+
+	void refract_tangents(Ray& ry, const arr& n_vec, const std::vector<arr>& dn, const double n1,
+		const double n2, const std::vector<double>& dn1, const std::vector<double>& dn2)
+	{
+		const arr& v = ry.v;
+		double v_dot_n{ v[0] * n_vec[0] + v[1] * n_vec[1] };
+
+		// Orient the normal against the incoming ray and choose the refractive 
+		// indices the same way as refract_ray()
+		double sgn{ v_dot_n > 0.0 ? -1.0 : 1.0 };
+		double ni{ v_dot_n > 0.0 ? n2 : n1 }, nf{ v_dot_n > 0.0 ? n1 : n2 };
+		const std::vector<double>& dni{ v_dot_n > 0.0 ? dn2 : dn1 };
+		const std::vector<double>& dnf{ v_dot_n > 0.0 ? dn1 : dn2 };
+
+		arr n_hat{ sgn * n_vec[0], sgn * n_vec[1] };
+
+		double cos_i{ -sgn * v_dot_n };
+		double eta{ ni / nf };
+		double k{ 1.0 - eta * eta * (1.0 - cos_i * cos_i) };
+
+		// Total internal reflection
+		if (k < 0.0)
+		{
+			reflect_tangents(ry, n_vec, dn);
+			return;
+		}
+
+		double sqrt_k{ std::sqrt(k) };
+
+		// Differentiate eta*v + (eta*cos_i - sqrt(k))*n_hat
+		for (std::size_t c = 0; c < ry.dv.size(); ++c)
+		{
+			arr& dv = ry.dv[c];
+			arr dn_hat{ sgn * dn[c][0], sgn * dn[c][1] };
+
+			double d_eta{ dni[c] / nf - ni * dnf[c] / (nf * nf) };
+			double d_cos_i{ -(dv[0] * n_hat[0] + dv[1] * n_hat[1] + v[0] * dn_hat[0] + v[1] * dn_hat[1]) };
+			double dk{ -2.0 * eta * d_eta * (1.0 - cos_i * cos_i) + 2.0 * eta * eta * cos_i * d_cos_i };
+
+			double n_coeff{ eta * cos_i - sqrt_k };
+			double d_n_coeff{ d_eta * cos_i + eta * d_cos_i - dk / (2.0 * sqrt_k) };
+
+			for (int i = 0; i < 2; ++i)
+				dv[i] = d_eta * v[i] + eta * dv[i] + d_n_coeff * n_hat[i] + n_coeff * dn_hat[i];
+		}
+	}
+}
@@ -0,0 +1,71 @@
+// geometrical-ray-tracing: Program to perform geometrical ray tracing
+// Copyright (C) 2022  Tom Spencer (tspencerprog@gmail.com)
+
+// This file is part of geometrical-ray-tracing
+
+// geometrical-ray-tracing is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+// Contains the functions for propagating the tangents of a ray, i.e. the 
+// derivatives of its position and direction with respect to the parameters of
+// components, through interactions. They use forward mode differentiation so a
+// single trace yields the derivatives with respect to every parameter.
+//
+#pragma once
+#include "general.h"
+#include "Component.h"
+#include "Ray.h"
+#include <vector>
+
+namespace optics
+{
+	// Whether the ray is propagating tangents
+	inline bool has_tangents(const Ray& ry)
+	{
+		return !ry.dr.empty();
+	}
+
+	// Column of the ray's tangents the component's parameter with index ind maps to,
+	// -1 if the parameter isn't being differentiated with respect to
+	inline int tangent_col(const Ray& ry, const Component& c, std::size_t ind)
+	{
+		if (ry.tangent_cols == nullptr)
+			return -1;
+
+		auto it = ry.tangent_cols->find(&c);
+
+		return it != ry.tangent_cols->end() && ind < it->second.size() ? it->second[ind] : -1;
+	}
+
+	// Derivative of the component's parameter with index ind with respect to each
+	// column, i.e. one in its own column and zero otherwise
+	std::vector<double> param_tangents(const Ray& ry, const Component& c, std::size_t ind, 
+		std::size_t n_cols);
+
+	// Updates the position tangents of a ray that has just moved for time t onto
+	// the surface g(x) = 0, must be called before its direction is changed. grad_g
+	// is the gradient of g at the new position and dg the derivative of g with 
+	// respect to each column's parameter at fixed position
+	void move_tangents(Ray& ry, const double t, const arr& grad_g, const std::vector<double>& dg);
+
+	// Updates the direction tangents of a ray about to be reflected by the unit
+	// normal n_vec, must be called before its direction is changed. dn holds the 
+	// tangents of n_vec
+	void reflect_tangents(Ray& ry, const arr& n_vec, const std::vector<arr>& dn);
+
+	// Updates the direction tangents of a ray about to be refracted by refract_ray()
+	// with the same n_vec, n1 and n2, must be called before its direction is changed.
+	// dn, dn1 and dn2 hold the tangents of n_vec, n1 and n2
+	void refract_tangents(Ray& ry, const arr& n_vec, const std::vector<arr>& dn, const double n1,
+		const double n2, const std::vector<double>& dn1, const std::vector<double>& dn2);
+}
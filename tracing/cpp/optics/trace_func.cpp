@@ -18,18 +18,28 @@
 
 
 #include "trace_func.h"
+#include <algorithm>
 
 namespace optics 
 {
 	template<typename T>
-	std::pair<size_t, double> next_component(const T& c, const Ray* ry)
+	std::pair<size_t, double> next_component(const T& c, const Ray* ry, const Scene_Bounds* bounds,
+		const std::vector<std::uint32_t>* candidates)
 	{
 		double current_t;
 		double best_t{ infinity };
 		size_t best_ind{ 0 };
 
-		for (std::size_t ind = 0; ind < c.size(); ++ind)
+		const std::size_t n_tests{ candidates == nullptr ? c.size() : candidates->size() };
+
+		for (std::size_t k = 0; k < n_tests; ++k)
 		{
+			const std::size_t ind{ candidates == nullptr ? k : (*candidates)[k] };
+
+			// Components the ray can't reach before the best hit so far needn't be tested
+			if (bounds != nullptr && !bounds->may_hit(ind, *ry, best_t))
+				continue;
+
 			current_t = c[ind]->test_hit(ry);
 
 			if (current_t < best_t)
@@ -43,11 +53,22 @@ namespace optics
 	}
 
 	template <typename T>
-	void trace_ray(const T& c, Ray* ry, int n, bool fill_up)
+	Trace_Status trace_ray(const T& c, Ray* ry, int n, bool fill_up, Roulette* roulette,
+		const Scene_Bounds* bounds, const Visibility* visibility, Trace_Order order)
 	{
 		if (fill_up)
 			ry->pos.reserve(ry->pos.size() + n);
 
+		if (ry->pos.size() == 1)
+			ry->v_start = ry->v;
+
+		// Components that can be hit next, null before the first hit as the ray could 
+		// start anywhere
+		const std::vector<std::uint32_t>* candidates{ nullptr };
+
+		// Index of the component tested next in sequential orders
+		std::size_t next_seq{ 0 };
+
 		for (int i = 0; i < n; ++i)
 		{
 			// Ensure normalisation of ry->v does not drift from 1
@@ -55,16 +76,49 @@ namespace optics
 
 			// Now do tracing
 			// Determine which, if any is the next component
-			size_t next_ind;
-			double t;
+			size_t next_ind{ 0 };
+			double t{ infinity };
 			bool found;
 
-			std::tie(next_ind, t) = next_component(c, ry);
+			// The component last hit is tested with the next so rays cross complex components,
+			// e.g. lenses, before moving on. Ties go to the later one so a surface listed
+			// twice in a row is hit once for each
+			if (order != Trace_Order::any)
+			{
+				for (std::size_t k = next_seq == 0 ? 0 : next_seq - 1; k <= next_seq && k < c.size(); ++k)
+				{
+					double t_k{ c[k]->test_hit(ry) };
+
+					if (t_k != infinity && t_k <= t)
+					{
+						t = t_k;
+						next_ind = k;
+					}
+				}
+			}
+
+			// Rays heading away from the scene's box can't hit anything
+			if ((order == Trace_Order::any || (order == Trace_Order::fallback && t == infinity))
+				&& (bounds == nullptr || !bounds->escapes(*ry)))
+				std::tie(next_ind, t) = next_component(c, ry, bounds, candidates);
+
 			found = t != infinity;
 
 			if (found) // work out next interaction
 			{
-				c[next_ind]->hit(ry);
+				// Components such as lenses may use several of the remaining interactions
+				const std::size_t n_pos{ ry->pos.size() };
+
+				c[next_ind]->hit(ry, n - i);
+				i += static_cast<int>(ry->pos.size() - n_pos) - 1;
+				next_seq = next_ind + 1;
+
+				if (visibility != nullptr)
+					candidates = &visibility->candidates(next_ind, *ry);
+
+				// Rays that lose the roulette are absorbed where they are
+				if (roulette != nullptr && ry->continue_tracing && !roulette->play(*ry))
+					ry->continue_tracing = false;
 			}
 
 			arr& r{ ry->pos.back() };  // last position of ray
@@ -75,6 +129,16 @@ namespace optics
 				const arr end = { r[0] + (ry->continue_tracing ? ry->v[0] : 0.0)
 								, r[1] + (ry->continue_tracing ? ry->v[1] : 0.0) };
 
+				// Keep the position tangents those of the last point
+				if (ry->continue_tracing)
+				{
+					for (std::size_t k = 0; k < ry->dr.size(); ++k)
+					{
+						ry->dr[k][0] += ry->dv[k][0];
+						ry->dr[k][1] += ry->dv[k][1];
+					}
+				}
+
 				if (fill_up)  // fill up to desired n
 				{
 					for (int j = 0; j < n - i; ++j)
@@ -85,16 +149,145 @@ namespace optics
 				else if (ry->continue_tracing)  // only add another if continue tracing
 					ry->pos.push_back(end);  // show result of last interaction
 
-				return;  // Exit the function as we have nothing else to do
+				// Exit the function as we have nothing else to do
+				return ry->continue_tracing ? Trace_Status::escaped : Trace_Status::stopped;
 			}
 		}
+
+		return Trace_Status::active;
 	}
 
 	template <typename T>
-	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up)
+	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up, Roulette* roulette,
+		Trace_Control* control, const Visibility* visibility, Trace_Order order)
+	{
+		const Scene_Bounds bounds{ c };
+
+		if (control != nullptr)
+			control->start();
+
+		for (std::size_t ind = 0; ind < rays.size(); ++ind)
+		{
+			if (control != nullptr && control->should_stop())
+				break;
+
+			if (roulette != nullptr)
+				roulette->seed_ray(ind);
+
+			// The component the ray last hit may have been changed or freed since
+			rays[ind]->last_hit = nullptr;
+			trace_ray(c, rays[ind], n, fill_up, roulette, &bounds, visibility, order);
+
+			if (control != nullptr)
+				control->ray_done(ind + 1);
+		}
+
+		if (control != nullptr)
+			control->end();
+	}
+
+	template <typename T, typename P>
+	void trace_bundle(const T& c, const arr* starts, const arr* dirs, std::size_t n_rays, double alpha,
+		int n, Roulette* roulette, Ray_Bundle<P>& bundle, const Visibility* visibility, Trace_Order order)
+	{
+		bundle.clear();
+
+		if (n_rays == 0)
+			return;
+
+		bundle.points.reserve(2 * n_rays);
+		bundle.offsets.reserve(n_rays + 1);
+		bundle.v.reserve(n_rays);
+		bundle.weight.reserve(n_rays);
+
+		const Scene_Bounds bounds{ c };
+		Ray ry{ starts[0], dirs[0], alpha };
+
+		for (std::size_t ind = 0; ind < n_rays; ++ind)
+		{
+			ry.reset(dirs[ind], starts[ind]);
+
+			if (roulette != nullptr)
+				roulette->seed_ray(ind);
+
+			trace_ray(c, &ry, n, false, roulette, &bounds, visibility, order);
+			bundle.append(ry);
+		}
+	}
+
+	template <typename T, typename P>
+	void trace_into(const T& c, const arr* starts, const arr* dirs, std::size_t n_rays, double alpha,
+		int n, Roulette* roulette, P* positions, P* directions, P* weights, std::int32_t* status,
+		const Visibility* visibility, Trace_Order order)
+	{
+		if (n_rays == 0)
+			return;
+
+		// A ray has at most its start and one position per interaction
+		std::size_t n_points{ static_cast<std::size_t>(n) + 1 };
+
+		const Scene_Bounds bounds{ c };
+		Ray ry{ starts[0], dirs[0], alpha };
+		ry.pos.reserve(n_points);
+
+		for (std::size_t ind = 0; ind < n_rays; ++ind)
+		{
+			ry.reset(dirs[ind], starts[ind]);
+
+			if (roulette != nullptr)
+				roulette->seed_ray(ind);
+
+			Trace_Status ray_status{ trace_ray(c, &ry, n, false, roulette, &bounds, visibility, order) };
+
+			if (positions != nullptr)
+			{
+				P* row{ positions + 2 * n_points * ind };
+
+				for (std::size_t j = 0; j < n_points; ++j)
+				{
+					const arr& p{ ry.pos[std::min(j, ry.pos.size() - 1)] };
+
+					row[2 * j] = static_cast<P>(p[0]);
+					row[2 * j + 1] = static_cast<P>(p[1]);
+				}
+			}
+
+			if (directions != nullptr)
+			{
+				directions[2 * ind] = static_cast<P>(ry.v[0]);
+				directions[2 * ind + 1] = static_cast<P>(ry.v[1]);
+			}
+
+			if (weights != nullptr)
+				weights[ind] = static_cast<P>(ry.weight);
+
+			if (status != nullptr)
+				status[ind] = static_cast<std::int32_t>(ray_status);
+		}
+	}
+
+	void trace_ends(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, arr* ends, double* weights, 
+		const Component** stopped_by, const Visibility* visibility, Trace_Order order)
 	{
-		for (Ray* r : rays)
-			trace_ray(c, r, n, fill_up);
+		if (n_rays == 0)
+			return;
+
+		const Scene_Bounds bounds{ c };
+		Ray ry{ starts[0], dirs[0], alpha };
+		ry.pos.reserve(static_cast<std::size_t>(n) + 1);
+
+		for (std::size_t ind = 0; ind < n_rays; ++ind)
+		{
+			ry.reset(dirs[ind], starts[ind]);
+
+			Trace_Status ray_status{ trace_ray(c, &ry, n, false, nullptr, &bounds, visibility, order) };
+
+			// Components in c set last_hit to themselves, also when a sub-component was hit
+			ends[ind] = ry.pos.back();
+			weights[ind] = ry.weight;
+			stopped_by[ind] = ray_status == Trace_Status::stopped ? ry.last_hit : nullptr;
+		}
 	}
 
 	arr compute_new_pos(const Ray& ry, const double t)
@@ -111,6 +304,12 @@ namespace optics
 		return newPos;
 	}
 
+	void attenuate_ray(Ray& ry, const double t)
+	{
+		if (ry.alpha > 0.0)
+			ry.weight *= std::exp(-ry.alpha * t);
+	}
+
 	void reflect_ray(Ray& ry, const arr n_vec)
 	{
 		arr& v = ry.v;
@@ -122,10 +321,11 @@ namespace optics
 			v[i] -= 2 * v_dot_n * n_vec[i];
 	}
 
-	void refract_ray(Ray& ry, const arr n_vec, const double n1, const double n2)
+	void refract_ray(Ray& ry, const arr n_vec, const double n1, const double n2,
+		const double a1, const double a2)
 	{
 		arr& v = ry.v;
-		double ni, nf;
+		double ni, nf, af;
 
 		double vi_dot_n{ v[0] * n_vec[0] + v[1] * n_vec[1] };
 
@@ -133,11 +333,13 @@ namespace optics
 		{
 			ni = n2;
 			nf = n1;
+			af = a1;
 		}
 		else
 		{
 			ni = n1;
 			nf = n2;
+			af = a2;
 		}
 
 		double gamma{ (n_vec[0] * v[1] - n_vec[1] * v[0]) * ni / nf };
@@ -152,7 +354,8 @@ namespace optics
 			return;
 		}
 
-		// we are performing refraction
+		// we are performing refraction, so the ray enters the new medium
+		ry.alpha = af;
 		disc = std::sqrt(disc);
 
 		// Either side of +/- of resulting speeds
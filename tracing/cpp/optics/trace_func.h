@@ -23,6 +23,10 @@
 #include "general.h"
 #include "Component.h"
 #include "Ray.h"
+#include "Ray_Bundle.h"
+#include "Roulette.h"
+#include "Scene_Bounds.h"
+#include "Visibility.h"
 #include <fstream>
 #include <string>
 #include <tuple>
@@ -32,31 +36,80 @@ namespace optics
 	// Determines the index in c of the next component the ray hits and the time it hits
 	// Returns time of infinity if no component is next to interact
 	template <typename T>
-	std::pair<size_t, double> next_component(const T& c, const Ray* r);
+	std::pair<size_t, double> next_component(const T& c, const Ray* r, const Scene_Bounds* bounds,
+		const std::vector<std::uint32_t>* candidates);
 
-	// Traces an individual ray for n interactions
+	// Traces an individual ray for n interactions, returns the status of the ray
 	template <typename T>
-	void trace_ray(const T& c, Ray* ry, int n, bool fill_up);
+	Trace_Status trace_ray(const T& c, Ray* ry, int n, bool fill_up, Roulette* roulette,
+		const Scene_Bounds* bounds, const Visibility* visibility, Trace_Order order);
 
-	// Traces a vector of rays through the components
+	// Traces a vector of rays through the components, culling with the scene's bounds
+	// and, if it isn't null, the components' visibility, testing components in the given order
 	// Don't need to redefine 
 	template <typename T>
-	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up);
+	void trace(const T& c, std::vector<Ray*>& rays, int n, bool fill_up, Roulette* roulette,
+		Trace_Control* control, const Visibility* visibility, Trace_Order order);
 
 	// Explicity initiate these template types to allows component list to contain either unique_ptr or raw pointers
-	template void trace(const std::vector<std::shared_ptr<Component>>& c, std::vector<Ray*>& rays, int n, bool fill_up);
-	//template void trace(const std::vector<std::unique_ptr<Component>> &c, std::vector<Ray*> &rays, int n, bool fill_up);
-	template void trace(const std::vector<Component*>& c, std::vector<Ray*>& rays, int n, bool fill_up);
+	template void trace(const std::vector<std::shared_ptr<Component>>& c, std::vector<Ray*>& rays, int n, bool fill_up, Roulette* roulette,
+		Trace_Control* control, const Visibility* visibility, Trace_Order order);
+	//template void trace(const std::vector<std::unique_ptr<Component>> &c, std::vector<Ray*> &rays, int n, bool fill_up, Roulette* roulette);
+	template void trace(const std::vector<Component*>& c, std::vector<Ray*>& rays, int n, bool fill_up, Roulette* roulette,
+		Trace_Control* control, const Visibility* visibility, Trace_Order order);
+
+	// Traces the n_rays rays starting at starts with directions dirs in a medium with
+	// absorption coefficient alpha, replacing the contents of bundle with their paths. Paths
+	// aren't filled up and a single ray is reused so only the bundle grows with the number of rays
+	template <typename T, typename P>
+	void trace_bundle(const T& c, const arr* starts, const arr* dirs, std::size_t n_rays, double alpha,
+		int n, Roulette* roulette, Ray_Bundle<P>& bundle, const Visibility* visibility, Trace_Order order);
+
+	template void trace_bundle(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, Roulette* roulette, Ray_Bundle<double>& bundle,
+		const Visibility* visibility, Trace_Order order);
+	template void trace_bundle(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, Roulette* roulette, Ray_Bundle<float>& bundle,
+		const Visibility* visibility, Trace_Order order);
+
+	// Traces rays as trace_bundle() but writes into caller provided buffers, any of which may be
+	// null. Ray i's positions fill positions[i * (n + 1) * 2] onwards, padded with its last
+	// position, its final direction is directions[2 * i], its final weight is weights[i]
+	// and its Trace_Status is status[i]
+	template <typename T, typename P>
+	void trace_into(const T& c, const arr* starts, const arr* dirs, std::size_t n_rays, double alpha,
+		int n, Roulette* roulette, P* positions, P* directions, P* weights, std::int32_t* status,
+		const Visibility* visibility, Trace_Order order);
+
+	template void trace_into(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, Roulette* roulette, double* positions, double* directions,
+		double* weights, std::int32_t* status, const Visibility* visibility, Trace_Order order);
+	template void trace_into(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, Roulette* roulette, float* positions, float* directions,
+		float* weights, std::int32_t* status, const Visibility* visibility, Trace_Order order);
+
+	// Traces rays as trace_into() but keeps only where they end. Ray i's last position is ends[i],
+	// its final weight is weights[i] and stopped_by[i] is the component in c it stopped on, or
+	// null if it didn't stop
+	void trace_ends(const std::vector<Component*>& c, const arr* starts, const arr* dirs,
+		std::size_t n_rays, double alpha, int n, arr* ends, double* weights, 
+		const Component** stopped_by, const Visibility* visibility, Trace_Order order);
 
 	// Position of ray at time t
 	arr compute_new_pos(const Ray& ry, const double t);
 
+	// Reduces the weight of the ray according to the Beer-Lambert law after
+	// it has travelled for time t through its current medium
+	void attenuate_ray(Ray& ry, const double t);
+
 	// Only changes direction of ray, does not update position
 	void reflect_ray(Ray& ry, const arr n_vec);
 
 	// Only changes direction of ray, does not update position
-	// n1 should be on the side n_vec points towards
-	void refract_ray(Ray& ry, const arr n_vec, const double n1, const double n2);
+	// n1 should be on the side n_vec points towards, a1 and a2 are the absorption
+	// coefficients of the media on the n1 and n2 sides respectively
+	void refract_ray(Ray& ry, const arr n_vec, const double n1, const double n2,
+		const double a1 = 0.0, const double a2 = 0.0);
 
 	// Saves rays to file
 	void save_rays(std::vector<Ray>& rays, std::string path);
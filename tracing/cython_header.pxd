@@ -19,8 +19,11 @@
 
 # distutils: language = c++
 from libcpp.vector cimport vector
+from libcpp.unordered_map cimport unordered_map
 from libcpp.memory cimport shared_ptr
 from libcpp cimport bool
+from libc.stdint cimport int32_t, int64_t, uint32_t, uint64_t
+from libcpp.atomic cimport atomic
 
 # Typedefs used
 
@@ -31,6 +34,12 @@ cdef extern from "<array>" namespace "std" nogil:
         double* data()
         size_t size()
 
+    cdef cppclass arr_f "std::array<float, 2>":
+        arr_f() except+
+        float& operator[](size_t)
+        float* data()
+        size_t size()
+
 
 ctypedef vector[shared_ptr[Component]] comp_list
 
@@ -40,26 +49,135 @@ cdef extern from "Ray.cpp":
     pass
     
 cdef extern from "Ray.h" namespace "optics":
+    cdef cppclass Component
+    ctypedef unordered_map[const Component*, vector[int]] Tangent_Cols
+
     cdef cppclass Ray:
-        Ray(arr, arr)
+        Ray(arr, arr, double)
         vector[arr] pos
         arr v
+        arr v_start
+        bool continue_tracing
+        double weight
+        double alpha, alpha_start
+        vector[arr] dr, dv
+        const Tangent_Cols* tangent_cols
 
         void reset(arr)
         void reset(arr, arr)
 
+
+cdef extern from "Ray_Pool.cpp":
+    pass
+
+cdef extern from "Ray_Pool.h" namespace "optics":
+    cdef cppclass Ray_Pool:
+        Ray_Pool(size_t)
+        Ray* acquire(arr, arr, double)
+        void release_all()
+        size_t size()
+        size_t capacity()
+
+
+cdef extern from "Ray_Bundle.cpp":
+    pass
+
+cdef extern from "Ray_Bundle.h":
+    cdef cppclass Ray_Bundle "optics::Ray_Bundle<double>":
+        Ray_Bundle()
+        vector[arr] points
+        vector[int64_t] offsets
+        vector[arr] v
+        vector[double] weight
+
+        void clear()
+        void append(Ray&)
+        size_t size()
+
+    cdef cppclass Ray_Bundle_f "optics::Ray_Bundle<float>":
+        Ray_Bundle_f()
+        vector[arr_f] points
+        vector[int64_t] offsets
+        vector[arr_f] v
+        vector[float] weight
+
+        void clear()
+        void append(Ray&)
+        size_t size()
+
+
+cdef extern from "Rasterize.cpp":
+    pass
+
+cdef extern from "Rasterize.h" namespace "optics" nogil:
+    cdef struct Raster_Grid:
+        double x_min, x_max, y_min, y_max
+        size_t nx, ny
+
+    void rasterize(const arr*, const int64_t*, size_t, const double*, const Raster_Grid&,
+                   double*, unsigned)
+    void rasterize(const arr_f*, const int64_t*, size_t, const double*, const Raster_Grid&,
+                   double*, unsigned)
+
 cdef extern from "general.cpp":
     pass
 
 cdef extern from "general.h" namespace "optics":
+    cdef enum class Trace_Order(int32_t):
+        any
+        sequential
+        fallback
+
+    cdef cppclass Trace_Control:
+        atomic[bool] cancelled
+        atomic[bool] stopped
+        atomic[bool] timed_out
+        atomic[size_t] done
+        void (*progress)(void*, size_t) noexcept nogil
+        void* progress_data
+        size_t progress_every
+
+        void set_budget(double)
+
+
+cdef extern from "Roulette.cpp":
     pass
 
+cdef extern from "Roulette.h" namespace "optics":
+    cdef cppclass Roulette:
+        Roulette()
+        Roulette(double, uint64_t)
+        double threshold
+        uint64_t seed
+
+
+cdef extern from "tangent_func.cpp":
+    pass
+
+cdef extern from "Scene_Bounds.cpp":
+    pass
+
+cdef extern from "Visibility.cpp":
+    pass
 
 cdef extern from "trace_func.cpp":
     pass
 
-cdef extern from "trace_func.h" namespace "optics":
-    void trace(vector[Component*]&, vector[Ray*] &, int, bool)
+cdef extern from "trace_func.h" namespace "optics" nogil:
+    void trace(vector[Component*]&, vector[Ray*] &, int, bool, Roulette*, Trace_Control*,
+               const Visibility*, Trace_Order)
+    void trace_bundle(vector[Component*]&, const arr*, const arr*, size_t, double, int,
+                      Roulette*, Ray_Bundle&, const Visibility*, Trace_Order)
+    void trace_bundle(vector[Component*]&, const arr*, const arr*, size_t, double, int,
+                      Roulette*, Ray_Bundle_f&, const Visibility*, Trace_Order)
+    void trace_into(vector[Component*]&, const arr*, const arr*, size_t, double, int, 
+                    Roulette*, double*, double*, double*, int32_t*, const Visibility*,
+                    Trace_Order)
+    void trace_into(vector[Component*]&, const arr*, const arr*, size_t, double, int, 
+                    Roulette*, float*, float*, float*, int32_t*, const Visibility*,
+                    Trace_Order)
+    void trace_ends(vector[Component*]&, const arr*, const arr*, size_t, double, int, 
+                    arr*, double*, const Component**, const Visibility*, Trace_Order)
 
 
 # Components
@@ -71,6 +189,22 @@ cdef extern from "Component.h" namespace "optics":
     cdef cppclass Component:
         pass
 
+cdef extern from "Scene_Bounds.h" namespace "optics":
+    cdef cppclass Scene_Bounds:
+        Scene_Bounds(vector[Component*]&)
+        arr lo, hi
+
+cdef extern from "Visibility.h" namespace "optics":
+    cdef cppclass Visibility:
+        cppclass Flat:
+            arr start, end, normal
+            vector[uint32_t] sides[2]
+
+        Visibility(vector[Component*]&)
+        vector[vector[uint32_t]] visible
+        vector[Flat] flats
+        vector[int64_t] flat_ind
+
 
 # Planar components
 
@@ -94,7 +228,8 @@ cdef extern from "Mirror_Plane.cpp":
     
 cdef extern from "Mirror_Plane.h" namespace "optics":
     cdef cppclass Mirror_Plane(Plane):
-        Mirror_Plane(arr, arr) except+
+        Mirror_Plane(arr, arr, double) except+
+        double reflectivity
         void hit(Ray&, int)
 
 
@@ -103,8 +238,9 @@ cdef extern from "Refract_Plane.cpp":
 
 cdef extern from "Refract_Plane.h" namespace "optics":
     cdef cppclass Refract_Plane(Plane):
-        Refract_Plane(arr, arr, double, double) except+
+        Refract_Plane(arr, arr, double, double, double, double) except+
         double n1, n2
+        double a1, a2
         void hit(Ray&, int)
 
 cdef extern from "Screen_Plane.cpp":
@@ -136,7 +272,8 @@ cdef extern from "Mirror_Sph.cpp":
 
 cdef extern from "Mirror_Sph.h" namespace "optics":
     cdef cppclass Mirror_Sph(Spherical):
-        Mirror_Sph(arr, double, double, double)
+        Mirror_Sph(arr, double, double, double, double)
+        double reflectivity
         void hit(Ray*, int)
 
     
@@ -145,8 +282,126 @@ cdef extern from "Refract_Sph.cpp":
 
 cdef extern from "Refract_Sph.h" namespace "optics":
     cdef cppclass Refract_Sph(Spherical):
-        Refract_Sph(arr, double, double, double, double, double)
+        Refract_Sph(arr, double, double, double, double, double, double, double)
         double n1, n2
+        double a1, a2
+        void hit(Ray*, int)
+
+
+# Aspheric components
+
+cdef extern from "Aspheric.cpp":
+    pass
+
+cdef extern from "Aspheric.h" namespace "optics":
+    cdef cppclass Aspheric(Component):
+        arr vertex
+        double c, k, h
+        vector[double] coeffs
+        double get_axis()
+        void set_axis(double)
+        double sag(double)
+        double test_hit(Ray*)
+
+
+cdef extern from "Mirror_Asph.cpp":
+    pass
+
+cdef extern from "Mirror_Asph.h" namespace "optics":
+    cdef cppclass Mirror_Asph(Aspheric):
+        Mirror_Asph(arr, double, double, double, double, vector[double], double)
+        double reflectivity
+        void hit(Ray*, int)
+
+
+cdef extern from "Refract_Asph.cpp":
+    pass
+
+cdef extern from "Refract_Asph.h" namespace "optics":
+    cdef cppclass Refract_Asph(Aspheric):
+        Refract_Asph(arr, double, double, double, double, vector[double], double, double, double, double)
+        double n1, n2
+        double a1, a2
+        void hit(Ray*, int)
+
+
+# Polyline components
+
+cdef extern from "Polyline.cpp":
+    pass
+
+cdef extern from "Polyline.h" namespace "optics":
+    cdef cppclass Polyline(Component):
+        const vector[arr]& get_points()
+        void set_points(vector[arr]) except+
+        size_t size()
+        double test_hit(Ray*)
+
+
+cdef extern from "Mirror_Polyline.cpp":
+    pass
+
+cdef extern from "Mirror_Polyline.h" namespace "optics":
+    cdef cppclass Mirror_Polyline(Polyline):
+        Mirror_Polyline(vector[arr], double) except+
+        double reflectivity
+        void hit(Ray*, int)
+
+
+cdef extern from "Refract_Polyline.cpp":
+    pass
+
+cdef extern from "Refract_Polyline.h" namespace "optics":
+    cdef cppclass Refract_Polyline(Polyline):
+        Refract_Polyline(vector[arr], double, double, double, double) except+
+        double n1, n2
+        double a1, a2
+        void hit(Ray*, int)
+
+
+cdef extern from "Screen_Polyline.cpp":
+    pass
+
+cdef extern from "Screen_Polyline.h" namespace "optics":
+    cdef cppclass Screen_Polyline(Polyline):
+        Screen_Polyline(vector[arr]) except+
+        void hit(Ray*, int)
+
+
+# Bezier components
+
+cdef extern from "Bezier.cpp":
+    pass
+
+cdef extern from "Bezier.h" namespace "optics":
+    cdef cppclass Bezier(Component):
+        const vector[arr]& get_points()
+        void set_points(vector[arr]) except+
+        int get_depth()
+        void set_depth(int) except+
+        size_t size()
+        arr point(size_t, double)
+        double test_hit(Ray*)
+
+
+cdef extern from "Mirror_Bezier.cpp":
+    pass
+
+cdef extern from "Mirror_Bezier.h" namespace "optics":
+    cdef cppclass Mirror_Bezier(Bezier):
+        Mirror_Bezier(vector[arr], double, int) except+
+        double reflectivity
+        void hit(Ray*, int)
+
+
+cdef extern from "Refract_Bezier.cpp":
+    pass
+
+cdef extern from "Refract_Bezier.h" namespace "optics":
+    cdef cppclass Refract_Bezier(Bezier):
+        Refract_Bezier(vector[arr], double, double, double, double, int) except+
+        double n1, n2
+        double a1, a2
         void hit(Ray*, int)
 
 
@@ -160,4 +415,33 @@ cdef extern from "Complex_Component.h" namespace "optics":  # Don't to explicity
         comp_list comps
         double test_hit(Ray*)
         void hit(Ray*, int)
+        void set_transform(const arr&, double)
+        const arr& get_offset()
+        double get_angle()
+
+cdef extern from "Lens.cpp":
+    pass
+
+cdef extern from "Lens.h" namespace "optics":
+    cdef cppclass Lens(Complex_Component):
+        void check_surfaces() except +
 
+
+
+# Transfer table
+
+cdef extern from "Transfer.cpp":
+    pass
+
+cdef extern from "Transfer.h" namespace "optics":
+    cdef cppclass Transfer_Exit "optics::Transfer::Exit":
+        arr pos
+        arr v
+        double weight
+        bint stops
+
+    cdef cppclass Transfer(Plane):
+        Transfer(arr, arr, vector[double], vector[double], vector[Transfer_Exit]) except+
+        const vector[double]& get_s_nodes()
+        const vector[double]& get_angle_nodes()
+        const vector[Transfer_Exit]& get_exits()
@@ -18,6 +18,7 @@
 
 
 # distutils: language = c++
+cimport cython
 from cpython.ref cimport Py_INCREF
 from cython.operator import dereference
 from libcpp.memory cimport shared_ptr
@@ -25,6 +26,22 @@ from libcpp.vector cimport vector
 from libcpp cimport bool
 from cython_header cimport *
 
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import tempfile
+import threading
+import time
+import types
+
 import numpy as np
 cimport numpy as np
 
@@ -40,6 +57,13 @@ cdef extern from "<utility>" namespace "std" nogil:
 # Shape of 1d numpy array with 2 elements
 _arr_shape = (2, 0, 0, 0, 0, 0, 0, 0)
 
+# Status of a ray at the end of tracing, see PyTrace_Bundle(). Active rays 
+# used all n interactions, escaped rays were found to hit no more components 
+# and stopped rays hit a screen or lost the Russian roulette
+TRACE_ACTIVE = 0
+TRACE_ESCAPED = 1
+TRACE_STOPPED = 2
+
 def wrong_np_shape_except(var_name, bad_arr):
     """
     Returns an exception to be used when an array doesn't have the same shape
@@ -105,15 +129,23 @@ cdef make_np_view_from_arr(arr& a, object owning_obj):
     
     """
 
+    cdef np.npy_intp[1] dims = [2]  # Number of elements in each dimension
+
+    return _make_np_view(1, &(dims[0]), np.NPY_FLOAT64, a.data(), owning_obj)
+
+
+cdef np.ndarray _make_np_view(int nd, np.npy_intp* dims, int typenum, void* data, 
+                              object owning_obj):
+    """
+    Exposes the C data as a numpy view with nd dimensions of sizes dims, kept
+    alive by owning_obj.
+    """
+
     # Uses PyArray_SimpleNewFromData() from numpy C API to create numpy view
     # See https://numpy.org/doc/stable/reference/c-api/array.html
 
-    cdef int nd = 1  # number of dimensions in arr
-    cdef int typenum = np.NPY_FLOAT64
-    cdef np.npy_intp[1] dims = [2]  # Number of elements in each dimension
-
     # PyArray_SimpleNewFromData() creates a numpy array from the given pointer
-    cdef np.ndarray np_view = np.PyArray_SimpleNewFromData(nd, &(dims[0]), typenum, a.data())
+    cdef np.ndarray np_view = np.PyArray_SimpleNewFromData(nd, dims, typenum, data)
 
     # PyArray_SetBaseObject() steals a reference so we need to pre-increment
     Py_INCREF(owning_obj)
@@ -129,14 +161,24 @@ cdef make_np_view_from_arr(arr& a, object owning_obj):
 
 # PyTrace function
 
-def PyTrace(list components, list rays, int n, bool fill_up=True):
+def PyTrace(list components, list rays, int n, bool fill_up=True, 
+            double roulette_threshold=0.0, unsigned long long seed=0, 
+            list params=None, cache=None, progress=None, 
+            size_t progress_every=1000, time_budget=None, control=None,
+            visibility=None, bint sequential=False, bint fallback=False):
     """
     Traces the rays through the component list for n iterations.
 
+    Long traces can report their progress, be limited to a time budget and
+    be cancelled. These are checked between rays so the rays are traced in
+    order, each completely or not at all, and if tracing stops early the 
+    rays already traced keep their results while the others are unchanged.
+
     Parameters
     ----------
     components : list
-        The components rays will be traced through.
+        The components rays will be traced through. A PyComponent_Array adds
+        each of its components.
     rays : list
         The rays to be traced.
     n : int
@@ -148,462 +190,6497 @@ def PyTrace(list components, list rays, int n, bool fill_up=True):
         If is detected a ray will not interact with any more components before 
         n iterations are reached, PyTrace will fill the ray's position up with 
         the final position so it has added n points. The default is True.
+    roulette_threshold : double, optional
+        If greater than zero, rays whose weight falls below 
+        roulette_threshold after an interaction play Russian roulette. They
+        survive with probability weight / roulette_threshold, in which case 
+        their weight is raised to roulette_threshold, otherwise they are 
+        absorbed at their current position. The default is 0.0, meaning no
+        rays are terminated.
+    seed : int, optional
+        Seed for the Russian roulette. Each ray's random stream depends only
+        on the seed and its index in rays. The default is 0.
+    params : list, optional
+        A list of (component, name) tuples giving the parameters to 
+        differentiate the end point of each ray with respect to. See 
+        tangent_param_names() for the names each component accepts. The 
+        component can be a sub-component of a complex component. Parameters 
+        which are points, e.g. a plane's start, contribute two columns, x then
+        y, to the result. The derivatives are propagated alongside the rays so
+        a single trace gives the full Jacobian. The default is None, meaning 
+        no derivatives are computed.
+    cache : PyTrace_Cache, optional
+        If given, the final state of the rays is loaded from the cache when
+        the same components have traced rays in the same state before, 
+        otherwise it is stored after tracing. Results of traces which stop
+        early aren't stored. The default is None.
+    progress : callable, optional
+        Called as progress(done, total) with the number of rays traced after
+        every progress_every rays and when tracing ends. If it raises, 
+        tracing stops and the exception is raised by PyTrace. The default is
+        None.
+    progress_every : int, optional
+        The number of rays between calls to progress. The default is 1000.
+    time_budget : double, optional
+        The number of seconds after which tracing stops before the next ray.
+        The default is None, meaning no limit.
+    control : PyTrace_Control, optional
+        A cancel token, tracing stops before the next ray once its cancel() 
+        is called. Its done attribute gives the number of rays traced. The 
+        default is None.
+    visibility : PyVisibility, optional
+        The visibility of the components, after which only the components a
+        ray can reach from the one it last hit are tested. The results are 
+        the same. The default is None.
+    sequential : bool, optional
+        If True, components are an ordered surface list, e.g. of a lens 
+        system, and each ray only tests the component after the one it last
+        hit, starting with the first. The one it last hit is also tested so 
+        rays cross a complex component, e.g. a PyLens, before moving on. Rays
+        which miss them escape. The default is False, meaning all the 
+        components are searched for each interaction.
+    fallback : bool, optional
+        If True, rays which miss the next surface in sequential mode search
+        all the components instead, continuing the sequence after the one 
+        they hit. Requires sequential. The default is False.
 
     Raises
     ------
     TypeError
-        Raised if an element in components is not recognised as a component.
+        Raised if an element in components is not recognised as a component,
+        progress isn't callable or visibility isn't a PyVisibility.
+    ValueError
+        Raised if a parameter in params is not recognised or given more than
+        once, if both params and cache are given, progress_every is less than
+        one, time_budget is less than zero, visibility was computed for a
+        different number of components or fallback is given without 
+        sequential.
 
     Returns
     -------
-    None.
+    None or numpy.ndarray
+        None if params is None. Otherwise a numpy array with shape 
+        (len(rays), 2, P) where P is the number of columns. Element [i, j, k]
+        is the derivative of coordinate j of the end point of ray i with 
+        respect to parameter column k.
 
     """
     
-    cdef vector[Component*] vec_comp
-        
-    for c in components:
-        if isinstance(c, PyMirror_Plane):
-            vec_comp.push_back( (<PyMirror_Plane>c).c_component_ptr.get() )
-            
-        elif isinstance(c, PyRefract_Plane):
-            vec_comp.push_back( (<PyRefract_Plane>c).c_component_ptr.get() )
+    cdef vector[Component*] vec_comp = _make_comp_vector(components)
+    cdef const Visibility* vis_ptr = _visibility_ptr(visibility, vec_comp.size())
+    cdef Trace_Order order = _trace_order(sequential, fallback)
 
-        elif isinstance(c, PyScreen_Plane):
-            vec_comp.push_back( (<PyScreen_Plane>c).c_component_ptr.get() )
-            
-        elif isinstance(c, PyMirror_Sph):
-            vec_comp.push_back( (<PyMirror_Sph>c).c_component_ptr.get() )
-            
-        elif isinstance(c, PyRefract_Sph):
-            vec_comp.push_back( (<PyRefract_Sph>c).c_component_ptr.get() )
-            
-        elif isinstance(c, PyCC_Wrap):  # Complex derived from PyCC_Wrap
-            vec_comp.push_back( ( <PyComplex_Component>( c.PyCC )).c_component_ptr.get() )
-            
-        else:
-            raise TypeError(f"type {type(c)} is not a recognised type for a component")
-            
-        
-    cdef vector[Ray*] vec_rays
-    
-    for r in rays:
-        vec_rays.push_back( (<PyRay>r).c_data )
-        
-    trace(vec_comp, vec_rays, n, fill_up)
+    if roulette_threshold < 0.0:
+        raise ValueError("roulette_threshold cannot be less than zero")
 
-# class PyRay
+    cdef Roulette roulette = Roulette(roulette_threshold, seed)
+    cdef PyTrace_Control ctrl = control
+    cdef Trace_Control* ctrl_ptr = NULL
 
-cdef class PyRay:
-    """
-    A class to describe a ray.
-    
-    ...
-    
-    Attributes
-    ----------
-    pos : numpy.ndarray
-        Returns a numpy array of the positions of the ray.
-    v : numpy.ndarray
-        The current 2d direction of the ray.
-        
-    Methods
-    -------
-    
-    plot()
-        Returns a numpy array with shape (N, 2) of the positions of the ray.
-        Intended for plotting.
-    
-    """
-    
-    cdef Ray* c_data
-    
-    def __cinit__(self, double[:] init not None, double[:] v not None):
-        """
-        Creates an instance of PyRay
+    if ctrl is None and (progress is not None or time_budget is not None):
+        ctrl = PyTrace_Control()
 
-        Parameters
-        ----------
-        init : numpy.ndarray
-            Initial 2d position of the ray. Should be a numpy array with shape
-            (2,).
-        v : numpy.ndarray
-            Initial 2d direction of the ray. Should be a normalised numpy array
-            with shape (2,).
+    if ctrl is not None:
+        ctrl._prepare(progress, progress_every, time_budget, len(rays))
+        ctrl_ptr = ctrl.c_data
 
-        Returns
-        -------
-        None.
+    if cache is not None:
+        if params is not None:
+            raise ValueError("cache cannot be used with params")
 
-        """
-        
-        if tuple(init.shape) != _arr_shape:
-            raise wrong_np_shape_except("init", init)
+        key = _trace_key("rays", components, n, fill_up, roulette_threshold, 
+                         seed, <int>order, *_ray_state(rays).values())
+        state = cache.load(key)
 
-        if tuple(v.shape) != _arr_shape:
-            raise wrong_np_shape_except("v", v)
+        if state is not None:
+            _set_ray_state(rays, state)
 
-        self.c_data = new Ray(make_arr_from_numpy(init), 
-                              make_arr_from_numpy(v))
-        
-    def __dealloc__(self):
-        """
-        Deallocates the memory held by PyRay
+            if ctrl is not None:
+                ctrl.c_data.done.store(len(rays))
+                ctrl._finish()
 
-        Returns
-        -------
-        None.
+            if progress is not None:
+                progress(len(rays), len(rays))
 
-        """
+            return None
 
-        del self.c_data
-        
-    @property
-    def pos(self):
-        """
-        Returns the positions of each interaction of the ray.
+    try:
+        ans = _trace_rays(vec_comp, rays, n, fill_up, 
+                          &roulette if roulette_threshold > 0.0 else NULL, params,
+                          ctrl_ptr, vis_ptr, order)
+    finally:
+        if ctrl is not None:
+            ctrl._finish()
 
-        Returns
-        -------
-        ans : numpy.ndarray
-            A numpy array with shape (N, 2).
+    if cache is not None and (ctrl is None or ctrl.done == len(rays)):
+        cache.store(key, _ray_state(rays))
 
-        """
-        
-        n = dereference(self.c_data).pos.size()
-        
-        ans = np.empty((n, 2), dtype=np.double)
-        
-        for i in range(n):
-            ans[i, 0] = dereference(self.c_data).pos[i][0]
-            ans[i, 1] = dereference(self.c_data).pos[i][1]
-        
-        return ans
-    
-    @property
-    def v(self):
-        """
-        Gets a view of the current 2d direction of the ray. It returns a numpy
-        view so can be used to modify PyRay.v elementwise.
+    return ans
 
-        Returns
-        -------
-        v_np : numpy.ndarray
-            A numpy view with shape (2,).
 
-        """
-        
-        return make_np_view_from_arr(self.c_data.v, self)
-    @v.setter
-    def v(self, double[:] v not None):
-        if tuple(v.shape) != _arr_shape:
-            raise wrong_np_shape_except("v", v)
-        
-        dereference(self.c_data).v = make_arr_from_numpy(v)
-        
-    def plot(self):
-        """
-        Produces a numpy arrays that can be used to plot the path of the ray.
+cdef dict _ray_state(list rays):
+    """
+    Returns the positions, directions, weights, absorption coefficients and 
+    whether each ray is still being traced as numpy arrays, the positions 
+    packed as in PyRay_Bundle.
+    """
 
-        Returns
-        -------
-        numpy.ndarray
-            A numpy array with shape (N, 2).
+    cdef Py_ssize_t i, j, N = len(rays)
+    cdef Ray* ray_ptr
+    cdef int64_t[::1] offsets = np.zeros(N + 1, dtype=np.int64)
 
-        """
-        
-        return self.pos
+    for i in range(N):
+        offsets[i + 1] = offsets[i] + (<PyRay?>rays[i]).c_data.pos.size()
 
-    def reset(self, double[:] new_v not None, double[:] new_p = None):
-        """
-        Resets the PyRay instance to the start position and is direction to
-        that of new_v. new_v is assumed to be normalised.
+    cdef double[:, ::1] points = np.empty((offsets[N], 2))
+    cdef double[:, ::1] v = np.empty((N, 2))
+    cdef double[:, ::1] values = np.empty((N, 3))
+    cdef np.npy_bool[::1] cont = np.empty(N, dtype=np.bool_)
 
-        Parameters
-        ----------
-        new_v : numpy.ndarray
-            The new 2d direction of the ray. Should be a normalised numpy array
-            with shape (2,).
-        new_p : numpy.ndarray, optional
-            Initial 2d position of the ray. If not specified, the original 
-            initial position will be used. Should be a numpy array with shape
-            (2,).
+    for i in range(N):
+        ray_ptr = (<PyRay>rays[i]).c_data
 
-        Returns
-        -------
-        None. 
-        
-        """
+        for j in range(offsets[i + 1] - offsets[i]):
+            points[offsets[i] + j, 0] = ray_ptr.pos[j][0]
+            points[offsets[i] + j, 1] = ray_ptr.pos[j][1]
 
-        if tuple(new_v.shape) != _arr_shape:
-            raise wrong_np_shape_except("new_v", new_v)
+        v[i, 0], v[i, 1] = ray_ptr.v[0], ray_ptr.v[1]
+        values[i, 0] = ray_ptr.weight
+        values[i, 1] = ray_ptr.alpha
+        values[i, 2] = ray_ptr.alpha_start
+        cont[i] = ray_ptr.continue_tracing
 
-        cdef arr n_v = make_arr_from_numpy(new_v)
-        cdef arr n_p
+    return {"points": np.asarray(points), "offsets": np.asarray(offsets), 
+            "directions": np.asarray(v), "values": np.asarray(values), 
+            "continue": np.asarray(cont)}
 
-        if new_p is None:
-            dereference(self.c_data).reset(n_v)
-        else:
-            if tuple(new_p.shape) != _arr_shape:
-                raise wrong_np_shape_except("new_p", new_p)
 
-            n_p = make_arr_from_numpy(new_p)
+cdef _set_ray_state(list rays, dict state):
+    """Restores the state of the rays returned by _ray_state()"""
 
-            dereference(self.c_data).reset(n_v, n_p)
+    cdef Py_ssize_t i, j
+    cdef Ray* ray_ptr
+    cdef const int64_t[::1] offsets = state["offsets"]
+    cdef const double[:, ::1] points = state["points"]
+    cdef const double[:, ::1] v = state["directions"]
+    cdef const double[:, ::1] values = state["values"]
+    cdef const np.npy_bool[::1] cont = state["continue"]
 
+    for i in range(len(rays)):
+        ray_ptr = (<PyRay?>rays[i]).c_data
 
-# class _PyComponent
-    
-cdef class _PyComponent:
-    """
-    A class to mirror the C++ Component class. Not intended to be initialized.
-    
-    ...
-    
-    Attributes
-    ----------
-    
-    None.
-    
-    Methods
-    -------
-    
-    None.
-    
-    """
-    
-    cdef shared_ptr[Component] c_component_ptr
+        if ray_ptr.pos.size() == 1:
+            ray_ptr.v_start = ray_ptr.v
 
-    cdef _load_component(self, Component* cmp_ptr):
-        """
-        Sets the C++ component pointer.
+        ray_ptr.pos.resize(offsets[i + 1] - offsets[i])
 
-        Parameters
-        ----------
-        cmp_ptr : Component*
+        for j in range(offsets[i + 1] - offsets[i]):
+            ray_ptr.pos[j][0] = points[offsets[i] + j, 0]
+            ray_ptr.pos[j][1] = points[offsets[i] + j, 1]
 
-        Returns
-        -------
-        None.
+        ray_ptr.v[0], ray_ptr.v[1] = v[i, 0], v[i, 1]
+        ray_ptr.weight = values[i, 0]
+        ray_ptr.alpha = values[i, 1]
+        ray_ptr.alpha_start = values[i, 2]
+        ray_ptr.continue_tracing = cont[i]
+        ray_ptr.dr.clear()
+        ray_ptr.dv.clear()
 
-        """
 
-        self.c_component_ptr = shared_ptr[Component](cmp_ptr)
+cdef vector[Component*] _make_comp_vector(list components) except *:
+    """
+    Creates the vector of C++ components to trace rays through.
 
+    Parameters
+    ----------
+    components : list
+        The components rays will be traced through.
 
-# Planar components
-# class _PyPlane
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component.
 
-cdef class _PyPlane(_PyComponent):
-    """
-    A class to mirror the C++ Plane class which represents a 2d plane. Not 
-    intended to be initialised.
-    
-    ...
-    
-    Attributes
-    ----------
-    
-    start : numpy.ndarray
-        The start point of the plane.
-    end : numpy.ndarray
-        The end point of the plane.
-    
-    Methods
+    Returns
     -------
-    
-    plot() : numpy.ndarray
-        Returns a numpy array for plotting the plane with shape (2, 2), with
-        the first indiex specifying the point.
-    
+    vector[Component*]
+        Pointers to the C++ components. They are owned by the Python 
+        components so are only valid while those are alive.
+
     """
-    
-    cdef Plane* c_plane_ptr
 
+    cdef vector[Component*] vec_comp
+    cdef comp_list comps
 
-    cdef _load_Plane(self, Plane* pln_ptr):
-        """
-        Loads plane properties, namely start & end. Also sets the plane and
-        component pointers.
+    _load_shared_ptrs(components, comps)
 
-        Parameters
-        ----------
-        pl_ptr : Plane*
-            Pointer to the C++ Plane.
+    for i in range(comps.size()):
+        vec_comp.push_back(comps[i].get())
 
-        Returns
-        -------
-        None.
-        
-        """
+    return vec_comp
 
-        self.c_plane_ptr = pln_ptr
-        self._load_component(<Component*>pln_ptr)
 
-    @property
-    def start(self):
-        """
-        The start point of the plane. Can be set as a copy of the passed numpy
-        array.
+cdef _load_shared_ptrs(list components, comp_list& comps):
+    """
+    Appends the shared pointers to the C++ components in components to comps.
 
-        Returns
-        -------
+    Parameters
+    ----------
+    components : list
+        The components. They should be leaf components, PyComponent_Array or 
+        inherit from PyCC_Wrap.
+    comps : comp_list
+        The vector to append the pointers to.
+
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    cdef PyComponent_Array comp_arr
+
+    for c in components:
+        if isinstance(c, PyComponent_Array):
+            comp_arr = <PyComponent_Array>c
+            comps.insert(comps.end(), comp_arr.c_comps.begin(), 
+                         comp_arr.c_comps.end())
+
+        elif isinstance(c, _PyComponent):
+            comps.push_back( (<_PyComponent>c).c_component_ptr )
+            
+        elif isinstance(c, PyCC_Wrap):  # Complex derived from PyCC_Wrap
+            comps.push_back( (<PyComplex_Component?>( c.PyCC )).c_component_ptr )
+            
+        else:
+            raise TypeError(f"type {type(c)} is not a recognised type for a component")
+
+
+cdef np.ndarray _many_points(str var_name, points, Py_ssize_t N=-1):
+    """
+    Returns points as a C contiguous numpy array with shape (N, 2), raising a
+    TypeError if it has the wrong shape. If N is -1 any N is accepted.
+    """
+
+    ans = np.ascontiguousarray(points, dtype=np.double)
+
+    if ans.ndim != 2 or ans.shape[1] != 2 or (N != -1 and ans.shape[0] != N):
+        n_str = "N" if N == -1 else str(N)
+        raise TypeError(f"expected {var_name} to have shape ({n_str}, 2) but got array with shape {ans.shape}")
+
+    return ans
+
+
+cdef np.ndarray _many_values(str var_name, values, Py_ssize_t N):
+    """
+    Returns values broadcast to a C contiguous numpy array with shape (N,), 
+    raising a TypeError if it cannot be.
+    """
+
+    ans = np.asarray(values, dtype=np.double)
+
+    try:
+        return np.ascontiguousarray(np.broadcast_to(ans, (N,)))
+    except ValueError:
+        raise TypeError(f"expected {var_name} to be a double or have shape ({N},) but got array with shape {ans.shape}")
+
+
+cdef inline arr _arr_from_row(const double[:, ::1] points, Py_ssize_t i):
+    """Returns row i of points as an arr"""
+
+    cdef arr ans
+    ans[0], ans[1] = points[i, 0], points[i, 1]
+
+    return ans
+
+
+cdef _trace_rays(vector[Component*]& vec_comp, list rays, int n, bool fill_up,
+                 Roulette* roulette, list params, Trace_Control* control=NULL,
+                 const Visibility* visibility=NULL, Trace_Order order=Trace_Order.any):
+    """
+    Traces rays through the C++ components, see PyTrace().
+
+    Parameters
+    ----------
+    vec_comp : vector[Component*]
+        The components rays will be traced through.
+    rays : list
+        The rays to be traced.
+    n : int
+        The number of iterations to be performed.
+    fill_up : bool
+        Whether to fill the ray's positions up to n points.
+    roulette : Roulette*
+        The Russian roulette to play or NULL.
+    params : list or None
+        The (component, name) tuples to compute derivatives with respect to.
+    control : Trace_Control*, optional
+        Lets another thread follow and cancel the trace, or NULL. The default
+        is NULL.
+    visibility : const Visibility*, optional
+        The visibility of the components or NULL. The default is NULL.
+    order : Trace_Order, optional
+        The order components are tested in. The default is Trace_Order.any.
+
+    Returns
+    -------
+    None or numpy.ndarray
+        See PyTrace().
+
+    """
+
+    cdef vector[Ray*] vec_rays
+    cdef Ray* ray_ptr
+    cdef arr zero
+    cdef Tangent_Cols cols  # Kept by this trace so others can share the components
+    cdef int n_cols = 0
+
+    zero[0], zero[1] = 0.0, 0.0
+
+    if params is not None:
+        n_cols = _load_tangent_params(params, cols)
+    
+    for r in rays:
+        ray_ptr = (<PyRay?>r).c_data
+
+        # Tangents start at zero as the initial ray doesn't depend on params
+        ray_ptr.dr.assign(n_cols, zero)
+        ray_ptr.dv.assign(n_cols, zero)
+        ray_ptr.tangent_cols = &cols
+
+        vec_rays.push_back(ray_ptr)
+
+    # The rays and components are owned by Python objects held by the caller 
+    # so the GIL can be released
+    try:
+        with nogil:
+            trace(vec_comp, vec_rays, n, fill_up, roulette, control, visibility, order)
+    finally:
+        # cols doesn't outlive this call
+        for ray_ptr in vec_rays:
+            ray_ptr.tangent_cols = NULL
+
+    if params is None:
+        return None
+
+    return np.stack([r.d_pos for r in rays]).reshape(len(rays), 2, n_cols)
+
+
+cdef Trace_Order _trace_order(bint sequential, bint fallback) except *:
+    """
+    Returns the order components are tested in, see PyTrace(). Raises a 
+    ValueError if fallback is given without sequential.
+    """
+
+    if fallback and not sequential:
+        raise ValueError("fallback requires sequential")
+
+    if fallback:
+        return Trace_Order.fallback
+
+    return Trace_Order.sequential if sequential else Trace_Order.any
+
+
+def PyTrace_Bundle(list components, starts, directions, int n, double alpha=0.0,
+                   double roulette_threshold=0.0, unsigned long long seed=0,
+                   out_positions=None, out_directions=None, out_status=None,
+                   dtype=np.double, cache=None, out_weights=None, visibility=None,
+                   bint sequential=False, bint fallback=False):
+    """
+    Traces rays given by their start points and directions through the 
+    component list for n iterations without creating a PyRay for each. The
+    paths are stored contiguously without filling up, so rays which stop 
+    early take no more memory than their own positions. Alternatively the
+    results can be written into caller provided arrays, e.g. np.memmap or
+    arrays backed by multiprocessing.shared_memory, which are reused without
+    allocating. Rays are traced in double precision but can be stored as 
+    float32, halving the memory of the results.
+
+    Parameters
+    ----------
+    components : list
+        The components rays will be traced through. See PyTrace().
+    starts : numpy.ndarray
+        The initial positions of the rays with shape (N, 2).
+    directions : numpy.ndarray
+        The initial normalised directions of the rays with shape (N, 2).
+    n : int
+        The number of iterations (i.e. interactions) to be performed. See 
+        PyTrace().
+    alpha : double, optional
+        The absorption coefficient of the medium the rays start in. The 
+        default is 0.0.
+    roulette_threshold : double, optional
+        The weight below which rays play Russian roulette. See PyTrace(). The
+        default is 0.0.
+    seed : int, optional
+        Seed for the Russian roulette. The random stream of each ray matches
+        that of PyTrace() for a ray with the same index. The default is 0.
+    out_positions : numpy.ndarray, optional
+        A writeable C contiguous array of dtype with shape (N, n + 1, 2) the 
+        paths are written into instead of returning a bundle. Each path is 
+        padded with its last position. The default is None.
+    out_directions : numpy.ndarray, optional
+        A writeable C contiguous array of dtype with shape (N, 2) the final 
+        directions are written into. Requires out_positions. The default is 
+        None.
+    out_status : numpy.ndarray, optional
+        A writeable C contiguous int32 array with shape (N,) the status of
+        each ray is written into, one of TRACE_ACTIVE, TRACE_ESCAPED or 
+        TRACE_STOPPED. Requires out_positions. The default is None.
+    dtype : numpy.dtype, optional
+        The dtype results are stored with, either np.float64 or np.float32.
+        The default is np.double.
+    cache : PyTrace_Cache, optional
+        If given, the bundle is loaded from the cache when the same 
+        components have traced the same rays with the same arguments before, 
+        otherwise it is stored after tracing. Can't be used with 
+        out_positions. The default is None.
+    out_weights : numpy.ndarray, optional
+        A writeable C contiguous array of dtype with shape (N,) the final 
+        weights are written into. Requires out_positions. The default is 
+        None.
+    visibility : PyVisibility, optional
+        The visibility of the components. See PyTrace(). The default is None.
+    sequential : bool, optional
+        Whether components are an ordered surface list each ray tests in 
+        turn. See PyTrace(). The default is False.
+    fallback : bool, optional
+        Whether rays which miss the next surface in sequential mode search all
+        the components. See PyTrace(). The default is False.
+
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component,
+        an array has the wrong shape or dtype, dtype isn't supported or 
+        visibility isn't a PyVisibility.
+    ValueError
+        Raised if alpha or roulette_threshold is less than zero, an output
+        array is read-only, not C contiguous or given without out_positions,
+        if both cache and out_positions are given, visibility was computed 
+        for a different number of components or fallback is given without
+        sequential.
+
+    Returns
+    -------
+    PyRay_Bundle or None
+        The paths, final directions and weights of the rays. A ray's path is
+        the same as its pos after PyTrace() with fill_up=False. None if 
+        out_positions is given.
+
+    """
+
+    cdef vector[Component*] vec_comp = _make_comp_vector(components)
+    cdef const Visibility* vis_ptr = _visibility_ptr(visibility, vec_comp.size())
+    cdef Trace_Order order = _trace_order(sequential, fallback)
+    cdef const double[:, ::1] s = _many_points("starts", starts)
+    cdef const double[:, ::1] d = _many_points("directions", directions, s.shape[0])
+    cdef Py_ssize_t N = s.shape[0]
+    cdef const arr* s_ptr = NULL
+    cdef const arr* d_ptr = NULL
+    cdef double[:, :, ::1] pos_view
+    cdef double[:, ::1] dir_view
+    cdef float[:, :, ::1] pos_view_f
+    cdef float[:, ::1] dir_view_f
+    cdef int[::1] status_view
+    cdef double[::1] weight_view
+    cdef float[::1] weight_view_f
+    cdef double* dir_ptr = NULL
+    cdef float* dir_ptr_f = NULL
+    cdef double* weight_ptr = NULL
+    cdef float* weight_ptr_f = NULL
+    cdef int32_t* status_ptr = NULL
+    cdef PyRay_Bundle new_bundle
+    cdef bint single
+
+    dtype = _bundle_dtype(dtype)
+    single = dtype == np.float32
+
+    if alpha < 0.0:
+        raise ValueError("alpha cannot be less than zero")
+
+    if roulette_threshold < 0.0:
+        raise ValueError("roulette_threshold cannot be less than zero")
+
+    cdef Roulette roulette = Roulette(roulette_threshold, seed)
+    cdef Roulette* roulette_ptr = &roulette if roulette_threshold > 0.0 else NULL
+
+    # Rows of a C contiguous (N, 2) array are laid out as arr
+    if N > 0:
+        s_ptr = <const arr*>&s[0, 0]
+        d_ptr = <const arr*>&d[0, 0]
+
+    if out_positions is None:
+        if out_directions is not None or out_status is not None or out_weights is not None:
+            raise ValueError("out_directions, out_weights and out_status require out_positions")
+
+        if cache is not None:
+            key = _trace_key("bundle", components, np.asarray(s), np.asarray(d),
+                             n, alpha, roulette_threshold, seed, dtype.str, <int>order)
+            arrays = cache.load(key)
+
+            if arrays is not None:
+                bundle = PyRay_Bundle(dtype)
+                (<PyRay_Bundle>bundle)._assign(arrays["points"], arrays["offsets"],
+                                               arrays["directions"], arrays["weights"])
+                return bundle
+
+        bundle = PyRay_Bundle(dtype)
+
+        new_bundle = bundle
+
+        with nogil:
+            if single:
+                trace_bundle(vec_comp, s_ptr, d_ptr, N, alpha, n, roulette_ptr, 
+                             dereference(new_bundle.c_data_f), vis_ptr, order)
+            else:
+                trace_bundle(vec_comp, s_ptr, d_ptr, N, alpha, n, roulette_ptr, 
+                             dereference(new_bundle.c_data), vis_ptr, order)
+
+        if cache is not None:
+            cache.store(key, {"points": bundle.points, "offsets": bundle.offsets,
+                              "directions": bundle.directions, 
+                              "weights": bundle.weights})
+
+        return bundle
+
+    if cache is not None:
+        raise ValueError("cache cannot be used with out_positions")
+
+    if n < 0:
+        raise ValueError("n cannot be less than zero when writing to out_positions")
+
+    positions = _check_out("out_positions", out_positions, (N, n + 1, 2), dtype)
+
+    if out_directions is not None:
+        directions = _check_out("out_directions", out_directions, (N, 2), dtype)
+
+    if out_weights is not None:
+        weights = _check_out("out_weights", out_weights, (N,), dtype)
+
+    if out_status is not None:
+        status_view = _check_out("out_status", out_status, (N,), np.int32)
+
+        if N > 0:
+            status_ptr = <int32_t*>&status_view[0]
+
+    if N == 0:
+        return None
+
+    if single:
+        pos_view_f = positions
+
+        if out_directions is not None:
+            dir_view_f = directions
+            dir_ptr_f = &dir_view_f[0, 0]
+
+        if out_weights is not None:
+            weight_view_f = weights
+            weight_ptr_f = &weight_view_f[0]
+
+        with nogil:
+            trace_into(vec_comp, s_ptr, d_ptr, N, alpha, n, roulette_ptr, 
+                       &pos_view_f[0, 0, 0], dir_ptr_f, weight_ptr_f, status_ptr,
+                       vis_ptr, order)
+    else:
+        pos_view = positions
+
+        if out_directions is not None:
+            dir_view = directions
+            dir_ptr = &dir_view[0, 0]
+
+        if out_weights is not None:
+            weight_view = weights
+            weight_ptr = &weight_view[0]
+
+        with nogil:
+            trace_into(vec_comp, s_ptr, d_ptr, N, alpha, n, roulette_ptr, 
+                       &pos_view[0, 0, 0], dir_ptr, weight_ptr, status_ptr, 
+                       vis_ptr, order)
+
+    return None
+
+
+cdef np.ndarray _check_out(str var_name, out, tuple shape, dtype):
+    """
+    Returns the output array out as a numpy array without copying, raising a
+    TypeError if it has the wrong shape or dtype and a ValueError if it can't
+    be written to in place.
+    """
+
+    ans = np.asarray(out)
+
+    if ans.shape != shape:
+        raise TypeError(f"expected {var_name} to have shape {shape} but got array with shape {ans.shape}")
+
+    if ans.dtype != dtype:
+        raise TypeError(f"expected {var_name} to have dtype {np.dtype(dtype)} but got {ans.dtype}")
+
+    if not ans.flags.c_contiguous or not ans.flags.writeable:
+        raise ValueError(f"{var_name} must be C contiguous and writeable")
+
+    return ans
+
+
+def _bundle_dtype(dtype):
+    """
+    Returns dtype as a numpy dtype, raising a TypeError if it isn't float64 or
+    float32.
+    """
+
+    ans = np.dtype(dtype)
+
+    if ans != np.float64 and ans != np.float32:
+        raise TypeError(f"dtype must be float64 or float32 but got {ans}")
+
+    return ans
+
+
+# Scene bounds
+
+def scene_bounds(list components):
+    """
+    Returns the axis aligned box containing the components, which tracing 
+    uses to stop rays heading away from the scene without testing every 
+    component. It is padded slightly so rounding can't cull hits on its 
+    edge. It is infinite if a component can't be bounded.
+
+    Parameters
+    ----------
+    components : list
+        The components, see PyTrace().
+
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component.
+
+    Returns
+    -------
+    tuple
+        The box as (x_min, x_max, y_min, y_max), the same convention as 
+        extent in PyRasterize(). x_min is infinity if components is empty.
+
+    """
+
+    cdef vector[Component*] vec_comp = _make_comp_vector(components)
+    cdef Scene_Bounds* bounds = new Scene_Bounds(vec_comp)
+
+    try:
+        return (bounds.lo[0], bounds.hi[0], bounds.lo[1], bounds.hi[1])
+    finally:
+        del bounds
+
+
+# Visibility
+
+cdef class PyVisibility:
+    """
+    Lists of the components a ray can hit next after hitting each component,
+    so tracing only tests those instead of every component. Mirrors C++ 
+    class Visibility.
+    
+    Straight components, i.e. planes, polylines and the planes of complex 
+    components, which join up exactly into closed walls, e.g. the sides of a
+    cavity, separate the components inside them from those outside. A plane
+    which is part of a wall has a list for each side, so a ray leaving it 
+    into the cavity only tests what is inside. The lists are conservative so
+    traces give the same results with or without them. Other components 
+    touching a wall see every component on their side of any other walls. 
+    Computing the lists takes time proportional to the number of components
+    times the number of wall segments, so they should be computed once and 
+    reused while the components don't move.
+    
+    ...
+    
+    Attributes
+    ----------
+    n_components : int
+        The number of leaf components, counting each component of a 
+        PyComponent_Array.
+    
+    Methods
+    -------
+    
+    visible(i, side=0) : numpy.ndarray
+        The indices of the components which can be hit after component i.
+    
+    """
+
+    cdef Visibility* c_data
+    cdef readonly Py_ssize_t n_components
+
+    def __cinit__(self, list components):
+        """
+        Computes the visibility of the components.
+
+        Parameters
+        ----------
+        components : list
+            The components, in the order they will be traced through.
+
+        Raises
+        ------
+        TypeError
+            Raised if an element in components is not recognised as a 
+            component.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        cdef vector[Component*] vec_comp = _make_comp_vector(components)
+
+        self.c_data = new Visibility(vec_comp)
+        self.n_components = vec_comp.size()
+
+    def __dealloc__(self):
+        del self.c_data
+
+    def visible(self, Py_ssize_t i, int side=0):
+        """
+        Returns the indices of the components a ray can hit after hitting 
+        component i, which always include i.
+
+        Parameters
+        ----------
+        i : int
+            The index of the component, counting each component of a 
+            PyComponent_Array.
+        side : int, optional
+            For a plane with a list for each side, 1 for rays leaving to the
+            left of its start to end and -1 for its right. The default is 0,
+            meaning rays leaving to either side, which is used for every 
+            component without lists for each side.
+
+        Raises
+        ------
+        IndexError
+            Raised if i is out of range.
+        ValueError
+            Raised if side isn't -1, 0 or 1.
+
+        Returns
+        -------
+        numpy.ndarray
+            The indices in increasing order as uint32.
+
+        """
+
+        if i < 0 or i >= self.n_components:
+            raise IndexError(f"component index {i} out of range for {self.n_components} components")
+
+        if side not in (-1, 0, 1):
+            raise ValueError(f"side must be -1, 0 or 1 but got {side}")
+
+        cdef vector[uint32_t]* vis = &self.c_data.visible[i]
+        cdef int64_t flat = self.c_data.flat_ind[i]
+
+        if side != 0 and flat >= 0:
+            vis = &self.c_data.flats[flat].sides[0 if side == 1 else 1]
+        ans = np.empty(vis.size(), dtype=np.uint32)
+        cdef uint32_t[::1] view = ans
+
+        for j in range(vis.size()):
+            view[j] = dereference(vis)[j]
+
+        return ans
+
+    def __len__(self):
+        return self.n_components
+
+
+cdef const Visibility* _visibility_ptr(visibility, size_t n_components) except? NULL:
+    """
+    Returns the C++ visibility of a PyVisibility or NULL if it is None, 
+    raising a TypeError if it isn't a PyVisibility and a ValueError if it 
+    was computed for a different number of components.
+    """
+
+    if visibility is None:
+        return NULL
+
+    if not isinstance(visibility, PyVisibility):
+        raise TypeError(f"visibility must be a PyVisibility but got {type(visibility)}")
+
+    if (<PyVisibility>visibility).n_components != n_components:
+        raise ValueError(f"visibility was computed for {visibility.n_components} components but there are {n_components}")
+
+    return (<PyVisibility>visibility).c_data
+
+
+# Asynchronous tracing
+
+# Executor trace_async() runs traces on, created when first needed
+_trace_executor = None
+
+
+async def trace_async(list components, list rays, int n, bint fill_up=True,
+                      double roulette_threshold=0.0, unsigned long long seed=0):
+    """
+    Traces the rays through the component list for n iterations like 
+    PyTrace() without blocking the event loop. The trace runs on an internal
+    thread pool with the GIL released, so concurrent traces overlap with 
+    each other and with I/O. If the awaiting task is cancelled, tracing 
+    stops before the next ray and the cancellation is raised once it has
+    stopped, leaving the rays which weren't reached unchanged.
+    
+    The rays and components mustn't be modified until the trace is done. 
+    Components can be shared between concurrent traces.
+
+    Parameters
+    ----------
+    components : list
+        The components rays will be traced through. See PyTrace().
+    rays : list
+        The rays to be traced.
+    n : int
+        The number of iterations (i.e. interactions) to be performed. See
+        PyTrace().
+    fill_up : bool, optional
+        Whether to fill each ray's positions up to n points. See PyTrace(). 
+        The default is True.
+    roulette_threshold : double, optional
+        The weight below which rays play Russian roulette. See PyTrace(). The
+        default is 0.0.
+    seed : int, optional
+        Seed for the Russian roulette. See PyTrace(). The default is 0.
+
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component
+        or rays contains something other than a PyRay.
+    ValueError
+        Raised if roulette_threshold is less than zero.
+    asyncio.CancelledError
+        Raised if the task is cancelled.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global _trace_executor
+
+    if roulette_threshold < 0.0:
+        raise ValueError("roulette_threshold cannot be less than zero")
+
+    for r in rays:
+        if not isinstance(r, PyRay):
+            raise TypeError(f"expected rays to contain PyRay but got {type(r)}")
+
+    if _trace_executor is None:
+        _trace_executor = concurrent.futures.ThreadPoolExecutor(
+            thread_name_prefix="trace_async")
+
+    # Copies of the lists keep the rays and components alive while tracing
+    control = PyTrace_Control()
+    job = functools.partial(PyTrace, list(components), list(rays), n, fill_up,
+                            roulette_threshold, seed, control=control)
+    future = asyncio.get_running_loop().run_in_executor(_trace_executor, job)
+
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        control.cancel()
+
+        # The rays can't be used until the C++ trace has returned
+        await asyncio.wait([future])
+        raise
+
+
+# Controlling traces
+
+cdef class PyTrace_Control:
+    """
+    A cancel token which also reports the progress of a trace, see PyTrace().
+    A trace using it stops before its next ray once cancel() is called, 
+    which can be done from another thread, e.g. a GUI or a signal handler. 
+    Mirrors C++ struct Trace_Control.
+    
+    ...
+    
+    Attributes
+    ----------
+    cancelled : bool
+        Whether cancel() has been called.
+    timed_out : bool
+        Whether the last trace stopped because its time budget ran out.
+    done : int
+        The number of rays traced by the last or current trace. These are the
+        first done rays passed to it.
+    
+    Methods
+    -------
+    
+    cancel() : None
+        Stops traces using the token before their next ray.
+    
+    """
+
+    cdef Trace_Control* c_data
+    cdef object _progress  # Callback of the current trace or None
+    cdef object _error     # Exception raised by _progress
+    cdef size_t _total     # Number of rays in the current trace
+
+    def __cinit__(self):
+        """
+        Creates an instance of PyTrace_Control.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.c_data = new Trace_Control()
+
+    def __dealloc__(self):
+        del self.c_data
+
+    def cancel(self):
+        """
+        Stops traces using the token before their next ray. It stays 
+        cancelled, so later traces using it stop immediately.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.c_data.cancelled.store(True)
+
+    @property
+    def cancelled(self):
+        """
+        Whether cancel() has been called.
+
+        Returns
+        -------
+        bool
+            True if cancelled.
+
+        """
+
+        return self.c_data.cancelled.load()
+
+    @property
+    def timed_out(self):
+        """
+        Whether the last trace stopped because its time budget ran out.
+
+        Returns
+        -------
+        bool
+            True if the trace ran out of time.
+
+        """
+
+        return self.c_data.timed_out.load()
+
+    @property
+    def done(self):
+        """
+        The number of rays traced by the last or current trace, the first 
+        done rays passed to it.
+
+        Returns
+        -------
+        int
+            The number of rays.
+
+        """
+
+        return self.c_data.done.load()
+
+    cdef _prepare(self, progress, size_t progress_every, time_budget, 
+                  size_t total):
+        """
+        Sets up the token for a trace of total rays, see PyTrace() for the
+        arguments, raising a TypeError or ValueError if they are invalid.
+        """
+
+        if progress is not None and not callable(progress):
+            raise TypeError(f"expected progress to be callable but got {type(progress)}")
+
+        if progress_every < 1:
+            raise ValueError("progress_every must be at least one")
+
+        if time_budget is not None and time_budget < 0.0:
+            raise ValueError("time_budget cannot be less than zero")
+
+        self._progress = progress
+        self._error = None
+        self._total = total
+
+        self.c_data.progress = NULL
+        if progress is not None:
+            self.c_data.progress = _report_progress
+
+        self.c_data.progress_data = <void*>self
+        self.c_data.progress_every = progress_every
+        self.c_data.set_budget(np.inf if time_budget is None else time_budget)
+
+    cdef _finish(self):
+        """
+        Clears the callback after a trace, raising any exception it raised.
+        """
+
+        error = self._error
+        self._progress, self._error = None, None
+        self.c_data.progress = NULL
+
+        if error is not None:
+            raise error
+
+
+cdef void _report_progress(void* data, size_t done) noexcept with gil:
+    """
+    Calls the progress callback of the PyTrace_Control data, stopping the 
+    trace without cancelling the token if it raises. It isn't called again
+    once it has raised.
+    """
+
+    cdef PyTrace_Control control = <PyTrace_Control>data
+
+    if control._error is not None:
+        return
+
+    try:
+        control._progress(done, control._total)
+    except BaseException as e:
+        control._error = e
+        control.c_data.stopped.store(True)
+
+
+# Rasterizing paths
+
+def PyRasterize(paths, extent, resolution, weights=None, unsigned n_threads=0,
+                out=None):
+    """
+    Accumulates the paths of rays into a density image, which is much faster
+    than plotting each ray for large numbers of rays. Each straight section 
+    of a path adds its weighted length inside each pixel divided by the 
+    pixel's area, so the image approximates the weighted path length per 
+    unit area and doesn't depend on the resolution. Sections outside extent
+    are clipped. The rays are shared between threads and the GIL is released
+    while rasterizing.
+
+    Parameters
+    ----------
+    paths : PyRay_Bundle or list
+        The paths to rasterize, either a bundle returned by PyTrace_Bundle() 
+        or a list of PyRay.
+    extent : tuple
+        The region covered by the image as (x_min, x_max, y_min, y_max), the
+        same convention as matplotlib's imshow().
+    resolution : int or tuple
+        The number of pixels along each axis or (nx, ny).
+    weights : numpy.ndarray, optional
+        The weight of each ray with shape (N,), e.g. the bundle's weights. 
+        The default is None, meaning every ray has weight 1.
+    n_threads : int, optional
+        The number of threads to use, 0 for the number of hardware threads. 
+        Fewer are used if there are too few positions for them to be worth
+        it. The default is 0.
+    out : numpy.ndarray, optional
+        A writeable C contiguous float64 array with shape (ny, nx) the 
+        density is added to, allowing rays to be rasterized in batches. The
+        default is None.
+
+    Raises
+    ------
+    TypeError
+        Raised if paths isn't a PyRay_Bundle or list of PyRay or weights or
+        out has the wrong shape or dtype.
+    ValueError
+        Raised if extent is empty, the resolution is less than one or out is
+        read-only or not C contiguous.
+
+    Returns
+    -------
+    numpy.ndarray
+        The image with shape (ny, nx), row 0 is at y_min so it should be 
+        shown with origin="lower". This is out if given.
+
+    """
+
+    cdef PyRay_Bundle bundle
+    cdef Raster_Grid grid
+    cdef const double[::1] w
+    cdef const double* w_ptr = NULL
+    cdef double[:, ::1] image
+    cdef const int64_t* offsets_ptr
+    cdef size_t N
+
+    if isinstance(paths, PyRay_Bundle):
+        bundle = paths
+    elif isinstance(paths, list):
+        bundle = PyRay_Bundle.from_rays(paths)
+    else:
+        raise TypeError(f"expected paths to be a PyRay_Bundle or list of PyRay but got {type(paths)}")
+
+    grid.x_min, grid.x_max, grid.y_min, grid.y_max = extent
+
+    if not (grid.x_min < grid.x_max and grid.y_min < grid.y_max):
+        raise ValueError(f"extent must have x_min < x_max and y_min < y_max but got {extent}")
+
+    nx, ny = (resolution, resolution) if np.ndim(resolution) == 0 else resolution
+
+    if nx < 1 or ny < 1:
+        raise ValueError(f"resolution must be at least one but got {resolution}")
+
+    grid.nx, grid.ny = nx, ny
+    N = len(bundle)
+
+    if weights is not None:
+        w = _many_values("weights", weights, N) if np.ndim(weights) == 0 else \
+            np.ascontiguousarray(weights, dtype=np.double)
+
+        if w.shape[0] != N or np.ndim(weights) > 1:
+            raise TypeError(f"expected weights to have shape ({N},) but got array with shape {np.shape(weights)}")
+
+        if N > 0:
+            w_ptr = &w[0]
+
+    if out is None:
+        out = np.zeros((ny, nx))
+    else:
+        out = _check_out("out", out, (ny, nx), np.double)
+
+    image = out
+
+    if bundle.c_data != NULL:
+        offsets_ptr = bundle.c_data.offsets.data()
+
+        with nogil:
+            rasterize(bundle.c_data.points.data(), offsets_ptr, N, w_ptr, grid, 
+                      &image[0, 0], n_threads)
+    else:
+        offsets_ptr = bundle.c_data_f.offsets.data()
+
+        with nogil:
+            rasterize(bundle.c_data_f.points.data(), offsets_ptr, N, w_ptr, grid, 
+                      &image[0, 0], n_threads)
+
+    return out
+
+
+# Detector response matrices
+
+class PyResponse_Matrix:
+    """
+    A sparse matrix mapping the elements of a source basis to the bins of a 
+    detector, stored in compressed sparse row (CSR) format with one row per 
+    bin and one column per element. The detector response of any source made
+    of the elements is the product of the matrix and the source's power in 
+    each element, so many sources can be evaluated against the same optics 
+    without tracing them. Use trace() to create one.
+    
+    ...
+    
+    Attributes
+    ----------
+    shape : tuple
+        The number of bins and elements as (n_bins, n_elements).
+    data : numpy.ndarray
+        The non-zero entries row by row with shape (nnz,).
+    indices : numpy.ndarray
+        The column of each entry in data with shape (nnz,).
+    indptr : numpy.ndarray
+        The entries of row i are data[indptr[i]:indptr[i + 1]], with shape 
+        (n_bins + 1,).
+    nnz : int
+        The number of non-zero entries.
+    
+    Methods
+    -------
+    
+    trace(components, source_start, source_end, n_segments, max_angle, 
+          n_angles, detector, n_bins, ...) : PyResponse_Matrix
+        Traces a basis of source elements to the bins of detector.
+    toarray() : numpy.ndarray
+        Returns the matrix as a dense array.
+    
+    """
+
+    def __init__(self, data, indices, indptr, shape):
+        """
+        Creates an instance of PyResponse_Matrix.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The non-zero entries row by row with shape (nnz,).
+        indices : numpy.ndarray
+            The column of each entry in data with shape (nnz,).
+        indptr : numpy.ndarray
+            Where the entries of each row start in data, followed by nnz, with
+            shape (n_bins + 1,).
+        shape : tuple
+            The number of bins and elements as (n_bins, n_elements).
+
+        Raises
+        ------
+        TypeError
+            Raised if an array has the wrong shape.
+        ValueError
+            Raised if indptr doesn't increase from 0 to nnz or an index is 
+            outside the columns.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        n_rows, n_cols = shape
+        self.shape = (int(n_rows), int(n_cols))
+        self.data = np.ascontiguousarray(data, dtype=np.double)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int64)
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+
+        if self.data.ndim != 1 or self.indices.shape != self.data.shape:
+            raise TypeError(f"expected data and indices to have the same 1d shape but got "
+                            f"arrays with shapes {self.data.shape} and {self.indices.shape}")
+
+        if self.indptr.shape != (self.shape[0] + 1,):
+            raise TypeError(f"expected indptr to have shape ({self.shape[0] + 1},) but got "
+                            f"array with shape {self.indptr.shape}")
+
+        if (self.indptr[0] != 0 or self.indptr[-1] != self.data.shape[0] 
+                or np.any(np.diff(self.indptr) < 0)):
+            raise ValueError("indptr must increase from 0 to the number of entries")
+
+        if np.any(self.indices < 0) or np.any(self.indices >= self.shape[1]):
+            raise ValueError(f"indices must be between 0 and {self.shape[1] - 1}")
+
+    @property
+    def nnz(self):
+        """
+        The number of non-zero entries.
+
+        Returns
+        -------
+        int
+            The number of entries in data.
+
+        """
+
+        return self.data.shape[0]
+
+    def __matmul__(self, sources):
+        """
+        Returns the detector response of sources.
+
+        Parameters
+        ----------
+        sources : numpy.ndarray
+            The power emitted in each element with shape (n_elements,), or 
+            (n_elements, k) for k sources at once.
+
+        Raises
+        ------
+        TypeError
+            Raised if sources has the wrong shape.
+
+        Returns
+        -------
+        numpy.ndarray
+            The power reaching each bin with shape (n_bins,) or (n_bins, k).
+
+        """
+
+        x = np.asarray(sources, dtype=np.double)
+
+        if x.ndim not in (1, 2) or x.shape[0] != self.shape[1]:
+            raise TypeError(f"expected sources to have shape ({self.shape[1]},) or "
+                            f"({self.shape[1]}, k) but got array with shape {x.shape}")
+
+        ans = np.zeros((self.shape[0],) + x.shape[1:])
+        filled = np.diff(self.indptr) > 0
+
+        # reduceat() sums each row's products, empty rows have no segment
+        if filled.any():
+            products = x[self.indices] * self.data.reshape((-1,) + (1,) * (x.ndim - 1))
+            ans[filled] = np.add.reduceat(products, self.indptr[:-1][filled], axis=0)
+
+        return ans
+
+    def toarray(self):
+        """
+        Returns the matrix as a dense array.
+
+        Returns
+        -------
+        numpy.ndarray
+            The matrix with shape (n_bins, n_elements).
+
+        """
+
+        ans = np.zeros(self.shape)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        ans[rows, self.indices] = self.data
+
+        return ans
+
+    @staticmethod
+    def trace(list components, source_start, source_end, int n_segments, 
+              double max_angle, int n_angles, detector, int n_bins, 
+              int rays_per_element=100, int n=100, double alpha=0.0, 
+              unsigned long long seed=0, bint sequential=False):
+        """
+        Traces a basis of source elements through components once and 
+        accumulates the weight of the rays each element delivers to each bin
+        of detector. The source is the line segment from source_start to 
+        source_end, split into n_segments equal segments, emitting to its 
+        left at angles from the normal in [-max_angle, max_angle], split 
+        into n_angles equal bins. Element i * n_angles + j is segment i 
+        emitting in angle bin j with unit power, sampled by rays_per_element
+        rays at uniformly random positions in the segment and angles in the
+        bin, each carrying 1 / rays_per_element. The detector is split into 
+        n_bins equal bins from its start to its end and a ray the detector 
+        stops counts towards the bin it stops in with its final weight.
+
+        The entries are Monte Carlo estimates whose relative noise is about 
+        one over the square root of the number of rays behind them. A source
+        with a different angular distribution within each bin, e.g. 
+        Lambertian, is described by weighting each element by its power.
+
+        Parameters
+        ----------
+        components : list
+            The components rays will be traced through, which must include 
+            detector. See PyTrace().
+        source_start : numpy.ndarray
+            The start point of the source with shape (2,).
+        source_end : numpy.ndarray
+            The end point of the source with shape (2,).
+        n_segments : int
+            The number of segments along the source.
+        max_angle : double
+            The largest angle in radians from the source's normal rays are
+            emitted at, in (0, pi / 2].
+        n_angles : int
+            The number of angle bins.
+        detector : PyScreen_Plane
+            The screen whose bins are the rows of the matrix.
+        n_bins : int
+            The number of bins along the detector.
+        rays_per_element : int, optional
+            The number of rays traced for each element. The default is 100.
+        n : int, optional
+            The number of interactions rays are traced for. See PyTrace(). 
+            The default is 100.
+        alpha : double, optional
+            The absorption coefficient of the medium the rays start in. The
+            default is 0.0.
+        seed : int, optional
+            Seed for sampling the rays. The default is 0.
+        sequential : bool, optional
+            Whether components are an ordered surface list. See PyTrace(). 
+            The default is False.
+
+        Raises
+        ------
+        TypeError
+            Raised if source_start or source_end has the wrong shape, 
+            detector isn't a PyScreen_Plane or an element in components is 
+            not recognised as a component.
+        ValueError
+            Raised if detector isn't in components, max_angle isn't in 
+            (0, pi / 2] or n_segments, n_angles, n_bins or rays_per_element 
+            is less than one.
+
+        Returns
+        -------
+        PyResponse_Matrix
+            The matrix with shape (n_bins, n_segments * n_angles).
+
+        """
+
+        start_np = np.array(source_start, dtype=np.double)
+        end_np = np.array(source_end, dtype=np.double)
+
+        if start_np.shape != (2,):
+            raise wrong_np_shape_except("source_start", start_np)
+
+        if end_np.shape != (2,):
+            raise wrong_np_shape_except("source_end", end_np)
+
+        if not isinstance(detector, PyScreen_Plane):
+            raise TypeError(f"expected detector to be a PyScreen_Plane but got {type(detector)}")
+
+        if not any(c is detector for c in components):
+            raise ValueError("detector must be one of components")
+
+        if not 0.0 < max_angle <= np.pi / 2:
+            raise ValueError("max_angle must be in (0, pi / 2]")
+
+        if min(n_segments, n_angles, n_bins, rays_per_element) < 1:
+            raise ValueError("n_segments, n_angles, n_bins and rays_per_element must be at least one")
+
+        along = end_np - start_np
+        normal = np.array([-along[1], along[0]]) / np.hypot(along[0], along[1])
+        det_start = np.array(detector.start, dtype=np.double)
+        det_along = np.array(detector.end, dtype=np.double) - det_start
+
+        cdef vector[Component*] vec_comp = _make_comp_vector(components)
+        cdef Trace_Order order = _trace_order(sequential, False)
+        cdef const Component* det_ptr = (<_PyComponent>detector).c_component_ptr.get()
+        cdef vector[const Component*] stopped_by
+        cdef Py_ssize_t n_elements = n_segments * n_angles
+        cdef Py_ssize_t n_rays = n_elements * rays_per_element
+        cdef Py_ssize_t first, N, i
+        cdef const double[:, ::1] s_view
+        cdef const double[:, ::1] d_view
+        cdef double[:, ::1] end_view
+        cdef double[::1] weight_view
+        cdef np.npy_bool[::1] hit_view
+
+        rng = np.random.default_rng(seed)
+        keys, sums = [], []
+
+        # Rays are traced in batches keeping only where they end, so the memory 
+        # used doesn't grow with the number of rays or interactions
+        for first in range(0, n_rays, _RESPONSE_BATCH_RAYS):
+            element = np.arange(first, min(first + _RESPONSE_BATCH_RAYS, n_rays)) // rays_per_element
+            N = element.shape[0]
+
+            s = (element // n_angles + rng.random(N)) / n_segments
+            a = ((element % n_angles + rng.random(N)) / n_angles * 2 - 1) * max_angle
+            c, sn = np.cos(a), np.sin(a)
+            s_view = start_np + s[:, None] * along
+            d_view = np.column_stack([c * normal[0] - sn * normal[1], sn * normal[0] + c * normal[1]])
+
+            ends = np.empty((N, 2))
+            weights = np.empty(N)
+            hits = np.empty(N, dtype=np.bool_)
+            end_view, weight_view, hit_view = ends, weights, hits
+            stopped_by.resize(N)
+
+            with nogil:
+                trace_ends(vec_comp, <const arr*>&s_view[0, 0], <const arr*>&d_view[0, 0], N, 
+                           alpha, n, <arr*>&end_view[0, 0], &weight_view[0], stopped_by.data(), 
+                           NULL, order)
+
+                # Only rays the detector stopped count, not those stopped elsewhere
+                for i in range(N):
+                    hit_view[i] = stopped_by[i] == det_ptr
+
+            t = (ends[hits] - det_start) @ det_along / (det_along @ det_along)
+            bins = np.clip((t * n_bins).astype(np.int64), 0, n_bins - 1)
+            keys.append(bins * n_elements + element[hits])
+            sums.append(weights[hits] / rays_per_element)
+
+        # An element's rays can be split between batches
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        data = np.bincount(inverse, weights=np.concatenate(sums), minlength=keys.shape[0])
+        indptr = np.searchsorted(keys // n_elements, np.arange(n_bins + 1))
+
+        return PyResponse_Matrix(data, keys % n_elements, indptr, (n_bins, n_elements))
+
+
+# The most rays PyResponse_Matrix.trace() traces at once
+_RESPONSE_BATCH_RAYS = 1 << 16
+
+
+# Trace result cache
+
+# Changing how results are traced or stored invalidates existing cache entries
+_CACHE_VERSION = 1
+
+# Names of the properties describing each type of leaf component
+_component_props = {}
+
+
+class PyTrace_Cache:
+    """
+    A content-addressed cache of trace results stored in a directory. Results
+    are keyed by a fingerprint of the components (their types, geometry and
+    order) and of the ray inputs, so tracing the same system with the same
+    rays again loads the result instead. The least recently used entries are
+    removed when the cache grows beyond max_bytes. The directory can be 
+    shared between processes.
+    
+    ...
+    
+    Attributes
+    ----------
+    directory : str
+        The directory the entries are stored in.
+    max_bytes : int
+        The maximum total size of the entries on disk.
+    hits : int
+        The number of lookups which found an entry.
+    misses : int
+        The number of lookups which didn't find an entry.
+    hit_rate : double
+        The fraction of lookups which found an entry.
+    bytes_saved : int
+        The total size of the results loaded instead of being traced.
+    size : int
+        The total size of the entries on disk.
+    
+    Methods
+    -------
+    
+    load(key) : dict or None
+        Returns the arrays stored under key.
+    store(key, arrays) : None
+        Stores the arrays under key.
+    clear() : None
+        Removes every entry.
+    
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Creates an instance of PyTrace_Cache, creating the directory if it 
+        doesn't exist.
+
+        Parameters
+        ----------
+        directory : str or os.PathLike
+            The directory to store the entries in.
+        max_bytes : int, optional
+            The maximum total size of the entries on disk. The default is 
+            1 << 30, i.e. 1 GiB.
+
+        Raises
+        ------
+        ValueError
+            Raised if max_bytes is less than zero.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if max_bytes < 0:
+            raise ValueError("max_bytes cannot be less than zero")
+
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._last_used = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __len__(self):
+        """Returns the number of entries"""
+
+        return len(self._entries())
+
+    @property
+    def hit_rate(self):
+        """
+        The fraction of lookups which found an entry, 0 if there have been no
+        lookups.
+
+        Returns
+        -------
+        double
+            The hit rate.
+
+        """
+
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    @property
+    def size(self):
+        """
+        The total size of the entries on disk.
+
+        Returns
+        -------
+        int
+            The size in bytes.
+
+        """
+
+        return sum(e[2] for e in self._entries())
+
+    def load(self, key):
+        """
+        Returns the arrays stored under key, marking the entry as most 
+        recently used.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by the fingerprint of the trace.
+
+        Returns
+        -------
+        dict or None
+            The arrays by name, None if there is no entry for key.
+
+        """
+
+        path = self._path(key)
+
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                arrays = {name: f[name] for name in f.files}
+        except (OSError, ValueError):
+            # Missing, possibly evicted by another process, or corrupt
+            self.misses += 1
+            return None
+
+        self._touch(path)
+        self.hits += 1
+        self.bytes_saved += sum(a.nbytes for a in arrays.values())
+
+        return arrays
+
+    def store(self, key, arrays):
+        """
+        Stores the arrays under key then evicts the least recently used 
+        entries until the size is at most max_bytes. An entry larger than 
+        max_bytes is not kept.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by the fingerprint of the trace.
+        arrays : dict
+            The numpy arrays to store by name.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        # Writes to a temporary file first so other processes never see a
+        # partial entry
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        self._touch(self._path(key))
+        self._evict()
+
+    def clear(self):
+        """
+        Removes every entry. The statistics are kept.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        for path, _, _ in self._entries():
+            _remove_entry(path)
+
+    def _path(self, key):
+        """Returns the path of the entry for key"""
+
+        return os.path.join(self.directory, key + ".npz")
+
+    def _touch(self, path):
+        """Marks the entry at path as the most recently used"""
+
+        # Strictly increasing so entries used in quick succession are ordered
+        self._last_used = max(time.time_ns(), self._last_used + 1)
+
+        try:
+            os.utime(path, ns=(self._last_used, self._last_used))
+        except OSError:
+            pass
+
+    def _entries(self):
+        """Returns (path, last used, size) of each entry"""
+
+        ans = []
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+
+                ans.append((entry.path, st.st_mtime_ns, st.st_size))
+
+        return ans
+
+    def _evict(self):
+        """Removes the least recently used entries until within max_bytes"""
+
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(e[2] for e in entries)
+
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+
+            _remove_entry(path)
+            total -= size
+
+
+def _remove_entry(path):
+    """Removes the cache entry at path if another process hasn't already"""
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _trace_key(str kind, list components, *inputs):
+    """
+    Returns the cache key of tracing with the given kind, e.g. "bundle", 
+    through components with the inputs, which are numbers, strings or arrays.
+    """
+
+    h = hashlib.sha256()
+    _hash_value(h, (_CACHE_VERSION, kind))
+
+    _hash_components(h, components)
+
+    for value in inputs:
+        _hash_value(h, value)
+
+    return h.hexdigest()
+
+
+def _hash_components(h, list components):
+    """
+    Updates the hash h with the types and properties of the components in 
+    order, descending into complex components.
+    """
+
+    _hash_value(h, len(components))
+
+    for c in components:
+        if isinstance(c, PyComponent_Array):
+            _hash_value(h, ("array", c.component_type.__name__))
+
+            for a in (<PyComponent_Array>c)._args:
+                _hash_value(h, a)
+
+        elif isinstance(c, PyComplex_Component):
+            _hash_value(h, ("complex", c.angle))
+            _hash_value(h, c.offset)
+            _hash_components(h, (<PyComplex_Component>c)._components)
+
+        elif isinstance(c, _PyComponent):
+            _hash_value(h, type(c).__name__)
+
+            for name in _leaf_props(type(c)):
+                _hash_value(h, getattr(c, name))
+
+        elif isinstance(c, PyCC_Wrap):
+            _hash_value(h, ("complex", c.angle))
+            _hash_value(h, c.offset)
+            _hash_components(h, c._components)
+
+        else:
+            raise TypeError(f"type {type(c)} is not a recognised type for a component")
+
+
+def _leaf_props(cls):
+    """Returns the names of the properties of the leaf component class cls"""
+
+    if cls not in _component_props:
+        _component_props[cls] = [name for k in cls.__mro__ 
+                                 for name, attr in vars(k).items() 
+                                 if isinstance(attr, types.GetSetDescriptorType)
+                                 and not name.startswith("__")]
+
+    return _component_props[cls]
+
+
+def _hash_value(h, value):
+    """
+    Updates the hash h with value. Numbers, strings and tuples of them are 
+    hashed by their repr, anything else as a numpy array by its dtype, shape
+    and contents.
+    """
+
+    if isinstance(value, tuple):
+        h.update(f"({len(value)}".encode())
+
+        for v in value:
+            _hash_value(h, v)
+
+    elif value is None or isinstance(value, (int, float, str)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+    else:
+        a = np.ascontiguousarray(value)
+        h.update(f"{a.dtype.str}{a.shape};".encode())
+        h.update(a.tobytes())
+
+
+# Distributed tracing
+
+# Prefix giving the length of the JSON header of a message between the 
+# coordinator and a worker, followed by the contents of its arrays
+_message_prefix = struct.Struct("!Q")
+
+
+def PyTrace_Distributed(list components, starts, directions, int n, 
+                        list workers, double alpha=0.0, 
+                        double roulette_threshold=0.0, 
+                        unsigned long long seed=0, Py_ssize_t shard_size=1024,
+                        histogram_extent=None, histogram_bins=100, 
+                        timeout=None):
+    """
+    Traces rays given by their start points and directions through the 
+    component list by splitting them into shards of shard_size rays traced
+    by worker processes, which can be on other hosts. The scene is sent to
+    each worker once, then shards are handed to whichever worker is free. 
+    The status of each ray and optionally a histogram of where the rays 
+    stopped are gathered here.
+    
+    Shard i is traced with a seed derived from seed and i only, and the 
+    histograms are summed in shard order, so the results don't depend on 
+    the number of workers or the order shards finish in. Shards of a worker
+    whose connection fails are traced by the others.
+    
+    Workers are started with serve_trace_worker(), or PyLocal_Workers for 
+    processes on this machine. The connection isn't authenticated or
+    encrypted so should only be used on a trusted network.
+
+    Parameters
+    ----------
+    components : list
+        The components rays will be traced through. See PyTrace().
+    starts : numpy.ndarray
+        The initial positions of the rays with shape (N, 2).
+    directions : numpy.ndarray
+        The initial normalised directions of the rays with shape (N, 2).
+    n : int
+        The number of iterations (i.e. interactions) to be performed. See 
+        PyTrace().
+    workers : list
+        The (host, port) addresses of the workers.
+    alpha : double, optional
+        The absorption coefficient of the medium the rays start in. The 
+        default is 0.0.
+    roulette_threshold : double, optional
+        The weight below which rays play Russian roulette. See PyTrace(). The
+        default is 0.0.
+    seed : int, optional
+        Seed the seeds of the shards are derived from. The default is 0.
+    shard_size : int, optional
+        The number of rays in each shard. A worker needs memory for the 
+        n + 1 positions of each ray in a shard. The default is 1024.
+    histogram_extent : tuple, optional
+        If given, the region (x_min, x_max, y_min, y_max) of the histogram 
+        of the final positions of stopped rays, e.g. on a screen, weighted 
+        by their final weight. The default is None, meaning no histogram.
+    histogram_bins : int or tuple, optional
+        The number of bins along each axis or (nx, ny). The default is 100.
+    timeout : double, optional
+        Seconds to wait when connecting to or receiving from a worker 
+        before treating it as failed. The default is None, meaning no limit.
+
+    Raises
+    ------
+    TypeError
+        Raised if an element in components is not recognised as a component
+        or starts or directions has the wrong shape.
+    ValueError
+        Raised if an argument is out of range or workers is empty.
+    RuntimeError
+        Raised if a worker fails to trace a shard.
+    ConnectionError
+        Raised if every worker failed before all shards were traced.
+
+    Returns
+    -------
+    status : numpy.ndarray
+        The status of each ray with shape (N,), one of TRACE_ACTIVE, 
+        TRACE_ESCAPED or TRACE_STOPPED.
+    histogram : numpy.ndarray or None
+        The weighted histogram with shape (ny, nx), row 0 at y_min, or None
+        if histogram_extent isn't given.
+
+    """
+
+    s = np.asarray(_many_points("starts", starts))
+    d = np.asarray(_many_points("directions", directions, s.shape[0]))
+    cdef Py_ssize_t N = s.shape[0]
+
+    if n < 0:
+        raise ValueError("n cannot be less than zero")
+
+    if alpha < 0.0:
+        raise ValueError("alpha cannot be less than zero")
+
+    if roulette_threshold < 0.0:
+        raise ValueError("roulette_threshold cannot be less than zero")
+
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least one")
+
+    if not workers:
+        raise ValueError("workers cannot be empty")
+
+    histogram = None
+
+    if histogram_extent is not None:
+        x_min, x_max, y_min, y_max = histogram_extent
+
+        if not (x_min < x_max and y_min < y_max):
+            raise ValueError(f"histogram_extent must have x_min < x_max and y_min < y_max but got {histogram_extent}")
+
+        nx, ny = ((histogram_bins, histogram_bins) if np.ndim(histogram_bins) == 0 
+                  else histogram_bins)
+
+        if nx < 1 or ny < 1:
+            raise ValueError(f"histogram_bins must be at least one but got {histogram_bins}")
+
+        histogram = np.zeros((ny, nx))
+        histogram_extent = [float(x_min), float(x_max), float(y_min), float(y_max)]
+        histogram_bins = [int(nx), int(ny)]
+
+    settings = {"n": n, "alpha": alpha, "roulette_threshold": roulette_threshold,
+                "histogram_extent": histogram_extent, 
+                "histogram_bins": histogram_bins}
+    scene = _scene_spec(components)
+
+    status = np.empty(N, dtype=np.int32)
+    n_shards = (N + shard_size - 1) // shard_size
+    pending = queue.Queue()
+
+    for i in range(n_shards):
+        pending.put(i)
+
+    lock = threading.Lock()
+    progress = {"done": 0, "next_histogram": 0, "error": None}
+    histograms = {}  # Histograms of finished shards waiting to be summed
+    failures = []
+
+    def run(address):
+        """Traces shards on the worker at address until none are left"""
+
+        try:
+            with socket.create_connection(tuple(address), timeout=timeout) as sock:
+                _send_message(sock, {"kind": "scene", "scene": scene, 
+                                     "settings": settings})
+
+                while True:
+                    with lock:
+                        if progress["done"] == n_shards or progress["error"] is not None:
+                            return
+
+                    # Shards of failed workers can be put back so keep waiting
+                    try:
+                        i = pending.get(timeout=0.05)
+                    except queue.Empty:
+                        continue
+
+                    a, b = i * shard_size, min((i + 1) * shard_size, N)
+
+                    try:
+                        _send_message(sock, {"kind": "shard", "shard": i, 
+                                             "seed": _shard_seed(seed, i)},
+                                      [s[a:b], d[a:b]])
+                        header, arrays = _recv_message(sock)
+                    except BaseException:
+                        pending.put(i)
+                        raise
+
+                    if header["kind"] == "error":
+                        with lock:
+                            progress["error"] = f"worker {address} failed: {header['message']}"
+                        return
+
+                    status[a:b] = arrays[0]
+
+                    with lock:
+                        if histogram is not None:
+                            histograms[i] = arrays[1]
+
+                            while progress["next_histogram"] in histograms:
+                                histogram[...] += histograms.pop(progress["next_histogram"])
+                                progress["next_histogram"] += 1
+
+                        progress["done"] += 1
+
+        except OSError as e:
+            with lock:
+                failures.append(f"{address}: {e}")
+
+    threads = [threading.Thread(target=run, args=(address,), daemon=True) 
+               for address in workers]
+
+    for th in threads:
+        th.start()
+
+    for th in threads:
+        th.join()
+
+    if progress["error"] is not None:
+        raise RuntimeError(progress["error"])
+
+    if progress["done"] != n_shards:
+        raise ConnectionError(f"{n_shards - progress['done']} shards weren't traced as every worker failed: " 
+                              + "; ".join(failures))
+
+    return status, histogram
+
+
+def serve_trace_worker(host="127.0.0.1", int port=0, ready=None):
+    """
+    Runs a worker for PyTrace_Distributed() which listens for coordinators 
+    and traces the shards they send, each connection in its own thread. It
+    runs until the process is stopped. Connections aren't authenticated so
+    it should only listen on a trusted network.
+
+    Parameters
+    ----------
+    host : str, optional
+        The address to listen on, e.g. "0.0.0.0" for every interface. The 
+        default is "127.0.0.1".
+    port : int, optional
+        The port to listen on, 0 to pick a free port. The default is 0.
+    ready : callable, optional
+        Called with the (host, port) address the worker listens on once it 
+        accepts connections. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    with socket.create_server((host, port)) as server:
+        if ready is not None:
+            ready(server.getsockname()[:2])
+
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=_serve_connection, args=(conn,), 
+                             daemon=True).start()
+
+
+def _serve_connection(conn):
+    """Traces the shards sent over the connection from a coordinator"""
+
+    components, settings = None, None
+
+    with conn:
+        while True:
+            try:
+                header, arrays = _recv_message(conn)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                if header["kind"] == "scene":
+                    components = _build_scene(header["scene"])
+                    settings = header["settings"]
+                    continue
+
+                results = _trace_shard(components, settings, header["seed"], *arrays)
+            except Exception as e:
+                _send_message(conn, {"kind": "error", "message": repr(e)})
+                return
+
+            _send_message(conn, {"kind": "result", "shard": header["shard"]}, results)
+
+
+def _trace_shard(list components, dict settings, seed, starts, directions):
+    """
+    Returns the status of each ray in a shard and the histogram of where 
+    they stopped if the settings ask for one.
+    """
+
+    cdef Py_ssize_t N = starts.shape[0]
+    cdef int n = settings["n"]
+
+    positions = np.empty((N, n + 1, 2))
+    weights = np.empty(N)
+    status = np.empty(N, dtype=np.int32)
+
+    PyTrace_Bundle(components, starts, directions, n, settings["alpha"], 
+                   settings["roulette_threshold"], seed, out_positions=positions,
+                   out_status=status, out_weights=weights)
+
+    if settings["histogram_extent"] is None:
+        return [status]
+
+    x_min, x_max, y_min, y_max = settings["histogram_extent"]
+    nx, ny = settings["histogram_bins"]
+    stopped = status == TRACE_STOPPED
+    ends = positions[stopped, -1]
+
+    histogram, _, _ = np.histogram2d(ends[:, 1], ends[:, 0], bins=(ny, nx), 
+                                     range=[[y_min, y_max], [x_min, x_max]],
+                                     weights=weights[stopped])
+
+    return [status, histogram]
+
+
+def _shard_seed(unsigned long long seed, Py_ssize_t shard):
+    """Returns the Russian roulette seed of a shard"""
+
+    return int(np.random.SeedSequence([seed, shard]).generate_state(1, np.uint64)[0])
+
+
+class PyLocal_Workers:
+    """
+    Worker processes for PyTrace_Distributed() on this machine, e.g. to 
+    stand in for remote hosts or to use several processes. Can be used as a
+    context manager which stops the workers on exit.
+    
+    ...
+    
+    Attributes
+    ----------
+    addresses : list
+        The (host, port) address of each worker.
+    
+    Methods
+    -------
+    
+    close() : None
+        Stops the workers.
+    
+    """
+
+    def __init__(self, int n_workers, double start_timeout=60.0):
+        """
+        Starts n_workers worker processes listening on localhost.
+
+        Parameters
+        ----------
+        n_workers : int
+            The number of workers.
+        start_timeout : double, optional
+            Seconds to wait for each worker to start. The default is 60.0.
+
+        Raises
+        ------
+        ValueError
+            Raised if n_workers is less than one.
+        RuntimeError
+            Raised if a worker doesn't start in time.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least one")
+
+        self._processes = []
+        self.addresses = []
+
+        try:
+            for i in range(n_workers):
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_local_worker_main, 
+                                                  args=(sender,), daemon=True)
+                process.start()
+                self._processes.append(process)
+
+                if not receiver.poll(start_timeout):
+                    raise RuntimeError("worker process didn't start in time")
+
+                self.addresses.append(tuple(receiver.recv()))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """
+        Stops the workers.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        for process in self._processes:
+            process.terminate()
+
+        for process in self._processes:
+            process.join()
+
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _local_worker_main(sender):
+    """Entry point of the processes of PyLocal_Workers"""
+
+    serve_trace_worker("127.0.0.1", 0, ready=sender.send)
+
+
+def _scene_spec(list components):
+    """
+    Returns a description of the components made of lists, dicts, strings 
+    and numbers which can be sent as JSON and rebuilt by _build_scene(). 
+    Complex components are rebuilt as PyComplex_Component.
+    """
+
+    ans = []
+
+    for c in components:
+        if isinstance(c, PyComponent_Array):
+            ans.append({"type": "array", 
+                        "component_type": c.component_type.__name__,
+                        "args": [_spec_value(a) for a in (<PyComponent_Array>c)._args]})
+
+        elif isinstance(c, PyComplex_Component):
+            ans.append({"type": "complex", "lens": (<PyComplex_Component>c).lens,
+                        "offset": _spec_value(c.offset), "angle": c.angle,
+                        "components": _scene_spec((<PyComplex_Component>c)._components)})
+
+        elif isinstance(c, _PyComponent):
+            ans.append({"type": type(c).__name__, 
+                        "props": {name: _spec_value(getattr(c, name)) 
+                                  for name in _leaf_props(type(c))}})
+
+        elif isinstance(c, PyCC_Wrap):
+            ans.append({"type": "complex", "lens": c.PyCC.lens, 
+                        "offset": _spec_value(c.offset), "angle": c.angle,
+                        "components": _scene_spec(c._components)})
+
+        else:
+            raise TypeError(f"type {type(c)} is not a recognised type for a component")
+
+    return ans
+
+
+def _spec_value(value):
+    """Returns a property value with arrays replaced by {"array": list}"""
+
+    if np.ndim(value) == 0:
+        return value.item() if isinstance(value, np.generic) else value
+
+    return {"array": np.asarray(value, dtype=np.double).tolist()}
+
+
+def _build_scene(list spec):
+    """Returns the components described by spec, see _scene_spec()"""
+
+    ans = []
+
+    for c in spec:
+        if c["type"] == "complex":
+            cc = PyComplex_Component(_build_scene(c["components"]), lens=c.get("lens", False))
+
+            if "offset" in c:
+                cc.offset = _value_from_spec(c["offset"])
+                cc.angle = c["angle"]
+
+            ans.append(cc)
+
+        elif c["type"] == "array":
+            cls = _spec_component_class(c["component_type"])
+            ans.append(cls.many(*[_value_from_spec(a) for a in c["args"]]))
+
+        else:
+            cls = _spec_component_class(c["type"])
+            ans.append(cls(**{name: _value_from_spec(value) 
+                              for name, value in c["props"].items()}))
+
+    return ans
+
+
+def _value_from_spec(value):
+    """Reverses _spec_value()"""
+
+    if isinstance(value, dict):
+        return np.array(value["array"], dtype=np.double)
+
+    return value
+
+
+def _spec_component_class(str name):
+    """
+    Returns the leaf component class called name, raising a ValueError if 
+    there isn't one so only components can be created from a scene.
+    """
+
+    cls = globals().get(name)
+
+    if (name.startswith("_") or not isinstance(cls, type) 
+            or not issubclass(cls, _PyComponent) or cls is PyComplex_Component):
+        raise ValueError(f"{name} is not a leaf component type")
+
+    return cls
+
+
+def _send_message(sock, dict header, list arrays=[]):
+    """
+    Sends header as JSON followed by the contents of the numpy arrays, whose
+    dtypes and shapes are added to the header.
+    """
+
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    header = dict(header, arrays=[[a.dtype.str, a.shape] for a in arrays])
+    data = json.dumps(header).encode()
+
+    sock.sendall(_message_prefix.pack(len(data)) + data)
+
+    for a in arrays:
+        if a.nbytes > 0:
+            sock.sendall(a)
+
+
+def _recv_message(sock):
+    """
+    Receives a message sent by _send_message(), raising a ConnectionError
+    if the connection closes.
+
+    Returns
+    -------
+    header : dict
+        The header.
+    arrays : list
+        The numpy arrays.
+
+    """
+
+    cdef Py_ssize_t length = _message_prefix.unpack(_recv_exact(sock, _message_prefix.size))[0]
+    header = json.loads(_recv_exact(sock, length))
+    arrays = []
+
+    for dtype_str, shape in header["arrays"]:
+        dtype = np.dtype(dtype_str)
+        count = int(np.prod(shape, dtype=np.int64))
+        data = _recv_exact(sock, count * dtype.itemsize)
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count).reshape(shape))
+
+    return header, arrays
+
+
+def _recv_exact(sock, Py_ssize_t n_bytes):
+    """Receives exactly n_bytes, raising a ConnectionError if it closes"""
+
+    buf = bytearray(n_bytes)
+    view = memoryview(buf)
+    cdef Py_ssize_t received = 0
+
+    while received < n_bytes:
+        n = sock.recv_into(view[received:])
+
+        if n == 0:
+            raise ConnectionError("connection closed")
+
+        received += n
+
+    return buf
+
+
+def tangent_param_names(component):
+    """
+    Returns the names of the parameters of a component that PyTrace() can
+    differentiate with respect to.
+
+    Parameters
+    ----------
+    component : Any
+        A leaf component, e.g. PyRefract_Sph.
+
+    Returns
+    -------
+    list of str
+        The parameter names.
+
+    """
+
+    return list(component._tangent_slots_dict())
+
+
+cdef int _load_tangent_params(list params, Tangent_Cols& cols) except -1:
+    """
+    Sets the tangent columns of the C++ components in cols for each 
+    parameter in params.
+
+    Parameters
+    ----------
+    params : list
+        A list of (component, name) tuples.
+    cols : Tangent_Cols&
+        The columns of the trace, which must be empty.
+
+    Raises
+    ------
+    TypeError
+        Raised if a component cannot have parameters differentiated.
+    ValueError
+        Raised if a parameter name is not recognised or is repeated.
+
+    Returns
+    -------
+    int
+        The number of columns.
+
+    """
+
+    cdef int col = 0
+    cdef vector[int]* inds
+
+    for c, name in params:
+        if not isinstance(c, _PyComponent) or isinstance(c, PyComplex_Component):
+            raise TypeError(f"type {type(c)} does not have parameters that can be differentiated")
+
+        slots = c._tangent_slots_dict().get(name)
+
+        if slots is None:
+            raise ValueError(f"{name} is not a parameter of {type(c).__name__}")
+
+        inds = &cols[(<_PyComponent>c).c_component_ptr.get()]
+
+        for s in slots:
+            if <size_t>s >= inds.size():
+                inds.resize(s + 1, -1)
+
+            if dereference(inds)[s] >= 0:
+                raise ValueError(f"parameter {name} of {type(c).__name__} was given more than once")
+
+            dereference(inds)[s] = col
+            col += 1
+
+    return col
+
+
+# Optimiser
+
+def optimize(list components, list params, merit, list rays, int n, 
+             list configs=None, list bounds=None, int max_iter=100, 
+             double tol=1e-10, bool fill_up=True):
+    """
+    Optimises parameters of the components by minimising the sum of squares
+    of the residuals returned by merit using the Levenberg-Marquardt method.
+    The Jacobian of the residuals is propagated alongside the rays, see 
+    PyTrace(), so each iteration requires a single trace per configuration.
+    The C++ component list is created once and only the parameters that 
+    change are updated between traces.
+
+    Parameters
+    ----------
+    components : list
+        The components rays will be traced through.
+    params : list
+        A list of (component, name) tuples giving the parameters to optimise.
+        The component can be a leaf component, in which case name must be one
+        of tangent_param_names(component), or inherit from PyCC_Wrap, in which
+        case name can be any property with a setter, e.g. R1 of a PyLens. 
+        Points, e.g. a plane's start, are optimised in both coordinates.
+    merit : str or callable
+        The merit function, either 'spot' for spot_merit() or a callable 
+        taking the list of traced rays and returning the residuals as a 
+        numpy.ndarray with shape (M,) and their derivatives with respect to 
+        the end points of the rays, see the merit functions below.
+    rays : list
+        The rays to trace. Each trace starts from the rays' initial positions
+        and directions, also if they have already been traced.
+    n : int
+        The number of iterations for each trace, see PyTrace().
+    configs : list, optional
+        A list of callables taking no arguments. The system is traced once 
+        per callable after calling it, e.g. to set refractive indices for 
+        different wavelengths, and the residuals for each are concatenated.
+        The default is None, meaning the system is traced as is.
+    bounds : list, optional
+        A list of (lower, upper) tuples, one per parameter, giving the range
+        each parameter is kept within. Either bound, or the whole tuple, can 
+        be None for no bound. The 
+        default is None, meaning no parameters are bounded.
+    max_iter : int, optional
+        The maximum number of iterations. The default is 100.
+    tol : double, optional
+        The iteration stops when the relative decrease of the cost or the
+        relative step size is less than tol. The default is 1e-10.
+    fill_up : bool, optional
+        Passed to each trace, see PyTrace(). The default is True.
+
+    Raises
+    ------
+    TypeError
+        Raised if a component cannot be optimised.
+    ValueError
+        Raised if a parameter is not recognised or bounds has the wrong 
+        length.
+
+    Returns
+    -------
+    dict
+        The result with keys 'x', the optimised parameter values 
+        concatenated in the order of params, 'cost', half the sum of squares
+        of the residuals, 'n_iter', the number of iterations performed, and 
+        'converged'. The components are left with the optimised parameters 
+        and the rays traced through them.
+
+    """
+
+    if isinstance(merit, str):
+        if merit != 'spot':
+            raise ValueError(f"merit {merit} is not recognised")
+
+        merit = spot_merit
+
+    if configs is None:
+        configs = [None]
+
+    cdef vector[Component*] vec_comp = _make_comp_vector(components)
+
+    cdef list opt_params = [_Opt_Param(c, name) for c, name in params]
+    cdef list sizes = [p.get().size for p in opt_params]
+
+    x = np.concatenate([p.get() for p in opt_params])
+    lower = np.full(x.size, -np.inf)
+    upper = np.full(x.size, np.inf)
+
+    if bounds is not None:
+        if len(bounds) != len(opt_params):
+            raise ValueError(f"bounds has length {len(bounds)} but there are {len(opt_params)} parameters")
+
+        i = 0
+        for b, size in zip(bounds, sizes):
+            lo, hi = (None, None) if b is None else b
+            lower[i:i + size] = -np.inf if lo is None else lo
+            upper[i:i + size] = np.inf if hi is None else hi
+            i += size
+
+        x = np.clip(x, lower, upper)
+
+    # Rays restart from their initial position and direction
+    cdef list starts = [_ray_start(r) for r in rays]
+
+    # Leaf parameters that the tangents are propagated for
+    cdef list leaf_params = []
+    seen = set()
+
+    for p in opt_params:
+        for leaf, name in p.leaf_params:
+            if (id(leaf), name) not in seen:
+                seen.add((id(leaf), name))
+                leaf_params.append((leaf, name))
+
+    _set_opt_params(opt_params, sizes, x)
+    res, jac = _opt_residuals(vec_comp, rays, starts, n, fill_up, 
+                              opt_params, sizes, leaf_params, merit, configs)
+    cost = 0.5 * res.dot(res)
+
+    if not np.isfinite(cost):
+        raise ValueError("merit function is not finite for the initial parameters")
+
+    lam = 1e-3
+    cdef bint converged = False
+    cdef bint rays_at_x = True
+    cdef int n_iter = 0
+
+    while n_iter < max_iter and not converged:
+        n_iter += 1
+
+        A = jac.T.dot(jac)
+        g = jac.T.dot(res)
+
+        # Damping proportional to the diagonal makes the step scale invariant,
+        # the small constant handles parameters that have no effect
+        A_damp = A + lam * np.diag(np.diag(A) + 1e-12 * (np.trace(A) + 1e-300))
+
+        try:
+            step = np.linalg.solve(A_damp, -g)
+        except np.linalg.LinAlgError:
+            step = np.linalg.lstsq(A_damp, -g, rcond=None)[0]
+
+        x_new = np.clip(x + step, lower, upper)
+
+        try:
+            _set_opt_params(opt_params, sizes, x_new)
+            res_new, jac_new = _opt_residuals(vec_comp, rays, starts, n, 
+                                              fill_up, opt_params, sizes, 
+                                              leaf_params, merit, configs)
+            cost_new = 0.5 * res_new.dot(res_new)
+        except ValueError:
+            # Step left the region where the parameters are valid
+            cost_new = np.inf
+
+        if cost_new < cost:
+            converged = (cost - cost_new <= tol * cost or 
+                         np.linalg.norm(x_new - x) <= tol * (np.linalg.norm(x) + tol))
+
+            x, res, jac, cost = x_new, res_new, jac_new, cost_new
+            lam = max(lam / 10, 1e-12)
+            rays_at_x = True
+        else:
+            _set_opt_params(opt_params, sizes, x)
+            lam *= 10
+            rays_at_x = False
+
+            if lam > 1e12:
+                # Step is too small to decrease the cost so at a minimum
+                converged = True
+
+    if not rays_at_x:
+        _opt_residuals(vec_comp, rays, starts, n, fill_up, opt_params, sizes,
+                       leaf_params, merit, configs)
+
+    return {'x': x, 'cost': float(cost), 'n_iter': n_iter, 'converged': converged}
+
+
+def spot_merit(list rays):
+    """
+    Merit function for the RMS spot size. The residuals are the coordinates 
+    of the end point of each ray relative to the mean end point. The rays are
+    usually traced onto a PyScreen_Plane.
+
+    Parameters
+    ----------
+    rays : list
+        The traced rays, which must have had their derivatives computed.
+
+    Returns
+    -------
+    tuple
+        The residuals as a numpy.ndarray with shape (2 * len(rays),) and 
+        their derivatives with shape (2 * len(rays), P).
+
+    """
+
+    pos = np.array([r.pos[-1] for r in rays])
+    d_pos = np.stack([r.d_pos for r in rays])
+
+    res = pos - pos.mean(axis=0)
+    jac = d_pos - d_pos.mean(axis=0)
+
+    return res.ravel(), jac.reshape(res.size, -1)
+
+
+def focus_merit(double target, double axis_y=0.0):
+    """
+    Creates a merit function for the focal position. The residuals are the
+    x coordinate where each ray's final path crosses the line y = axis_y 
+    minus target. Rays travelling parallel to the line have NaN residuals so
+    optimize() rejects parameters for which any ray misses the lens.
+
+    Parameters
+    ----------
+    target : double
+        The x coordinate of the desired focus.
+    axis_y : double, optional
+        The y coordinate of the optical axis. The default is 0.0.
+
+    Returns
+    -------
+    callable
+        The merit function to pass to optimize().
+
+    """
+
+    def merit(list rays):
+        pos = np.array([r.pos[-1] for r in rays])
+        v = np.array([r.v for r in rays])
+        d_pos = np.stack([r.d_pos for r in rays])
+        d_v = np.stack([r.d_v for r in rays])
+
+        # Distance along ray to the axis
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v_y = np.where(np.abs(v[:, 1]) > 1e-12, v[:, 1], np.nan)
+            t = (axis_y - pos[:, 1]) / v_y
+            dt = -(d_pos[:, 1] + t[:, None] * d_v[:, 1]) / v_y[:, None]
+
+        res = pos[:, 0] + t * v[:, 0] - target
+        jac = d_pos[:, 0] + dt * v[:, 0, None] + t[:, None] * d_v[:, 0]
+
+        return res, jac
+
+    return merit
+
+
+class _Opt_Param:
+    """A parameter varied by optimize()"""
+
+    def __init__(self, comp, name):
+        """
+        Creates an instance of _Opt_Param.
+
+        Parameters
+        ----------
+        comp : Any
+            A leaf component or a component inheriting from PyCC_Wrap.
+        name : str
+            The name of the parameter.
+
+        Raises
+        ------
+        TypeError
+            Raised if comp cannot be optimised.
+        ValueError
+            Raised if name is not a parameter of comp.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.comp = comp
+        self.name = name
+        self.is_leaf = not isinstance(comp, PyCC_Wrap)
+
+        if not self.is_leaf:
+            if not isinstance(getattr(type(comp), name, None), property):
+                raise ValueError(f"{name} is not a parameter of {type(comp).__name__}")
+
+            # Derivatives of the leaf parameters are found numerically
+            self.leaf_params = [(leaf, nm) for leaf in _leaf_components(comp)
+                                for nm in leaf._tangent_slots_dict()]
+
+        elif isinstance(comp, _PyComponent) and not isinstance(comp, PyComplex_Component):
+            if name not in comp._tangent_slots_dict():
+                raise ValueError(f"{name} is not a parameter of {type(comp).__name__}")
+
+            self.leaf_params = [(comp, name)]
+
+        else:
+            raise TypeError(f"type {type(comp)} does not have parameters that can be optimised")
+
+    def get(self):
+        """Returns the value as a numpy.ndarray with shape (size,)"""
+
+        return np.atleast_1d(np.array(getattr(self.comp, self.name), dtype=np.double))
+
+    def set(self, value):
+        """Sets the value from a numpy.ndarray with shape (size,)"""
+
+        if value.size == 1:
+            setattr(self.comp, self.name, float(value[0]))
+        else:
+            setattr(self.comp, self.name, np.array(value, dtype=np.double))
+
+
+def _ray_start(PyRay ray not None):
+    """Returns the initial position and direction of a ray"""
+
+    cdef Ray* ray_ptr = ray.c_data
+    cdef arr v = ray_ptr.v if ray_ptr.pos.size() == 1 else ray_ptr.v_start
+
+    return (np.array([ray_ptr.pos[0][0], ray_ptr.pos[0][1]]),
+            np.array([v[0], v[1]]))
+
+
+def _leaf_components(comp):
+    """Yields the leaf components of a component inheriting from PyCC_Wrap"""
+
+    for c in comp._components:
+        if isinstance(c, PyCC_Wrap):
+            yield from _leaf_components(c)
+        else:
+            yield c
+
+
+def _set_opt_params(list opt_params, list sizes, x):
+    """Sets the parameters in opt_params which differ from the values in x"""
+
+    i = 0
+    for p, size in zip(opt_params, sizes):
+        value = x[i:i + size]
+
+        if not np.array_equal(p.get(), value):
+            p.set(value)
+
+        i += size
+
+
+def _leaf_values(list leaf_params):
+    """Returns the values of the leaf parameters concatenated"""
+
+    return np.concatenate([np.atleast_1d(np.array(getattr(c, name), dtype=np.double))
+                           for c, name in leaf_params])
+
+
+def _chain_matrix(list opt_params, list sizes, list leaf_params):
+    """
+    Returns the derivatives of the leaf parameter values with respect to the
+    optimised parameters. Parameters of complex components are differentiated
+    numerically, which is cheap as it requires no tracing.
+    """
+
+    leaf_sizes = [len(c._tangent_slots_dict()[name]) for c, name in leaf_params]
+    leaf_start = np.concatenate([[0], np.cumsum(leaf_sizes)]).astype(int)
+    leaf_ind = {(id(c), name): k for k, (c, name) in enumerate(leaf_params)}
+
+    T = np.zeros((leaf_start[-1], sum(sizes)))
+
+    col = 0
+    for p, size in zip(opt_params, sizes):
+        if p.is_leaf:
+            k = leaf_ind[(id(p.comp), p.name)]
+            T[leaf_start[k]:leaf_start[k + 1], col:col + size] += np.eye(size)
+
+        else:
+            rows = np.concatenate([np.arange(leaf_start[leaf_ind[(id(c), name)]],
+                                             leaf_start[leaf_ind[(id(c), name)] + 1])
+                                   for c, name in p.leaf_params])
+            x0 = p.get()
+
+            for j in range(size):
+                h = 1e-6 * max(1.0, abs(x0[j]))
+                vals = []
+                steps = []
+
+                for sign in (1.0, -1.0):
+                    x_h = x0.copy()
+                    x_h[j] += sign * h
+
+                    try:
+                        p.set(x_h)
+                    except ValueError:
+                        # One sided difference at the edge of the valid region
+                        x_h = x0
+                    
+                    vals.append(_leaf_values(p.leaf_params))
+                    steps.append(x_h[j])
+
+                p.set(x0)
+                T[rows, col + j] = (vals[0] - vals[1]) / (steps[0] - steps[1])
+
+        col += size
+
+    return T
+
+
+cdef _opt_residuals(vector[Component*]& vec_comp, list rays, list starts, 
+                    int n, bool fill_up, list opt_params, list sizes, 
+                    list leaf_params, merit, list configs):
+    """
+    Traces the rays for each configuration and returns the residuals and 
+    their Jacobian with respect to the optimised parameters.
+    """
+
+    cdef list res = []
+    cdef list jac = []
+
+    for config in configs:
+        if config is not None:
+            config()
+
+        for r, (p0, v0) in zip(rays, starts):
+            r.reset(v0, p0)
+
+        _trace_rays(vec_comp, rays, n, fill_up, NULL, leaf_params)
+
+        r_c, j_c = merit(rays)
+        res.append(np.asarray(r_c, dtype=np.double))
+        jac.append(np.asarray(j_c, dtype=np.double))
+
+    T = _chain_matrix(opt_params, sizes, leaf_params)
+
+    return np.concatenate(res), np.concatenate(jac).dot(T)
+
+
+# Paraxial optics
+
+class PyParaxial:
+    """
+    First order properties of a lens system found from its ray transfer 
+    (ABCD) matrix, e.g. focal lengths, principal planes and magnification.
+    The optical axis is the line y = axis which rays travel along in the 
+    positive x direction. The matrix acts on the height of a ray above the 
+    axis and its reduced angle, the refractive index times its angle to the
+    axis, from the first surface's vertex to the last's. No rays are traced
+    so the properties are available at once, validate() compares them with
+    a small exact trace.
+    """
+
+    def __init__(self, list components, double axis=0.0):
+        """
+        Creates an instance of PyParaxial.
+
+        Parameters
+        ----------
+        components : list
+            The surfaces in the order rays meet them, as for PyTrace() with
+            sequential=True. Elements can be a PyLens, whose parameters give
+            both of its surfaces, a PyRefract_Sph or PyRefract_Asph centred on
+            the axis or a PyRefract_Plane perpendicular to it. A sphere can 
+            be given twice in a row to use both of its vertices.
+        axis : double, optional
+            The height of the optical axis. The default is 0.0.
+
+        Raises
+        ------
+        TypeError
+            Raised if a component isn't one of the types above.
+        ValueError
+            Raised if there are no components, a surface doesn't cross the 
+            axis perpendicularly after the previous one or the refractive 
+            indices of consecutive surfaces don't match.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not components:
+            raise ValueError("components cannot be empty")
+
+        self._components = list(components)
+        self._axis = axis
+
+        # Each surface is (vertex x, curvature, n before, n after, aperture)
+        surfaces = []
+        x_prev = -np.inf
+
+        for i, c in enumerate(components):
+            repeated = i > 0 and c is components[i - 1]
+
+            for s in _paraxial_surfaces(c, axis, x_prev, repeated):
+                if surfaces and not np.isclose(s[2], surfaces[-1][3], rtol=1e-9, atol=0.0):
+                    raise ValueError(f"refractive index {s[2]} before {type(c).__name__} "
+                                     f"doesn't match {surfaces[-1][3]} after the previous surface")
+
+                surfaces.append(s)
+                x_prev = s[0]
+
+        self._vertices = np.array([s[0] for s in surfaces])
+        self._curvatures = np.array([s[1] for s in surfaces])
+        self._n_object = surfaces[0][2]
+        self._n_image = surfaces[-1][3]
+        self._aperture = min(s[4] for s in surfaces)
+
+        # Alternate translations and refractions from the first vertex
+        A, B, C, D = 1.0, 0.0, 0.0, 1.0
+        x, n = surfaces[0][0], self._n_object
+
+        for s in surfaces:
+            t = (s[0] - x) / n
+            A, B = A + t * C, B + t * D
+
+            P = (s[3] - s[2]) * s[1]
+            C, D = C - P * A, D - P * B
+
+            x, n = s[0], s[3]
+
+        self._matrix = (A, B, C, D)
+
+    @property
+    def matrix(self):
+        """
+        The ray transfer matrix from the first vertex to the last. 
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (2, 2), [[A, B], [C, D]].
+
+        """
+
+        return np.array(self._matrix).reshape(2, 2)
+
+    @property
+    def vertices(self):
+        """
+        The x coordinates of the vertices of the surfaces in order.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N,).
+
+        """
+
+        return self._vertices.copy()
+
+    @property
+    def n_object(self):
+        """
+        The refractive index before the first surface.
+
+        Returns
+        -------
+        double
+            The refractive index of object space.
+
+        """
+
+        return self._n_object
+
+    @property
+    def n_image(self):
+        """
+        The refractive index after the last surface.
+
+        Returns
+        -------
+        double
+            The refractive index of image space.
+
+        """
+
+        return self._n_image
+
+    @property
+    def power(self):
+        """
+        The optical power of the system, zero if it is afocal.
+
+        Returns
+        -------
+        double
+            The power, -C.
+
+        """
+
+        return -self._matrix[2]
+
+    @property
+    def efl(self):
+        """
+        The effective focal length in image space, the distance from the rear
+        principal plane to the rear focal point.
+
+        Returns
+        -------
+        double
+            The focal length, numpy.inf if the system is afocal.
+
+        """
+
+        P = self.power
+        return np.inf if P == 0.0 else self._n_image / P
+
+    @property
+    def front_focal_length(self):
+        """
+        The focal length in object space, the distance from the front focal
+        point to the front principal plane.
+
+        Returns
+        -------
+        double
+            The focal length, numpy.inf if the system is afocal.
+
+        """
+
+        P = self.power
+        return np.inf if P == 0.0 else self._n_object / P
+
+    @property
+    def focal_points(self):
+        """
+        The x coordinates of the front and rear focal points.
+
+        Returns
+        -------
+        tuple
+            (front, rear), both numpy.nan if the system is afocal.
+
+        """
+
+        A, B, C, D = self._matrix
+
+        if C == 0.0:
+            return (np.nan, np.nan)
+
+        return (self._vertices[0] + self._n_object * D / C, 
+                self._vertices[-1] - self._n_image * A / C)
+
+    @property
+    def principal_planes(self):
+        """
+        The x coordinates of the front and rear principal planes, which are 
+        imaged onto each other with unit magnification.
+
+        Returns
+        -------
+        tuple
+            (front, rear), both numpy.nan if the system is afocal.
+
+        """
+
+        A, B, C, D = self._matrix
+
+        if C == 0.0:
+            return (np.nan, np.nan)
+
+        return (self._vertices[0] + self._n_object * (D - 1.0) / C,
+                self._vertices[-1] + self._n_image * (1.0 - A) / C)
+
+    @property
+    def bfl(self):
+        """
+        The back focal length, the distance from the last vertex to the rear
+        focal point.
+
+        Returns
+        -------
+        double
+            The back focal length, numpy.inf if the system is afocal.
+
+        """
+
+        A, B, C, D = self._matrix
+        return np.inf if C == 0.0 else -self._n_image * A / C
+
+    @property
+    def ffl(self):
+        """
+        The front focal length, the distance from the front focal point to 
+        the first vertex.
+
+        Returns
+        -------
+        double
+            The front focal length, numpy.inf if the system is afocal.
+
+        """
+
+        A, B, C, D = self._matrix
+        return np.inf if C == 0.0 else -self._n_object * D / C
+
+    def image(self, double x_object):
+        """
+        Finds the image of a point on the axis.
+
+        Parameters
+        ----------
+        x_object : double
+            The x coordinate of the object.
+
+        Returns
+        -------
+        tuple
+            (x_image, magnification). The image is virtual if it lies before
+            the last vertex. Both are numpy.inf if the image is at infinity,
+            e.g. for an object at the front focal point.
+
+        """
+
+        A, B, C, D = self._matrix
+        s = (self._vertices[0] - x_object) / self._n_object
+
+        # Matrix from the object to the last vertex
+        B_o, D_o = A * s + B, C * s + D
+
+        if D_o == 0.0:
+            return (np.inf, np.inf)
+
+        s_i = -B_o / D_o
+        return (self._vertices[-1] + self._n_image * s_i, A + s_i * C)
+
+    def validate(self, height=None, int n_rays=3, double rtol=1e-3):
+        """
+        Compares the matrix with an exact trace of rays parallel to the axis
+        close to it, traced sequentially through the components. For each 
+        ray at height h the height y and slope u it leaves the last vertex 
+        with are compared with A h and C h / n_image.
+
+        Parameters
+        ----------
+        height : double, optional
+            The height above the axis of the outermost ray. The default is 
+            None, meaning 1e-3 times the smallest aperture of the surfaces.
+        n_rays : int, optional
+            The number of rays, evenly spaced in height. The default is 3.
+        rtol : double, optional
+            The tolerance of the comparison. Heights are compared relative to
+            h and slopes relative to h times the larger of |C| / n_image and
+            the inverse of the aperture. The default is 1e-3.
+
+        Raises
+        ------
+        ValueError
+            Raised if height or rtol isn't positive, n_rays is less than one
+            or the traced rays don't agree with the matrix.
+
+        Returns
+        -------
+        numpy.ndarray
+            The traced values with shape (n_rays, 2), the exact counterparts 
+            of A and C from y / h and u n_image / h.
+
+        """
+
+        if height is None:
+            height = 1e-3 * self._aperture
+
+        if not height > 0.0:
+            raise ValueError(f"height must be greater than zero but got {height}")
+
+        if n_rays < 1:
+            raise ValueError(f"n_rays must be at least one but got {n_rays}")
+
+        if not rtol > 0.0:
+            raise ValueError(f"rtol must be greater than zero but got {rtol}")
+
+        A, B, C, D = self._matrix
+        x_first, x_last = self._vertices[0], self._vertices[-1]
+        heights = height * np.arange(1, n_rays + 1) / n_rays
+
+        rays = [PyRay(np.array([x_first - self._aperture, self._axis + h]), 
+                      np.array([1.0, 0.0])) for h in heights]
+        PyTrace(self._components, rays, 2 * len(self._vertices) + 1, fill_up=False,
+                sequential=True)
+
+        ans = np.empty((n_rays, 2))
+        slope_scale = max(abs(C) / self._n_image, 1.0 / self._aperture)
+
+        for i, (r, h) in enumerate(zip(rays, heights)):
+            p, v = r.pos[-1], r.v
+
+            if v[0] <= 0.0:
+                raise ValueError(f"ray at height {h} didn't leave the last surface forwards")
+
+            u = v[1] / v[0]
+            y = p[1] - self._axis + (x_last - p[0]) * u
+            ans[i] = y / h, u * self._n_image / h
+
+            if abs(y - A * h) > rtol * h or abs(u - C * h / self._n_image) > rtol * h * slope_scale:
+                raise ValueError(f"ray at height {h} left with height {y} and slope {u} "
+                                 f"but the matrix gives {A * h} and {C * h / self._n_image}")
+
+        return ans
+
+
+def _paraxial_surfaces(comp, double axis, double x_prev, bint repeated=False):
+    """
+    Returns the surfaces of comp the optical axis y = axis crosses after 
+    x_prev as a list of (vertex x, curvature, n before, n after, aperture) 
+    tuples, where curvature is positive if the centre of curvature lies after
+    the vertex. If repeated, comp is also the previous component so its 
+    surfaces must lie strictly after x_prev. See PyParaxial.
+    """
+
+    name = type(comp).__name__
+    tol = 1e-9
+
+    if isinstance(comp, PyLens):
+        if comp.angle % (2 * np.pi) != 0.0:
+            raise ValueError(f"{name} is rotated off the axis")
+
+        c_x, c_y = comp.lens_centre
+
+        if abs(c_y - axis) > tol * max(1.0, abs(axis)):
+            raise ValueError(f"{name} isn't centred on the axis y = {axis}")
+
+        sags = [np.sign(R) * (abs(R) - np.sqrt(R**2 - comp.R_lens**2)) for R in (comp.R1, comp.R2)]
+        x_1, x_2 = c_x - comp.d / 2 - sags[0], c_x + comp.d / 2 + sags[1]
+
+        if x_1 < x_prev - tol * max(1.0, abs(x_prev)):
+            raise ValueError(f"{name} lies before the previous surface")
+
+        if x_2 < x_1:
+            raise ValueError(f"{name}'s surfaces cross on the axis")
+
+        return [(x_1, 1.0 / comp.R1, comp.n_out, comp.n_in, comp.R_lens),
+                (x_2, -1.0 / comp.R2, comp.n_in, comp.n_out, comp.R_lens)]
+
+    if isinstance(comp, PyRefract_Sph):
+        c_x, c_y = comp.centre
+        R = comp.R
+
+        if abs(c_y - axis) > tol * max(R, abs(axis)):
+            raise ValueError(f"{name} isn't centred on the axis y = {axis}")
+
+        # Vertices at angles pi and 0, the first one the arc covers after x_prev is used
+        for angle, x, curv, n_1, n_2 in [(np.pi, c_x - R, 1.0 / R, comp.n_out, comp.n_in),
+                                         (0.0, c_x + R, -1.0 / R, comp.n_in, comp.n_out)]:
+            past = (angle - comp.start) % (2 * np.pi)
+            span = comp.end - comp.start
+
+            margin = tol * max(R, abs(x_prev))
+
+            if past <= span and (x > x_prev + margin if repeated else x >= x_prev - margin):
+                # Aperture is set by the nearer end of the arc unless it's a full circle
+                half = np.pi / 2 if span >= 2 * np.pi else min(past, span - past, np.pi / 2)
+                return [(x, curv, n_1, n_2, R * np.sin(half))]
+
+        raise ValueError(f"{name} doesn't cross the axis y = {axis} after the previous surface")
+
+    if isinstance(comp, PyRefract_Plane):
+        (s_x, s_y), (e_x, e_y) = comp.start, comp.end
+        length = np.hypot(e_x - s_x, e_y - s_y)
+
+        if abs(e_x - s_x) > tol * length or not min(s_y, e_y) <= axis <= max(s_y, e_y):
+            raise ValueError(f"{name} doesn't cross the axis y = {axis} perpendicularly")
+
+        if s_x < x_prev - tol * max(length, abs(x_prev)):
+            raise ValueError(f"{name} lies before the previous surface")
+
+        # n1 lies to the left of the direction from start to end
+        n_1, n_2 = (comp.n1, comp.n2) if e_y > s_y else (comp.n2, comp.n1)
+        return [(s_x, 0.0, n_1, n_2, min(abs(s_y - axis), abs(e_y - axis)))]
+
+    if isinstance(comp, PyRefract_Asph):
+        v_x, v_y = comp.vertex
+        direction = np.cos(comp.axis)
+
+        if abs(v_y - axis) > tol * max(comp.h, abs(axis)) or abs(abs(direction) - 1.0) > tol:
+            raise ValueError(f"{name}'s optical axis isn't the axis y = {axis}")
+
+        if v_x < x_prev - tol * max(comp.h, abs(x_prev)):
+            raise ValueError(f"{name} lies before the previous surface")
+
+        # n1 lies on the side the surface's optical axis points to
+        n_1, n_2 = (comp.n2, comp.n1) if direction > 0.0 else (comp.n1, comp.n2)
+        return [(v_x, np.sign(direction) / comp.R, n_1, n_2, comp.h)]
+
+    raise TypeError(f"{name} can't be used in paraxial analysis, expected a PyLens, "
+                    "PyRefract_Sph, PyRefract_Asph or PyRefract_Plane")
+
+
+# class PyRay
+
+# Passed to PyRay.__new__() by PyRay_Pool, which supplies the C++ ray
+_POOLED_RAY = object()
+
+
+@cython.freelist(1024)
+cdef class PyRay:
+    """
+    A class to describe a ray. Freed PyRay objects are kept on a freelist so
+    creating many rays doesn't allocate a Python object for each. Use 
+    PyRay_Pool to reuse the C++ rays as well.
+    
+    ...
+    
+    Attributes
+    ----------
+    pos : numpy.ndarray
+        Returns a numpy array of the positions of the ray.
+    v : numpy.ndarray
+        The current 2d direction of the ray.
+    weight : double
+        The weight, i.e. energy, carried by the ray.
+    alpha : double
+        The absorption coefficient of the medium the ray is currently in.
+        
+    Methods
+    -------
+    
+    plot()
+        Returns a numpy array with shape (N, 2) of the positions of the ray.
+        Intended for plotting.
+    
+    """
+    
+    cdef Ray* c_data
+    cdef PyRay_Pool _pool  # Pool owning c_data, None if the PyRay owns it
+    
+    def __cinit__(self, *args, **kwargs):
+        """
+        Creates the C++ ray, which __init__() sets up. Rays handed out by a
+        PyRay_Pool are created with _POOLED_RAY and receive the pool's ray 
+        instead.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        cdef arr start, v
+
+        if len(args) == 1 and args[0] is _POOLED_RAY:
+            self.c_data = NULL
+        else:
+            start[0], start[1] = 0.0, 0.0
+            v[0], v[1] = 1.0, 0.0
+            self.c_data = new Ray(start, v, 0.0)
+
+    def __init__(self, double[:] init not None, double[:] v not None, 
+                 double alpha=0.0):
+        """
+        Creates an instance of PyRay
+
+        Parameters
+        ----------
+        init : numpy.ndarray
+            Initial 2d position of the ray. Should be a numpy array with shape
+            (2,).
+        v : numpy.ndarray
+            Initial 2d direction of the ray. Should be a normalised numpy array
+            with shape (2,).
+        alpha : double, optional
+            The absorption coefficient of the medium the ray starts in. The
+            default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if tuple(init.shape) != _arr_shape:
+            raise wrong_np_shape_except("init", init)
+
+        if tuple(v.shape) != _arr_shape:
+            raise wrong_np_shape_except("v", v)
+
+        if alpha < 0.0:
+            raise ValueError("alpha cannot be less than zero")
+
+        # A pool's ray is left to the pool, the ray from __cinit__() is reused
+        if self._pool is not None:
+            self._pool = None
+            self.c_data = new Ray(make_arr_from_numpy(init), make_arr_from_numpy(v), alpha)
+        else:
+            self.c_data[0] = Ray(make_arr_from_numpy(init), make_arr_from_numpy(v), alpha)
+        
+    def __dealloc__(self):
+        """
+        Deallocates the memory held by PyRay, unless it belongs to a 
+        PyRay_Pool
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if self._pool is None:
+            del self.c_data
+        
+    @property
+    def pos(self):
+        """
+        Returns the positions of each interaction of the ray.
+
+        Returns
+        -------
+        ans : numpy.ndarray
+            A numpy array with shape (N, 2).
+
+        """
+        
+        n = dereference(self.c_data).pos.size()
+        
+        ans = np.empty((n, 2), dtype=np.double)
+        
+        for i in range(n):
+            ans[i, 0] = dereference(self.c_data).pos[i][0]
+            ans[i, 1] = dereference(self.c_data).pos[i][1]
+        
+        return ans
+    
+    @property
+    def v(self):
+        """
+        Gets a view of the current 2d direction of the ray. It returns a numpy
+        view so can be used to modify PyRay.v elementwise.
+
+        Returns
+        -------
+        v_np : numpy.ndarray
+            A numpy view with shape (2,).
+
+        """
+        
+        return make_np_view_from_arr(self.c_data.v, self)
+    @v.setter
+    def v(self, double[:] v not None):
+        if tuple(v.shape) != _arr_shape:
+            raise wrong_np_shape_except("v", v)
+        
+        dereference(self.c_data).v = make_arr_from_numpy(v)
+
+    @property
+    def v_start(self):
+        """
+        The 2d direction the ray left its first position, pos[0], in. Set when
+        the ray is created or reset and when it is traced from pos[0].
+
+        Returns
+        -------
+        v_start : numpy.ndarray
+            An array with shape (2,).
+
+        """
+
+        return np.array(make_np_view_from_arr(self.c_data.v_start, self))
+
+    @property
+    def d_pos(self):
+        """
+        The derivatives of the ray's last position with respect to the 
+        parameters given to the last call of PyTrace().
+
+        Returns
+        -------
+        ans : numpy.ndarray
+            A numpy array with shape (2, P) where P is the number of parameter
+            columns.
+
+        """
+
+        return self._tangents_to_numpy(dereference(self.c_data).dr)
+
+    @property
+    def d_v(self):
+        """
+        The derivatives of the ray's current direction with respect to the 
+        parameters given to the last call of PyTrace().
+
+        Returns
+        -------
+        ans : numpy.ndarray
+            A numpy array with shape (2, P) where P is the number of parameter
+            columns.
+
+        """
+
+        return self._tangents_to_numpy(dereference(self.c_data).dv)
+
+    cdef _tangents_to_numpy(self, vector[arr]& tangents):
+        """Copies the tangents into a numpy array with shape (2, P)"""
+
+        n = tangents.size()
+
+        ans = np.empty((2, n), dtype=np.double)
+
+        for i in range(n):
+            ans[0, i] = tangents[i][0]
+            ans[1, i] = tangents[i][1]
+
+        return ans
+
+    @property
+    def weight(self):
+        """
+        The weight, i.e. energy, carried by the ray. It starts at 1.0 and is 
+        reduced by absorption, mirror reflectivities and Russian roulette.
+
+        Returns
+        -------
+        double
+            The weight of the ray.
+
+        """
+
+        return dereference(self.c_data).weight
+    @weight.setter
+    def weight(self, double weight):
+        if weight < 0.0:
+            raise ValueError("weight cannot be less than zero")
+
+        dereference(self.c_data).weight = weight
+
+    @property
+    def alpha(self):
+        """
+        The absorption coefficient of the medium the ray is currently 
+        travelling through. The weight of the ray decays as exp(-alpha*L)
+        after travelling a distance L. Setting alpha also sets the absorption
+        coefficient restored by reset().
+
+        Returns
+        -------
+        double
+            The current absorption coefficient.
+
+        """
+
+        return dereference(self.c_data).alpha
+    @alpha.setter
+    def alpha(self, double alpha):
+        if alpha < 0.0:
+            raise ValueError("alpha cannot be less than zero")
+
+        dereference(self.c_data).alpha = alpha
+        dereference(self.c_data).alpha_start = alpha
+        
+    def plot(self):
+        """
+        Produces a numpy arrays that can be used to plot the path of the ray.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N, 2).
+
+        """
+        
+        return self.pos
+
+    def reset(self, double[:] new_v not None, double[:] new_p = None):
+        """
+        Resets the PyRay instance to the start position and is direction to
+        that of new_v. new_v is assumed to be normalised. The weight is reset
+        to 1.0 and alpha to the absorption coefficient the ray was created 
+        with.
+
+        Parameters
+        ----------
+        new_v : numpy.ndarray
+            The new 2d direction of the ray. Should be a normalised numpy array
+            with shape (2,).
+        new_p : numpy.ndarray, optional
+            Initial 2d position of the ray. If not specified, the original 
+            initial position will be used. Should be a numpy array with shape
+            (2,).
+
+        Returns
+        -------
+        None. 
+        
+        """
+
+        if tuple(new_v.shape) != _arr_shape:
+            raise wrong_np_shape_except("new_v", new_v)
+
+        cdef arr n_v = make_arr_from_numpy(new_v)
+        cdef arr n_p
+
+        if new_p is None:
+            dereference(self.c_data).reset(n_v)
+        else:
+            if tuple(new_p.shape) != _arr_shape:
+                raise wrong_np_shape_except("new_p", new_p)
+
+            n_p = make_arr_from_numpy(new_p)
+
+            dereference(self.c_data).reset(n_v, n_p)
+
+
+# class PyRay_Pool
+
+cdef class PyRay_Pool:
+    """
+    An arena of rays which are reused between traces. Mirrors C++ class 
+    Ray_Pool. Rays handed out by acquire() are reset in place rather than 
+    allocated, and keep the storage for their positions, so a steady state 
+    loop of acquire(), PyTrace() and release_all() doesn't allocate memory 
+    for its rays.
+    
+    ...
+    
+    Attributes
+    ----------
+    capacity : int
+        The number of rays held by the pool.
+    
+    Methods
+    -------
+    
+    acquire(n, starts=None, directions=None, alpha=0.0) : list
+        Returns n reset rays from the pool.
+    release_all()
+        Releases every ray so it can be handed out again.
+    
+    """
+
+    cdef Ray_Pool* c_data
+
+    def __cinit__(self, Py_ssize_t points_per_ray=0):
+        """
+        Creates an instance of PyRay_Pool.
+
+        Parameters
+        ----------
+        points_per_ray : int, optional
+            The number of positions storage is reserved for when a new ray is
+            created. The default is 0.
+
+        Raises
+        ------
+        ValueError
+            Raised if points_per_ray is negative.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if points_per_ray < 0:
+            raise ValueError("points_per_ray cannot be less than zero")
+
+        self.c_data = new Ray_Pool(points_per_ray)
+
+    def __dealloc__(self):
+        """
+        Deallocates the memory held by PyRay_Pool
+
+        Returns
+        -------
+        None.
+
+        """
+
+        del self.c_data
+
+    def __len__(self):
+        """Returns the number of rays handed out since the last release_all()"""
+
+        return self.c_data.size()
+
+    @property
+    def capacity(self):
+        """
+        The number of rays held by the pool, in use or not.
+
+        Returns
+        -------
+        int
+            The capacity of the pool.
+
+        """
+
+        return self.c_data.capacity()
+
+    def acquire(self, Py_ssize_t n, starts=None, directions=None, 
+                double alpha=0.0):
+        """
+        Returns n rays, reusing released rays before creating new ones. Each
+        ray is reset as by PyRay.reset(), with its weight set to 1.0 and no
+        positions but its start.
+
+        Parameters
+        ----------
+        n : int
+            The number of rays.
+        starts : numpy.ndarray, optional
+            The initial positions with shape (n, 2). The default is None, 
+            meaning every ray starts at the origin.
+        directions : numpy.ndarray, optional
+            The initial normalised directions with shape (n, 2). The default
+            is None, meaning every ray travels along +x.
+        alpha : double, optional
+            The absorption coefficient of the medium the rays start in. The
+            default is 0.0.
+
+        Raises
+        ------
+        TypeError
+            Raised if starts or directions has the wrong shape.
+        ValueError
+            Raised if n or alpha is less than zero.
+
+        Returns
+        -------
+        list
+            A list of n PyRay. They stay valid while the pool exists but are
+            handed out again by acquire() after release_all().
+
+        """
+
+        cdef const double[:, ::1] s
+        cdef const double[:, ::1] d
+        cdef arr init, v
+        cdef Py_ssize_t i
+        cdef PyRay ray
+
+        if n < 0:
+            raise ValueError("n cannot be less than zero")
+
+        if alpha < 0.0:
+            raise ValueError("alpha cannot be less than zero")
+
+        if starts is None:
+            starts = np.zeros((n, 2))
+
+        if directions is None:
+            directions = np.broadcast_to(np.array([1.0, 0.0]), (n, 2))
+
+        s = _many_points("starts", starts, n)
+        d = _many_points("directions", directions, n)
+
+        ans = []
+
+        for i in range(n):
+            ray = PyRay.__new__(PyRay, _POOLED_RAY)
+            ray.c_data = self.c_data.acquire(_arr_from_row(s, i), 
+                                             _arr_from_row(d, i), alpha)
+            ray._pool = self
+            ans.append(ray)
+
+        return ans
+
+    def release_all(self):
+        """
+        Releases every ray handed out by acquire(). The PyRay objects remain 
+        safe to use but share their storage with the rays handed out by later
+        calls to acquire(), so should be discarded.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.c_data.release_all()
+
+
+# class PyRay_Bundle
+
+cdef class PyRay_Bundle:
+    """
+    The paths of many rays stored in one array, as returned by 
+    PyTrace_Bundle(). The path of ray i is points[offsets[i]:offsets[i + 1]].
+    The arrays are read-only views onto the C++ storage. Positions, 
+    directions and weights are stored as float64 or float32, rays are always
+    traced in double precision.
+    
+    ...
+    
+    Attributes
+    ----------
+    dtype : numpy.dtype
+        The dtype the positions, directions and weights are stored with.
+    points : numpy.ndarray
+        The positions of every ray with shape (M, 2), one path after another.
+    offsets : numpy.ndarray
+        The index in points of the start of each path, followed by M, with 
+        shape (N + 1,).
+    directions : numpy.ndarray
+        The final direction of each ray with shape (N, 2).
+    weights : numpy.ndarray
+        The final weight of each ray with shape (N,).
+    lengths : numpy.ndarray
+        The number of positions in each path with shape (N,).
+    end_points : numpy.ndarray
+        The last position of each path with shape (N, 2).
+    
+    Methods
+    -------
+    
+    from_rays(rays, dtype=np.double) : PyRay_Bundle
+        Packs the positions of a list of PyRay.
+    path(i) : numpy.ndarray
+        Returns the path of ray i with shape (L, 2).
+    plot() : list
+        Returns a list of the paths, intended for plotting.
+    segments() : numpy.ndarray
+        Returns every straight section of every path with shape (S, 2, 2).
+    padded(n_points=None) : numpy.ndarray
+        Returns the paths padded to equal length with shape (N, n_points, 2).
+    
+    """
+
+    cdef Ray_Bundle* c_data      # Storage if dtype is float64, otherwise null
+    cdef Ray_Bundle_f* c_data_f  # Storage if dtype is float32, otherwise null
+    cdef readonly object dtype
+
+    def __cinit__(self, dtype=np.double):
+        """
+        Creates an empty instance of PyRay_Bundle. Use PyTrace_Bundle() or
+        PyRay_Bundle.from_rays() instead.
+
+        Parameters
+        ----------
+        dtype : numpy.dtype, optional
+            Either np.float64 or np.float32. The default is np.double.
+
+        Raises
+        ------
+        TypeError
+            Raised if dtype isn't supported.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.dtype = _bundle_dtype(dtype)
+
+        if self.dtype == np.float32:
+            self.c_data_f = new Ray_Bundle_f()
+        else:
+            self.c_data = new Ray_Bundle()
+
+    def __dealloc__(self):
+        """
+        Deallocates the memory held by PyRay_Bundle
+
+        Returns
+        -------
+        None.
+
+        """
+
+        del self.c_data
+        del self.c_data_f
+
+    @staticmethod
+    def from_rays(list rays, dtype=np.double):
+        """
+        Packs the positions, directions and weights of the rays into a 
+        bundle, e.g. after tracing them with PyTrace(fill_up=False).
+
+        Parameters
+        ----------
+        rays : list
+            A list of PyRay.
+        dtype : numpy.dtype, optional
+            Either np.float64 or np.float32. The default is np.double.
+
+        Raises
+        ------
+        TypeError
+            Raised if dtype isn't supported.
+
+        Returns
+        -------
+        PyRay_Bundle
+            The bundle of the rays.
+
+        """
+
+        cdef PyRay_Bundle bundle = PyRay_Bundle(dtype)
+
+        for r in rays:
+            if bundle.c_data != NULL:
+                bundle.c_data.append(dereference((<PyRay?>r).c_data))
+            else:
+                bundle.c_data_f.append(dereference((<PyRay?>r).c_data))
+
+        return bundle
+
+    cdef np.ndarray _view(self, int nd, np.npy_intp* dims, int typenum, void* data):
+        """Returns a read-only numpy view onto the bundle's C++ storage"""
+
+        cdef np.ndarray ans = _make_np_view(nd, dims, typenum, data, self)
+        ans.flags.writeable = False
+
+        return ans
+
+    cdef int _typenum(self):
+        """Returns the numpy type number of the stored values"""
+
+        return np.NPY_FLOAT64 if self.c_data != NULL else np.NPY_FLOAT32
+
+    cdef _assign(self, points, offsets, directions, weights):
+        """
+        Replaces the contents of the bundle with copies of the arrays, which
+        have the shapes of the attributes with the same names.
+        """
+
+        cdef np.npy_intp M = points.shape[0]
+        cdef np.npy_intp N = weights.shape[0]
+        cdef np.npy_intp[2] dims = [M, 2]
+        cdef int typenum = self._typenum()
+        cdef void* p_ptr
+        cdef void* v_ptr
+        cdef void* w_ptr
+        cdef void* o_ptr
+
+        if self.c_data != NULL:
+            self.c_data.points.resize(M)
+            self.c_data.offsets.resize(N + 1)
+            self.c_data.v.resize(N)
+            self.c_data.weight.resize(N)
+            p_ptr, v_ptr = self.c_data.points.data(), self.c_data.v.data()
+            w_ptr, o_ptr = self.c_data.weight.data(), self.c_data.offsets.data()
+        else:
+            self.c_data_f.points.resize(M)
+            self.c_data_f.offsets.resize(N + 1)
+            self.c_data_f.v.resize(N)
+            self.c_data_f.weight.resize(N)
+            p_ptr, v_ptr = self.c_data_f.points.data(), self.c_data_f.v.data()
+            w_ptr, o_ptr = self.c_data_f.weight.data(), self.c_data_f.offsets.data()
+
+        # Views onto empty vectors would allocate their own memory
+        if M > 0:
+            _make_np_view(2, &dims[0], typenum, p_ptr, self)[...] = points
+
+        dims[0] = N + 1
+        _make_np_view(1, &dims[0], np.NPY_INT64, o_ptr, self)[...] = offsets
+
+        if N > 0:
+            dims[0] = N
+            _make_np_view(2, &dims[0], typenum, v_ptr, self)[...] = directions
+            _make_np_view(1, &dims[0], typenum, w_ptr, self)[...] = weights
+
+    def __len__(self):
+        """Returns the number of rays"""
+
+        return self.c_data.size() if self.c_data != NULL else self.c_data_f.size()
+
+    @property
+    def points(self):
+        """
+        The positions of every ray, one path after another.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only view with shape (M, 2).
+
+        """
+
+        cdef np.npy_intp[2] dims = [0, 2]
+
+        if self.c_data != NULL:
+            dims[0] = self.c_data.points.size()
+            return self._view(2, &(dims[0]), self._typenum(), self.c_data.points.data())
+
+        dims[0] = self.c_data_f.points.size()
+        return self._view(2, &(dims[0]), self._typenum(), self.c_data_f.points.data())
+
+    @property
+    def offsets(self):
+        """
+        The index in points of the start of each path, followed by the total
+        number of points.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only view of int64 with shape (N + 1,).
+
+        """
+
+        cdef vector[int64_t]* offsets = (&self.c_data.offsets if self.c_data != NULL 
+                                         else &self.c_data_f.offsets)
+        cdef np.npy_intp[1] dims = [offsets.size()]
+
+        return self._view(1, &(dims[0]), np.NPY_INT64, offsets.data())
+
+    @property
+    def directions(self):
+        """
+        The final direction of each ray.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only view with shape (N, 2).
+
+        """
+
+        cdef np.npy_intp[2] dims = [len(self), 2]
+
+        if self.c_data != NULL:
+            return self._view(2, &(dims[0]), self._typenum(), self.c_data.v.data())
+
+        return self._view(2, &(dims[0]), self._typenum(), self.c_data_f.v.data())
+
+    @property
+    def weights(self):
+        """
+        The final weight of each ray.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only view with shape (N,).
+
+        """
+
+        cdef np.npy_intp[1] dims = [len(self)]
+
+        if self.c_data != NULL:
+            return self._view(1, &(dims[0]), self._typenum(), self.c_data.weight.data())
+
+        return self._view(1, &(dims[0]), self._typenum(), self.c_data_f.weight.data())
+
+    @property
+    def lengths(self):
+        """
+        The number of positions in each path.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N,).
+
+        """
+
+        return np.diff(self.offsets)
+
+    @property
+    def end_points(self):
+        """
+        The last position of each path.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N, 2).
+
+        """
+
+        return self.points[self.offsets[1:] - 1]
+
+    def path(self, Py_ssize_t i):
+        """
+        Returns the positions of ray i.
+
+        Parameters
+        ----------
+        i : int
+            The index of the ray, negative indices count from the end.
+
+        Raises
+        ------
+        IndexError
+            Raised if i is out of range.
+
+        Returns
+        -------
+        numpy.ndarray
+            A read-only view with shape (L, 2), the same as PyRay.pos.
+
+        """
+
+        cdef Py_ssize_t N = len(self)
+
+        if i < 0:
+            i += N
+
+        if not 0 <= i < N:
+            raise IndexError("ray index out of range")
+
+        offsets = self.offsets
+
+        return self.points[offsets[i]:offsets[i + 1]]
+
+    def plot(self):
+        """
+        Returns the path of each ray, in the same form as PyRay.plot().
+
+        Returns
+        -------
+        list
+            A list of N numpy arrays with shape (L, 2).
+
+        """
+
+        if len(self) == 0:
+            return []
+
+        return np.split(self.points, self.offsets[1:-1])
+
+    def segments(self):
+        """
+        Returns every straight section of every path, e.g. for a matplotlib 
+        LineCollection. Sections joining the end of one path to the start of
+        the next are excluded.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (S, 2, 2), where [k, 0] and [k, 1] are 
+            the start and end of section k.
+
+        """
+
+        points = self.points
+        keep = np.ones(max(points.shape[0] - 1, 0), dtype=np.bool_)
+
+        # The section from the last point of each path to the next path's start
+        keep[self.offsets[1:-1] - 1] = False
+
+        return np.stack((points[:-1][keep], points[1:][keep]), axis=1)
+
+    def padded(self, n_points=None):
+        """
+        Returns the paths padded to the same length by repeating each path's
+        last position, similar to the layout of PyTrace() with fill_up=True.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            The length to pad to. The default is None, meaning the length of 
+            the longest path.
+
+        Raises
+        ------
+        ValueError
+            Raised if n_points is shorter than the longest path.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N, n_points, 2).
+
+        """
+
+        lengths = self.lengths
+        max_len = int(lengths.max()) if lengths.size else 0
+
+        if n_points is None:
+            n_points = max_len
+        elif n_points < max_len:
+            raise ValueError(f"n_points must be at least the longest path length {max_len}")
+
+        # Index of the point each entry copies, clipped to the path's end
+        ind = np.minimum(np.arange(n_points)[None, :], lengths[:, None] - 1)
+
+        return self.points[self.offsets[:-1, None] + ind]
+
+
+# class _PyComponent
+    
+cdef class _PyComponent:
+    """
+    A class to mirror the C++ Component class. Not intended to be initialized.
+    
+    ...
+    
+    Attributes
+    ----------
+    
+    None.
+    
+    Methods
+    -------
+    
+    None.
+    
+    """
+    
+    cdef shared_ptr[Component] c_component_ptr
+
+    cdef _load_component(self, Component* cmp_ptr):
+        """
+        Sets the C++ component pointer.
+
+        Parameters
+        ----------
+        cmp_ptr : Component*
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.c_component_ptr = shared_ptr[Component](cmp_ptr)
+
+
+# Planar components
+# class _PyPlane
+
+cdef class _PyPlane(_PyComponent):
+    """
+    A class to mirror the C++ Plane class which represents a 2d plane. Not 
+    intended to be initialised.
+    
+    ...
+    
+    Attributes
+    ----------
+    
+    start : numpy.ndarray
+        The start point of the plane.
+    end : numpy.ndarray
+        The end point of the plane.
+    
+    Methods
+    -------
+    
+    plot() : numpy.ndarray
+        Returns a numpy array for plotting the plane with shape (2, 2), with
+        the first indiex specifying the point.
+    
+    """
+    
+    cdef Plane* c_plane_ptr
+
+
+    cdef _load_Plane(self, Plane* pln_ptr):
+        """
+        Loads plane properties, namely start & end. Also sets the plane and
+        component pointers.
+
+        Parameters
+        ----------
+        pl_ptr : Plane*
+            Pointer to the C++ Plane.
+
+        Returns
+        -------
+        None.
+        
+        """
+
+        self.c_plane_ptr = pln_ptr
+        self._load_component(<Component*>pln_ptr)
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters.
+        """
+
+        return {'start': (0, 1), 'end': (2, 3)}
+
+    @property
+    def start(self):
+        """
+        The start point of the plane. Can be set as a copy of the passed numpy
+        array.
+
+        Returns
+        -------
         start_np : numpy.ndarray
             A read-only numpy view of the start point.
 
         """
 
-        cdef np.ndarray start_np = make_np_view_from_arr(self.c_plane_ptr.get_start(), self)
+        cdef np.ndarray start_np = make_np_view_from_arr(self.c_plane_ptr.get_start(), self)
+
+        # Make array read-only as Plane.start can't be set trivially
+        start_np.flags.writeable = False
+
+        return start_np
+    @start.setter
+    def start(self, double[:] start not None):
+        if tuple(start.shape) != _arr_shape:
+            raise wrong_np_shape_except("start", start)
+        
+        self.c_plane_ptr.set_start(make_arr_from_numpy(start))
+
+    @property
+    def end(self):
+        """
+        The end point of the plane. Can be set as a copy of the passed numpy
+        array.
+
+        Returns
+        -------
+        end_np : numpy.ndarray
+            A read only numpy view with shape (2,) of the end point.
+
+        """
+        
+        cdef np.ndarray end_np = make_np_view_from_arr(self.c_plane_ptr.get_end(), self)
+
+        # Make array read-only as Plane.start can't be set trivially
+        end_np.flags.writeable = False
+
+        return end_np
+    @end.setter
+    def end(self, double[:] end not None):
+        if tuple(end.shape) != _arr_shape:
+            raise wrong_np_shape_except("end", end)
+
+        self.c_plane_ptr.set_end(make_arr_from_numpy(end))
+        
+    def plot(self):
+        """
+        Returns a numpy array that can be used to plot the plane.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (2, 2). The first index spcifies the start
+            or end points.
+
+        """
+        
+        points = np.empty((2, 2), dtype=np.double)
+        
+        points[0] = self.start
+        points[1] = self.end
+        
+        return points
+
+# class PyMirror_Plane
+
+cdef class PyMirror_Plane(_PyPlane):
+    """
+    A class to represent a plane mirror. Mirrors C++ class Mirror_Plane.
+    """
+    
+    cdef Mirror_Plane* c_data
+    
+    def __cinit__(self, double[:] start not None, double[:] end not None,
+                  double reflectivity=1.0):
+        """
+        Creates an instance of PyMirror_Plane.
+
+        Parameters
+        ----------
+        start : numpy.ndarray
+            The start point of the plane. It should be a numpy.ndarray with 
+            shape (2,).
+        end : numpy.ndarray
+            The end point of the plane. It should be a numpy.ndarray with 
+            shape (2,).
+        reflectivity : double, optional
+            The fraction of a ray's weight that is reflected, must be between
+            0 and 1. The default is 1.0.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if tuple(start.shape) != _arr_shape:
+            raise wrong_np_shape_except("start", start)
+
+        if tuple(end.shape) != _arr_shape:
+            raise wrong_np_shape_except("end", end)
+
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+        
+        self.c_data = new Mirror_Plane(make_arr_from_numpy(start), 
+                                       make_arr_from_numpy(end), reflectivity)
+        
+        self._load_Plane(<Plane*>self.c_data)
+
+    @staticmethod
+    def many(starts, ends, reflectivity=1.0):
+        """
+        Creates many plane mirrors in one call.
+
+        Parameters
+        ----------
+        starts : numpy.ndarray
+            The start points of the planes with shape (N, 2).
+        ends : numpy.ndarray
+            The end points of the planes with shape (N, 2).
+        reflectivity : double or numpy.ndarray, optional
+            The reflectivity of all the mirrors or of each with shape (N,). 
+            The default is 1.0.
+
+        Returns
+        -------
+        PyComponent_Array
+            The N plane mirrors.
+
+        """
+
+        cdef const double[:, ::1] s = _many_points("starts", starts)
+        cdef Py_ssize_t i, N = s.shape[0]
+        cdef const double[:, ::1] e = _many_points("ends", ends, N)
+        cdef const double[::1] refl = _many_values("reflectivity", reflectivity, N)
+
+        if np.any(np.asarray(refl) < 0.0) or np.any(np.asarray(refl) > 1.0):
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        cdef PyComponent_Array ans = PyComponent_Array(PyMirror_Plane)
+        ans._args = (np.asarray(s), np.asarray(e), np.asarray(refl))
+        ans.c_comps.reserve(N)
+
+        for i in range(N):
+            ans.c_comps.push_back(shared_ptr[Component]( <Component*>new Mirror_Plane(
+                _arr_from_row(s, i), _arr_from_row(e, i), refl[i]) ))
+
+        return ans
+
+    @property
+    def reflectivity(self):
+        """
+        The fraction of a ray's weight that is reflected, must be between 0
+        and 1.
+
+        Returns
+        -------
+        double
+            The reflectivity of the mirror.
+
+        """
+
+        return dereference(self.c_data).reflectivity
+    @reflectivity.setter
+    def reflectivity(self, double reflectivity):
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        dereference(self.c_data).reflectivity = reflectivity
+
+        
+# class Pyrefract_Plane
+
+cdef class PyRefract_Plane(_PyPlane):
+    """
+    A class to represent a planar boundary at which refraction occurs. Mirrors
+    C++ class Refract_Plane.
+    """
+    
+    cdef Refract_Plane* c_data
+    
+    def __cinit__(self, double[:] start not None, double[:] end not None, double n1=1.0, 
+                  double n2=1.0, double a1=0.0, double a2=0.0):
+        """
+        Creates an instance of PyRefract_Plane.
+
+        Parameters
+        ----------
+        start : numpy.ndarray
+            The start point of the mirror plane. It should be a numpy.ndarray
+            with shape (2,).
+        end : numpy.ndarray
+            The end point of the mirror plane. It should be a numpy.ndarray
+            with shape (2,).
+        n1 : double, optional
+            The refractive index on the left of the planar boundary. Left is 
+            defined as left of the vector start->end. The default is 1.0.
+        n2 : double, optional
+            The refractive index on the right of the planar boundary. Right is 
+            defined as right of the vector start->end. The default is 1.0.
+        a1 : double, optional
+            The absorption coefficient of the medium on the left of the planar
+            boundary. The default is 0.0.
+        a2 : double, optional
+            The absorption coefficient of the medium on the right of the 
+            planar boundary. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        # Verify start and end arrays have correct shape
+        if tuple(start.shape) != _arr_shape:
+            raise wrong_np_shape_except("start", start)
+
+        if tuple(end.shape) != _arr_shape:
+            raise wrong_np_shape_except("end", end)
+
+        if a1 < 0.0 or a2 < 0.0:
+            raise ValueError("absorption coefficients cannot be less than zero")
+        
+        self.c_data = new Refract_Plane(make_arr_from_numpy(start), 
+                                        make_arr_from_numpy(end), n1, n2, a1, 
+                                        a2)
+        
+        self._load_Plane(<Plane*>self.c_data)
+
+    @staticmethod
+    def many(starts, ends, n1=1.0, n2=1.0, a1=0.0, a2=0.0):
+        """
+        Creates many planar refractive boundaries in one call. The refractive
+        indices and absorption coefficients can be a double for all the 
+        boundaries or a numpy.ndarray with shape (N,).
+
+        Parameters
+        ----------
+        starts : numpy.ndarray
+            The start points of the planes with shape (N, 2).
+        ends : numpy.ndarray
+            The end points of the planes with shape (N, 2).
+        n1 : double or numpy.ndarray, optional
+            The refractive index on the left of the boundaries. The default 
+            is 1.0.
+        n2 : double or numpy.ndarray, optional
+            The refractive index on the right of the boundaries. The default 
+            is 1.0.
+        a1 : double or numpy.ndarray, optional
+            The absorption coefficient on the left of the boundaries. The 
+            default is 0.0.
+        a2 : double or numpy.ndarray, optional
+            The absorption coefficient on the right of the boundaries. The 
+            default is 0.0.
+
+        Returns
+        -------
+        PyComponent_Array
+            The N refractive boundaries.
+
+        """
+
+        cdef const double[:, ::1] s = _many_points("starts", starts)
+        cdef Py_ssize_t i, N = s.shape[0]
+        cdef const double[:, ::1] e = _many_points("ends", ends, N)
+        cdef const double[::1] n1_v = _many_values("n1", n1, N)
+        cdef const double[::1] n2_v = _many_values("n2", n2, N)
+        cdef const double[::1] a1_v = _many_values("a1", a1, N)
+        cdef const double[::1] a2_v = _many_values("a2", a2, N)
+
+        if np.any(np.asarray(a1_v) < 0.0) or np.any(np.asarray(a2_v) < 0.0):
+            raise ValueError("absorption coefficients cannot be less than zero")
+
+        cdef PyComponent_Array ans = PyComponent_Array(PyRefract_Plane)
+        ans._args = (np.asarray(s), np.asarray(e), np.asarray(n1_v), 
+                     np.asarray(n2_v), np.asarray(a1_v), np.asarray(a2_v))
+        ans.c_comps.reserve(N)
+
+        for i in range(N):
+            ans.c_comps.push_back(shared_ptr[Component]( <Component*>new Refract_Plane(
+                _arr_from_row(s, i), _arr_from_row(e, i), n1_v[i], n2_v[i], 
+                a1_v[i], a2_v[i]) ))
+
+        return ans
+    
+    @property
+    def n1(self):
+        """
+        The refractive index on the left of the planar boundary. Left is 
+        defined as left of the vector start->end.
+
+        Returns
+        -------
+        double
+            The refractive index n1.
+
+        """
+        
+        return dereference(self.c_data).n1
+    @n1.setter
+    def n1(self, double n1):
+        if n1 <= 0.0:
+            raise ValueError("n1 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n1 = n1
+    
+    @property
+    def n2(self):
+        """
+        The refractive index on the right of the planar boundary. Right is 
+        defined as right of the vector start->end.
+
+        Returns
+        -------
+        double
+            The refractive index n2.
+
+        """
+        
+        return dereference(self.c_data).n2
+    @n2.setter
+    def n2(self, double n2):
+        if n2 <= 0.0:
+            raise ValueError("n2 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n2 = n2
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters.
+        """
+
+        slots = _PyPlane._tangent_slots_dict(self)
+        slots.update({'n1': (4,), 'n2': (5,)})
+
+        return slots
+
+    @property
+    def a1(self):
+        """
+        The absorption coefficient of the medium on the left of the planar
+        boundary. Left is defined as left of the vector start->end.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a1.
+
+        """
+
+        return dereference(self.c_data).a1
+    @a1.setter
+    def a1(self, double a1):
+        if a1 < 0.0:
+            raise ValueError("a1 cannot be less than zero")
+
+        dereference(self.c_data).a1 = a1
+
+    @property
+    def a2(self):
+        """
+        The absorption coefficient of the medium on the right of the planar
+        boundary. Right is defined as right of the vector start->end.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a2.
+
+        """
+
+        return dereference(self.c_data).a2
+    @a2.setter
+    def a2(self, double a2):
+        if a2 < 0.0:
+            raise ValueError("a2 cannot be less than zero")
+
+        dereference(self.c_data).a2 = a2
+        
+# class Screen_Plane
+
+cdef class PyScreen_Plane(_PyPlane):
+    """A class to represent a planar, absorbing screen"""
+
+    cdef Screen_Plane* c_data
+    
+    def __cinit__(self, double[:] start not None, double[:] end not None):
+        """
+        Creates an instance of PyScreen_Plane.
+
+        Parameters
+        ----------
+        start : numpy.ndarray
+            The start point of the plane. It should be a numpy.ndarray with 
+            shape (2,).
+        end : numpy.ndarray
+            The end point of the plane. It should be a numpy.ndarray with 
+            shape (2,).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if tuple(start.shape) != _arr_shape:
+            raise wrong_np_shape_except("start", start)
+
+        if tuple(end.shape) != _arr_shape:
+            raise wrong_np_shape_except("end", end)
+        
+        self.c_data = new Screen_Plane(make_arr_from_numpy(start), 
+                                       make_arr_from_numpy(end))
+        
+        self._load_Plane(<Plane*>self.c_data)
+
+    @staticmethod
+    def many(starts, ends):
+        """
+        Creates many screens in one call.
+
+        Parameters
+        ----------
+        starts : numpy.ndarray
+            The start points of the planes with shape (N, 2).
+        ends : numpy.ndarray
+            The end points of the planes with shape (N, 2).
+
+        Returns
+        -------
+        PyComponent_Array
+            The N screens.
+
+        """
+
+        cdef const double[:, ::1] s = _many_points("starts", starts)
+        cdef Py_ssize_t i, N = s.shape[0]
+        cdef const double[:, ::1] e = _many_points("ends", ends, N)
+
+        cdef PyComponent_Array ans = PyComponent_Array(PyScreen_Plane)
+        ans._args = (np.asarray(s), np.asarray(e))
+        ans.c_comps.reserve(N)
+
+        for i in range(N):
+            ans.c_comps.push_back(shared_ptr[Component]( <Component*>new Screen_Plane(
+                _arr_from_row(s, i), _arr_from_row(e, i)) ))
+
+        return ans
+
+# Spherical components
+# class _PySpherical
+
+cdef class _PySpherical(_PyComponent):
+    """
+    Class to describe a circular arc, mirrors C++ class Spherical. Not intended
+    to be initialised.
+    """
+    
+    cdef Spherical* c_sph_ptr
+    
+
+    cdef _load_Sph(self, Spherical* sph_ptr):
+        """
+        Loads spherical properties, namely centre. Also sets the spherical and
+        component pointers.
+
+        Parameters
+        ----------
+        sph_ptr : Spherical*
+            Pointer to the C++ Spherical.
+
+        Returns
+        -------
+        None.
+        
+        """
+
+        self.c_sph_ptr = sph_ptr
+        self._load_component(<Component*>sph_ptr)
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters.
+        """
+
+        return {'centre': (0, 1), 'R': (2,), 'start': (3,), 'end': (4,)}
+    
+    @property
+    def centre(self):
+        """
+        The centre of the ciruclar arc. Can be set as a copy of the passed 
+        numpy array.
+
+        Returns
+        -------
+        centre_np : numpy.ndarray
+            A numpy view with shape (2,) of the centre.
+
+        """
+
+        return make_np_view_from_arr(self.c_sph_ptr.centre, self)
+    @centre.setter
+    def centre(self, double[:] centre not None):
+        if tuple(centre.shape) != _arr_shape:
+            raise wrong_np_shape_except("centre", centre)
+
+        dereference(self.c_sph_ptr).centre = make_arr_from_numpy(centre)
+        
+    @property
+    def R(self):
+        """
+        The radius of the circular arc, must be positive.
+
+        Returns
+        -------
+        double
+            The radius of the circular arc.
+
+        """
+        
+        return dereference(self.c_sph_ptr).R
+    @R.setter
+    def R(self, double R):
+        if R <= 0.0:
+            raise ValueError("R cannot be less than or equal to zero")
+
+        dereference(self.c_sph_ptr).R = R
+        
+    @property
+    def start(self):
+        """
+        The start angle of the arc, in radians. It is measured anti-clockwise 
+        from the x axis. Must be less than property end.
+
+        Returns
+        -------
+        double
+            The start angle of the arc.
+
+        """
+        
+        return dereference(self.c_sph_ptr).get_start()
+    @start.setter
+    def start(self, double start):
+        if start >= self.end:
+            raise ValueError("start angle must be less than end angle")
+
+        dereference(self.c_sph_ptr).set_start(start)
+        
+    @property
+    def end(self):
+        """
+        The end angle of the arc, in radians. It is measured anti-clockwise 
+        from the x axis. Must be greater than property start.
+
+        Returns
+        -------
+        double
+            The end angle of the arc.
+
+        """
+        
+        return dereference(self.c_sph_ptr).get_end()
+    @end.setter
+    def end(self, double end):
+        if end <= self.start:
+            raise ValueError("end angle must be greater than start angle")
+
+        dereference(self.c_sph_ptr).set_end(end)
+
+    def update_start_end(self, double new_start, double new_end):
+        """
+        Updates start and end simultaneously. This is useful as it means you
+        don't have to ensure self.start < self.end while setting each property
+        individually. new_start must be less than new_end.
+
+        Parameters
+        ----------
+        new_start : double
+            The new start angle measured anticlockwise from the x axis.
+        new_end : double
+            The new end angle measured anticlockwise from the x axis.
+
+        Raises
+        ------
+        ValueError
+            Raised if new_end <= new_start.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if new_end <= new_start:
+            raise ValueError("end angle must be greater than start angle")
+
+        dereference(self.c_sph_ptr).set_start(new_start)
+        dereference(self.c_sph_ptr).set_end(new_end)
+        
+    def plot(self, n_points=100):
+        """
+        Returns a numpy array that can be used to plot the arc.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            The number of points returned. The default is 100.
+
+        Returns
+        -------
+        points : numpy.ndarray
+            A numpy array with shape (n_points, 2).
+
+        """
+        
+        points = np.empty((n_points, 2), dtype=np.double)
+        
+        t = np.linspace(self.start, self.end, n_points)
+        
+        points[:, 0] = self.centre[0] + self.R*np.cos(t)
+        points[:, 1] = self.centre[1] + self.R*np.sin(t)
+        
+        return points
+
+
+# class PyMirror_Sph 
+
+cdef class PyMirror_Sph(_PySpherical):
+    """A class to represent a circular mirror. Mirrors C++ class Mirror_Sph."""
+    
+    cdef Mirror_Sph* c_data
+    
+    def __cinit__(self, double[:] centre not None, double R, double start, double end,
+                  double reflectivity=1.0):
+        """
+        Creates an instance of PyMirror_Sph.
+
+        Parameters
+        ----------
+        centre : numpy.ndarray
+            The centre of the circular arc. It should be a numpy.ndarray with
+            shape (2,).
+        R : double
+            The radius of the arc.
+        start : double
+            The start angle of the arc, in radians. It is measured 
+            anti-clockwise from the x axis. Must be less than end.
+        end : double
+            The end angle of the arc, in radians. It is measured anti-clockwise 
+            from the x axis. Must be greater than start.
+        reflectivity : double, optional
+            The fraction of a ray's weight that is reflected, must be between
+            0 and 1. The default is 1.0.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if tuple(centre.shape) != _arr_shape:
+            raise wrong_np_shape_except("centre", centre)
+
+        if R <= 0.0:
+            raise ValueError("R cannot be less than or equal to zero")
+
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+                
+        self.c_data = new Mirror_Sph(make_arr_from_numpy(centre), R, start, 
+                                     end, reflectivity)
+        
+        self._load_Sph(<Spherical*>self.c_data)
+
+    @staticmethod
+    def many(centres, R, starts, ends, reflectivity=1.0):
+        """
+        Creates many circular arc mirrors in one call. R, starts, ends and 
+        reflectivity can be a double for all the arcs or a numpy.ndarray with
+        shape (N,).
+
+        Parameters
+        ----------
+        centres : numpy.ndarray
+            The centres of the arcs with shape (N, 2).
+        R : double or numpy.ndarray
+            The radii of the arcs.
+        starts : double or numpy.ndarray
+            The start angles of the arcs, in radians.
+        ends : double or numpy.ndarray
+            The end angles of the arcs, in radians.
+        reflectivity : double or numpy.ndarray, optional
+            The reflectivity of the mirrors. The default is 1.0.
+
+        Returns
+        -------
+        PyComponent_Array
+            The N arc mirrors.
+
+        """
+
+        cdef const double[:, ::1] c = _many_points("centres", centres)
+        cdef Py_ssize_t i, N = c.shape[0]
+        cdef const double[::1] R_v = _many_values("R", R, N)
+        cdef const double[::1] s = _many_values("starts", starts, N)
+        cdef const double[::1] e = _many_values("ends", ends, N)
+        cdef const double[::1] refl = _many_values("reflectivity", reflectivity, N)
+
+        if np.any(np.asarray(R_v) <= 0.0):
+            raise ValueError("R cannot be less than or equal to zero")
+
+        if np.any(np.asarray(refl) < 0.0) or np.any(np.asarray(refl) > 1.0):
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        cdef PyComponent_Array ans = PyComponent_Array(PyMirror_Sph)
+        ans._args = (np.asarray(c), np.asarray(R_v), np.asarray(s), np.asarray(e), np.asarray(refl))
+        ans.c_comps.reserve(N)
+
+        for i in range(N):
+            ans.c_comps.push_back(shared_ptr[Component]( <Component*>new Mirror_Sph(
+                _arr_from_row(c, i), R_v[i], s[i], e[i], refl[i]) ))
+
+        return ans
+
+    @property
+    def reflectivity(self):
+        """
+        The fraction of a ray's weight that is reflected, must be between 0
+        and 1.
+
+        Returns
+        -------
+        double
+            The reflectivity of the mirror.
+
+        """
+
+        return dereference(self.c_data).reflectivity
+    @reflectivity.setter
+    def reflectivity(self, double reflectivity):
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        dereference(self.c_data).reflectivity = reflectivity
+
+
+# class PyrefractSph
+
+cdef class PyRefract_Sph(_PySpherical):
+    """
+    A class to describe a circular arc at which refraction occurs. Mirrors
+    C++ class Refract_Sph.
+    """
+    
+    cdef Refract_Sph* c_data
+    
+    def __cinit__(self, double[:] centre not None, double R, double start, double end,
+                  double n_in=1.0, double n_out=1.0, double a_in=0.0, 
+                  double a_out=0.0):
+        """
+        Creates an instance of PyRefract_Sph.
+
+        Parameters
+        ----------
+        centre : numpy.ndarray
+            The centre of the circular arc. It should be a numpy.ndarray with
+            shape (2,).
+        R : double
+            The radius of the arc.
+        start : double
+            The start angle of the arc, in radians. It is measured 
+            anti-clockwise from the x axis. Must be less than end.
+        end : double
+            The end angle of the arc, in radians. It is measured anti-clockwise 
+            from the x axis. Must be greater than start.
+        n_in : double, optional
+            The refractive index for r < R. The default is 1.0.
+        n_out : double, optional
+            The refractive index for r > R. The default is 1.0.
+        a_in : double, optional
+            The absorption coefficient for r < R. The default is 0.0.
+        a_out : double, optional
+            The absorption coefficient for r > R. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if tuple(centre.shape) != _arr_shape:
+            raise wrong_np_shape_except("centre", centre)
+
+        if R <= 0.0:
+            raise ValueError("R cannot be less than or equal to zero")
+
+        if a_in < 0.0 or a_out < 0.0:
+            raise ValueError("absorption coefficients cannot be less than zero")
+        
+        self.c_data = new Refract_Sph(make_arr_from_numpy(centre), R, start, 
+                                     end, n_out, n_in, a_out, a_in)
+        
+        self._load_Sph(<Spherical*>self.c_data)
+
+    @staticmethod
+    def many(centres, R, starts, ends, n_in=1.0, n_out=1.0, a_in=0.0, 
+             a_out=0.0):
+        """
+        Creates many circular arc refractive boundaries in one call. All 
+        parameters except centres can be a double for all the arcs or a 
+        numpy.ndarray with shape (N,).
+
+        Parameters
+        ----------
+        centres : numpy.ndarray
+            The centres of the arcs with shape (N, 2).
+        R : double or numpy.ndarray
+            The radii of the arcs.
+        starts : double or numpy.ndarray
+            The start angles of the arcs, in radians.
+        ends : double or numpy.ndarray
+            The end angles of the arcs, in radians.
+        n_in : double or numpy.ndarray, optional
+            The refractive index for r < R. The default is 1.0.
+        n_out : double or numpy.ndarray, optional
+            The refractive index for r > R. The default is 1.0.
+        a_in : double or numpy.ndarray, optional
+            The absorption coefficient for r < R. The default is 0.0.
+        a_out : double or numpy.ndarray, optional
+            The absorption coefficient for r > R. The default is 0.0.
+
+        Returns
+        -------
+        PyComponent_Array
+            The N arc refractive boundaries.
+
+        """
+
+        cdef const double[:, ::1] c = _many_points("centres", centres)
+        cdef Py_ssize_t i, N = c.shape[0]
+        cdef const double[::1] R_v = _many_values("R", R, N)
+        cdef const double[::1] s = _many_values("starts", starts, N)
+        cdef const double[::1] e = _many_values("ends", ends, N)
+        cdef const double[::1] n_in_v = _many_values("n_in", n_in, N)
+        cdef const double[::1] n_out_v = _many_values("n_out", n_out, N)
+        cdef const double[::1] a_in_v = _many_values("a_in", a_in, N)
+        cdef const double[::1] a_out_v = _many_values("a_out", a_out, N)
+
+        if np.any(np.asarray(R_v) <= 0.0):
+            raise ValueError("R cannot be less than or equal to zero")
+
+        if np.any(np.asarray(a_in_v) < 0.0) or np.any(np.asarray(a_out_v) < 0.0):
+            raise ValueError("absorption coefficients cannot be less than zero")
+
+        cdef PyComponent_Array ans = PyComponent_Array(PyRefract_Sph)
+        ans._args = (np.asarray(c), np.asarray(R_v), np.asarray(s), np.asarray(e),
+                     np.asarray(n_in_v), np.asarray(n_out_v), 
+                     np.asarray(a_in_v), np.asarray(a_out_v))
+        ans.c_comps.reserve(N)
+
+        for i in range(N):
+            ans.c_comps.push_back(shared_ptr[Component]( <Component*>new Refract_Sph(
+                _arr_from_row(c, i), R_v[i], s[i], e[i], n_out_v[i], n_in_v[i],
+                a_out_v[i], a_in_v[i]) ))
+
+        return ans
+                
+    @property
+    def n_in(self):
+        """
+        The refractive index "inside" the arc where r < R.
+
+        Returns
+        -------
+        double
+            The refractive index n_in.
+
+        """
+        
+        return dereference(self.c_data).n2
+    @n_in.setter
+    def n_in(self, double n_in):
+        if n_in <= 0.0:
+            raise ValueError("n_in cannot be less than or equal to zero")
+
+        dereference(self.c_data).n2 = n_in
+    
+    @property
+    def n_out(self):
+        """
+        The refractive index "outside" the arc where r > R.
+
+        Returns
+        -------
+        double
+            The refractive index n_out.
+
+        """
+        
+        return dereference(self.c_data).n1
+    @n_out.setter
+    def n_out(self, double n_out):
+        if n_out <= 0.0:
+            raise ValueError("n_out cannot be less than or equal to zero")
+
+        dereference(self.c_data).n1 = n_out
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters.
+        """
+
+        slots = _PySpherical._tangent_slots_dict(self)
+        slots.update({'n_out': (5,), 'n_in': (6,)})
+
+        return slots
+
+    @property
+    def a_in(self):
+        """
+        The absorption coefficient "inside" the arc where r < R.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a_in.
+
+        """
+
+        return dereference(self.c_data).a2
+    @a_in.setter
+    def a_in(self, double a_in):
+        if a_in < 0.0:
+            raise ValueError("a_in cannot be less than zero")
+
+        dereference(self.c_data).a2 = a_in
+
+    @property
+    def a_out(self):
+        """
+        The absorption coefficient "outside" the arc where r > R.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a_out.
+
+        """
+
+        return dereference(self.c_data).a1
+    @a_out.setter
+    def a_out(self, double a_out):
+        if a_out < 0.0:
+            raise ValueError("a_out cannot be less than zero")
+
+        dereference(self.c_data).a1 = a_out
+    
+
+
+# Aspheric components
+# class _PyAspheric
+
+cdef class _PyAspheric(_PyComponent):
+    """
+    Class to describe an even asphere, mirrors C++ class Aspheric. In a local
+    frame with z along the optical axis and y perpendicular to it the surface
+    is z = y^2 / (R (1 + sqrt(1 - (1 + k) y^2 / R^2))) + A_0 y^4 + A_1 y^6 + 
+    ... for |y| <= h with its vertex at the origin. The conic constant k 
+    gives a circle for k = 0, an ellipse for k > -1, a parabola for k = -1 and
+    a hyperbola for k < -1. Not intended to be initialised.
+    """
+
+    cdef Aspheric* c_asph_ptr
+
+    cdef _load_Asph(self, Aspheric* asph_ptr):
+        """
+        Sets the aspheric and component pointers.
+
+        Parameters
+        ----------
+        asph_ptr : Aspheric*
+            Pointer to the C++ Aspheric.
+
+        Returns
+        -------
+        None.
+        
+        """
+
+        self.c_asph_ptr = asph_ptr
+        self._load_component(<Component*>asph_ptr)
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters. Aspheres have none.
+        """
+
+        return {}
+
+    @property
+    def vertex(self):
+        """
+        The vertex of the surface. Can be set as a copy of the passed numpy 
+        array.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy view with shape (2,) of the vertex.
+
+        """
+
+        return make_np_view_from_arr(self.c_asph_ptr.vertex, self)
+    @vertex.setter
+    def vertex(self, double[:] vertex not None):
+        if tuple(vertex.shape) != _arr_shape:
+            raise wrong_np_shape_except("vertex", vertex)
+
+        dereference(self.c_asph_ptr).vertex = make_arr_from_numpy(vertex)
+
+    @property
+    def axis(self):
+        """
+        The angle of the optical axis, in radians. It is measured 
+        anti-clockwise from the x axis.
+
+        Returns
+        -------
+        double
+            The angle of the optical axis.
+
+        """
+
+        return self.c_asph_ptr.get_axis()
+    @axis.setter
+    def axis(self, double axis):
+        self.c_asph_ptr.set_axis(axis)
+
+    @property
+    def R(self):
+        """
+        The radius of curvature at the vertex. It is positive if the centre of
+        curvature lies along the optical axis from the vertex and is 
+        numpy.inf for a flat vertex.
+
+        Returns
+        -------
+        double
+            The radius of curvature.
+
+        """
+
+        c = self.c_asph_ptr.c
+        return np.inf if c == 0.0 else 1.0 / c
+    @R.setter
+    def R(self, double R):
+        c = _asph_curvature(R)
+        _check_asph_aperture(c, self.k, self.h)
+
+        self.c_asph_ptr.c = c
+
+    @property
+    def k(self):
+        """
+        The conic constant.
+
+        Returns
+        -------
+        double
+            The conic constant.
+
+        """
+
+        return self.c_asph_ptr.k
+    @k.setter
+    def k(self, double k):
+        _check_asph_aperture(self.c_asph_ptr.c, k, self.h)
+
+        self.c_asph_ptr.k = k
+
+    @property
+    def h(self):
+        """
+        Half the width of the aperture, the surface covers |y| <= h. Must be 
+        positive.
+
+        Returns
+        -------
+        double
+            Half the width of the aperture.
+
+        """
+
+        return self.c_asph_ptr.h
+    @h.setter
+    def h(self, double h):
+        _check_asph_aperture(self.c_asph_ptr.c, self.k, h)
+
+        self.c_asph_ptr.h = h
+
+    @property
+    def coeffs(self):
+        """
+        The coefficients A_0, A_1, ... of y^4, y^6, ... in the sag. Can be set
+        as a copy of the passed numpy array.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy of the coefficients with shape (M,).
+
+        """
+
+        return np.array(self.c_asph_ptr.coeffs, dtype=np.double)
+    @coeffs.setter
+    def coeffs(self, coeffs):
+        self.c_asph_ptr.coeffs = _asph_coeffs(coeffs)
+
+    def sag(self, y):
+        """
+        Returns the sag of the surface, its z coordinate in the local frame.
+
+        Parameters
+        ----------
+        y : double or numpy.ndarray
+            The distance from the optical axis.
+
+        Returns
+        -------
+        double or numpy.ndarray
+            The sag at y.
+
+        """
+
+        y_arr = np.asarray(y, dtype=np.double)
+        ans = np.empty_like(y_arr)
+
+        cdef double[:] y_flat = y_arr.ravel()
+        cdef double[:] ans_flat = ans.reshape(-1)
+        cdef Py_ssize_t i
+
+        for i in range(y_flat.shape[0]):
+            ans_flat[i] = self.c_asph_ptr.sag(y_flat[i])
+
+        return ans if ans.ndim else float(ans)
+
+    def plot(self, n_points=100):
+        """
+        Returns a numpy array that can be used to plot the surface.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            The number of points returned. The default is 100.
+
+        Returns
+        -------
+        points : numpy.ndarray
+            A numpy array with shape (n_points, 2).
+
+        """
+
+        y = np.linspace(-self.h, self.h, n_points)
+        z = self.sag(y)
+        ax = self.axis
+
+        points = np.empty((n_points, 2), dtype=np.double)
+
+        points[:, 0] = self.vertex[0] + z * np.cos(ax) - y * np.sin(ax)
+        points[:, 1] = self.vertex[1] + z * np.sin(ax) + y * np.cos(ax)
+
+        return points
+
+
+def _asph_curvature(double R):
+    """Returns the curvature 1 / R, raising ValueError if R is zero"""
+
+    if R == 0.0:
+        raise ValueError("R cannot be zero")
+
+    return 0.0 if np.isinf(R) else 1.0 / R
+
+
+def _check_asph_aperture(double c, double k, double h):
+    """Raises ValueError if the aperture is invalid for the conic"""
+
+    if h <= 0.0:
+        raise ValueError("h must be greater than zero")
+
+    if (1.0 + k) * c * c * h * h > 1.0 + 1e-12:
+        raise ValueError(f"aperture h = {h} extends beyond the conic")
+
+
+cdef vector[double] _asph_coeffs(coeffs) except *:
+    """Returns the aspheric coefficients as a vector"""
+
+    cdef vector[double] ans
+
+    if coeffs is not None:
+        for a in np.asarray(coeffs, dtype=np.double).ravel():
+            ans.push_back(a)
+
+    return ans
+
+# class PyMirror_Asph
+
+cdef class PyMirror_Asph(_PyAspheric):
+    """
+    A class to represent a mirror in the shape of an even asphere, e.g. a
+    parabolic mirror with focal length f has R = 2f and k = -1. Mirrors C++ 
+    class Mirror_Asph.
+    """
+
+    cdef Mirror_Asph* c_data
+
+    def __cinit__(self, double[:] vertex not None, double axis, double R, 
+                  double h, double k=0.0, coeffs=None, double reflectivity=1.0):
+        """
+        Creates an instance of PyMirror_Asph.
+
+        Parameters
+        ----------
+        vertex : numpy.ndarray
+            The vertex of the surface. It should be a numpy.ndarray with 
+            shape (2,).
+        axis : double
+            The angle of the optical axis, in radians. It is measured 
+            anti-clockwise from the x axis.
+        R : double
+            The radius of curvature at the vertex. It is positive if the 
+            centre of curvature lies along the optical axis from the vertex.
+            Use numpy.inf for a flat vertex.
+        h : double
+            Half the width of the aperture, must be positive.
+        k : double, optional
+            The conic constant. The default is 0.0.
+        coeffs : numpy.ndarray, optional
+            The coefficients of y^4, y^6, ... in the sag. The default is 
+            None, meaning a pure conic.
+        reflectivity : double, optional
+            The fraction of a ray's weight that is reflected, must be between
+            0 and 1. The default is 1.0.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if tuple(vertex.shape) != _arr_shape:
+            raise wrong_np_shape_except("vertex", vertex)
+
+        c = _asph_curvature(R)
+        _check_asph_aperture(c, k, h)
+
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        self.c_data = new Mirror_Asph(make_arr_from_numpy(vertex), axis, c, k, h,
+                                      _asph_coeffs(coeffs), reflectivity)
+
+        self._load_Asph(<Aspheric*>self.c_data)
+
+    @property
+    def reflectivity(self):
+        """
+        The fraction of a ray's weight that is reflected, must be between 0
+        and 1.
+
+        Returns
+        -------
+        double
+            The reflectivity of the mirror.
+
+        """
+
+        return dereference(self.c_data).reflectivity
+    @reflectivity.setter
+    def reflectivity(self, double reflectivity):
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        dereference(self.c_data).reflectivity = reflectivity
+
+# class PyRefract_Asph
+
+cdef class PyRefract_Asph(_PyAspheric):
+    """
+    A class to represent a refractive boundary in the shape of an even 
+    asphere. Mirrors C++ class Refract_Asph.
+    """
+
+    cdef Refract_Asph* c_data
+
+    def __cinit__(self, double[:] vertex not None, double axis, double R, 
+                  double h, double k=0.0, coeffs=None, double n1=1.0, 
+                  double n2=1.0, double a1=0.0, double a2=0.0):
+        """
+        Creates an instance of PyRefract_Asph.
+
+        Parameters
+        ----------
+        vertex : numpy.ndarray
+            The vertex of the surface. It should be a numpy.ndarray with 
+            shape (2,).
+        axis : double
+            The angle of the optical axis, in radians. It is measured 
+            anti-clockwise from the x axis.
+        R : double
+            The radius of curvature at the vertex. It is positive if the 
+            centre of curvature lies along the optical axis from the vertex.
+            Use numpy.inf for a flat vertex.
+        h : double
+            Half the width of the aperture, must be positive.
+        k : double, optional
+            The conic constant. The default is 0.0.
+        coeffs : numpy.ndarray, optional
+            The coefficients of y^4, y^6, ... in the sag. The default is 
+            None, meaning a pure conic.
+        n1 : double, optional
+            The refractive index on the side of the surface the optical axis
+            points to. The default is 1.0.
+        n2 : double, optional
+            The refractive index on the other side of the surface. The 
+            default is 1.0.
+        a1 : double, optional
+            The absorption coefficient on the side of the surface the optical
+            axis points to. The default is 0.0.
+        a2 : double, optional
+            The absorption coefficient on the other side of the surface. The
+            default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if tuple(vertex.shape) != _arr_shape:
+            raise wrong_np_shape_except("vertex", vertex)
+
+        c = _asph_curvature(R)
+        _check_asph_aperture(c, k, h)
+
+        if a1 < 0.0 or a2 < 0.0:
+            raise ValueError("absorption coefficients cannot be less than zero")
+
+        self.c_data = new Refract_Asph(make_arr_from_numpy(vertex), axis, c, k, h,
+                                       _asph_coeffs(coeffs), n1, n2, a1, a2)
+
+        self._load_Asph(<Aspheric*>self.c_data)
+
+    @property
+    def n1(self):
+        """
+        The refractive index on the side of the surface the optical axis 
+        points to.
+
+        Returns
+        -------
+        double
+            The refractive index n1.
+
+        """
+        
+        return dereference(self.c_data).n1
+    @n1.setter
+    def n1(self, double n1):
+        if n1 <= 0.0:
+            raise ValueError("n1 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n1 = n1
+    
+    @property
+    def n2(self):
+        """
+        The refractive index on the other side of the surface.
+
+        Returns
+        -------
+        double
+            The refractive index n2.
+
+        """
+        
+        return dereference(self.c_data).n2
+    @n2.setter
+    def n2(self, double n2):
+        if n2 <= 0.0:
+            raise ValueError("n2 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n2 = n2
+
+    @property
+    def a1(self):
+        """
+        The absorption coefficient on the side of the surface the optical 
+        axis points to.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a1.
+
+        """
+
+        return dereference(self.c_data).a1
+    @a1.setter
+    def a1(self, double a1):
+        if a1 < 0.0:
+            raise ValueError("a1 cannot be less than zero")
+
+        dereference(self.c_data).a1 = a1
+
+    @property
+    def a2(self):
+        """
+        The absorption coefficient on the other side of the surface.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a2.
+
+        """
+
+        return dereference(self.c_data).a2
+    @a2.setter
+    def a2(self, double a2):
+        if a2 < 0.0:
+            raise ValueError("a2 cannot be less than zero")
+
+        dereference(self.c_data).a2 = a2
+
+
+# Polyline components
+# class _PyPolyline
+
+cdef class _PyPolyline(_PyComponent):
+    """
+    A class to mirror the C++ Polyline class which represents connected line 
+    segments stored as a single component. Segment i runs from point i to 
+    point i + 1. Not intended to be initialised.
+    
+    ...
+    
+    Attributes
+    ----------
+    
+    points : numpy.ndarray
+        The vertices of the segments.
+    
+    Methods
+    -------
+    
+    plot() : numpy.ndarray
+        Returns a numpy array for plotting the polyline with shape (N, 2).
+    
+    """
+
+    cdef Polyline* c_poly_ptr
+
+    cdef _load_Polyline(self, Polyline* poly_ptr):
+        """
+        Sets the polyline and component pointers.
+
+        Parameters
+        ----------
+        poly_ptr : Polyline*
+            Pointer to the C++ Polyline.
+
+        Returns
+        -------
+        None.
+        
+        """
+
+        self.c_poly_ptr = poly_ptr
+        self._load_component(<Component*>poly_ptr)
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters. Polylines have none.
+        """
+
+        return {}
+
+    def __len__(self):
+        """Returns the number of segments"""
+
+        return self.c_poly_ptr.size()
+
+    @property
+    def points(self):
+        """
+        The vertices of the segments. Can be set as a copy of the passed numpy
+        array, which must have at least two points.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy of the vertices with shape (N, 2).
+
+        """
+
+        cdef const vector[arr]* pts = &self.c_poly_ptr.get_points()
+        cdef Py_ssize_t i
+
+        ans = np.empty((pts.size(), 2), dtype=np.double)
+
+        for i in range(pts.size()):
+            ans[i, 0] = dereference(pts)[i][0]
+            ans[i, 1] = dereference(pts)[i][1]
+
+        return ans
+    @points.setter
+    def points(self, points):
+        self.c_poly_ptr.set_points(_points_to_vector("points", points, False))
+
+    def plot(self):
+        """
+        Returns a numpy array that can be used to plot the polyline.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N, 2) of the vertices.
+
+        """
+
+        return self.points
+
+
+cdef vector[arr] _points_to_vector(str var_name, points, bint closed) except *:
+    """
+    Returns the points in a numpy array with shape (N, 2) as a vector, with
+    the first point repeated at the end if closed.
+    """
+
+    cdef const double[:, ::1] p = _many_points(var_name, points)
+    cdef Py_ssize_t i
+    cdef vector[arr] ans
+
+    ans.reserve(p.shape[0] + 1)
+
+    for i in range(p.shape[0]):
+        ans.push_back(_arr_from_row(p, i))
+
+    if closed and p.shape[0] > 0:
+        ans.push_back(_arr_from_row(p, 0))
+
+    return ans
+
+# class PyMirror_Polyline
+
+cdef class PyMirror_Polyline(_PyPolyline):
+    """
+    A class to represent a mirror made of connected line segments. Mirrors 
+    C++ class Mirror_Polyline. It uses much less memory than a 
+    PyMirror_Plane per segment and finds the segment a ray hits without 
+    testing each one.
+    """
+
+    cdef Mirror_Polyline* c_data
+
+    def __cinit__(self, points, double reflectivity=1.0, bint closed=False):
+        """
+        Creates an instance of PyMirror_Polyline.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            The vertices of the segments with shape (N, 2), N >= 2.
+        reflectivity : double, optional
+            The fraction of a ray's weight that is reflected, must be between
+            0 and 1. The default is 1.0.
+        closed : bool, optional
+            If True a segment from the last point to the first is added, 
+            making a polygon. The default is False.
+
+        Raises
+        ------
+        TypeError
+            Raised if points has the wrong shape.
+        ValueError
+            Raised if there are fewer than two points or reflectivity is 
+            invalid.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        self.c_data = new Mirror_Polyline(_points_to_vector("points", points, closed),
+                                          reflectivity)
+
+        self._load_Polyline(<Polyline*>self.c_data)
+
+    @property
+    def reflectivity(self):
+        """
+        The fraction of a ray's weight that is reflected, must be between 0
+        and 1.
+
+        Returns
+        -------
+        double
+            The reflectivity of the mirror.
+
+        """
+
+        return dereference(self.c_data).reflectivity
+    @reflectivity.setter
+    def reflectivity(self, double reflectivity):
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        dereference(self.c_data).reflectivity = reflectivity
+
+# class PyRefract_Polyline
+
+cdef class PyRefract_Polyline(_PyPolyline):
+    """
+    A class to represent a refractive boundary made of connected line 
+    segments. Mirrors C++ class Refract_Polyline.
+    """
+
+    cdef Refract_Polyline* c_data
+
+    def __cinit__(self, points, double n1=1.0, double n2=1.0, double a1=0.0, 
+                  double a2=0.0, bint closed=False):
+        """
+        Creates an instance of PyRefract_Polyline.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            The vertices of the segments with shape (N, 2), N >= 2.
+        n1 : double, optional
+            The refractive index on the left of the segments. Left is defined
+            as left of the vector from a segment's start to its end. The 
+            default is 1.0.
+        n2 : double, optional
+            The refractive index on the right of the segments. The default is
+            1.0.
+        a1 : double, optional
+            The absorption coefficient of the medium on the left of the 
+            segments. The default is 0.0.
+        a2 : double, optional
+            The absorption coefficient of the medium on the right of the 
+            segments. The default is 0.0.
+        closed : bool, optional
+            If True a segment from the last point to the first is added, 
+            making a polygon. The default is False.
+
+        Raises
+        ------
+        TypeError
+            Raised if points has the wrong shape.
+        ValueError
+            Raised if there are fewer than two points or an absorption 
+            coefficient is negative.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if a1 < 0.0 or a2 < 0.0:
+            raise ValueError("absorption coefficients cannot be less than zero")
+
+        self.c_data = new Refract_Polyline(_points_to_vector("points", points, closed),
+                                           n1, n2, a1, a2)
+
+        self._load_Polyline(<Polyline*>self.c_data)
+
+    @property
+    def n1(self):
+        """
+        The refractive index on the left of the segments.
+
+        Returns
+        -------
+        double
+            The refractive index n1.
+
+        """
+        
+        return dereference(self.c_data).n1
+    @n1.setter
+    def n1(self, double n1):
+        if n1 <= 0.0:
+            raise ValueError("n1 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n1 = n1
+    
+    @property
+    def n2(self):
+        """
+        The refractive index on the right of the segments.
 
-        # Make array read-only as Plane.start can't be set trivially
-        start_np.flags.writeable = False
+        Returns
+        -------
+        double
+            The refractive index n2.
 
-        return start_np
-    @start.setter
-    def start(self, double[:] start not None):
-        if tuple(start.shape) != _arr_shape:
-            raise wrong_np_shape_except("start", start)
+        """
         
-        self.c_plane_ptr.set_start(make_arr_from_numpy(start))
+        return dereference(self.c_data).n2
+    @n2.setter
+    def n2(self, double n2):
+        if n2 <= 0.0:
+            raise ValueError("n2 cannot be less than or equal to zero")
+
+        dereference(self.c_data).n2 = n2
 
     @property
-    def end(self):
+    def a1(self):
         """
-        The end point of the plane. Can be set as a copy of the passed numpy
-        array.
+        The absorption coefficient of the medium on the left of the segments.
 
         Returns
         -------
-        end_np : numpy.ndarray
-            A read only numpy view with shape (2,) of the end point.
+        double
+            The absorption coefficient a1.
 
         """
-        
-        cdef np.ndarray end_np = make_np_view_from_arr(self.c_plane_ptr.get_end(), self)
 
-        # Make array read-only as Plane.start can't be set trivially
-        end_np.flags.writeable = False
+        return dereference(self.c_data).a1
+    @a1.setter
+    def a1(self, double a1):
+        if a1 < 0.0:
+            raise ValueError("a1 cannot be less than zero")
 
-        return end_np
-    @end.setter
-    def end(self, double[:] end not None):
-        if tuple(end.shape) != _arr_shape:
-            raise wrong_np_shape_except("end", end)
+        dereference(self.c_data).a1 = a1
 
-        self.c_plane_ptr.set_end(make_arr_from_numpy(end))
-        
-    def plot(self):
+    @property
+    def a2(self):
         """
-        Returns a numpy array that can be used to plot the plane.
+        The absorption coefficient of the medium on the right of the 
+        segments.
 
         Returns
         -------
-        numpy.ndarray
-            A numpy array with shape (2, 2). The first index spcifies the start
-            or end points.
+        double
+            The absorption coefficient a2.
 
         """
-        
-        points = np.empty((2, 2), dtype=np.double)
-        
-        points[0] = self.start
-        points[1] = self.end
-        
-        return points
 
-# class PyMirror_Plane
+        return dereference(self.c_data).a2
+    @a2.setter
+    def a2(self, double a2):
+        if a2 < 0.0:
+            raise ValueError("a2 cannot be less than zero")
 
-cdef class PyMirror_Plane(_PyPlane):
+        dereference(self.c_data).a2 = a2
+
+# class PyScreen_Polyline
+
+cdef class PyScreen_Polyline(_PyPolyline):
     """
-    A class to represent a plane mirror. Mirrors C++ class Mirror_Plane.
+    A class to represent a screen made of connected line segments, rays stop
+    when they hit it. Mirrors C++ class Screen_Polyline.
+    """
+
+    cdef Screen_Polyline* c_data
+
+    def __cinit__(self, points, bint closed=False):
+        """
+        Creates an instance of PyScreen_Polyline.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            The vertices of the segments with shape (N, 2), N >= 2.
+        closed : bool, optional
+            If True a segment from the last point to the first is added, 
+            making a polygon. The default is False.
+
+        Raises
+        ------
+        TypeError
+            Raised if points has the wrong shape.
+        ValueError
+            Raised if there are fewer than two points.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.c_data = new Screen_Polyline(_points_to_vector("points", points, closed))
+
+        self._load_Polyline(<Polyline*>self.c_data)
+
+# class _PyBezier
+
+cdef class _PyBezier(_PyComponent):
     """
+    A class to mirror the C++ Bezier class which represents a freeform curve
+    made of cubic Bezier segments. Segment i has control points 3i to 3i + 3,
+    so there must be 3m + 1 control points for m segments. Each segment is
+    split into 2**depth pieces whose bounding boxes are cached and rebuilt
+    when points or depth is set. Not intended to be initialised.
     
-    cdef Mirror_Plane* c_data
+    ...
     
-    def __cinit__(self, double[:] start not None, double[:] end not None):
+    Attributes
+    ----------
+    
+    points : numpy.ndarray
+        The control points of the segments.
+    depth : int
+        The number of times each segment is halved for the cached bounds.
+    
+    Methods
+    -------
+    
+    plot(n_points=20) : numpy.ndarray
+        Returns a numpy array for plotting the curve with shape (N, 2).
+    
+    """
+
+    cdef Bezier* c_bezier_ptr
+
+    cdef _load_Bezier(self, Bezier* bezier_ptr):
         """
-        Creates an instance of PyMirror_Plane.
+        Sets the Bezier and component pointers.
 
         Parameters
         ----------
-        start : numpy.ndarray
-            The start point of the plane. It should be a numpy.ndarray with 
-            shape (2,).
-        end : numpy.ndarray
-            The end point of the plane. It should be a numpy.ndarray with 
-            shape (2,).
+        bezier_ptr : Bezier*
+            Pointer to the C++ Bezier.
 
         Returns
         -------
         None.
+        
+        """
 
+        self.c_bezier_ptr = bezier_ptr
+        self._load_component(<Component*>bezier_ptr)
+
+    def _tangent_slots_dict(self):
+        """
+        Returns a dictionary mapping parameter names to the indices of the C++
+        component's tangent parameters. Bezier curves have none.
         """
 
-        if tuple(start.shape) != _arr_shape:
-            raise wrong_np_shape_except("start", start)
+        return {}
 
-        if tuple(end.shape) != _arr_shape:
-            raise wrong_np_shape_except("end", end)
-        
-        self.c_data = new Mirror_Plane(make_arr_from_numpy(start), 
-                                       make_arr_from_numpy(end))
-        
-        self._load_Plane(<Plane*>self.c_data)
+    def __len__(self):
+        """Returns the number of segments"""
 
-        
-# class Pyrefract_Plane
+        return self.c_bezier_ptr.size()
 
-cdef class PyRefract_Plane(_PyPlane):
+    @property
+    def points(self):
+        """
+        The control points of the segments. Can be set as a copy of the passed
+        numpy array, which must have 3m + 1 points with m >= 1. Setting 
+        rebuilds the cached bounds.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy of the control points with shape (N, 2).
+
+        """
+
+        cdef const vector[arr]* pts = &self.c_bezier_ptr.get_points()
+        cdef Py_ssize_t i
+
+        ans = np.empty((pts.size(), 2), dtype=np.double)
+
+        for i in range(pts.size()):
+            ans[i, 0] = dereference(pts)[i][0]
+            ans[i, 1] = dereference(pts)[i][1]
+
+        return ans
+    @points.setter
+    def points(self, points):
+        self.c_bezier_ptr.set_points(_points_to_vector("points", points, False))
+
+    @property
+    def depth(self):
+        """
+        The number of times each segment is halved for the cached bounding 
+        boxes, between 0 and 16. Deeper subdivision gives tighter boxes for 
+        strongly curved segments at the cost of more boxes to test.
+
+        Returns
+        -------
+        int
+            The subdivision depth.
+
+        """
+
+        return self.c_bezier_ptr.get_depth()
+    @depth.setter
+    def depth(self, int depth):
+        self.c_bezier_ptr.set_depth(depth)
+
+    def plot(self, int n_points=20):
+        """
+        Returns a numpy array that can be used to plot the curve.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            The number of points per segment. The default is 20.
+
+        Raises
+        ------
+        ValueError
+            Raised if n_points is less than 2.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (N, 2) of points along the curve.
+
+        """
+
+        cdef size_t seg, n_segs = self.c_bezier_ptr.size()
+        cdef Py_ssize_t i, ind = 0
+        cdef arr p
+
+        if n_points < 2:
+            raise ValueError("n_points must be at least 2")
+
+        ans = np.empty((n_segs * (n_points - 1) + 1, 2), dtype=np.double)
+
+        for seg in range(n_segs):
+            for i in range(n_points - 1):
+                p = self.c_bezier_ptr.point(seg, i / (n_points - 1.0))
+                ans[ind, 0] = p[0]
+                ans[ind, 1] = p[1]
+                ind += 1
+
+        p = self.c_bezier_ptr.point(n_segs - 1, 1.0)
+        ans[ind, 0] = p[0]
+        ans[ind, 1] = p[1]
+
+        return ans
+
+
+def bspline_to_bezier(points, bint closed=False):
     """
-    A class to represent a planar boundary at which refraction occurs. Mirrors
-    C++ class Refract_Plane.
+    Converts the control points of a uniform cubic B-spline to the control 
+    points of the equivalent cubic Bezier segments, which can be passed to 
+    PyMirror_Bezier and PyRefract_Bezier.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        The B-spline control points with shape (N, 2). N >= 4 if open and 
+        N >= 3 if closed.
+    closed : bool, optional
+        If True the spline is periodic and forms a closed curve. The default
+        is False.
+
+    Raises
+    ------
+    TypeError
+        Raised if points has the wrong shape.
+    ValueError
+        Raised if there are too few points.
+
+    Returns
+    -------
+    numpy.ndarray
+        The Bezier control points with shape (3m + 1, 2) for m segments.
+
     """
-    
-    cdef Refract_Plane* c_data
-    
-    def __cinit__(self, double[:] start not None, double[:] end not None, double n1=1.0, 
-                  double n2=1.0):
+
+    p = np.asarray(_many_points("points", points))
+
+    if closed:
+        if p.shape[0] < 3:
+            raise ValueError("a closed B-spline needs at least three points")
+
+        p = np.concatenate((p, p[:3]))
+    elif p.shape[0] < 4:
+        raise ValueError("an open B-spline needs at least four points")
+
+    p0, p1, p2, p3 = p[:-3], p[1:-2], p[2:-1], p[3:]
+
+    ans = np.empty((3 * p0.shape[0] + 1, 2), dtype=np.double)
+    ans[0:-1:3] = (p0 + 4.0 * p1 + p2) / 6.0
+    ans[1::3] = (2.0 * p1 + p2) / 3.0
+    ans[2::3] = (p1 + 2.0 * p2) / 3.0
+    ans[-1] = (p1[-1] + 4.0 * p2[-1] + p3[-1]) / 6.0
+
+    return ans
+
+# class PyMirror_Bezier
+
+cdef class PyMirror_Bezier(_PyBezier):
+    """
+    A class to represent a freeform mirror made of cubic Bezier segments. 
+    Mirrors C++ class Mirror_Bezier.
+    """
+
+    cdef Mirror_Bezier* c_data
+
+    def __cinit__(self, points, double reflectivity=1.0, int depth=3):
         """
-        Creates an instance of PyRefract_Plane.
+        Creates an instance of PyMirror_Bezier.
 
         Parameters
         ----------
-        start : numpy.ndarray
-            The start point of the mirror plane. It should be a numpy.ndarray
-            with shape (2,).
-        end : numpy.ndarray
-            The end point of the mirror plane. It should be a numpy.ndarray
-            with shape (2,).
+        points : numpy.ndarray
+            The control points with shape (3m + 1, 2) for m >= 1 segments.
+        reflectivity : double, optional
+            The fraction of a ray's weight that is reflected, must be between
+            0 and 1. The default is 1.0.
+        depth : int, optional
+            The number of times each segment is halved for the cached 
+            bounding boxes, between 0 and 16. The default is 3.
+
+        Raises
+        ------
+        TypeError
+            Raised if points has the wrong shape.
+        ValueError
+            Raised if the number of points or depth or reflectivity is 
+            invalid.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        self.c_data = new Mirror_Bezier(_points_to_vector("points", points, False),
+                                        reflectivity, depth)
+
+        self._load_Bezier(<Bezier*>self.c_data)
+
+    @property
+    def reflectivity(self):
+        """
+        The fraction of a ray's weight that is reflected, must be between 0
+        and 1.
+
+        Returns
+        -------
+        double
+            The reflectivity of the mirror.
+
+        """
+
+        return dereference(self.c_data).reflectivity
+    @reflectivity.setter
+    def reflectivity(self, double reflectivity):
+        if not 0.0 <= reflectivity <= 1.0:
+            raise ValueError("reflectivity must be between 0 and 1")
+
+        dereference(self.c_data).reflectivity = reflectivity
+
+# class PyRefract_Bezier
+
+cdef class PyRefract_Bezier(_PyBezier):
+    """
+    A class to represent a freeform refractive boundary made of cubic Bezier
+    segments. Mirrors C++ class Refract_Bezier.
+    """
+
+    cdef Refract_Bezier* c_data
+
+    def __cinit__(self, points, double n1=1.0, double n2=1.0, double a1=0.0, 
+                  double a2=0.0, int depth=3):
+        """
+        Creates an instance of PyRefract_Bezier.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            The control points with shape (3m + 1, 2) for m >= 1 segments.
         n1 : double, optional
-            The refractive index on the left of the planar boundary. Left is 
-            defined as left of the vector start->end. The default is 1.0.
+            The refractive index on the left of the curve. Left is defined as
+            left of the direction from the first control point to the last 
+            along the curve. The default is 1.0.
         n2 : double, optional
-            The refractive index on the right of the planar boundary. Right is 
-            defined as right of the vector start->end. The default is 1.0.
+            The refractive index on the right of the curve. The default is 
+            1.0.
+        a1 : double, optional
+            The absorption coefficient of the medium on the left of the 
+            curve. The default is 0.0.
+        a2 : double, optional
+            The absorption coefficient of the medium on the right of the 
+            curve. The default is 0.0.
+        depth : int, optional
+            The number of times each segment is halved for the cached 
+            bounding boxes, between 0 and 16. The default is 3.
+
+        Raises
+        ------
+        TypeError
+            Raised if points has the wrong shape.
+        ValueError
+            Raised if the number of points or depth is invalid or an 
+            absorption coefficient is negative.
 
         Returns
         -------
         None.
 
         """
-        
-        # Verify start and end arrays have correct shape
-        if tuple(start.shape) != _arr_shape:
-            raise wrong_np_shape_except("start", start)
 
-        if tuple(end.shape) != _arr_shape:
-            raise wrong_np_shape_except("end", end)
-        
-        self.c_data = new Refract_Plane(make_arr_from_numpy(start), 
-                                        make_arr_from_numpy(end), n1, n2)
-        
-        self._load_Plane(<Plane*>self.c_data)
-    
+        if a1 < 0.0 or a2 < 0.0:
+            raise ValueError("absorption coefficients cannot be less than zero")
+
+        self.c_data = new Refract_Bezier(_points_to_vector("points", points, False),
+                                         n1, n2, a1, a2, depth)
+
+        self._load_Bezier(<Bezier*>self.c_data)
+
     @property
     def n1(self):
         """
-        The refractive index on the left of the planar boundary. Left is 
-        defined as left of the vector start->end.
+        The refractive index on the left of the curve.
 
         Returns
         -------
@@ -623,8 +6700,7 @@ cdef class PyRefract_Plane(_PyPlane):
     @property
     def n2(self):
         """
-        The refractive index on the right of the planar boundary. Right is 
-        defined as right of the vector start->end.
+        The refractive index on the right of the curve.
 
         Returns
         -------
@@ -640,26 +6716,118 @@ cdef class PyRefract_Plane(_PyPlane):
             raise ValueError("n2 cannot be less than or equal to zero")
 
         dereference(self.c_data).n2 = n2
-        
-# class Screen_Plane
 
-cdef class PyScreen_Plane(_PyPlane):
-    """A class to represent a planar, absorbing screen"""
+    @property
+    def a1(self):
+        """
+        The absorption coefficient of the medium on the left of the curve.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a1.
 
-    cdef Screen_Plane* c_data
-    
-    def __cinit__(self, double[:] start not None, double[:] end not None):
         """
-        Creates an instance of PyScreen_Plane.
+
+        return dereference(self.c_data).a1
+    @a1.setter
+    def a1(self, double a1):
+        if a1 < 0.0:
+            raise ValueError("a1 cannot be less than zero")
+
+        dereference(self.c_data).a1 = a1
+
+    @property
+    def a2(self):
+        """
+        The absorption coefficient of the medium on the right of the curve.
+
+        Returns
+        -------
+        double
+            The absorption coefficient a2.
+
+        """
+
+        return dereference(self.c_data).a2
+    @a2.setter
+    def a2(self, double a2):
+        if a2 < 0.0:
+            raise ValueError("a2 cannot be less than zero")
+
+        dereference(self.c_data).a2 = a2
+
+
+# Transfer table
+
+cdef class PyTransfer(_PyComponent):
+    """
+    A class to represent a frozen subsystem, e.g. a collimator, by a table of
+    the rays leaving it for those entering through its input port. Mirrors 
+    C++ class Transfer. Rays entering the port are interpolated from the 
+    table instead of being traced through the subsystem, which must not be 
+    in the components list as well. Use tabulate() to create one.
+
+    The port is a line segment from start to end with the subsystem on its 
+    left, as the surfaces of PyLens are ordered anticlockwise. Entry rays are
+    given by the fraction s of the way from start to end they cross the port
+    and the angle of their direction anticlockwise from the port's normal 
+    pointing into the subsystem. Exits are interpolated bilinearly between 
+    the nodes of the table, except in cells where a node's ray stops, where 
+    the nearest node is used. A hit uses two interactions, moving the ray to
+    the port and then to its exit. Rays with one interaction left or 
+    entering at angles outside the table stop at the port. Rays leaving
+    through the port pass through it. Derivatives aren't propagated through 
+    the table.
+    """
+
+    cdef Transfer* c_data
+    cdef readonly double position_error, direction_error, unresolved_fraction
+
+    def __cinit__(self, double[:] start not None, double[:] end not None, s_nodes, 
+                  angle_nodes, exits, stops, double position_error=0.0, 
+                  double direction_error=0.0, double unresolved_fraction=0.0):
+        """
+        Creates an instance of PyTransfer.
 
         Parameters
         ----------
         start : numpy.ndarray
-            The start point of the plane. It should be a numpy.ndarray with 
-            shape (2,).
+            The start point of the port with shape (2,).
         end : numpy.ndarray
-            The end point of the plane. It should be a numpy.ndarray with 
-            shape (2,).
+            The end point of the port with shape (2,).
+        s_nodes : numpy.ndarray
+            The increasing fractions along the port of the table's nodes with
+            shape (N_s,), N_s >= 2.
+        angle_nodes : numpy.ndarray
+            The increasing angles in radians of the table's nodes with shape
+            (N_a,), N_a >= 2.
+        exits : numpy.ndarray
+            The exits of the nodes' rays with shape (N_s, N_a, 5). The last 
+            axis holds the x and y of the exit position, or where the ray 
+            stops, the x and y of its normalised direction and the fraction of
+            its weight that remains.
+        stops : numpy.ndarray
+            Whether each node's ray stops in the subsystem, with shape 
+            (N_s, N_a).
+        position_error : double, optional
+            The estimated largest error of the interpolated exit positions. 
+            The default is 0.0.
+        direction_error : double, optional
+            The estimated largest error in radians of the interpolated exit
+            directions. The default is 0.0.
+        unresolved_fraction : double, optional
+            The fraction of the table's cells, weighted by their area in s and
+            angle, whose interpolation doesn't meet position_error and 
+            direction_error. The default is 0.0.
+
+        Raises
+        ------
+        TypeError
+            Raised if an array has the wrong shape.
+        ValueError
+            Raised if s_nodes or angle_nodes have less than two elements or 
+            aren't increasing.
 
         Returns
         -------
@@ -667,375 +6835,601 @@ cdef class PyScreen_Plane(_PyPlane):
 
         """
 
+        cdef Py_ssize_t i, j
+        cdef const double[:, :, ::1] ex
+        cdef vector[Transfer_Exit] c_exits
+        cdef Transfer_Exit e
+
         if tuple(start.shape) != _arr_shape:
             raise wrong_np_shape_except("start", start)
 
         if tuple(end.shape) != _arr_shape:
             raise wrong_np_shape_except("end", end)
-        
-        self.c_data = new Screen_Plane(make_arr_from_numpy(start), 
-                                       make_arr_from_numpy(end))
-        
-        self._load_Plane(<Plane*>self.c_data)
 
-# Spherical components
-# class _PySpherical
+        s_np = np.ascontiguousarray(s_nodes, dtype=np.double)
+        a_np = np.ascontiguousarray(angle_nodes, dtype=np.double)
 
-cdef class _PySpherical(_PyComponent):
-    """
-    Class to describe a circular arc, mirrors C++ class Spherical. Not intended
-    to be initialised.
-    """
-    
-    cdef Spherical* c_sph_ptr
-    
+        if s_np.ndim != 1 or a_np.ndim != 1:
+            raise TypeError("expected s_nodes and angle_nodes to be 1d arrays")
 
-    cdef _load_Sph(self, Spherical* sph_ptr):
+        cdef Py_ssize_t N_s = s_np.shape[0], N_a = a_np.shape[0]
+        ex_np = np.ascontiguousarray(exits, dtype=np.double)
+        st = np.asarray(stops, dtype=np.bool_)
+
+        if ex_np.shape != (N_s, N_a, 5):
+            raise TypeError(f"expected exits to have shape ({N_s}, {N_a}, 5) but got array "
+                            f"with shape {ex_np.shape}")
+
+        if st.shape != (N_s, N_a):
+            raise TypeError(f"expected stops to have shape ({N_s}, {N_a}) but got array "
+                            f"with shape {st.shape}")
+
+        ex = ex_np
+        c_exits.reserve(N_s * N_a)
+
+        for i in range(N_s):
+            for j in range(N_a):
+                e.pos[0], e.pos[1] = ex[i, j, 0], ex[i, j, 1]
+                e.v[0], e.v[1] = ex[i, j, 2], ex[i, j, 3]
+                e.weight = ex[i, j, 4]
+                e.stops = st[i, j]
+                c_exits.push_back(e)
+
+        self.c_data = new Transfer(make_arr_from_numpy(start), make_arr_from_numpy(end),
+                                   s_np, a_np, c_exits)
+        self._load_component(<Component*>self.c_data)
+
+        self.position_error = position_error
+        self.direction_error = direction_error
+        self.unresolved_fraction = unresolved_fraction
+
+    @staticmethod
+    def tabulate(list components, start, end, double max_angle, int n=100, 
+                 double alpha=0.0, double tol=1e-6, double angle_tol=1e-6, 
+                 int n_s=9, int n_angle=9, int max_depth=10, int max_nodes=257,
+                 bint sequential=False):
         """
-        Loads spherical properties, namely centre. Also sets the spherical and
-        component pointers.
+        Tabulates the rays leaving the subsystem made of components for those
+        entering through the port from start to end on an adaptive grid. 
+        Starting from evenly spaced nodes, the interval between two nodes in 
+        s or angle is split while the ray traced from its midpoint leaves 
+        further than tol from, or at an angle of more than angle_tol to, the
+        interpolated exit, or only some of the rays stop. Intervals aren't 
+        split more than max_depth times and, once an axis would go over 
+        max_nodes nodes, only its intervals with the largest errors are 
+        split.
+
+        Cells with an edge whose midpoint still misses the tolerances, e.g. 
+        across a discontinuity such as rays that only just miss a lens, or 
+        where only some rays stop, are unresolved and their area fraction is
+        reported as unresolved_fraction. The largest errors found at the 
+        other midpoints are reported as position_error and direction_error. 
+        They estimate the errors of the table but aren't strict bounds, e.g.
+        the tabulation can miss features narrower than the initial grid.
 
         Parameters
         ----------
-        sph_ptr : Spherical*
-            Pointer to the C++ Spherical.
+        components : list
+            The components of the subsystem. See PyTrace().
+        start : numpy.ndarray
+            The start point of the port with shape (2,).
+        end : numpy.ndarray
+            The end point of the port with shape (2,).
+        max_angle : double
+            The largest angle in radians entry rays make with the port's 
+            normal, which must be in (0, pi / 2).
+        n : int, optional
+            The number of interactions rays are traced through the subsystem
+            for. Those still being traced after n are taken to stop. The 
+            default is 100.
+        alpha : double, optional
+            The absorption coefficient of the medium the rays enter the 
+            subsystem from. The default is 0.0.
+        tol : double, optional
+            The largest error of the exit positions before an interval is 
+            split. The default is 1e-6.
+        angle_tol : double, optional
+            The largest error in radians of the exit directions before an 
+            interval is split. The default is 1e-6.
+        n_s : int, optional
+            The initial number of nodes along the port. The default is 9.
+        n_angle : int, optional
+            The initial number of angles. The default is 9.
+        max_depth : int, optional
+            The most times an initial interval can be split. The default is 
+            10.
+        max_nodes : int, optional
+            The most nodes along each axis. The default is 257.
+        sequential : bool, optional
+            Whether components are an ordered surface list. See PyTrace(). 
+            The default is False.
+
+        Raises
+        ------
+        TypeError
+            Raised if start or end has the wrong shape or an element in 
+            components is not recognised as a component.
+        ValueError
+            Raised if max_angle isn't in (0, pi / 2), n_s or n_angle is less 
+            than two or n_s or n_angle is more than max_nodes.
 
         Returns
         -------
-        None.
-        
+        PyTransfer
+            The table of the subsystem.
+
         """
 
-        self.c_sph_ptr = sph_ptr
-        self._load_component(<Component*>sph_ptr)
-    
+        start_np = np.array(start, dtype=np.double)
+        end_np = np.array(end, dtype=np.double)
+
+        if start_np.shape != (2,):
+            raise wrong_np_shape_except("start", start_np)
+
+        if end_np.shape != (2,):
+            raise wrong_np_shape_except("end", end_np)
+
+        if not 0.0 < max_angle < np.pi / 2:
+            raise ValueError("max_angle must be between 0 and pi / 2")
+
+        if n_s < 2 or n_angle < 2:
+            raise ValueError("n_s and n_angle must be at least two")
+
+        if n_s > max_nodes or n_angle > max_nodes:
+            raise ValueError("n_s and n_angle can't be more than max_nodes")
+
+        along = end_np - start_np
+        normal = np.array([-along[1], along[0]]) / np.hypot(along[0], along[1])
+
+        def trace(s, a):
+            """Returns the exits and whether the rays entering at s and a stop"""
+            s, a = np.broadcast_arrays(s, a)
+            starts = start_np + s.reshape(-1, 1) * along
+            c, sn = np.cos(a.ravel()), np.sin(a.ravel())
+            dirs = np.column_stack([c * normal[0] - sn * normal[1], sn * normal[0] + c * normal[1]])
+
+            N = starts.shape[0]
+            pos = np.empty((N, n + 1, 2))
+            v = np.empty((N, 2))
+            weights = np.empty(N)
+            status = np.empty(N, dtype=np.int32)
+
+            PyTrace_Bundle(components, starts, dirs, n, alpha, out_positions=pos, 
+                           out_directions=v, out_status=status, out_weights=weights,
+                           sequential=sequential)
+
+            # Escaped rays end a step past their exit
+            passes = status == TRACE_ESCAPED
+            exits = np.column_stack([pos[:, -1] - passes[:, None] * v, v, weights])
+
+            return exits.reshape(s.shape + (5,)), ~passes.reshape(s.shape)
+
+        s_nodes = np.linspace(0.0, 1.0, n_s)
+        a_nodes = np.linspace(-max_angle, max_angle, n_angle)
+        min_ds = 1.0 / (n_s - 1) / 2**max_depth
+        min_da = 2 * max_angle / (n_angle - 1) / 2**max_depth
+
+        while True:
+            exits, stops = trace(s_nodes[:, None], a_nodes[None, :])
+
+            s_mid = (s_nodes[1:] + s_nodes[:-1]) / 2
+            a_mid = (a_nodes[1:] + a_nodes[:-1]) / 2
+
+            # Errors of the midpoints between neighbouring nodes in s then in angle
+            pos_s, dir_s, score_s = _transfer_errors(exits[:-1], exits[1:], stops[:-1], stops[1:], 
+                                                     *trace(s_mid[:, None], a_nodes[None, :]), 
+                                                     tol, angle_tol)
+            pos_a, dir_a, score_a = _transfer_errors(exits[:, :-1], exits[:, 1:], stops[:, :-1], 
+                                                     stops[:, 1:], *trace(s_nodes[:, None], a_mid[None, :]),
+                                                     tol, angle_tol)
+
+            split_s = _transfer_splits(score_s.max(axis=1), np.diff(s_nodes) > min_ds, 
+                                       max_nodes - s_nodes.shape[0])
+            split_a = _transfer_splits(score_a.max(axis=0), np.diff(a_nodes) > min_da, 
+                                       max_nodes - a_nodes.shape[0])
+
+            if not split_s.any() and not split_a.any():
+                break
+
+            s_nodes = np.sort(np.concatenate([s_nodes, s_mid[split_s]]))
+            a_nodes = np.sort(np.concatenate([a_nodes, a_mid[split_a]]))
+
+        # Cells with an edge that didn't meet the tolerances are unresolved
+        fails_s, fails_a = score_s > 1.0, score_a > 1.0
+        unresolved = fails_s[:, :-1] | fails_s[:, 1:] | fails_a[:-1] | fails_a[1:]
+        areas = np.diff(s_nodes)[:, None] * np.diff(a_nodes)[None, :]
+
+        return PyTransfer(start_np, end_np, s_nodes, a_nodes, exits, stops, 
+                          max(pos_s[~fails_s].max(initial=0.0), pos_a[~fails_a].max(initial=0.0)), 
+                          max(dir_s[~fails_s].max(initial=0.0), dir_a[~fails_a].max(initial=0.0)),
+                          areas[unresolved].sum() / areas.sum())
+
     @property
-    def centre(self):
+    def start(self):
         """
-        The centre of the ciruclar arc. Can be set as a copy of the passed 
-        numpy array.
+        The start point of the port.
 
         Returns
         -------
-        centre_np : numpy.ndarray
-            A numpy view with shape (2,) of the centre.
+        numpy.ndarray
+            A copy with shape (2,) of the start point.
 
         """
 
-        return make_np_view_from_arr(self.c_sph_ptr.centre, self)
-    @centre.setter
-    def centre(self, double[:] centre not None):
-        if tuple(centre.shape) != _arr_shape:
-            raise wrong_np_shape_except("centre", centre)
+        cdef arr s = self.c_data.get_start()
+
+        return np.array([s[0], s[1]])
 
-        dereference(self.c_sph_ptr).centre = make_arr_from_numpy(centre)
-        
     @property
-    def R(self):
+    def end(self):
         """
-        The radius of the circular arc, must be positive.
+        The end point of the port.
 
         Returns
         -------
-        double
-            The radius of the circular arc.
+        numpy.ndarray
+            A copy with shape (2,) of the end point.
 
         """
-        
-        return dereference(self.c_sph_ptr).R
-    @R.setter
-    def R(self, double R):
-        if R <= 0.0:
-            raise ValueError("R cannot be less than or equal to zero")
 
-        dereference(self.c_sph_ptr).R = R
-        
+        cdef arr e = self.c_data.get_end()
+
+        return np.array([e[0], e[1]])
+
     @property
-    def start(self):
+    def s_nodes(self):
         """
-        The start angle of the arc, in radians. It is measured anti-clockwise 
-        from the x axis. Must be less than property end.
+        The fractions along the port of the table's nodes.
 
         Returns
         -------
-        double
-            The start angle of the arc.
+        numpy.ndarray
+            A copy with shape (N_s,) of the nodes.
 
         """
-        
-        return dereference(self.c_sph_ptr).get_start()
-    @start.setter
-    def start(self, double start):
-        if start >= self.end:
-            raise ValueError("start angle must be less than end angle")
 
-        dereference(self.c_sph_ptr).set_start(start)
-        
+        return np.array(self.c_data.get_s_nodes(), dtype=np.double)
+
     @property
-    def end(self):
+    def angle_nodes(self):
         """
-        The end angle of the arc, in radians. It is measured anti-clockwise 
-        from the x axis. Must be greater than property start.
+        The angles of the table's nodes in radians.
 
         Returns
         -------
-        double
-            The end angle of the arc.
+        numpy.ndarray
+            A copy with shape (N_a,) of the nodes.
 
         """
-        
-        return dereference(self.c_sph_ptr).get_end()
-    @end.setter
-    def end(self, double end):
-        if end <= self.start:
-            raise ValueError("end angle must be greater than start angle")
 
-        dereference(self.c_sph_ptr).set_end(end)
+        return np.array(self.c_data.get_angle_nodes(), dtype=np.double)
 
-    def update_start_end(self, double new_start, double new_end):
+    @property
+    def exits(self):
         """
-        Updates start and end simultaneously. This is useful as it means you
-        don't have to ensure self.start < self.end while setting each property
-        individually. new_start must be less than new_end.
+        The exits of the nodes' rays, see PyTransfer().
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy with shape (N_s, N_a, 5) of the exits.
+
+        """
+
+        cdef Py_ssize_t k
+        cdef Py_ssize_t N_s = self.c_data.get_s_nodes().size()
+        cdef Py_ssize_t N_a = self.c_data.get_angle_nodes().size()
+        cdef double[:, ::1] ans = np.empty((N_s * N_a, 5))
+        cdef Transfer_Exit e
+
+        for k in range(N_s * N_a):
+            e = self.c_data.get_exits()[k]
+            ans[k, 0], ans[k, 1] = e.pos[0], e.pos[1]
+            ans[k, 2], ans[k, 3] = e.v[0], e.v[1]
+            ans[k, 4] = e.weight
+
+        return np.asarray(ans).reshape(N_s, N_a, 5)
+
+    @property
+    def stops(self):
+        """
+        Whether each node's ray stops in the subsystem.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy with shape (N_s, N_a) of the flags.
+
+        """
+
+        cdef Py_ssize_t k
+        cdef Py_ssize_t N_s = self.c_data.get_s_nodes().size()
+        cdef Py_ssize_t N_a = self.c_data.get_angle_nodes().size()
+        cdef np.npy_bool[::1] ans = np.empty(N_s * N_a, dtype=np.bool_)
+
+        for k in range(N_s * N_a):
+            ans[k] = self.c_data.get_exits()[k].stops
+
+        return np.asarray(ans).reshape(N_s, N_a)
+
+    def _tangent_slots_dict(self):
+        """Returns an empty dictionary as the table has no tangent parameters"""
+
+        return {}
+
+    def plot(self):
+        """
+        Returns a numpy array that can be used to plot the port.
+
+        Returns
+        -------
+        numpy.ndarray
+            A numpy array with shape (2, 2). The first index specifies the 
+            start or end points.
+
+        """
+
+        return np.array([self.start, self.end])
+
+
+def _transfer_errors(exits_0, exits_1, stops_0, stops_1, exits_mid, stops_mid, 
+                     double tol, double angle_tol):
+    """
+    Returns the errors of the position and direction interpolated halfway 
+    between exits_0 and exits_1 from exits_mid, zero where any ray stops, and
+    the largest of the errors relative to tol and angle_tol, infinite where 
+    only some of the rays stop, see PyTransfer.tabulate().
+    """
+
+    passes = ~(stops_0 | stops_1 | stops_mid)
+    mixed = ~(stops_0 & stops_1 & stops_mid) & ~passes
+
+    pos = (exits_0[..., :2] + exits_1[..., :2]) / 2
+    v = (exits_0[..., 2:4] + exits_1[..., 2:4]) / 2
+    v_mid = exits_mid[..., 2:4]
+
+    pos_err = np.where(passes, np.hypot(*np.moveaxis(pos - exits_mid[..., :2], -1, 0)), 0.0)
+    dir_err = np.where(passes, np.abs(np.arctan2(v[..., 0] * v_mid[..., 1] - v[..., 1] * v_mid[..., 0],
+                                                 v[..., 0] * v_mid[..., 0] + v[..., 1] * v_mid[..., 1])), 0.0)
+
+    return pos_err, dir_err, np.where(mixed, np.inf, np.maximum(pos_err / tol, dir_err / angle_tol))
+
+
+def _transfer_splits(score, splittable, Py_ssize_t spare):
+    """
+    Returns which intervals to split, those splittable with a score above one,
+    keeping the spare nodes for the highest scores if there aren't enough, 
+    see PyTransfer.tabulate().
+    """
+
+    split = splittable & (score > 1.0)
+
+    if np.count_nonzero(split) > spare:
+        worst = np.argsort(np.where(split, -score, 0.0), kind="stable")[:max(spare, 0)]
+        split = np.zeros_like(split)
+        split[worst] = True
+
+    return split
+
+
+# Complex component
+
+cdef class PyComplex_Component(_PyComponent):
+    """
+    A class to represent a complex component. Mirrors C++ class 
+    Complex_Component.
+    """
+    
+    cdef Complex_Component* c_data
+    cdef list _components  # Sub-components, used to fingerprint the component
+    cdef readonly bint lens
+    
+    def __cinit__(self, list comps, bint lens=False):
+        """
+        Creates an instance of PyComplex_Component.
 
         Parameters
         ----------
-        new_start : double
-            The new start angle measured anticlockwise from the x axis.
-        new_end : double
-            The new end angle measured anticlockwise from the x axis.
+        comps : list 
+            The list of components which describe the complex component. They
+            should be one of the following: PyMirror_Plane, PyRefract_Plane,
+            PyScreen_Plane, PyMirror_Sph, PyRefract_Sph, PyMirror_Asph,
+            PyRefract_Asph, PyMirror_Polyline, PyRefract_Polyline, 
+            PyScreen_Polyline, PyMirror_Bezier, PyRefract_Bezier, 
+            PyComponent_Array or inherit from PyCC_Wrap.
+        lens : bool, optional
+            If True comps are the left arc, bottom plane, right arc and top 
+            plane of a lens, ordered as PyLens creates them. A ray entering
+            the lens is then refracted at the surface it leaves by in the 
+            same hit rather than after searching all the components again. 
+            Each refraction still counts as an interaction. The default is 
+            False.
 
         Raises
         ------
+        TypeError
+            Raised if an element in comps is not recognised as a component.
         ValueError
-            Raised if new_end <= new_start.
+            Raised if lens is True and comps are not alternately arcs and 
+            planes, starting with an arc.
 
         Returns
         -------
         None.
 
         """
+        
+        if lens:
+            self.c_data = <Complex_Component*>new Lens()
+        else:
+            self.c_data = new Complex_Component()
 
-        if new_end <= new_start:
-            raise ValueError("end angle must be greater than start angle")
-
-        dereference(self.c_sph_ptr).set_start(new_start)
-        dereference(self.c_sph_ptr).set_end(new_end)
+        self.c_component_ptr = shared_ptr[Component]( <Component*>self.c_data )
         
-    def plot(self, n_points=100):
+        _load_shared_ptrs(comps, dereference(self.c_data).comps)
+        self._components = list(comps)
+        self.lens = lens
+
+        if lens:
+            (<Lens*>self.c_data).check_surfaces()
+
+    def instance(self, offset=None, angle=None):
         """
-        Returns a numpy array that can be used to plot the arc.
+        Creates a complex component sharing this one's sub-components, placed 
+        in the scene by its own offset and angle. Changing a sub-component 
+        changes every instance of it.
 
         Parameters
         ----------
-        n_points : int, optional
-            The number of points returned. The default is 100.
+        offset : numpy.ndarray or None, optional
+            A numpy array with shape (2,) giving the offset of the instance. If
+            None the offset of this component is used. The default is None.
+        angle : double or None, optional
+            The angle of the instance. If None the angle of this component is
+            used. The default is None.
 
         Returns
         -------
-        points : numpy.ndarray
-            A numpy array with shape (n_points, 2).
+        PyComplex_Component
+            The new instance.
 
         """
-        
-        points = np.empty((n_points, 2), dtype=np.double)
-        
-        t = np.linspace(self.start, self.end, n_points)
-        
-        points[:, 0] = self.centre[0] + self.R*np.cos(t)
-        points[:, 1] = self.centre[1] + self.R*np.sin(t)
-        
-        return points
 
+        cdef PyComplex_Component ans = PyComplex_Component(self._components, lens=self.lens)
 
-# class PyMirror_Sph 
+        ans.offset = self.offset if offset is None else offset
+        ans.angle = self.angle if angle is None else angle
 
-cdef class PyMirror_Sph(_PySpherical):
-    """A class to represent a circular mirror. Mirrors C++ class Mirror_Sph."""
-    
-    cdef Mirror_Sph* c_data
-    
-    def __cinit__(self, double[:] centre not None, double R, double start, double end):
-        """
-        Creates an instance of PyMirror_Sph.
+        return ans
 
-        Parameters
-        ----------
-        centre : numpy.ndarray
-            The centre of the circular arc. It should be a numpy.ndarray with
-            shape (2,).
-        R : double
-            The radius of the arc.
-        start : double
-            The start angle of the arc, in radians. It is measured 
-            anti-clockwise from the x axis. Must be less than end.
-        end : double
-            The end angle of the arc, in radians. It is measured anti-clockwise 
-            from the x axis. Must be greater than start.
+    @property
+    def offset(self):
+        """
+        The translation applied after rotating the sub-components by angle to
+        place them in the scene. Rays are traced through the sub-components 
+        in their own frame, so moving the component doesn't change them. Can
+        be set as a copy of the passed numpy array.
 
         Returns
         -------
-        None.
+        numpy.ndarray
+            A copy with shape (2,) of the offset.
 
         """
 
-        if tuple(centre.shape) != _arr_shape:
-            raise wrong_np_shape_except("centre", centre)
+        cdef arr o = dereference(self.c_data).get_offset()
 
-        if R <= 0.0:
-            raise ValueError("R cannot be less than or equal to zero")
-                
-        self.c_data = new Mirror_Sph(make_arr_from_numpy(centre), R, start, 
-                                     end)
-        
-        self._load_Sph(<Spherical*>self.c_data)
+        return np.array([o[0], o[1]])
+    @offset.setter
+    def offset(self, double[:] offset not None):
+        if tuple(offset.shape) != _arr_shape:
+            raise wrong_np_shape_except("offset", offset)
 
+        dereference(self.c_data).set_transform(make_arr_from_numpy(offset), 
+                                               dereference(self.c_data).get_angle())
 
-# class PyrefractSph
+    @property
+    def angle(self):
+        """
+        The angle in radians the sub-components are rotated by anti-clockwise
+        about the origin before being translated by offset.
 
-cdef class PyRefract_Sph(_PySpherical):
+        Returns
+        -------
+        double
+            The angle of the component.
+
+        """
+
+        return dereference(self.c_data).get_angle()
+    @angle.setter
+    def angle(self, double angle):
+        dereference(self.c_data).set_transform(dereference(self.c_data).get_offset(), angle)
+
+# class PyComponent_Array
+
+cdef class PyComponent_Array:
     """
-    A class to describe a circular arc at which refraction occurs. Mirrors
-    C++ class Refract_Sph.
+    A collection of leaf components of one type created in a single call by
+    the many() static methods, e.g. PyMirror_Plane.many(). It can be used in
+    the components list of PyTrace() and PyComplex_Component in place of the
+    individual components without creating a Python object for each.
     """
-    
-    cdef Refract_Sph* c_data
-    
-    def __cinit__(self, double[:] centre not None, double R, double start, double end,
-                  double n_in=1.0, double n_out=1.0):
+
+    cdef comp_list c_comps
+    cdef readonly object component_type
+    cdef tuple _args  # Arrays passed to many(), used to fingerprint components
+
+    def __cinit__(self, component_type):
         """
-        Creates an instance of PyRefract_Sph.
+        Creates an empty instance of PyComponent_Array. Use the many() static
+        methods of the components instead.
 
         Parameters
         ----------
-        centre : numpy.ndarray
-            The centre of the circular arc. It should be a numpy.ndarray with
-            shape (2,).
-        R : double
-            The radius of the arc.
-        start : double
-            The start angle of the arc, in radians. It is measured 
-            anti-clockwise from the x axis. Must be less than end.
-        end : double
-            The end angle of the arc, in radians. It is measured anti-clockwise 
-            from the x axis. Must be greater than start.
-        n_in : double, optional
-            The refractive index for r < R. The default is 1.0.
-        n_out : double, optional
-            The refractive index for r > R. The default is 1.0.
+        component_type : type
+            The class of the components, e.g. PyMirror_Plane.
 
         Returns
         -------
         None.
 
         """
-        
-        if tuple(centre.shape) != _arr_shape:
-            raise wrong_np_shape_except("centre", centre)
 
-        if R <= 0.0:
-            raise ValueError("R cannot be less than or equal to zero")
-        
-        self.c_data = new Refract_Sph(make_arr_from_numpy(centre), R, start, 
-                                     end, n_out, n_in)
-        
-        self._load_Sph(<Spherical*>self.c_data)
-                
-    @property
-    def n_in(self):
-        """
-        The refractive index "inside" the arc where r < R.
+        self.component_type = component_type
 
-        Returns
-        -------
-        double
-            The refractive index n_in.
+    def __len__(self):
+        """Returns the number of components"""
 
-        """
-        
-        return dereference(self.c_data).n2
-    @n_in.setter
-    def n_in(self, double n_in):
-        if n_in <= 0.0:
-            raise ValueError("n_in cannot be less than or equal to zero")
+        return self.c_comps.size()
 
-        dereference(self.c_data).n2 = n_in
-    
-    @property
-    def n_out(self):
+    def plot(self, n_points=100):
         """
-        The refractive index "outside" the arc where r > R.
+        Returns a numpy array that can be used to plot the components.
+
+        Parameters
+        ----------
+        n_points : int, optional
+            The number of points per arc, ignored for planes. The default is 
+            100.
 
         Returns
         -------
-        double
-            The refractive index n_out.
+        points : numpy.ndarray
+            A numpy array with shape (N, 2, 2) for planes or (N, n_points, 2)
+            for arcs. Element i gives the points of component i as returned by
+            its plot() method.
 
         """
-        
-        return dereference(self.c_data).n1
-    @n_out.setter
-    def n_out(self, double n_out):
-        if n_out <= 0.0:
-            raise ValueError("n_out cannot be less than or equal to zero")
 
-        dereference(self.c_data).n1 = n_out
-    
+        cdef Py_ssize_t i
+        cdef Py_ssize_t N = self.c_comps.size()
+        cdef Plane* pln_ptr
+        cdef Spherical* sph_ptr
+        cdef arr start, end
 
+        if issubclass(self.component_type, _PyPlane):
+            points = np.empty((N, 2, 2), dtype=np.double)
 
-# Complex component
+            for i in range(N):
+                pln_ptr = <Plane*>self.c_comps[i].get()
+                start, end = pln_ptr.get_start(), pln_ptr.get_end()
 
-cdef class PyComplex_Component(_PyComponent):
-    """
-    A class to represent a complex component. Mirrors C++ class 
-    Complex_Component.
-    """
-    
-    cdef Complex_Component* c_data
-    
-    def __cinit__(self, list comps):
-        """
-        Creates an instance of PyComplex_Component.
+                points[i, 0, 0], points[i, 0, 1] = start[0], start[1]
+                points[i, 1, 0], points[i, 1, 1] = end[0], end[1]
 
-        Parameters
-        ----------
-        comps : list 
-            The list of components which describe the complex component. They
-            should be one of the following: PyMirror_Plane, PyRefract_Plane,
-            PyScreen_Plane, PyMirror_Sph, PyRefract_Sph or inherit from 
-            PyCC_Wrap.
+            return points
 
-        Returns
-        -------
-        None.
+        points = np.empty((N, n_points, 2), dtype=np.double)
 
-        """
-        
-        self.c_data = new Complex_Component()
-        self.c_component_ptr = shared_ptr[Component]( <Component*>self.c_data )
-        
-        cdef Component* comp_ptr
-        cdef shared_ptr[Component] comp_shared_ptr
-                
-        for c in comps:
-            if isinstance(c, PyMirror_Plane):
-                comp_shared_ptr = ( <PyMirror_Plane>c ).c_component_ptr
-                
-            elif isinstance(c, PyRefract_Plane):
-                comp_shared_ptr = ( <PyRefract_Plane>c ).c_component_ptr
-                
-            elif isinstance(c, PyMirror_Sph):
-                comp_shared_ptr = ( <PyMirror_Sph>c ).c_component_ptr
-                
-            elif isinstance(c, PyRefract_Sph):
-                comp_shared_ptr = ( <PyRefract_Sph>c ).c_component_ptr
-                
-                # isinstance() covers PyCC_Wrap and anything that inherits from
-                # it
-            elif isinstance(c, PyCC_Wrap):
-                comp_shared_ptr = ( <PyComplex_Component?>( c.PyCC )).c_component_ptr
-            
-            dereference(self.c_data).comps.push_back(comp_shared_ptr)   
+        for i in range(N):
+            sph_ptr = <Spherical*>self.c_comps[i].get()
+            t = np.linspace(sph_ptr.get_start(), sph_ptr.get_end(), n_points)
+
+            points[i, :, 0] = sph_ptr.centre[0] + sph_ptr.R * np.cos(t)
+            points[i, :, 1] = sph_ptr.centre[1] + sph_ptr.R * np.sin(t)
+
+        return points
 
 # class PyCCWrap
 
@@ -1053,7 +7447,7 @@ class PyCC_Wrap:
     
     """
     
-    def __init__(self, ls):
+    def __init__(self, ls, lens=False):
         """
         Creates an instance of PyCC_Wrap.
 
@@ -1062,8 +7456,13 @@ class PyCC_Wrap:
         ls : list
             The list of components which describe the complex component. They
             should be one of the following: PyMirror_Plane, PyRefract_Plane,
-            PyScreen_Plane, PyMirror_Sph, PyRefract_Sph or inherit from 
-            PyCC_Wrap.
+            PyScreen_Plane, PyMirror_Sph, PyRefract_Sph, PyMirror_Asph,
+            PyRefract_Asph, PyMirror_Polyline, PyRefract_Polyline, 
+            PyScreen_Polyline, PyMirror_Bezier, PyRefract_Bezier, 
+            PyComponent_Array or inherit from PyCC_Wrap.
+        lens : bool, optional
+            Whether ls describes a lens, see PyComplex_Component. The default
+            is False.
 
         Returns
         -------
@@ -1076,7 +7475,7 @@ class PyCC_Wrap:
         # Originally created PyCC_Wrap so could easily store components and the
         # not having a valid python object when __cinit__() is called, not 
         # sure this is necessary anymore
-        self.PyCC = PyComplex_Component(self._components)
+        self.PyCC = PyComplex_Component(self._components, lens=lens)
         
     def __getitem__(self, key):
         """
@@ -1095,6 +7494,72 @@ class PyCC_Wrap:
         """
         
         return self._components[key]
+
+    def instance(self, offset=None, angle=None):
+        """
+        Creates a copy of the complex component sharing its sub-components,
+        placed in the scene by its own offset and angle. Changing a 
+        sub-component, e.g. through a property of the copy, changes every 
+        instance of it. Many instances use far less memory than as many 
+        complex components.
+
+        Parameters
+        ----------
+        offset : numpy.ndarray or None, optional
+            A numpy array with shape (2,) giving the offset of the instance. If
+            None the offset of this component is used. The default is None.
+        angle : double or None, optional
+            The angle of the instance. If None the angle of this component is
+            used. The default is None.
+
+        Returns
+        -------
+        PyCC_Wrap
+            The new instance, of the same class as this component.
+
+        """
+
+        ans = copy.copy(self)
+        ans.PyCC = self.PyCC.instance(offset, angle)
+
+        return ans
+
+    @property
+    def offset(self):
+        """
+        The translation applied after rotating the sub-components by angle to
+        place them in the scene. Setting it moves the complex component 
+        without changing its sub-components. See PyComplex_Component.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy with shape (2,) of the offset.
+
+        """
+
+        return self.PyCC.offset
+    @offset.setter
+    def offset(self, offset):
+        self.PyCC.offset = offset
+
+    @property
+    def angle(self):
+        """
+        The angle in radians the sub-components are rotated by anti-clockwise
+        about the origin before being translated by offset.
+
+        Returns
+        -------
+        double
+            The angle of the component.
+
+        """
+
+        return self.PyCC.angle
+    @angle.setter
+    def angle(self, angle):
+        self.PyCC.angle = angle
     
     def plot(self, *args, **kwargs):
         """
@@ -1117,7 +7582,27 @@ class PyCC_Wrap:
 
         """
         
-        return [c.plot(*args, **kwargs) for c in self._components]
+        points = [c.plot(*args, **kwargs) for c in self._components]
+
+        if self.angle == 0.0 and not self.offset.any():
+            return points
+
+        return _transform_points(points, self.offset, self.angle)
+
+
+def _transform_points(points, offset, double angle):
+    """
+    Returns the points, a numpy array with a last axis of size 2 or a nested 
+    list of them, rotated anti-clockwise by angle then translated by offset.
+    """
+
+    if isinstance(points, list):
+        return [_transform_points(p, offset, angle) for p in points]
+
+    c, s = np.cos(angle), np.sin(angle)
+    x, y = points[..., 0], points[..., 1]
+
+    return np.stack([c * x - s * y + offset[0], s * x + c * y + offset[1]], axis=-1)
 
 
 # Pre defined Complex components
@@ -1157,13 +7642,14 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        self._lens_centre = lens_centre
-        self._R_lens = R_lens
-        self._R1 = R1
-        self._R2 = R2
-        self._d = d
-        self._n_in = n_in
-        self._n_out = n_out
+        # The sub-components are built around lens_centre and stay there, the lens
+        # is moved by its offset
+        self._local_centre = np.array(lens_centre, dtype=np.double)
+        self._lens_centre = self._local_centre.copy()
+
+        # The shape is held in one dict shared by every instance of the lens, as
+        # they share its sub-components
+        self._shape = dict(R_lens=R_lens, R1=R1, R2=R2, d=d, n_in=n_in, n_out=n_out)
 
         # left arc
         if -R_lens < R1 < R_lens:
@@ -1199,7 +7685,76 @@ class PyLens(PyCC_Wrap):
             self._top_plane,
         ]
 
-        super().__init__(comps)
+        super().__init__(comps, lens=True)
+
+    def _placed_centre(self):
+        """Returns the centre the offset and angle place the lens at"""
+        return _transform_points(self._local_centre, self.offset, self.angle)
+
+    def instance(self, offset=None, angle=None):
+        """
+        Creates a copy of the lens sharing its sub-components and shape, see 
+        PyCC_Wrap.instance(). Setting R1, R2, n_in or n_out of any instance 
+        changes every instance.
+
+        Parameters
+        ----------
+        offset : numpy.ndarray or None, optional
+            The offset of the instance, None for this lens' offset. The 
+            default is None.
+        angle : double or None, optional
+            The angle of the instance, None for this lens' angle. The default
+            is None.
+
+        Returns
+        -------
+        PyLens
+            The instance.
+
+        """
+
+        ans = super().instance(offset, angle)
+        ans._lens_centre = ans._placed_centre()
+
+        return ans
+
+    @property
+    def offset(self):
+        """
+        The translation applied after rotating the lens by angle, see 
+        PyCC_Wrap.offset. Setting lens_centre changes it.
+
+        Returns
+        -------
+        numpy.ndarray
+            A copy with shape (2,) of the offset.
+
+        """
+
+        return self.PyCC.offset
+    @offset.setter
+    def offset(self, offset):
+        self.PyCC.offset = offset
+        self._lens_centre = self._placed_centre()
+
+    @property
+    def angle(self):
+        """
+        The angle in radians the lens is rotated by anti-clockwise about the
+        origin before being translated by offset, see PyCC_Wrap.angle.
+
+        Returns
+        -------
+        double
+            The angle of the lens.
+
+        """
+
+        return self.PyCC.angle
+    @angle.setter
+    def angle(self, angle):
+        self.PyCC.angle = angle
+        self._lens_centre = self._placed_centre()
 
     def _comp_arc_centre(self, left, lens_centre, R_lens, R1, R2, d, n_in, n_out):
         """Returns the centre of the arc"""
@@ -1271,9 +7826,10 @@ class PyLens(PyCC_Wrap):
     @property
     def lens_centre(self):
         """
-        The centre of the lens. Note lens_centre cannot be modified by changing
-        the elements of the returned numpy.ndarray. Doing so will corrput te
-        PyLens instance.
+        The centre of the lens. Setting it moves the lens by changing its 
+        offset, leaving the sub-components unchanged. Note lens_centre cannot
+        be modified by changing the elements of the returned numpy.ndarray. 
+        Doing so will corrput te PyLens instance.
 
         Returns
         -------
@@ -1286,20 +7842,11 @@ class PyLens(PyCC_Wrap):
     @lens_centre.setter
     def lens_centre(self, new_centre):
         """Setter for lens_centre"""
-        diff = new_centre - self._lens_centre
-
-        self._lens_centre += diff
-
-        # arcs
-        self._left_arc.centre += diff
-        self._right_arc.centre += diff
-
-        # planes
-        self._top_plane.start = self._top_plane.start + diff
-        self._top_plane.end = self._top_plane.end + diff
+        new_centre = np.array(new_centre, dtype=np.double)
 
-        self._bottom_plane.start = self._bottom_plane.start + diff
-        self._bottom_plane.end = self._bottom_plane.end + diff
+        self.PyCC.offset = new_centre - _transform_points(self._local_centre, np.zeros(2), 
+                                                          self.angle)
+        self._lens_centre = new_centre
 
     @property
     def R_lens(self):
@@ -1313,7 +7860,7 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        return self._R_lens
+        return self._shape['R_lens']
 
     @property
     def R1(self):
@@ -1328,7 +7875,7 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        return self._R1
+        return self._shape['R1']
     @R1.setter
     def R1(self, new_R1):
 
@@ -1336,10 +7883,11 @@ class PyLens(PyCC_Wrap):
             raise ValueError(f"R1 = {new_R1} is invalid")
 
         # Need to update R1 first as things like centre will also change
-        self._R1 = new_R1
+        self._shape['R1'] = new_R1
 
         p = self.get_current_params()
         p['left'] = True
+        p['lens_centre'] = self._local_centre
 
         l_p = self._create_arc_param(**p)
 
@@ -1361,7 +7909,7 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        return self._R2
+        return self._shape['R2']
     @R2.setter
     def R2(self, new_R2):
 
@@ -1369,17 +7917,18 @@ class PyLens(PyCC_Wrap):
             raise ValueError(f"R1 = {new_R2} is invalid")
 
         # Need to update R1 first as things like centre will also change
-        self._R2 = new_R2
+        self._shape['R2'] = new_R2
 
         p = self.get_current_params()
         p['left'] = False
+        p['lens_centre'] = self._local_centre
 
         r_p = self._create_arc_param(**p)
 
         # Need to update arc centre, R and start/end
-        self._left_arc.centre = r_p['centre']
-        self._left_arc.R = r_p['R']
-        self._left_arc.update_start_end(r_p['start'], r_p['end'])
+        self._right_arc.centre = r_p['centre']
+        self._right_arc.R = r_p['R']
+        self._right_arc.update_start_end(r_p['start'], r_p['end'])
 
     @property
     def d(self):
@@ -1395,7 +7944,7 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        return self._d
+        return self._shape['d']
 
     @property
     def n_in(self):
@@ -1409,12 +7958,12 @@ class PyLens(PyCC_Wrap):
 
         """
 
-        return self._n_in
+        return self._shape['n_in']
     @n_in.setter
     def n_in(self, new_n_in):
         """Setter for property n_in"""
 
-        self._n_in = new_n_in
+        self._shape['n_in'] = new_n_in
 
         p = self.get_current_params()
 
@@ -1448,12 +7997,12 @@ class PyLens(PyCC_Wrap):
 
         """
         
-        return self._n_out
+        return self._shape['n_out']
     @n_out.setter
     def n_out(self, new_n_out):
         """Setter for property n_out"""
 
-        self._n_out = new_n_out
+        self._shape['n_out'] = new_n_out
 
         p = self.get_current_params()
 